@@ -1,5 +1,6 @@
 # authentication/device_models.py
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
@@ -82,6 +83,12 @@ class UserDevice(models.Model):
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['device_id']),
             models.Index(fields=['last_seen']),
+            # Push recipients: current, active device with a token (authentication/device_registry.py)
+            models.Index(
+                fields=['user', '-last_seen'], name='user_device_push_idx',
+                condition=Q(is_active=True, is_current_device=True) & ~Q(fcm_token=''),
+            ),
+            models.Index(fields=['fcm_token'], name='user_device_fcm_token_idx', condition=~Q(fcm_token='')),
         ]
     
     def __str__(self):
@@ -0,0 +1,167 @@
+"""
+Device Registry Maintenance
+
+Push recipient resolution and FCM token hygiene for UserDevice.
+
+    push_devices(user_ids)        one query over the partial index on
+                                  "current, active device with a token"
+    invalid_token_batch()         FCM reports UNREGISTERED / invalid tokens
+                                  into the active batch (see fcm_api.FCM);
+                                  they are cleared with one UPDATE on exit
+    compact_devices(stale_days)   periodic job: deactivate devices not seen
+                                  for N days and collapse duplicates
+
+Usage:
+    with invalid_token_batch():
+        for device in push_devices([user.id]):
+            fcm.send_notification(device.fcm_token, ...)
+"""
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .device_models import UserDevice
+
+logger = logging.getLogger(__name__)
+
+# Matches the partial index condition on UserDevice
+PUSHABLE = Q(is_active=True, is_current_device=True) & ~Q(fcm_token='')
+
+_pending_tokens = ContextVar('pending_invalid_tokens', default=None)
+
+
+def push_devices(user_ids, fallback_to_active=False):
+    """
+    Devices to push to for ``user_ids``, most recently seen first.
+
+    With ``fallback_to_active``, users without a current device fall back to
+    any active device with a token (one extra query, only for those users).
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return []
+    devices = list(
+        UserDevice.objects.filter(PUSHABLE, user_id__in=user_ids)
+        .select_related('user').order_by('user_id', '-last_seen')
+    )
+    if fallback_to_active:
+        missing = user_ids - {device.user_id for device in devices}
+        if missing:
+            devices += list(
+                UserDevice.objects.filter(user_id__in=missing, is_active=True)
+                .exclude(fcm_token='').select_related('user').order_by('user_id', '-last_seen')
+            )
+    return devices
+
+
+def is_invalid_token_error(status_code, response):
+    """True if an FCM v1 error response means the token itself is dead"""
+    if status_code == 200 or not isinstance(response, dict):
+        return False
+    error = response.get('error') or {}
+    codes = {error.get('status')}
+    token_field = False
+    for detail in error.get('details') or []:
+        codes.add(detail.get('errorCode'))
+        for violation in detail.get('fieldViolations') or []:
+            token_field = token_field or violation.get('field') == 'message.token'
+    if 'UNREGISTERED' in codes:
+        return True
+    # INVALID_ARGUMENT is also raised for bad payloads; only trust it for the token
+    if 'INVALID_ARGUMENT' in codes:
+        return token_field or 'registration token' in (error.get('message') or '').lower()
+    return False
+
+
+def report_invalid_token(token):
+    """Queue a dead token for the active batch, or clear it right away"""
+    if not token:
+        return
+    pending = _pending_tokens.get()
+    if pending is None:
+        clear_tokens([token])
+    else:
+        pending.add(token)
+
+
+def clear_tokens(tokens):
+    """Blank the given FCM tokens on every device holding them (one UPDATE)"""
+    tokens = [token for token in set(tokens) if token]
+    if not tokens:
+        return 0
+    cleared = UserDevice.objects.filter(fcm_token__in=tokens).update(fcm_token='', updated_at=timezone.now())
+    if cleared:
+        logger.info(f"🧹 Cleared {len(tokens)} invalid FCM token(s) from {cleared} device(s)")
+    return cleared
+
+
+@contextmanager
+def invalid_token_batch():
+    """Collect invalid tokens reported while sending; clear them in bulk on exit"""
+    if _pending_tokens.get() is not None:
+        yield  # nested: the outer batch flushes
+        return
+    pending = set()
+    reset = _pending_tokens.set(pending)
+    try:
+        yield pending
+    finally:
+        _pending_tokens.reset(reset)
+        try:
+            clear_tokens(pending)
+        except Exception as e:
+            logger.error(f"❌ Failed to clear invalid FCM tokens: {e}")
+
+
+def _duplicate_ids(partition_by, queryset):
+    """
+    Subquery of the ids of every row but the most recently seen one in each
+    partition (the rank filter runs in SQL, so no rows are loaded)
+    """
+    return queryset.annotate(
+        rank=Window(RowNumber(), partition_by=partition_by, order_by=[F('last_seen').desc(), F('id').desc()])
+    ).filter(rank__gt=1).values('id')
+
+
+def compact_devices(stale_days=None):
+    """
+    Device registry maintenance:
+
+    - deactivate devices not seen for ``stale_days`` (DEVICE_STALE_DAYS)
+    - keep one holder per FCM token (a reinstall re-registers the same token
+      under a new device id); older holders lose the token
+    - keep one current device per user
+
+    Returns:
+        dict: rows changed per step
+    """
+    stale_days = stale_days if stale_days is not None else getattr(settings, 'DEVICE_STALE_DAYS', 90)
+    now = timezone.now()
+    cutoff = now - timedelta(days=stale_days)
+
+    stale = UserDevice.objects.filter(is_active=True, last_seen__lt=cutoff).update(
+        is_active=False, is_current_device=False, fcm_token='', updated_at=now
+    )
+
+    shared_token_ids = _duplicate_ids(
+        [F('fcm_token')], UserDevice.objects.exclude(fcm_token='')
+    )
+    shared_tokens = UserDevice.objects.filter(id__in=shared_token_ids).update(
+        fcm_token='', is_current_device=False, updated_at=now
+    )
+
+    extra_current_ids = _duplicate_ids(
+        [F('user_id')], UserDevice.objects.filter(is_current_device=True)
+    )
+    extra_current = UserDevice.objects.filter(id__in=extra_current_ids).update(
+        is_current_device=False, updated_at=now
+    )
+
+    return {'stale': stale, 'shared_tokens': shared_tokens, 'extra_current': extra_current}
@@ -4,13 +4,15 @@ Email helpers for authentication flows.
 import logging
 
 from django.conf import settings
-from django.core.mail import send_mail
+
+from notification.email_outbox import enqueue_email
+from notification.models import OutboundEmail
 
 logger = logging.getLogger(__name__)
 
 
 def send_password_reset_otp_email(email: str, otp: str, ttl_minutes: int = 15) -> bool:
-    """Send password-reset OTP email. Returns True if send_mail succeeded."""
+    """Queue password-reset OTP email on the OTP lane. Returns True if it was queued."""
     subject = 'POLA Password Reset Code'
     message = (
         'You requested a password reset for your POLA account.\n\n'
@@ -21,17 +23,17 @@ def send_password_reset_otp_email(email: str, otp: str, ttl_minutes: int = 15) -
     from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@pola.co.tz')
 
     try:
-        send_mail(
+        enqueue_email(
+            to_email=email,
             subject=subject,
-            message=message,
+            body=message,
             from_email=from_email,
-            recipient_list=[email],
-            fail_silently=False,
+            priority=OutboundEmail.PRIORITY_OTP,
         )
-        logger.info('Password reset OTP email sent to %s', email)
+        logger.info('Password reset OTP email queued for %s', email)
         return True
     except Exception:
-        logger.exception('Failed to send password reset OTP email to %s', email)
+        logger.exception('Failed to queue password reset OTP email to %s', email)
         # Still log OTP in DEBUG so local testing works without SMTP
         if settings.DEBUG:
             logger.warning('DEBUG password reset OTP for %s: %s', email, otp)
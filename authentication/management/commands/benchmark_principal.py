@@ -0,0 +1,101 @@
+"""
+Management command to benchmark per-request user resolution
+Usage: python manage.py benchmark_principal --requests 500
+
+Compares the old flow (SecurityTrackingMiddleware and DRF each running stock
+JWTAuthentication, then permissions lazily loading user_role, verification
+and subscription) with the shared, cached PrincipalJWTAuthentication.
+Runs inside a transaction that is rolled back, so nothing is written.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import PolaUser
+from authentication.principal import PrincipalJWTAuthentication, principal_cache_key
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _touch_permission_relations(user):
+    """What hub/subscription permission checks read on a typical request"""
+    getattr(user.user_role, 'role_name', None)
+    for relation in ('verification', 'subscription'):
+        try:
+            getattr(user, relation)
+        except Exception:
+            pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark queries and latency of authenticating one request (old double JWT load vs cached principal)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Simulated requests per mode')
+        parser.add_argument('--email', type=str, help='Benchmark an existing user instead of a throwaway one')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        if options['email']:
+            user = PolaUser.objects.get(email=options['email'])
+        else:
+            user = PolaUser.objects.create_user(
+                email='principal-benchmark@example.com', password='unused',
+                first_name='Bench', last_name='Mark', agreed_to_Terms=True
+            )
+        token = str(AccessToken.for_user(user))
+        factory = RequestFactory()
+        total = options['requests']
+
+        def legacy():
+            http_request = factory.get('/api/v1/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            JWTAuthentication().authenticate(http_request)  # middleware
+            drf_user, _ = JWTAuthentication().authenticate(Request(http_request))  # DRF
+            _touch_permission_relations(drf_user)
+
+        def principal():
+            http_request = factory.get('/api/v1/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            PrincipalJWTAuthentication().authenticate(http_request)  # middleware
+            drf_user, _ = PrincipalJWTAuthentication().authenticate(Request(http_request))  # DRF (memoised)
+            _touch_permission_relations(drf_user)
+
+        cache.delete(principal_cache_key(user.pk))
+        self.stdout.write(f'🔄 Benchmarking {total} authenticated requests for user {user.pk}...')
+        results = [('before (double JWT load)', *self._measure(legacy, total)),
+                   ('after (shared principal)', *self._measure(principal, total))]
+
+        for label, queries, elapsed in results:
+            self.stdout.write(
+                f'  {label:<26} {queries / total:5.2f} queries/request   {elapsed / total * 1000:7.3f} ms/request'
+            )
+        before, after = results[0], results[1]
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {before[1] - after[1]} fewer queries over {total} requests '
+            f'({before[2] / after[2] if after[2] else 0:.1f}x faster auth path)'
+        ))
+
+    def _measure(self, func, total):
+        func()  # warm caches and token parsing
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            for _ in range(total):
+                func()
+            elapsed = time.perf_counter() - started
+        return len(ctx.captured_queries), elapsed
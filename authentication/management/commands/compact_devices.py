@@ -0,0 +1,54 @@
+"""
+Management command for device registry maintenance
+Usage: python manage.py compact_devices [--stale-days 90] [--interval 86400]
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from authentication.device_registry import compact_devices
+
+
+class Command(BaseCommand):
+    help = 'Deactivate devices not seen recently and collapse duplicate FCM tokens / current devices'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-days',
+            type=int,
+            default=None,
+            help='Deactivate devices not seen for this many days (default: DEVICE_STALE_DAYS)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repeat every N seconds as a long-lived worker (0 = run once)',
+        )
+
+    def handle(self, *args, **options):
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while True:
+            self.stdout.write('🔄 Compacting device registry...')
+            changed = compact_devices(options['stale_days'])
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Devices compacted: stale={changed["stale"]} '
+                f'shared_tokens={changed["shared_tokens"]} extra_current={changed["extra_current"]}'
+            ))
+            if not options['interval']:
+                break
+            deadline = time.monotonic() + options['interval']
+            while self._running and time.monotonic() < deadline:
+                time.sleep(1)
+            if not self._running:
+                break
+            close_old_connections()
+
+    def _stop(self, signum, frame):
+        self._running = False
@@ -0,0 +1,24 @@
+"""
+Management command to rebuild the verification review queue
+Usage: python manage.py rebuild_review_queue
+"""
+
+from django.core.management.base import BaseCommand
+from authentication.review_queue import rebuild_review_queue
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the verification review queue from documents and verification records (run once after deploying the queue)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert',
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Rebuilding verification review queue...')
+        total = rebuild_review_queue(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Review queue rebuilt: {total} users'))
@@ -1,10 +1,10 @@
 from django.http import JsonResponse
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
-from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework.exceptions import AuthenticationFailed
 
 from .device_models import UserDevice, UserSession, LoginHistory
+from .principal import PrincipalJWTAuthentication
 from .device_utils import (
     get_client_ip,
     parse_user_agent,
@@ -47,32 +47,34 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
         """Process incoming request to track security information."""
 
         # Skip tracking for non-authenticated requests
+        principal = None
         if not hasattr(request, 'user') or not request.user.is_authenticated:
-            # Try to authenticate using JWT
+            # Try to authenticate using JWT (memoised on the request, DRF reuses it)
             try:
-                jwt_auth = JWTAuthentication()
-                auth_result = jwt_auth.authenticate(request)
+                auth_result = PrincipalJWTAuthentication().authenticate(request)
                 if auth_result:
                     request.user, request.auth = auth_result
+                    principal = request.principal
                 else:
                     return None
             except (AuthenticationFailed, Exception):
                 return None
 
-        # Get user
+        # Get user (JWT users stay lazy; tracking only needs the id)
         user = request.user
-        if not user.is_authenticated:
+        if principal is None and not user.is_authenticated:
             return None
+        user_id = principal.id if principal is not None else user.pk
 
         # Single-device enforcement via X-Device-Id (Flutter UUID)
-        blocked = self._enforce_current_device(request, user)
+        blocked = self._enforce_current_device(request, user_id)
         if blocked is not None:
             return blocked
 
         # Update user online status FIRST (regardless of device registration)
         try:
             online_status, created = UserOnlineStatus.objects.get_or_create(
-                user=user
+                user_id=user_id
             )
 
             # Update last heartbeat
@@ -89,7 +91,7 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
             # Don't break the request if online status tracking fails
             import logging
             logger = logging.getLogger(__name__)
-            logger.error(f"Error updating online status for user {user.id}: {e}")
+            logger.error(f"Error updating online status for user {user_id}: {e}")
 
         # Wrap everything in try-except to prevent errors from blocking requests
         try:
@@ -110,7 +112,7 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
             device = None
             if header_device_id:
                 device = UserDevice.objects.filter(
-                    user=user,
+                    user_id=user_id,
                     device_id=header_device_id,
                     is_active=True,
                 ).first()
@@ -118,7 +120,7 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
             # Fallback to fingerprint (legacy / admin clients)
             if not device:
                 device = UserDevice.objects.filter(
-                    user=user,
+                    user_id=user_id,
                     device_id=device_fingerprint,
                     is_active=True,
                 ).first()
@@ -136,7 +138,7 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
             device.mark_as_seen(ip_address)
 
             # Get or create session (use device_id + user as session key)
-            session_key = f"{user.id}_{device.device_id}"
+            session_key = f"{user_id}_{device.device_id}"
 
             # Try to get existing session
             session = UserSession.objects.filter(
@@ -154,7 +156,7 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
             if session is None and device.is_current_device:
                 # Create new session
                 session = UserSession.objects.create(
-                    user=user,
+                    user_id=user_id,
                     device=device,
                     session_key=session_key,
                     status='active',
@@ -216,7 +218,7 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
 
         return None
 
-    def _enforce_current_device(self, request, user):
+    def _enforce_current_device(self, request, user_id):
         """Return 401 JsonResponse if this device was replaced; else None."""
         path = request.path or ''
         if any(path.endswith(s) or s in path for s in _DEVICE_ENFORCEMENT_EXEMPT_SUFFIXES):
@@ -231,7 +233,7 @@ class SecurityTrackingMiddleware(MiddlewareMixin):
             return None
 
         device = UserDevice.objects.filter(
-            user=user,
+            user_id=user_id,
             device_id=device_id,
             is_active=True,
         ).first()
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of review_queue's role rules as of this migration
+AUTO_VERIFY_ROLES = ['citizen', 'law_student', 'lecturer']
+REQUIRED_DOCUMENTS = {
+    'advocate': ['roll_number_cert', 'practice_license'],
+    'lawyer': ['professional_cert', 'employment_letter'],
+    'paralegal': ['professional_cert', 'employment_letter'],
+    'law_firm': ['business_license', 'registration_cert'],
+}
+
+
+def backfill_review_queue(apps, schema_editor):
+    """Queue rows for users who already have documents or a verification record"""
+    Document = apps.get_model('authentication', 'Document')
+    PolaUser = apps.get_model('authentication', 'PolaUser')
+    VerificationReviewQueue = apps.get_model('authentication', 'VerificationReviewQueue')
+
+    docs = {}
+    rows = (
+        Document.objects.values('user_id', 'document_type')
+        .annotate(
+            total=models.Count('id'),
+            pending=models.Count('id', filter=models.Q(verification_status='pending')),
+            verified=models.Count('id', filter=models.Q(verification_status='verified')),
+        )
+        .order_by()
+    )
+    for row in rows:
+        entry = docs.setdefault(row['user_id'], {'types': set(), 'total': 0, 'pending': 0, 'verified': 0})
+        entry['types'].add(row['document_type'])
+        entry['total'] += row['total']
+        entry['pending'] += row['pending']
+        entry['verified'] += row['verified']
+
+    now = django.utils.timezone.now()
+    entries = []
+    users = PolaUser.objects.values_list('id', 'user_role__role_name', 'verification__status')
+    for user_id, role_name, verification_status in users.iterator():
+        if user_id not in docs and verification_status is None:
+            continue
+        user_docs = docs.get(user_id) or {'types': set(), 'total': 0, 'pending': 0, 'verified': 0}
+        required = [] if role_name in AUTO_VERIFY_ROLES else REQUIRED_DOCUMENTS.get(role_name, [])
+        missing = [doc for doc in required if doc not in user_docs['types']]
+        entries.append(VerificationReviewQueue(
+            user_id=user_id,
+            role_name=role_name,
+            verification_status=verification_status,
+            missing_documents=missing,
+            documents_count=user_docs['total'],
+            pending_documents=user_docs['pending'],
+            verified_documents=user_docs['verified'],
+            ready_for_review=verification_status == 'pending' and user_docs['total'] > 0 and not missing,
+            last_change=now,
+        ))
+    VerificationReviewQueue.objects.bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0004_merge_20260803'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationReviewQueue',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='review_queue_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('role_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('verification_status', models.CharField(blank=True, max_length=20, null=True)),
+                ('missing_documents', models.JSONField(blank=True, default=list)),
+                ('documents_count', models.PositiveIntegerField(default=0)),
+                ('pending_documents', models.PositiveIntegerField(default=0)),
+                ('verified_documents', models.PositiveIntegerField(default=0)),
+                ('ready_for_review', models.BooleanField(default=False, help_text='Verification pending and every required document uploaded')),
+                ('last_change', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'verification review queue entry',
+                'verbose_name_plural': 'verification review queue',
+                'indexes': [models.Index(fields=['ready_for_review', '-last_change'], name='review_queue_ready_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_review_queue, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_verification_review_queue'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userdevice',
+            index=models.Index(condition=models.Q(('is_active', True), ('is_current_device', True), models.Q(('fcm_token', ''), _negated=True)), fields=['user', '-last_seen'], name='user_device_push_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userdevice',
+            index=models.Index(condition=models.Q(('fcm_token', ''), _negated=True), fields=['fcm_token'], name='user_device_fcm_token_idx'),
+        ),
+    ]
@@ -459,6 +459,43 @@ class Document(models.Model):
         return self.verification_status == 'verified'
 
 
+class VerificationReviewQueue(models.Model):
+    """
+    Per-user verification review state, kept in step with documents and
+    verification status by authentication/review_queue.py.
+
+    Lets the admin review list page through an index instead of loading every
+    pending user's documents.
+    """
+    user = models.OneToOneField(
+        'PolaUser',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='review_queue_entry'
+    )
+    role_name = models.CharField(max_length=255, null=True, blank=True)
+    verification_status = models.CharField(max_length=20, null=True, blank=True)
+    missing_documents = models.JSONField(default=list, blank=True)
+    documents_count = models.PositiveIntegerField(default=0)
+    pending_documents = models.PositiveIntegerField(default=0)
+    verified_documents = models.PositiveIntegerField(default=0)
+    ready_for_review = models.BooleanField(
+        default=False,
+        help_text=_("Verification pending and every required document uploaded")
+    )
+    last_change = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = _("verification review queue entry")
+        verbose_name_plural = _("verification review queue")
+        indexes = [
+            models.Index(fields=['ready_for_review', '-last_change'], name='review_queue_ready_idx'),
+        ]
+
+    def __str__(self):
+        return f"Review queue entry for {self.user_id}"
+
+
 
 class PolaUser(AbstractUser):
 
@@ -777,11 +814,8 @@ class PolaUser(AbstractUser):
         Get set of material IDs this user has purchased
         Used to check: if material.id in user.purchased_material_ids
         """
-        from subscriptions.models import MaterialPurchase
-        return set(
-            MaterialPurchase.objects.filter(buyer=self)
-            .values_list('material_id', flat=True)
-        )
+        from subscriptions.entitlements import MATERIAL, entitled_ids
+        return entitled_ids(self, MATERIAL)
     
     @property
     def purchased_document_ids(self):
@@ -789,83 +823,26 @@ class PolaUser(AbstractUser):
         Get set of document IDs this user has purchased (paid generated documents)
         Used to check: if document.id in user.purchased_document_ids
         """
-        from document_templates.models import UserDocument
-        return set(
-            UserDocument.objects.filter(user=self, is_paid=True)
-            .values_list('id', flat=True)
-        )
+        from subscriptions.entitlements import DOCUMENT, entitled_ids
+        return entitled_ids(self, DOCUMENT)
     
     def has_purchased_material(self, material_id):
         """Check if user purchased a specific material"""
-        return material_id in self.purchased_material_ids
+        from subscriptions.entitlements import MATERIAL, has_entitlement
+        return has_entitlement(self, MATERIAL, material_id)
     
     def has_purchased_document(self, document_id):
         """Check if user purchased a specific document"""
-        return document_id in self.purchased_document_ids
+        from subscriptions.entitlements import DOCUMENT, has_entitlement
+        return has_entitlement(self, DOCUMENT, document_id)
     
     def get_purchase_summary(self):
         """
         Get summary of user's purchases for profile display
-        Returns recent purchases and totals
+        Returns recent purchases and totals (from the entitlement ledger)
         """
-        from subscriptions.models import MaterialPurchase
-        from document_templates.models import UserDocument
-        from django.db.models import Sum, Count
-        
-        # Get material purchases
-        material_purchases = MaterialPurchase.objects.filter(buyer=self).select_related('material')
-        material_stats = material_purchases.aggregate(
-            total_count=Count('id'),
-            total_spent=Sum('amount_paid')
-        )
-        
-        # Get document purchases
-        document_purchases = UserDocument.objects.filter(
-            user=self, 
-            is_paid=True
-        ).select_related('template')
-        document_stats = document_purchases.aggregate(
-            total_count=Count('id'),
-            total_spent=Sum('payment_amount')
-        )
-        
-        # Get recent purchases (last 5 of each type)
-        recent_materials = material_purchases.order_by('-created_at')[:5]
-        recent_documents = document_purchases.order_by('-created_at')[:5]
-        
-        return {
-            'materials': {
-                'total_count': material_stats['total_count'] or 0,
-                'total_spent': float(material_stats['total_spent'] or 0),
-                'recent': [
-                    {
-                        'id': p.material.id,
-                        'title': p.material.title,
-                        'type': 'material',
-                        'price_paid': float(p.amount_paid),
-                        'purchased_at': p.created_at.isoformat(),
-                    }
-                    for p in recent_materials
-                ]
-            },
-            'documents': {
-                'total_count': document_stats['total_count'] or 0,
-                'total_spent': float(document_stats['total_spent'] or 0),
-                'recent': [
-                    {
-                        'id': d.id,
-                        'title': d.document_title or d.template.name,
-                        'template_name': d.template.name,
-                        'type': 'document',
-                        'price_paid': float(d.payment_amount),
-                        'purchased_at': d.created_at.isoformat(),
-                    }
-                    for d in recent_documents
-                ]
-            },
-            'total_purchases': (material_stats['total_count'] or 0) + (document_stats['total_count'] or 0),
-            'total_spent': float((material_stats['total_spent'] or 0) + (document_stats['total_spent'] or 0))
-        }
+        from subscriptions.entitlements import purchase_summary
+        return purchase_summary(self)
         
     def full_name (self):
         """Return the user's full name."""
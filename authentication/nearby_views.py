@@ -89,9 +89,8 @@ def nearby_legal_professionals(request):
         'operating_districts__district'
     )
     
-    logger.info(f"🔍 [NEARBY] User {request.user.email} searching with types={user_types}, radius={radius_km}km")
-    logger.info(f"🔍 [NEARBY] User location: {user_location}")
-    logger.info(f"🔍 [NEARBY] Found {legal_professionals.count()} professionals matching role filter")
+    logger.info("🔍 [NEARBY] User %s searching with types=%s, radius=%skm at %s",
+                request.user.id, user_types, radius_km, user_location)
     
     # Calculate distances and filter by radius
     results = []
@@ -114,7 +113,7 @@ def nearby_legal_professionals(request):
             ).first()
         
         if not device or not device.latitude or not device.longitude:
-            logger.info(f"🔍 [NEARBY] Skipping {professional.email} - no device location")
+            logger.debug("🔍 [NEARBY] Skipping %s - no device location", professional.id)
             continue
         
         professional_location = (float(device.latitude), float(device.longitude))
@@ -122,11 +121,9 @@ def nearby_legal_professionals(request):
         # Calculate distance
         distance_km = geodesic(user_location, professional_location).kilometers
         
-        logger.info(f"🔍 [NEARBY] {professional.email}: distance={distance_km:.2f}km (radius={radius_km}km)")
-        
         # Filter by radius
         if distance_km > radius_km:
-            logger.info(f"🔍 [NEARBY] Skipping {professional.email} - outside radius")
+            logger.debug("🔍 [NEARBY] Skipping %s - %.2fkm is outside radius", professional.id, distance_km)
             continue
         
         # Get contact info
@@ -217,15 +214,16 @@ def nearby_legal_professionals(request):
         # Only include if they have a consultant profile (so they can be called)
         if consultant_profile:
             results.append(result)
-            logger.info(f"✅ [NEARBY] Added {professional.email} (ConsultantProfile ID: {consultant_profile.id})")
+            logger.debug("✅ [NEARBY] Added %s (ConsultantProfile ID: %s)", professional.id, consultant_profile.id)
         else:
-            logger.info(f"⚠️ [NEARBY] Skipping {professional.email} - no ConsultantProfile")
+            logger.debug("⚠️ [NEARBY] Skipping %s - no ConsultantProfile", professional.id)
     
     # Sort by distance (nearest first)
     results.sort(key=lambda x: x['distance_km'])
     
     # Apply limit
     results = results[:limit]
+    logger.info("🔍 [NEARBY] Returning %s professionals within %skm", len(results), radius_km)
     
     return Response({
         'count': len(results),
@@ -37,9 +37,9 @@ class OTPService:
     @staticmethod
     def send_otp_via_email(email, otp):
         """
-        Send OTP via email
+        Send OTP via email (queued on the outbox OTP lane, never blocks on SMTP)
         """
-        logger.info(f"📧 Sending OTP to {email}")
+        logger.info(f"📧 Queueing OTP email to {email}")
         return EmailService.send_otp_email(email, otp, OTPService.OTP_EXPIRY_MINUTES)
     
     @classmethod
@@ -0,0 +1,173 @@
+"""
+Authenticated Principal
+
+Resolves the JWT user once per request and shares it between
+SecurityTrackingMiddleware and DRF (PrincipalJWTAuthentication is the default
+DRF authentication class).
+
+A compact snapshot of the user (role, staff flags, verification and
+subscription status) is cached per user id for PRINCIPAL_CACHE_TTL seconds
+and invalidated from signals whenever the user, their role, verification or
+subscription is saved. Invalidation has to reach every worker, so caching is
+only on by default with a shared cache (CACHE_URL). Token checks (exists, is_active) and middleware
+tracking only need the snapshot. ``request.user`` stays a real PolaUser,
+loaded lazily in one query together with user_role, verification and
+subscription so permission checks do not trigger further queries.
+
+    request.principal            -> PrincipalSnapshot
+    request.user                 -> PolaUser (lazy, loaded at most once)
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import PolaUser
+
+_UNSET = object()
+
+
+@dataclass(frozen=True)
+class PrincipalSnapshot:
+    id: int
+    is_active: bool
+    is_staff: bool
+    is_superuser: bool
+    role_name: Optional[str]
+    is_verified: bool
+    subscription_status: Optional[str]
+    subscription_plan_type: Optional[str]
+    subscription_version: Optional[float]
+
+    @property
+    def is_admin(self):
+        return self.is_staff or self.is_superuser
+
+
+def principal_cache_key(user_id):
+    return f'principal:{user_id}'
+
+
+def _cache_ttl():
+    return getattr(settings, 'PRINCIPAL_CACHE_TTL', 60)
+
+
+def _build_snapshot(user_id):
+    row = PolaUser.objects.filter(pk=user_id).values(
+        'id', 'is_active', 'is_staff', 'is_superuser', 'user_role__role_name',
+        'verification__status', 'subscription__status', 'subscription__plan__plan_type',
+        'subscription__updated_at',
+    ).first()
+    if row is None:
+        return None
+    updated_at = row['subscription__updated_at']
+    return {
+        'id': row['id'],
+        'is_active': row['is_active'],
+        'is_staff': row['is_staff'],
+        'is_superuser': row['is_superuser'],
+        'role_name': row['user_role__role_name'],
+        'is_verified': row['verification__status'] == 'verified',
+        'subscription_status': row['subscription__status'],
+        'subscription_plan_type': row['subscription__plan__plan_type'],
+        'subscription_version': updated_at.timestamp() if updated_at else None,
+    }
+
+
+def get_principal(user_id):
+    """Cached snapshot for a user id, or None if the user does not exist"""
+    ttl = _cache_ttl()
+    if ttl <= 0:
+        data = _build_snapshot(user_id)
+    else:
+        key = principal_cache_key(user_id)
+        data = cache.get(key)
+        if data is None:
+            data = _build_snapshot(user_id)
+            if data is not None:
+                cache.set(key, data, ttl)
+    return PrincipalSnapshot(**data) if data else None
+
+
+def invalidate_principal(*user_ids):
+    """Drop cached snapshots once the current transaction commits"""
+    keys = [principal_cache_key(user_id) for user_id in user_ids if user_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def load_user(user_id):
+    """The full PolaUser with the relations permission checks read"""
+    return PolaUser.objects.select_related(
+        'user_role', 'verification', 'subscription__plan'
+    ).get(pk=user_id)
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that runs once per request.
+
+    The result is memoised on the underlying HttpRequest, so the middleware
+    and DRF (which wraps the same HttpRequest) share one token validation and
+    one user.
+    """
+
+    def authenticate(self, request):
+        http_request = getattr(request, '_request', request)
+        cached = getattr(http_request, '_principal_auth', _UNSET)
+        if cached is not _UNSET:
+            return cached
+
+        self._principal = None
+        result = super().authenticate(request)
+        http_request._principal_auth = result
+        http_request.principal = self._principal
+        return result
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            # Needs the password hash, which the snapshot does not hold
+            user = super().get_user(validated_token)
+            self._principal = get_principal(user.pk)
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        principal = get_principal(user_id)
+        if principal is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not principal.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        self._principal = principal
+        return SimpleLazyObject(lambda: load_user(principal.id))
+
+
+def principal_from_header(header):
+    """
+    PrincipalSnapshot for an ``Authorization`` header value, or None.
+
+    For endpoints outside DRF (e.g. the event stream) that cannot use the
+    authentication class directly.
+    """
+    auth = PrincipalJWTAuthentication()
+    try:
+        raw_token = auth.get_raw_token(header.encode() if isinstance(header, str) else header)
+        if raw_token is None:
+            return None
+        auth._principal = None
+        auth.get_user(auth.get_validated_token(raw_token))
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return auth._principal
@@ -0,0 +1,119 @@
+"""
+Verification Review Queue
+
+Keeps one VerificationReviewQueue row per user with uploaded documents or a
+verification record: role, missing required documents, document counts by
+status, and whether the user is ready for admin review.
+
+Rows are refreshed from authentication/signals.py whenever a Document or
+Verification is saved or deleted, or a user's role changes. Each refresh is
+one grouped query plus an upsert. ``rebuild_review_queue`` rebuilds the whole
+table.
+"""
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Document, PolaUser, VerificationReviewQueue
+
+# Roles verified at registration; they never need documents
+AUTO_VERIFY_ROLES = ['citizen', 'law_student', 'lecturer']
+
+REQUIRED_DOCUMENTS = {
+    'advocate': ['roll_number_cert', 'practice_license'],
+    'lawyer': ['professional_cert', 'employment_letter'],
+    'paralegal': ['professional_cert', 'employment_letter'],
+    'law_firm': ['business_license', 'registration_cert'],
+}
+
+
+def required_documents(role_name):
+    """Required document types for a role"""
+    if role_name in AUTO_VERIFY_ROLES:
+        return []
+    return REQUIRED_DOCUMENTS.get(role_name, [])
+
+
+def _document_counts(user_ids=None):
+    """{user_id: {'types': set, 'total': n, 'pending': n, 'verified': n}} in one query"""
+    counts = {}
+    documents = Document.objects.all()
+    if user_ids is not None:
+        documents = documents.filter(user_id__in=user_ids)
+    rows = (
+        documents.values('user_id', 'document_type')
+        .annotate(
+            total=Count('id'),
+            pending=Count('id', filter=Q(verification_status='pending')),
+            verified=Count('id', filter=Q(verification_status='verified')),
+        )
+        .order_by()
+    )
+    for row in rows:
+        entry = counts.setdefault(row['user_id'], {'types': set(), 'total': 0, 'pending': 0, 'verified': 0})
+        entry['types'].add(row['document_type'])
+        entry['total'] += row['total']
+        entry['pending'] += row['pending']
+        entry['verified'] += row['verified']
+    return counts
+
+
+def _build_entry(user_id, role_name, verification_status, docs):
+    docs = docs or {'types': set(), 'total': 0, 'pending': 0, 'verified': 0}
+    missing = [doc for doc in required_documents(role_name) if doc not in docs['types']]
+    return VerificationReviewQueue(
+        user_id=user_id,
+        role_name=role_name,
+        verification_status=verification_status,
+        missing_documents=missing,
+        documents_count=docs['total'],
+        pending_documents=docs['pending'],
+        verified_documents=docs['verified'],
+        ready_for_review=verification_status == 'pending' and docs['total'] > 0 and not missing,
+        last_change=timezone.now(),
+    )
+
+
+def _users(user_ids=None):
+    users = PolaUser.objects.all()
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+    return users.values_list('id', 'user_role__role_name', 'verification__status')
+
+
+def refresh_review_entry(user_id):
+    """Recompute one user's queue row (no-op for users without documents or verification)"""
+    rows = list(_users([user_id]))
+    if not rows:
+        return None
+    _, role_name, verification_status = rows[0]
+    docs = _document_counts([user_id]).get(user_id)
+    if docs is None and verification_status is None:
+        VerificationReviewQueue.objects.filter(user_id=user_id).delete()
+        return None
+
+    entry = _build_entry(user_id, role_name, verification_status, docs)
+    VerificationReviewQueue.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            field.name: getattr(entry, field.name)
+            for field in VerificationReviewQueue._meta.concrete_fields
+            if field.name != 'user'
+        },
+    )
+    return entry
+
+
+def rebuild_review_queue(batch_size=1000):
+    """Rebuild every queue row from documents and verifications"""
+    docs = _document_counts()
+    entries = [
+        _build_entry(user_id, role_name, verification_status, docs.get(user_id))
+        for user_id, role_name, verification_status in _users()
+        if user_id in docs or verification_status is not None
+    ]
+    with transaction.atomic():
+        VerificationReviewQueue.objects.all().delete()
+        VerificationReviewQueue.objects.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
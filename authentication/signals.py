@@ -0,0 +1,55 @@
+"""
+Keep the verification review queue and cached principals in step with
+documents, verifications, roles and users
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Document, PolaUser, UserRole, Verification, VerificationReviewQueue
+from .principal import invalidate_principal
+from .review_queue import refresh_review_entry
+
+
+@receiver(post_save, sender=Document)
+@receiver(post_save, sender=Verification)
+def refresh_review_queue(sender, instance, **kwargs):
+    """Document upload/verify or verification status change"""
+    refresh_review_entry(instance.user_id)
+
+
+@receiver(post_delete, sender=Document)
+@receiver(post_delete, sender=Verification)
+def refresh_review_queue_on_delete(sender, instance, origin=None, **kwargs):
+    """Document or verification removed (skipped when the user itself is being deleted)"""
+    if isinstance(origin, PolaUser) or getattr(origin, 'model', None) is PolaUser:
+        return
+    refresh_review_entry(instance.user_id)
+
+
+@receiver(post_save, sender=PolaUser)
+def refresh_review_queue_on_role_change(sender, instance, created, update_fields=None, **kwargs):
+    """Role changes alter the required documents"""
+    if created or (update_fields is not None and 'user_role' not in update_fields):
+        return
+    role_name = instance.user_role.role_name if instance.user_role_id else None
+    if VerificationReviewQueue.objects.filter(user_id=instance.pk).exclude(role_name=role_name).exists():
+        refresh_review_entry(instance.pk)
+
+
+@receiver(post_save, sender=PolaUser)
+@receiver(post_delete, sender=PolaUser)
+def invalidate_user_principal(sender, instance, **kwargs):
+    invalidate_principal(instance.pk)
+
+
+@receiver(post_save, sender=Verification)
+@receiver(post_delete, sender=Verification)
+def invalidate_verification_principal(sender, instance, **kwargs):
+    invalidate_principal(instance.user_id)
+
+
+@receiver(post_save, sender=UserRole)
+@receiver(pre_delete, sender=UserRole)
+def invalidate_role_principals(sender, instance, **kwargs):
+    """Role renames/removals change every holder's snapshot"""
+    invalidate_principal(*PolaUser.objects.filter(user_role=instance).values_list('id', flat=True))
@@ -1,3 +1,271 @@
-from django.test import TestCase
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from notification.google_firebase_service.push_notification.fcm_api import FCM
+from notification.notification_service import NotificationService
+from utils.testing import create_test_admin, create_test_user
+from .device_models import UserDevice
+from .device_registry import compact_devices, push_devices
+from .models import Document, UserRole, Verification, VerificationReviewQueue
+from .principal import get_principal
+from .review_queue import rebuild_review_queue
+
+
+class VerificationReviewQueueTestCase(TestCase):
+    """Test suite for the admin verification dashboard and review queue"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.advocate_role, _ = UserRole.objects.get_or_create(role_name='advocate')
+        self.citizen_role, _ = UserRole.objects.get_or_create(role_name='citizen')
+        self.admin = create_test_admin('verify-admin@test.com', 'Admin', 'User')
+        self.advocates = [
+            create_test_user(f'advocate{i}@test.com', 'Adv', str(i), user_role=self.advocate_role)
+            for i in range(3)
+        ]
+        self.citizen = create_test_user('citizen@test.com', 'Cit', 'Izen', user_role=self.citizen_role)
+        for user in self.advocates + [self.citizen]:
+            Verification.objects.get_or_create(user=user)
+        citizen_verification = self.citizen.verification
+        citizen_verification.status = 'verified'
+        citizen_verification.save()
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _upload(self, user, document_type):
+        document = Document(user=user, document_type=document_type, title=document_type)
+        document.file.save(f'{document_type}.pdf', ContentFile(b'%PDF'), save=False)
+        document.save()
+        return document
+
+    def test_queue_follows_uploads_and_verification(self):
+        """Users enter the queue once every required document is uploaded"""
+        advocate = self.advocates[0]
+        self._upload(advocate, 'roll_number_cert')
+        entry = VerificationReviewQueue.objects.get(user=advocate)
+        self.assertFalse(entry.ready_for_review)
+        self.assertEqual(entry.missing_documents, ['practice_license'])
+
+        license_doc = self._upload(advocate, 'practice_license')
+        entry.refresh_from_db()
+        self.assertTrue(entry.ready_for_review)
+        self.assertEqual(entry.pending_documents, 2)
+
+        license_doc.verify(self.admin)
+        entry.refresh_from_db()
+        self.assertEqual(entry.verified_documents, 1)
+
+        verification = advocate.verification
+        verification.status = 'verified'
+        verification.save()
+        entry.refresh_from_db()
+        self.assertFalse(entry.ready_for_review)
+
+    def test_users_needing_review_is_paginated_queue_scan(self):
+        """The review list reads the queue, newest change first"""
+        for advocate in self.advocates[:2]:
+            self._upload(advocate, 'roll_number_cert')
+            self._upload(advocate, 'practice_license')
+        self._upload(self.advocates[2], 'roll_number_cert')
+
+        response = self.client.get(
+            reverse('authentication:admin-verification-users-needing-review'), {'page_size': 1}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(len(response.data['users']), 1)
+        self.assertEqual(response.data['users'][0]['user_id'], self.advocates[1].id)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_rebuild_matches_incremental(self):
+        """Rebuilding from scratch reproduces the signal-maintained rows"""
+        self._upload(self.advocates[0], 'roll_number_cert')
+        self._upload(self.advocates[0], 'practice_license')
+        self._upload(self.advocates[1], 'roll_number_cert')
+        fields = ('user_id', 'role_name', 'verification_status', 'missing_documents',
+                  'documents_count', 'pending_documents', 'verified_documents', 'ready_for_review')
+        live = list(VerificationReviewQueue.objects.order_by('user_id').values(*fields))
+
+        rebuild_review_queue()
+
+        self.assertEqual(list(VerificationReviewQueue.objects.order_by('user_id').values(*fields)), live)
+
+        # The 0005 data migration builds the same rows from the historical models
+        state = MigrationLoader(connection).project_state(('authentication', '0005_verification_review_queue'))
+        migration = import_module('authentication.migrations.0005_verification_review_queue')
+        VerificationReviewQueue.objects.all().delete()
+        migration.backfill_review_queue(state.apps, None)
+
+        self.assertEqual(list(VerificationReviewQueue.objects.order_by('user_id').values(*fields)), live)
+
+    def test_user_deletion_drops_queue_entry(self):
+        """Cascading deletes do not recreate the user's queue row"""
+        advocate = self.advocates[0]
+        self._upload(advocate, 'roll_number_cert')
+        advocate.delete()
+        self.assertFalse(VerificationReviewQueue.objects.filter(user_id=advocate.id).exists())
+
+    def test_statistics_use_grouped_queries(self):
+        """Statistics cost a fixed number of queries however many roles/users exist"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('authentication:admin-verification-statistics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLessEqual(len(ctx.captured_queries), 3)
+
+        overview = response.data['overview']
+        self.assertEqual(overview['total_users'], 4)
+        self.assertEqual(overview['auto_verified_users'], 1)
+        self.assertEqual(overview['manual_pending'], 3)
+        self.assertEqual(response.data['by_role']['advocate']['total'], 3)
+        self.assertEqual(response.data['by_role']['citizen']['verified'], 1)
+
+
+@override_settings(PRINCIPAL_CACHE_TTL=60)
+class PrincipalResolutionTestCase(TestCase):
+    """Test suite for the shared, cached authenticated principal"""
+
+    def setUp(self):
+        cache.clear()
+        self.role, _ = UserRole.objects.get_or_create(role_name='advocate')
+        self.user = create_test_user('principal@test.com', 'Prin', 'Cipal', user_role=self.role)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.url = reverse('authentication:user-profile')
+
+    def _user_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [q['sql'] for q in ctx.captured_queries if 'FROM "authentication_polauser"' in q['sql']]
+
+    def test_user_loaded_once_per_request(self):
+        """Middleware and DRF share one user load; the snapshot comes from cache"""
+        self._user_queries()  # populate the principal cache
+        queries = self._user_queries()
+        self.assertEqual(len(queries), 1)
+        self.assertIn('authentication_verification', queries[0])
+
+    def test_snapshot_invalidated_on_role_change(self):
+        """Saving the user drops the cached snapshot after commit"""
+        self.assertEqual(get_principal(self.user.id).role_name, 'advocate')
+        citizen, _ = UserRole.objects.get_or_create(role_name='citizen')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_role = citizen
+            self.user.save()
+        self.assertEqual(get_principal(self.user.id).role_name, 'citizen')
+
+    def test_inactive_user_rejected(self):
+        """Deactivation takes effect immediately despite the cache"""
+        self._user_queries()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class DeviceRegistryTestCase(TestCase):
+    """Test suite for push recipient resolution and FCM token hygiene"""
+
+    def setUp(self):
+        self.users = [
+            create_test_user(f'device{i}@test.com', 'Device', str(i))
+            for i in range(3)
+        ]
+        self.current = UserDevice.objects.create(
+            user=self.users[0], device_id='a-current', fcm_token='token-a', is_current_device=True
+        )
+        UserDevice.objects.create(user=self.users[0], device_id='a-old', fcm_token='token-a-old')
+        self.fallback = UserDevice.objects.create(user=self.users[1], device_id='b-active', fcm_token='token-b')
+        UserDevice.objects.create(user=self.users[2], device_id='c-current', is_current_device=True)
+
+    def _fcm_response(self, status_code, body):
+        response = mock.Mock(status_code=status_code)
+        response.json.return_value = body
+        return response
+
+    def test_push_devices_resolves_batch_in_one_query(self):
+        """Current devices with tokens for many users in one query; fallback only for the rest"""
+        user_ids = [user.id for user in self.users]
+        with self.assertNumQueries(1):
+            devices = push_devices(user_ids)
+        self.assertEqual([device.id for device in devices], [self.current.id])
+
+        with self.assertNumQueries(2):
+            devices = push_devices(user_ids, fallback_to_active=True)
+        self.assertEqual({device.id for device in devices}, {self.current.id, self.fallback.id})
+
+    def test_invalid_tokens_cleared_after_send(self):
+        """UNREGISTERED / token INVALID_ARGUMENT responses clear tokens; payload errors do not"""
+        self.fallback.is_current_device = True
+        self.fallback.save()
+        responses = {
+            'token-a': self._fcm_response(404, {'error': {'status': 'NOT_FOUND', 'details': [
+                {'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': 'UNREGISTERED'}
+            ]}}),
+            'token-b': self._fcm_response(400, {'error': {'status': 'INVALID_ARGUMENT', 'details': [
+                {'fieldViolations': [{'field': 'message.data', 'description': 'Invalid value'}]}
+            ]}}),
+        }
+
+        def post(url, headers=None, data=None):
+            return responses[json.loads(data)['message']['token']]
+
+        fcm_module = 'notification.google_firebase_service.push_notification.fcm_api.requests.post'
+        with mock.patch.object(NotificationService, '_get_fcm_instance', return_value=FCM('project', 'token')), \
+                mock.patch(fcm_module, side_effect=post):
+            delivered = NotificationService.send_notification_to_users(self.users, 'Title', 'Body', {'k': 'v'})
+
+        self.assertEqual(delivered, set())
+        self.assertEqual(UserDevice.objects.get(pk=self.current.pk).fcm_token, '')
+        self.assertEqual(UserDevice.objects.get(pk=self.fallback.pk).fcm_token, 'token-b')
+
+        responses['token-b'] = self._fcm_response(400, {'error': {
+            'status': 'INVALID_ARGUMENT', 'message': 'The registration token is not a valid FCM registration token',
+        }})
+        with mock.patch(fcm_module, side_effect=post):
+            FCM('project', 'token').send_call_status_notification('token-b', {'type': 'call_ended'})
+        self.assertEqual(UserDevice.objects.get(pk=self.fallback.pk).fcm_token, '')
+
+    def test_compact_devices(self):
+        """Stale devices are deactivated and duplicate tokens / current devices collapsed"""
+        stale = UserDevice.objects.create(user=self.users[1], device_id='b-stale', fcm_token='token-stale')
+        UserDevice.objects.filter(pk=stale.pk).update(last_seen=timezone.now() - timedelta(days=120))
+        reinstall = UserDevice.objects.create(
+            user=self.users[0], device_id='a-reinstall', fcm_token='token-a', is_current_device=True
+        )
+
+        # One UPDATE per step; duplicates are ranked inside the UPDATE's subquery
+        with self.assertNumQueries(3):
+            changed = compact_devices(stale_days=90)
+
+        self.assertEqual(changed, {'stale': 1, 'shared_tokens': 1, 'extra_current': 0})
+        stale.refresh_from_db()
+        self.current.refresh_from_db()
+        self.assertFalse(stale.is_active)
+        self.assertEqual((self.current.fcm_token, self.current.is_current_device), ('', False))
+        self.assertEqual(UserDevice.objects.filter(user=self.users[0], is_current_device=True).get(), reinstall)
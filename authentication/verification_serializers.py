@@ -5,7 +5,7 @@ Handles serialization for documents and verification processes
 
 from rest_framework import serializers
 from .models import Document, Verification, VerificationDocument, PolaUser
-from utils.base64_fields import Base64AnyFileField
+from uploads.fields import UploadSessionFileField
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -113,8 +113,8 @@ class DocumentSerializer(serializers.ModelSerializer):
 
 
 class DocumentUploadSerializer(serializers.ModelSerializer):
-    """Serializer for uploading documents with base64 support"""
-    file = Base64AnyFileField(required=True)
+    """Serializer for uploading documents by upload session id, multipart or base64"""
+    file = UploadSessionFileField(required=True)
     
     class Meta:
         model = Document
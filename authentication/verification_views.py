@@ -10,11 +10,12 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet, CharFilter, DateFilter, BooleanFilter
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, Q
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
-from .models import PolaUser, Verification, Document, VerificationDocument
+from .models import PolaUser, Verification, Document, VerificationDocument, VerificationReviewQueue
+from .review_queue import AUTO_VERIFY_ROLES, required_documents
 from .verification_serializers import (
     DocumentSerializer,
     DocumentUploadSerializer,
@@ -23,6 +24,7 @@ from .verification_serializers import (
     UserVerificationStatusSerializer
 )
 from utils.pagination import StandardResultsSetPagination
+from utils.db_routing import read_only_replica
 
 
 class IsAdminUser(permissions.BasePermission):
@@ -807,18 +809,7 @@ class VerificationViewSet(viewsets.ReadOnlyModelViewSet):
 
     def _get_required_documents(self, role_name):
         """Get required document types for each role"""
-        # Auto-verified roles have no document requirements
-        auto_verify_roles = ['citizen', 'law_student', 'lecturer']
-        if role_name in auto_verify_roles:
-            return []
-            
-        requirements = {
-            'advocate': ['roll_number_cert', 'practice_license'],
-            'lawyer': ['professional_cert', 'employment_letter'],
-            'paralegal': ['professional_cert', 'employment_letter'],
-            'law_firm': ['business_license', 'registration_cert'],
-        }
-        return requirements.get(role_name, [])
+        return required_documents(role_name)
 
 
 class AdminVerificationDashboardViewSet(viewsets.ViewSet):
@@ -833,66 +824,44 @@ class AdminVerificationDashboardViewSet(viewsets.ViewSet):
         tags=['Verification - Admin Dashboard']
     )
     @action(detail=False, methods=['get'])
+    @read_only_replica
     def statistics(self, request):
         """
         Get verification statistics - separates auto-verified from manual verification roles, excludes admin users
         GET /admin-verification/statistics/
         """
-        auto_verify_roles = ['citizen', 'law_student', 'lecturer']
-        
-        # Total users (excluding admin/staff users)
-        total_users = PolaUser.objects.exclude(is_staff=True).exclude(is_superuser=True).count()
-        auto_verified_users = PolaUser.objects.filter(
-            user_role__role_name__in=auto_verify_roles
-        ).exclude(is_staff=True).exclude(is_superuser=True).count()
-        manual_verification_users = total_users - auto_verified_users
-        
-        # Manual verification statistics (excluding auto-verified roles and admin users)
-        manual_verified = PolaUser.objects.filter(
-            verification__status='verified'
-        ).exclude(
-            user_role__role_name__in=auto_verify_roles
-        ).exclude(
-            is_staff=True
-        ).exclude(
-            is_superuser=True
-        ).count()
+        auto_verify_roles = AUTO_VERIFY_ROLES
         
-        manual_pending = Verification.objects.filter(
-            status='pending'
-        ).exclude(
-            user__user_role__role_name__in=auto_verify_roles
-        ).exclude(
-            user__is_staff=True
-        ).exclude(
-            user__is_superuser=True
-        ).count()
+        # Non-admin users grouped by role in one query
+        from .models import UserRole
+        users = PolaUser.objects.exclude(is_staff=True).exclude(is_superuser=True)
+        by_role = {
+            row['user_role__role_name']: row
+            for row in users.values('user_role__role_name').annotate(
+                total=Count('id'),
+                verified=Count('id', filter=Q(verification__status='verified')),
+                pending=Count('id', filter=Q(verification__status='pending')),
+                rejected=Count('id', filter=Q(verification__status='rejected')),
+            ).order_by()
+        }
         
-        manual_rejected = Verification.objects.filter(
-            status='rejected'
-        ).exclude(
-            user__user_role__role_name__in=auto_verify_roles
-        ).exclude(
-            user__is_staff=True
-        ).exclude(
-            user__is_superuser=True
-        ).count()
+        total_users = sum(row['total'] for row in by_role.values())
+        auto_verified_users = sum(row['total'] for role, row in by_role.items() if role in auto_verify_roles)
+        manual_verification_users = total_users - auto_verified_users
+        manual_rows = [row for role, row in by_role.items() if role not in auto_verify_roles]
+        manual_verified = sum(row['verified'] for row in manual_rows)
+        manual_pending = sum(row['pending'] for row in manual_rows)
+        manual_rejected = sum(row['rejected'] for row in manual_rows)
         
         # By role stats (excluding admin users)
         role_stats = {}
-        from .models import UserRole
-        for role in UserRole.objects.all():
-            is_auto_verify = role.role_name in auto_verify_roles
-            role_stats[role.role_name] = {
-                'total': PolaUser.objects.filter(user_role=role).exclude(is_staff=True).exclude(is_superuser=True).count(),
-                'verified': PolaUser.objects.filter(
-                    user_role=role, 
-                    verification__status='verified'
-                ).exclude(is_staff=True).exclude(is_superuser=True).count(),
-                'pending': Verification.objects.filter(
-                    user__user_role=role, 
-                    status='pending'
-                ).exclude(user__is_staff=True).exclude(user__is_superuser=True).count(),
+        for role_name in UserRole.objects.values_list('role_name', flat=True):
+            is_auto_verify = role_name in auto_verify_roles
+            row = by_role.get(role_name, {})
+            role_stats[role_name] = {
+                'total': row.get('total', 0),
+                'verified': row.get('verified', 0),
+                'pending': row.get('pending', 0),
                 'is_auto_verified': is_auto_verify,
                 'verification_type': 'auto' if is_auto_verify else 'manual'
             }
@@ -939,34 +908,45 @@ class AdminVerificationDashboardViewSet(viewsets.ViewSet):
         Debug endpoint to check document status
         GET /admin-verification/debug_documents/
         """
-        all_docs = Document.objects.all()
-        active_docs = Document.objects.filter(is_active=True)
+        totals = Document.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(is_active=True)),
+            pending=Count('id', filter=Q(is_active=True, verification_status='pending')),
+            verified=Count('id', filter=Q(is_active=True, verification_status='verified')),
+            rejected=Count('id', filter=Q(is_active=True, verification_status='rejected')),
+        )
         
         debug_info = {
-            'total_documents': all_docs.count(),
-            'active_documents': active_docs.count(),
-            'inactive_documents': all_docs.filter(is_active=False).count(),
+            'total_documents': totals['total'],
+            'active_documents': totals['active'],
+            'inactive_documents': totals['total'] - totals['active'],
             'documents_by_status': {
-                'pending': active_docs.filter(verification_status='pending').count(),
-                'verified': active_docs.filter(verification_status='verified').count(),
-                'rejected': active_docs.filter(verification_status='rejected').count(),
+                'pending': totals['pending'],
+                'verified': totals['verified'],
+                'rejected': totals['rejected'],
             },
             'documents_by_user': []
         }
         
-        # Get document count per user
-        for user in PolaUser.objects.all():
-            user_docs = Document.objects.filter(user=user, is_active=True)
-            if user_docs.exists():
-                debug_info['documents_by_user'].append({
-                    'user_id': user.id,
-                    'user_email': user.email,
-                    'user_name': f"{user.first_name} {user.last_name}",
-                    'total_docs': user_docs.count(),
-                    'verified_docs': user_docs.filter(verification_status='verified').count(),
-                    'pending_docs': user_docs.filter(verification_status='pending').count(),
-                    'rejected_docs': user_docs.filter(verification_status='rejected').count(),
-                })
+        # Active document counts per user in one grouped query
+        per_user = Document.objects.filter(is_active=True).values(
+            'user_id', 'user__email', 'user__first_name', 'user__last_name'
+        ).annotate(
+            total_docs=Count('id'),
+            verified_docs=Count('id', filter=Q(verification_status='verified')),
+            pending_docs=Count('id', filter=Q(verification_status='pending')),
+            rejected_docs=Count('id', filter=Q(verification_status='rejected')),
+        ).order_by('user_id')
+        for row in per_user:
+            debug_info['documents_by_user'].append({
+                'user_id': row['user_id'],
+                'user_email': row['user__email'],
+                'user_name': f"{row['user__first_name']} {row['user__last_name']}",
+                'total_docs': row['total_docs'],
+                'verified_docs': row['verified_docs'],
+                'pending_docs': row['pending_docs'],
+                'rejected_docs': row['rejected_docs'],
+            })
         
         return Response(debug_info)
 
@@ -978,52 +958,34 @@ class AdminVerificationDashboardViewSet(viewsets.ViewSet):
     def users_needing_review(self, request):
         """
         Get users who have uploaded all required documents and need review
-        GET /admin-verification/users_needing_review/
+        GET /admin-verification/users_needing_review/?page=1&page_size=20
+        
+        Reads the review queue maintained on document upload/verify, most recent change first.
         """
-        # Get users with pending verification who have uploaded documents
-        users_with_docs = PolaUser.objects.filter(
-            verification__status='pending',
-            documents__isnull=False
-        ).distinct()
-
-        results = []
-        for user in users_with_docs:
-            role_name = user.user_role.role_name if user.user_role else None
-            required_docs = self._get_required_documents(role_name)
-            
-            user_docs = Document.objects.filter(user=user)
-            uploaded_doc_types = set(user_docs.values_list('document_type', flat=True))
-            
-            # Check if all required documents are uploaded
-            has_all_docs = all(doc in uploaded_doc_types for doc in required_docs)
-            
-            if has_all_docs:
-                results.append({
-                    'user_id': user.id,
-                    'email': user.email,
-                    'name': f"{user.first_name} {user.last_name}",
-                    'role': role_name,
-                    'documents_count': user_docs.count(),
-                    'verified_documents': user_docs.filter(verification_status='verified').count(),
-                    'pending_documents': user_docs.filter(verification_status='pending').count()
-                })
+        queue = VerificationReviewQueue.objects.filter(
+            ready_for_review=True
+        ).select_related('user').order_by('-last_change')
+        
+        paginator = StandardResultsSetPagination()
+        page = paginator.paginate_queryset(queue, request)
+        results = [{
+            'user_id': entry.user_id,
+            'email': entry.user.email,
+            'name': f"{entry.user.first_name} {entry.user.last_name}",
+            'role': entry.role_name,
+            'documents_count': entry.documents_count,
+            'verified_documents': entry.verified_documents,
+            'pending_documents': entry.pending_documents,
+            'last_change': entry.last_change,
+        } for entry in page]
 
         return Response({
-            'count': len(results),
+            'count': paginator.page.paginator.count,
+            'next': paginator.get_next_link(),
+            'previous': paginator.get_previous_link(),
             'users': results
         })
 
     def _get_required_documents(self, role_name):
         """Get required document types for each role"""
-        # Auto-verified roles have no document requirements
-        auto_verify_roles = ['citizen', 'law_student', 'lecturer']
-        if role_name in auto_verify_roles:
-            return []
-            
-        requirements = {
-            'advocate': ['roll_number_cert', 'practice_license'],
-            'lawyer': ['professional_cert', 'employment_letter'],
-            'paralegal': ['professional_cert', 'employment_letter'],
-            'law_firm': ['business_license', 'registration_cert'],
-        }
-        return requirements.get(role_name, [])
+        return required_documents(role_name)
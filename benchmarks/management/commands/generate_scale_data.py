@@ -0,0 +1,69 @@
+"""
+Management command to bulk-generate production-scale benchmark data
+Usage: python manage.py generate_scale_data --scale production [--users 100000 --likes 1000000 ...]
+
+Generated users have @bench.pola.invalid addresses; remove everything with --purge.
+Never run against the production database. Purging goes through the ORM (cascades and
+signals) and takes minutes for large sets; for production-scale runs point DB_NAME at a
+throwaway database (createdb pola_bench && python manage.py migrate) instead.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.scale_data import SCALES, ScaleDataGenerator, dataset_summary, purge_scale_data
+
+
+class Command(BaseCommand):
+    help = 'Generate large users/materials/likes/comments/payments datasets with bulk_create for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small', help='Preset row counts')
+        for table in ('users', 'materials', 'likes', 'comments', 'payments'):
+            parser.add_argument(f'--{table}', type=int, help=f'Override the preset number of {table}')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows per bulk insert')
+        parser.add_argument('--days', type=int, default=90, help='Spread created_at over this many days')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for a repeatable dataset')
+        parser.add_argument('--skip-derived', action='store_true', help='Do not rebuild search/rollup/mention tables')
+        parser.add_argument('--purge', action='store_true', help='Delete previously generated data and exit')
+
+    def handle(self, *args, **options):
+        if options['purge']:
+            self.stdout.write('🔄 Removing generated benchmark data...')
+            deleted = purge_scale_data(rebuild_derived=not options['skip_derived'])
+            self.stdout.write(self.style.SUCCESS(f'✅ Removed {deleted} generated users and their content'))
+            return
+
+        counts = dict(SCALES[options['scale']])
+        for table in counts:
+            if options.get(table) is not None:
+                counts[table] = options[table]
+        if counts['users'] < 1 or counts['materials'] < 1:
+            raise CommandError('At least one user and one material are required')
+
+        last_report = {}
+
+        def progress(label, done, total):
+            # Report roughly every 10%
+            step = max(1, total // 10)
+            if done >= total or done - last_report.get(label, 0) >= step:
+                last_report[label] = done
+                self.stdout.write(f'  {label:<12} {done:>10,}/{total:,}')
+
+        self.stdout.write('🔄 Generating ' + ', '.join(f'{count:,} {table}' for table, count in counts.items()) + '...')
+        started = time.perf_counter()
+        created = ScaleDataGenerator(
+            counts,
+            batch_size=options['batch_size'],
+            seed=options['seed'],
+            days=options['days'],
+            rebuild_derived=not options['skip_derived'],
+            progress=progress,
+        ).generate()
+        elapsed = time.perf_counter() - started
+
+        for table, count in created.items():
+            self.stdout.write(f'  {table:<14} {count:>10,} new')
+        totals = ', '.join(f'{table}={count:,}' for table, count in dataset_summary().items())
+        self.stdout.write(self.style.SUCCESS(f'✅ Generated {sum(created.values()):,} rows in {elapsed:.1f}s ({totals})'))
@@ -0,0 +1,68 @@
+"""
+Management command to benchmark the hot API endpoints
+Usage: python manage.py run_benchmarks [--iterations 30] [--only hubs. analytics.] [--compare benchmark_reports/base.json] [--conn-max-age 0]
+
+Writes a JSON report (latency percentiles and query counts per scenario) that can
+be compared against a report from another commit. Run once with --conn-max-age 0
+and compare to a default run to see connection setup leave p50 latency.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from benchmarks.runner import compare_reports, load_report, run_benchmarks, write_report
+
+
+class Command(BaseCommand):
+    help = 'Measure latency percentiles and query counts of hub, nearby, consultant, permission and analytics endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30, help='Measured requests per scenario')
+        parser.add_argument('--warmup', type=int, default=3, help='Unmeasured requests per scenario')
+        parser.add_argument('--only', nargs='+', help='Scenario name prefixes to run (e.g. hubs. analytics.)')
+        parser.add_argument('--output', help='Report path (default: benchmark_reports/<commit>-<time>.json)')
+        parser.add_argument('--compare', help='Baseline report to compare against')
+        parser.add_argument('--threshold', type=float, default=0.1, help='Allowed p95 growth before flagging (0.1 = 10%%)')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero when a scenario regresses')
+        parser.add_argument('--keep-logs', action='store_true', help='Do not silence INFO logging while measuring')
+        parser.add_argument('--conn-max-age', type=int, help='Override DATABASES CONN_MAX_AGE (0 = new connection per request)')
+
+    def handle(self, *args, **options):
+        baseline = load_report(options['compare']) if options['compare'] else None
+
+        def progress(name, result):
+            latency, queries = result['latency_ms'], result['queries']
+            statuses = ','.join(sorted(result['status']))
+            self.stdout.write(
+                f"  {name:<30} p50 {latency['p50']:8.1f} ms  p95 {latency['p95']:8.1f} ms  "
+                f"{queries['p50']:5.0f} queries  {result['connects']:3d} connects  [{statuses}]"
+            )
+
+        self.stdout.write(f"🔄 Running benchmarks ({options['iterations']} iterations per scenario)...")
+        report = run_benchmarks(
+            iterations=options['iterations'],
+            warmup=options['warmup'],
+            only=options['only'],
+            quiet_logs=not options['keep_logs'],
+            progress=progress,
+            conn_max_age=options['conn_max_age'],
+        )
+        output = options['output'] or (
+            f"benchmark_reports/{report['meta']['commit'] or 'local'}-{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        path = write_report(report, output)
+        self.stdout.write(self.style.SUCCESS(f"✅ {len(report['scenarios'])} scenarios written to {path}"))
+
+        if baseline is None:
+            return
+        rows = compare_reports(baseline, report, threshold=options['threshold'])
+        self.stdout.write(f"🔄 Compared with {options['compare']} ({baseline['meta'].get('commit')}):")
+        for row in rows:
+            line = (
+                f"  {row['scenario']:<30} p95 {row['p95'][0]:8.1f} -> {row['p95'][1]:8.1f} ms "
+                f"({row['p95_change']:+.0%})  queries {row['queries'][0]:.0f} -> {row['queries'][1]:.0f}"
+            )
+            self.stdout.write(self.style.WARNING(line) if row['regression'] else line)
+        regressions = [row['scenario'] for row in rows if row['regression']]
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"Regressions: {', '.join(regressions)}")
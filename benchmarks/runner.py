@@ -0,0 +1,308 @@
+"""
+API Benchmark Runner
+
+Drives the hot read endpoints (hub feeds, trending, comments, nearby search,
+consultant directory, permission checks, admin analytics) through the Django
+test client against the current database, and records latency percentiles and
+query counts per scenario:
+
+    report = run_benchmarks(iterations=30)
+    write_report(report, 'benchmark_reports/after.json')
+    compare_reports(load_report('before.json'), report)
+
+Requests carry a real JWT, so authentication and middleware are part of the
+measurement. Connections are closed/kept between requests the way a WSGI
+server does (``CONN_MAX_AGE``), so connection setup shows up in latency and in
+the ``connects`` count; ``conn_max_age=0`` reproduces reconnect-per-request.
+Reports are plain JSON and can be compared across commits.
+"""
+
+import json
+import logging
+import subprocess
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.device_models import UserDevice
+from authentication.models import PolaUser, UserRole, Verification
+from documents.models import LearningMaterial
+from subscriptions.models import SubscriptionPlan, UserSubscription
+from .scale_data import BENCH_EMAIL_DOMAIN, CENTER, dataset_summary
+
+API = f'/api/{settings.API_VERSION}'
+
+VIEWER_EMAIL = f'viewer@{BENCH_EMAIL_DOMAIN}'
+ADMIN_EMAIL = f'admin@{BENCH_EMAIL_DOMAIN}'
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    path: str
+    principal: str = 'viewer'  # 'viewer' or 'admin'
+
+
+def benchmark_principals():
+    """
+    The users requests are made as (created on first run, removed by
+    purge_scale_data): a located, verified advocate (can read every hub) with
+    an active subscription when a plan exists, and a superuser for admin
+    endpoints.
+
+    Returns:
+        dict: {'viewer': PolaUser, 'admin': PolaUser}
+    """
+    viewer = PolaUser.objects.filter(email=VIEWER_EMAIL).first()
+    if viewer is None:
+        advocate, _ = UserRole.objects.get_or_create(role_name='advocate')
+        viewer = PolaUser.objects.create_user(
+            email=VIEWER_EMAIL, password=None, first_name='Bench', last_name='Viewer',
+            agreed_to_Terms=True, user_role=advocate
+        )
+        Verification.objects.update_or_create(
+            user=viewer, defaults={'status': 'verified', 'verification_date': timezone.now()}
+        )
+        UserDevice.objects.create(
+            user=viewer, device_id='bench-viewer', device_type='mobile', is_active=True,
+            is_current_device=True, latitude=Decimal(str(CENTER[0])), longitude=Decimal(str(CENTER[1])),
+        )
+        plan = SubscriptionPlan.objects.filter(is_active=True).order_by('price').last()
+        if plan is not None:
+            UserSubscription.objects.create(
+                user=viewer, plan=plan, status='active', end_date=timezone.now() + timedelta(days=365)
+            )
+
+    admin = PolaUser.objects.filter(email=ADMIN_EMAIL).first()
+    if admin is None:
+        admin = PolaUser.objects.create_superuser(
+            email=ADMIN_EMAIL, password=None, first_name='Bench', last_name='Admin', agreed_to_Terms=True
+        )
+    return {'viewer': viewer, 'admin': admin}
+
+
+def default_scenarios(principals):
+    """Scenarios for the endpoints the app and admin dashboard hit most"""
+    hot = (
+        LearningMaterial.objects.filter(is_active=True, is_approved=True)
+        .order_by('-views_count').values_list('pk', flat=True).first()
+    )
+    viewer_id = principals['viewer'].pk
+    scenarios = [
+        Scenario('hubs.feed.advocates', f'{API}/hubs/content/?hub_type=advocates'),
+        Scenario('hubs.feed.students', f'{API}/hubs/content/?hub_type=students'),
+        Scenario('hubs.feed.forum', f'{API}/hubs/content/?hub_type=forum'),
+        Scenario('hubs.trending', f'{API}/hubs/content/trending/'),
+        Scenario('hubs.trending.advocates', f'{API}/hubs/content/trending/?hub_type=advocates'),
+        Scenario('nearby.professionals', f'{API}/authentication/nearby-legal-professionals/?radius=50'),
+        Scenario('consultants.directory', f'{API}/subscriptions/consultants/'),
+        Scenario('consultants.calls', f'{API}/subscriptions/calls/consultants/'),
+        Scenario('permissions.my_subscription', f'{API}/subscriptions/my_subscription/'),
+        Scenario('permissions.user', f'{API}/admin/auth/permissions/user/{viewer_id}/', 'admin'),
+        Scenario('analytics.dashboard', f'{API}/admin/analytics/dashboard/', 'admin'),
+        Scenario('analytics.revenue', f'{API}/admin/analytics/revenue/', 'admin'),
+        Scenario('analytics.users', f'{API}/admin/analytics/users/', 'admin'),
+    ]
+    if hot:
+        scenarios.insert(3, Scenario('hubs.comments.hot', f'{API}/hubs/comments/?content_id={hot}'))
+    return scenarios
+
+
+def _percentile(ordered, pct):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not ordered:
+        return None
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _summary(samples):
+    ordered = sorted(samples)
+    summary = {'min': ordered[0], 'mean': sum(ordered) / len(ordered), 'max': ordered[-1]}
+    for pct in PERCENTILES:
+        summary[f'p{pct}'] = _percentile(ordered, pct)
+    return {key: round(value, 3) for key, value in summary.items()}
+
+
+def _finish_request():
+    # The test client skips close_old_connections(); a WSGI server runs it on
+    # request_finished. Not inside a test transaction, where closing would
+    # break the atomic block.
+    if not connection.in_atomic_block:
+        close_old_connections()
+
+
+def measure(client, scenario, headers, iterations, warmup):
+    """
+    Returns:
+        dict: latency_ms / queries summaries, status code counts, median bytes
+              and new database connections opened while measuring
+    """
+    for _ in range(warmup):
+        client.get(scenario.path, secure=True, **headers)
+        _finish_request()
+
+    connects = []
+
+    def count_connect(sender, connection, **kwargs):
+        connects.append(connection.alias)
+
+    latencies, queries, sizes, statuses = [], [], [], {}
+    connection_created.connect(count_connect)
+    try:
+        for _ in range(iterations):
+            # Timer starts first: CaptureQueriesContext opens the connection on enter
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.get(scenario.path, secure=True, **headers)
+            elapsed = time.perf_counter() - started
+            _finish_request()
+            latencies.append(elapsed * 1000)
+            queries.append(len(ctx.captured_queries))
+            sizes.append(len(response.content))
+            statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    finally:
+        connection_created.disconnect(count_connect)
+
+    return {
+        'path': scenario.path,
+        'principal': scenario.principal,
+        'status': statuses,
+        'latency_ms': _summary(latencies),
+        'queries': _summary(queries),
+        'bytes': int(_percentile(sorted(sizes), 50)),
+        'connects': len(connects),
+    }
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _set_conn_max_age(max_age):
+    """Apply CONN_MAX_AGE to every alias; returns the previous values"""
+    previous = {}
+    for conn in connections.all():
+        previous[conn.alias] = conn.settings_dict['CONN_MAX_AGE']
+        conn.settings_dict['CONN_MAX_AGE'] = max_age
+        if not conn.in_atomic_block:
+            conn.close()  # close_at is fixed when a connection opens
+    return previous
+
+
+def run_benchmarks(iterations=30, warmup=3, only=None, quiet_logs=True, progress=None, conn_max_age=None):
+    """
+    Run every scenario (or those whose name starts with one of ``only``).
+    ``conn_max_age`` overrides DATABASES CONN_MAX_AGE for the run (0 opens a
+    connection per request) to compare against persistent connections.
+
+    Returns:
+        dict: {'meta': {...}, 'scenarios': {name: measurement}}
+    """
+    principals = benchmark_principals()
+    headers = {
+        role: {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+        for role, user in principals.items()
+    }
+    scenarios = [
+        scenario for scenario in default_scenarios(principals)
+        if not only or scenario.name.startswith(tuple(only))
+    ]
+
+    # Server errors are recorded as status codes instead of aborting the run
+    client = Client(raise_request_exception=False)
+    results = {}
+    previous_max_age = _set_conn_max_age(conn_max_age) if conn_max_age is not None else None
+    if quiet_logs:
+        # Per-row INFO logging in some views would flood the console
+        logging.disable(logging.INFO)
+    try:
+        with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            for scenario in scenarios:
+                results[scenario.name] = measure(
+                    client, scenario, headers[scenario.principal], iterations, warmup
+                )
+                if progress:
+                    progress(scenario.name, results[scenario.name])
+    finally:
+        if quiet_logs:
+            logging.disable(logging.NOTSET)
+        if previous_max_age is not None:
+            for alias, max_age in previous_max_age.items():
+                connections[alias].settings_dict['CONN_MAX_AGE'] = max_age
+
+    return {
+        'meta': {
+            'commit': current_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'conn_max_age': connection.settings_dict['CONN_MAX_AGE'] if conn_max_age is None else conn_max_age,
+            'conn_health_checks': connection.settings_dict['CONN_HEALTH_CHECKS'],
+            'pooler_mode': getattr(settings, 'DB_POOLER_MODE', 'none'),
+            'iterations': iterations,
+            'warmup': warmup,
+            'dataset': dataset_summary(),
+        },
+        'scenarios': results,
+    }
+
+
+def write_report(report, path):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2, sort_keys=True))
+    return path
+
+
+def load_report(path):
+    return json.loads(Path(path).read_text())
+
+
+def compare_reports(baseline, current, threshold=0.1):
+    """
+    Compare p50/p95 latency and median queries per scenario.
+
+    A scenario regresses when its p95 grows by more than ``threshold``
+    (fraction) or it runs more queries than before.
+
+    Returns:
+        list: [{'scenario', 'p50': (before, after), 'p95': (...),
+                'queries': (...), 'p95_change', 'regression'}, ...]
+    """
+    rows = []
+    for name, after in current['scenarios'].items():
+        before = baseline['scenarios'].get(name)
+        if before is None:
+            continue
+        p95_before, p95_after = before['latency_ms']['p95'], after['latency_ms']['p95']
+        queries_before, queries_after = before['queries']['p50'], after['queries']['p50']
+        change = (p95_after - p95_before) / p95_before if p95_before else 0.0
+        rows.append({
+            'scenario': name,
+            'p50': (before['latency_ms']['p50'], after['latency_ms']['p50']),
+            'p95': (p95_before, p95_after),
+            'queries': (queries_before, queries_after),
+            'p95_change': round(change, 3),
+            'regression': change > threshold or queries_after > queries_before,
+        })
+    return rows
@@ -0,0 +1,411 @@
+"""
+Scale Data Generator
+
+The seeders create small fixture sets row by row. This module bulk-loads
+production-sized volumes so the hot endpoints can be measured:
+
+    ScaleDataGenerator(SCALES['production']).generate()
+
+Rows are built from small pools of Faker text (generating a fresh sentence per
+row is slower than the database insert) and written with ``bulk_create``.
+Popularity is skewed, so a few materials collect most likes and comments, as
+in production. ``created_at`` is spread over ``days`` so trending windows and
+the daily engagement rollup see realistic history.
+
+Every generated user has an ``@bench.pola.invalid`` address; ``purge_scale_data``
+removes them together with everything they own (cascade). bulk_create skips
+signals, so the derived tables (search index, engagement rollup, mention
+directory) are rebuilt afterwards.
+"""
+
+import io
+import random
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from faker import Faker
+
+from authentication.device_models import UserDevice
+from authentication.models import PolaUser, UserRole, Verification
+from documents.models import LearningMaterial
+from hubs.catalog import invalidate_catalog
+from hubs.models import ContentLike, HubComment
+from subscriptions.models import ConsultantProfile, PaymentTransaction, SubscriptionPlan, UserSubscription
+
+BENCH_EMAIL_DOMAIN = 'bench.pola.invalid'
+BENCH_PASSWORD = 'bench-pass-123'
+
+SCALES = {
+    'tiny': {
+        'users': 60, 'materials': 40, 'likes': 300, 'comments': 200, 'payments': 100,
+    },
+    'small': {
+        'users': 5_000, 'materials': 2_500, 'likes': 50_000, 'comments': 50_000, 'payments': 25_000,
+    },
+    'production': {
+        'users': 100_000, 'materials': 50_000, 'likes': 1_000_000, 'comments': 1_000_000, 'payments': 500_000,
+    },
+}
+
+# (role, share of users)
+ROLE_MIX = [
+    ('citizen', 0.55), ('law_student', 0.2), ('advocate', 0.1), ('lawyer', 0.05),
+    ('paralegal', 0.04), ('lecturer', 0.04), ('law_firm', 0.02),
+]
+PROFESSIONAL_ROLES = ('advocate', 'lawyer', 'paralegal', 'law_firm')
+
+# (hub_type, uploader_type, content types)
+HUB_MIX = [
+    ('advocates', 'advocate', ('discussion', 'article', 'news', 'document')),
+    ('students', 'student', ('notes', 'past_papers', 'assignments', 'research')),
+    ('forum', 'student', ('discussion', 'question')),
+    ('legal_ed', 'admin', ('document', 'tutorial', 'case_study')),
+]
+
+# Around Dar es Salaam, for nearby search
+CENTER = (-6.7924, 39.2083)
+
+TEXT_POOL_SIZE = 500
+
+
+def _skewed(rng, n, power=2.5):
+    """Index in [0, n) biased towards 0 (hot items)"""
+    return min(n - 1, int(n * rng.random() ** power))
+
+
+class ScaleDataGenerator:
+    """
+    Usage:
+        generator = ScaleDataGenerator(SCALES['small'], seed=42, progress=print)
+        counts = generator.generate()
+    """
+
+    def __init__(self, counts, batch_size=5000, seed=None, days=90, rebuild_derived=True, progress=None):
+        self.counts = counts
+        self.batch_size = batch_size
+        self.days = days
+        self.rebuild_derived = rebuild_derived
+        self.progress = progress or (lambda label, done, total: None)
+        self.rng = random.Random(seed)
+        self.tag = uuid.UUID(int=self.rng.getrandbits(128)).hex[:8]
+
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.first_names = [fake.first_name() for _ in range(TEXT_POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(TEXT_POOL_SIZE)]
+        self.sentences = [fake.sentence(nb_words=10) for _ in range(TEXT_POOL_SIZE)]
+        self.paragraphs = [fake.paragraph(nb_sentences=4) for _ in range(TEXT_POOL_SIZE)]
+        self.cities = [fake.city() for _ in range(50)]
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    def _pick(self, pool):
+        return pool[self.rng.randrange(len(pool))]
+
+    def _insert(self, label, model, rows_iter, total):
+        """bulk_create rows from ``rows_iter`` in batches; returns the new ids"""
+        ids, batch = [], []
+        for row in rows_iter:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                ids.extend(self._flush(model, batch))
+                batch = []
+                self.progress(label, len(ids), total)
+        if batch:
+            ids.extend(self._flush(model, batch))
+            self.progress(label, len(ids), total)
+        return ids
+
+    def _flush(self, model, batch):
+        with transaction.atomic():
+            created = model.objects.bulk_create(batch)
+        return [obj.pk for obj in created]
+
+    def _spread_dates(self, model, ids, field='created_at'):
+        """Move ``field`` of the new rows back by a random age up to ``days``"""
+        if not ids or connection.vendor != 'postgresql':
+            return
+        table = connection.ops.quote_name(model._meta.db_table)
+        column = connection.ops.quote_name(model._meta.get_field(field).column)
+        pk = connection.ops.quote_name(model._meta.pk.column)
+        with connection.cursor() as cursor:
+            for start in range(0, len(ids), 50_000):
+                cursor.execute(
+                    f'UPDATE {table} SET {column} = {column} - random() * %s * interval %s '
+                    f'WHERE {pk} = ANY(%s)',
+                    [self.days, '1 day', ids[start:start + 50_000]],
+                )
+
+    # ------------------------------------------------------------------
+    # Tables
+    # ------------------------------------------------------------------
+
+    def _roles(self):
+        return {
+            role: UserRole.objects.get_or_create(role_name=role)[0].pk
+            for role, _ in ROLE_MIX
+        }
+
+    def generate_users(self):
+        total = self.counts['users']
+        role_ids = self._roles()
+        weights = [share for _, share in ROLE_MIX]
+        names = [role for role, _ in ROLE_MIX]
+        password = make_password(BENCH_PASSWORD)
+        now = timezone.now()
+
+        assigned = []
+
+        def rows():
+            for i in range(total):
+                role = self.rng.choices(names, weights)[0]
+                assigned.append(role)
+                first, last = self._pick(self.first_names), self._pick(self.last_names)
+                yield PolaUser(
+                    email=f'{self.tag}-{i}@{BENCH_EMAIL_DOMAIN}',
+                    username=f'bench_{self.tag}_{i}',
+                    password=password,
+                    first_name=first,
+                    last_name=last,
+                    user_role_id=role_ids[role],
+                    agreed_to_Terms=True,
+                    is_active=True,
+                    date_joined=now,
+                    firm_name=f'{last} & Partners' if role == 'law_firm' else None,
+                )
+
+        ids = self._insert('users', PolaUser, rows(), total)
+        self._spread_dates(PolaUser, ids, field='date_joined')
+        self.users = list(zip(ids, assigned))
+        return len(ids)
+
+    def generate_verifications(self):
+        """create_user adds a Verification row; most professionals are verified"""
+        now = timezone.now()
+
+        def rows():
+            for user_id, role in self.users:
+                verified = role in PROFESSIONAL_ROLES and self.rng.random() < 0.8
+                yield Verification(
+                    user_id=user_id,
+                    status='verified' if verified else 'pending',
+                    verification_date=now if verified else None,
+                )
+
+        return len(self._insert('verifications', Verification, rows(), len(self.users)))
+
+    def generate_devices(self):
+        """One located device per professional, for nearby search"""
+        professionals = [user_id for user_id, role in self.users if role in PROFESSIONAL_ROLES]
+
+        def rows():
+            for user_id in professionals:
+                yield UserDevice(
+                    user_id=user_id,
+                    device_id=f'bench-{user_id}',
+                    device_type='mobile',
+                    is_active=True,
+                    is_current_device=True,
+                    latitude=Decimal(str(round(CENTER[0] + self.rng.uniform(-0.5, 0.5), 6))),
+                    longitude=Decimal(str(round(CENTER[1] + self.rng.uniform(-0.5, 0.5), 6))),
+                )
+
+        return len(self._insert('devices', UserDevice, rows(), len(professionals)))
+
+    def generate_consultants(self):
+        candidates = [user_id for user_id, role in self.users if role in PROFESSIONAL_ROLES]
+        chosen = candidates[: max(1, len(candidates) // 5)] if candidates else []
+        role_of = dict(self.users)
+
+        def rows():
+            for user_id in chosen:
+                yield ConsultantProfile(
+                    user_id=user_id,
+                    consultant_type=role_of[user_id],
+                    specialization=self._pick(self.sentences),
+                    years_of_experience=self.rng.randint(1, 30),
+                    city=self._pick(self.cities),
+                    is_available=self.rng.random() < 0.8,
+                    total_consultations=self.rng.randint(0, 500),
+                    average_rating=Decimal(str(round(self.rng.uniform(3, 5), 2))),
+                    total_reviews=self.rng.randint(0, 200),
+                )
+
+        return len(self._insert('consultants', ConsultantProfile, rows(), len(chosen)))
+
+    def generate_subscriptions(self):
+        plan = SubscriptionPlan.objects.filter(is_active=True).order_by('price').last()
+        if plan is None:
+            return 0
+        subscribers = [user_id for user_id, _ in self.users if self.rng.random() < 0.3]
+        end_date = timezone.now() + timedelta(days=30)
+
+        def rows():
+            for user_id in subscribers:
+                yield UserSubscription(user_id=user_id, plan=plan, status='active', end_date=end_date)
+
+        return len(self._insert('subscriptions', UserSubscription, rows(), len(subscribers)))
+
+    def generate_materials(self):
+        total = self.counts['materials']
+        uploaders = [user_id for user_id, role in self.users if role != 'citizen'] or [u for u, _ in self.users]
+        hubs = []
+
+        def rows():
+            for _ in range(total):
+                hub_type, uploader_type, content_types = self._pick(HUB_MIX)
+                hubs.append(hub_type)
+                paid = hub_type == 'students' and self.rng.random() < 0.4
+                yield LearningMaterial(
+                    hub_type=hub_type,
+                    content_type=self._pick(content_types),
+                    uploader_id=self._pick(uploaders),
+                    uploader_type=uploader_type,
+                    title=self._pick(self.sentences)[:200],
+                    description=self._pick(self.paragraphs),
+                    content=self._pick(self.paragraphs),
+                    language='sw' if self.rng.random() < 0.3 else 'en',
+                    price=Decimal(self.rng.choice([1000, 2000, 5000])) if paid else Decimal('0'),
+                    views_count=int(self.rng.paretovariate(1.2) * 10),
+                    downloads_count=self.rng.randint(0, 50),
+                    is_approved=True,
+                    is_active=True,
+                )
+
+        ids = self._insert('materials', LearningMaterial, rows(), total)
+        self._spread_dates(LearningMaterial, ids)
+        self.materials = list(zip(ids, hubs))
+        return len(ids)
+
+    def generate_likes(self):
+        total = self.counts['likes']
+        user_ids = [user_id for user_id, _ in self.users]
+        seen = set()
+
+        def rows():
+            attempts = 0
+            while len(seen) < total and attempts < total * 3:
+                attempts += 1
+                pair = (self._pick(user_ids), self.materials[_skewed(self.rng, len(self.materials))][0])
+                if pair in seen:
+                    continue
+                seen.add(pair)
+                yield ContentLike(user_id=pair[0], content_id=pair[1])
+
+        # Pairs are unique and the users are new, so there is nothing to conflict with
+        ids = self._insert('likes', ContentLike, rows(), total)
+        self._spread_dates(ContentLike, ids)
+        return len(ids)
+
+    def generate_comments(self):
+        total = self.counts['comments']
+        user_ids = [user_id for user_id, _ in self.users]
+
+        def rows():
+            for _ in range(total):
+                content_id, hub_type = self.materials[_skewed(self.rng, len(self.materials))]
+                yield HubComment(
+                    hub_type=hub_type,
+                    content_id=content_id,
+                    author_id=self._pick(user_ids),
+                    comment_text=self._pick(self.sentences),
+                )
+
+        ids = self._insert('comments', HubComment, rows(), total)
+        self._spread_dates(HubComment, ids)
+        return len(ids)
+
+    def generate_payments(self):
+        total = self.counts['payments']
+        user_ids = [user_id for user_id, _ in self.users]
+        methods = [code for code, _ in PaymentTransaction.PAYMENT_METHODS]
+        types = ['subscription', 'consultation', 'document', 'material', 'call_credit']
+
+        def rows():
+            for i in range(total):
+                transaction_type = self.rng.choices(types, [4, 2, 1, 2, 1])[0]
+                status = self.rng.choices(['completed', 'pending', 'failed'], [85, 5, 10])[0]
+                material_id = self._pick(self.materials)[0] if transaction_type == 'material' else None
+                yield PaymentTransaction(
+                    user_id=self._pick(user_ids),
+                    transaction_type=transaction_type,
+                    amount=Decimal(self.rng.choice([1000, 3000, 5000, 10000, 30000])),
+                    payment_method=self._pick(methods),
+                    payment_reference=f'BENCH-{self.tag}-{i}',
+                    status=status,
+                    is_fulfilled=status == 'completed',
+                    related_material_id=material_id,
+                )
+
+        ids = self._insert('payments', PaymentTransaction, rows(), total)
+        self._spread_dates(PaymentTransaction, ids)
+        return len(ids)
+
+    # ------------------------------------------------------------------
+
+    def generate(self):
+        """
+        Returns:
+            dict: rows created per table
+        """
+        created = {'users': self.generate_users()}
+        created['verifications'] = self.generate_verifications()
+        created['devices'] = self.generate_devices()
+        created['consultants'] = self.generate_consultants()
+        created['subscriptions'] = self.generate_subscriptions()
+        created['materials'] = self.generate_materials()
+        created['likes'] = self.generate_likes()
+        created['comments'] = self.generate_comments()
+        created['payments'] = self.generate_payments()
+        if self.rebuild_derived:
+            rebuild_derived_tables()
+        return created
+
+
+def rebuild_derived_tables():
+    """bulk_create skips signals; rebuild what they normally maintain"""
+    for command in ('rebuild_content_search', 'backfill_engagement_rollup', 'rebuild_mention_directory'):
+        call_command(command, stdout=io.StringIO())
+    invalidate_catalog()
+
+
+def purge_scale_data(batch_size=1000, rebuild_derived=True):
+    """
+    Delete every generated user and (by cascade) their content.
+
+    Returns:
+        int: users deleted
+    """
+    deleted = 0
+    while True:
+        ids = list(
+            PolaUser.objects.filter(email__endswith=f'@{BENCH_EMAIL_DOMAIN}')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not ids:
+            break
+        with transaction.atomic():
+            PolaUser.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+    if deleted and rebuild_derived:
+        rebuild_derived_tables()
+    return deleted
+
+
+def dataset_summary():
+    """Row counts of the tables the benchmark scenarios read"""
+    return {
+        'users': PolaUser.objects.count(),
+        'materials': LearningMaterial.objects.count(),
+        'likes': ContentLike.objects.count(),
+        'comments': HubComment.objects.count(),
+        'payments': PaymentTransaction.objects.count(),
+        'consultants': ConsultantProfile.objects.count(),
+    }
@@ -0,0 +1,49 @@
+from django.db.models import F
+from django.test import TestCase
+
+from authentication.models import PolaUser
+from documents.models import LearningMaterial
+from hubs.models import ContentLike, HubComment
+from subscriptions.models import PaymentTransaction
+from .runner import compare_reports, run_benchmarks
+from .scale_data import BENCH_EMAIL_DOMAIN, SCALES, ScaleDataGenerator, purge_scale_data
+
+
+class ScaleBenchmarkTestCase(TestCase):
+    """Test suite for the scale-data generator and benchmark runner"""
+
+    def test_generates_and_purges_dataset(self):
+        created = ScaleDataGenerator(SCALES['tiny'], batch_size=25, seed=7).generate()
+
+        self.assertEqual(created['users'], 60)
+        self.assertEqual(PolaUser.objects.filter(email__endswith=BENCH_EMAIL_DOMAIN).count(), 60)
+        self.assertEqual(LearningMaterial.objects.count(), 40)
+        self.assertEqual(ContentLike.objects.count(), created['likes'])
+        self.assertEqual(HubComment.objects.count(), 200)
+        self.assertEqual(PaymentTransaction.objects.count(), 100)
+        # Comments follow their material's hub
+        self.assertFalse(HubComment.objects.exclude(hub_type=F('content__hub_type')).exists())
+
+        self.assertEqual(purge_scale_data(), 60)
+        self.assertFalse(LearningMaterial.objects.exists())
+
+    def test_runner_reports_percentiles_and_compares(self):
+        ScaleDataGenerator(SCALES['tiny'], seed=3, rebuild_derived=False).generate()
+
+        only = ['hubs.feed.advocates', 'analytics.dashboard', 'analytics.revenue']
+        report = run_benchmarks(iterations=3, warmup=1, only=only)
+        self.assertEqual(set(report['scenarios']), set(only))
+        for result in report['scenarios'].values():
+            self.assertEqual(result['status'], {'200': 3})
+            self.assertLessEqual(result['latency_ms']['p50'], result['latency_ms']['p95'])
+            self.assertGreater(result['queries']['p50'], 0)
+            self.assertEqual(result['connects'], 0)
+        self.assertEqual(report['meta']['dataset']['materials'], 40)
+
+        slower = {'scenarios': {
+            name: {**result, 'latency_ms': {**result['latency_ms'], 'p95': result['latency_ms']['p95'] * 3}}
+            for name, result in report['scenarios'].items()
+        }}
+        rows = compare_reports(report, slower)
+        self.assertTrue(all(row['regression'] for row in rows))
+        self.assertFalse(any(row['regression'] for row in compare_reports(report, report)))
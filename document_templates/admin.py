@@ -4,7 +4,8 @@ from .models import (
     TemplateSection,
     TemplateField,
     UserDocument,
-    UserDocumentData
+    UserDocumentData,
+    DocumentBatch
 )
 
 
@@ -97,13 +98,13 @@ class UserDocumentAdmin(admin.ModelAdmin):
     list_display = ['document_title', 'user', 'template', 'language', 'status', 'download_count', 'created_at']
     list_filter = ['template', 'language', 'status', 'is_paid']
     search_fields = ['document_title', 'user__email', 'user__first_name', 'user__last_name']
-    readonly_fields = ['status', 'generated_file', 'download_count', 'last_downloaded_at', 
+    readonly_fields = ['status', 'generated_file', 'download_count', 'last_downloaded_at', 'batch', 'batch_row',
                        'generation_started_at', 'generation_completed_at', 'created_at', 'updated_at']
     inlines = [UserDocumentDataInline]
     
     fieldsets = (
         ('Document Information', {
-            'fields': ('user', 'template', 'language', 'document_title', 'status')
+            'fields': ('user', 'template', 'language', 'document_title', 'status', 'batch', 'batch_row')
         }),
         ('Payment', {
             'fields': ('is_paid', 'payment_amount')
@@ -131,3 +132,12 @@ class UserDocumentDataAdmin(admin.ModelAdmin):
     def value_preview(self, obj):
         return obj.value[:50] + '...' if len(obj.value) > 50 else obj.value
     value_preview.short_description = 'Value'
+
+
+@admin.register(DocumentBatch)
+class DocumentBatchAdmin(admin.ModelAdmin):
+    list_display = ['template', 'user', 'language', 'status', 'total_rows', 'succeeded_rows', 'failed_rows', 'created_at']
+    list_filter = ['template', 'status', 'language']
+    search_fields = ['user__email', 'template__name']
+    readonly_fields = ['status', 'source_file', 'archive', 'total_rows', 'processed_rows', 'succeeded_rows',
+                       'failed_rows', 'error_message', 'started_at', 'completed_at', 'created_at', 'updated_at']
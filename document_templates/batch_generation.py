@@ -0,0 +1,467 @@
+"""
+Batch Document Generation
+
+Generates one template for every row of a CSV/XLSX file (bulk employment
+contracts, notices, ...):
+
+    rows = read_rows(upload)                    header row = field names
+    errors, unknown = validate_rows(template, rows)
+    batch = create_batch(user, template, 'en', upload, rows)
+
+Every row is validated with ``validate_field_data`` before anything is
+stored; a file with a bad row creates nothing. ``create_batch`` bulk-inserts
+the UserDocument and UserDocumentData rows and leaves the batch queued for
+the ``process_document_batches`` worker (DOCUMENT_BATCH_ASYNC). Without the
+worker, DOCUMENT_BATCH_IN_PROCESS renders it on a background thread of the
+web process; with DOCUMENT_BATCH_ASYNC off it renders inline after commit.
+
+``process_batch`` renders the PDFs and stores each document as it finishes,
+advancing the batch counters so clients can poll progress. Only the worker
+spreads rows across a process pool (DOCUMENT_BATCH_WORKERS; xhtml2pdf is
+CPU-bound); a request-serving process renders one row at a time. The result
+is a ZIP of every PDF plus ``report.csv`` (one status line per row).
+
+A processing batch's ``updated_at`` is its heartbeat: it moves on claim and
+on every rendered row. ``reclaim_stale_batches`` re-queues batches whose
+heartbeat is older than DOCUMENT_BATCH_STALE_SECONDS (worker crash, restart,
+deploy); the ``process_document_batches`` command reclaims them and renders
+queued batches, resuming from the documents already generated.
+
+An optional ``document_title`` column sets each document's title.
+"""
+
+import csv
+import io
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import DocumentBatch, DocumentTemplate, UserDocument, UserDocumentData
+from .utils.pdf_generator import (
+    init_render_worker,
+    load_template_content,
+    render_document_job,
+    validate_field_data
+)
+
+logger = logging.getLogger(__name__)
+
+TITLE_COLUMN = 'document_title'
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+REPORT_COLUMNS = ['row', 'document_id', 'document_title', 'status', 'error_message']
+
+# Data rows start below the header, so the first one is spreadsheet row 2
+FIRST_DATA_ROW = 2
+MIN_ROWS_PER_WORKER = 10
+
+
+class BatchFileError(ValueError):
+    """The uploaded file cannot be read as a batch"""
+
+
+# ---------------------------------------------------------------------------
+# Reading and validating rows
+# ---------------------------------------------------------------------------
+
+def _cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.date().isoformat() if value.time() == datetime.min.time() else value.isoformat(sep=' ')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _csv_rows(uploaded_file):
+    try:
+        text = uploaded_file.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise BatchFileError("CSV file must be UTF-8 encoded")
+    return list(csv.reader(io.StringIO(text)))
+
+
+def _xlsx_rows(uploaded_file):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
+    except Exception as e:
+        raise BatchFileError(f"Could not read XLSX file: {e}")
+    try:
+        return [list(row) for row in workbook.active.iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def read_rows(uploaded_file):
+    """
+    Parse a CSV/XLSX upload. Blank rows are skipped; cells are returned as
+    strings (dates as YYYY-MM-DD).
+
+    Returns:
+        list: [{'row': spreadsheet row number, 'values': {column: value}}, ...]
+
+    Raises:
+        BatchFileError: unsupported/unreadable file, no header, no data rows
+                        or more than DOCUMENT_BATCH_MAX_ROWS rows
+    """
+    name = (getattr(uploaded_file, 'name', '') or '').lower()
+    if not name.endswith(SUPPORTED_EXTENSIONS):
+        raise BatchFileError("File must be a .csv or .xlsx spreadsheet")
+
+    uploaded_file.seek(0)
+    raw_rows = _csv_rows(uploaded_file) if name.endswith('.csv') else _xlsx_rows(uploaded_file)
+    uploaded_file.seek(0)
+
+    if not raw_rows:
+        raise BatchFileError("File is empty")
+    header = [_cell_text(cell) for cell in raw_rows[0]]
+    if not any(header):
+        raise BatchFileError("First row must contain the field names")
+
+    max_rows = getattr(settings, 'DOCUMENT_BATCH_MAX_ROWS', 500)
+    rows = []
+    for number, raw in enumerate(raw_rows[1:], start=FIRST_DATA_ROW):
+        cells = [_cell_text(cell) for cell in raw]
+        if not any(cells):
+            continue
+        values = {column: value for column, value in zip(header, cells) if column}
+        rows.append({'row': number, 'values': values})
+        if len(rows) > max_rows:
+            raise BatchFileError(f"A batch can have at most {max_rows} rows")
+
+    if not rows:
+        raise BatchFileError("File has no data rows")
+    return rows
+
+
+def validate_rows(template, rows):
+    """
+    Validate every row against the template fields (same rules as the
+    single-document ``validate`` endpoint).
+
+    Returns:
+        tuple: ([{'row': n, 'errors': {field_name: message}}, ...],
+                sorted columns that are not template fields)
+    """
+    fields = list(template.fields.all())
+    field_names = {field.field_name for field in fields}
+
+    errors = []
+    for row in rows:
+        row_errors = {}
+        for field in fields:
+            is_valid, error_msg = validate_field_data(field, row['values'].get(field.field_name, ''))
+            if not is_valid:
+                row_errors[field.field_name] = error_msg
+        if row_errors:
+            errors.append({'row': row['row'], 'errors': row_errors})
+
+    columns = set().union(*(row['values'] for row in rows))
+    unknown_columns = sorted(columns - field_names - {TITLE_COLUMN})
+    return errors, unknown_columns
+
+
+# ---------------------------------------------------------------------------
+# Creating a batch
+# ---------------------------------------------------------------------------
+
+def create_batch(user, template, language, source_file, rows):
+    """
+    Store a validated batch: one UserDocument (draft) per row and its field
+    data, in bulk. Rendering starts once the transaction commits. Only free
+    templates are accepted by the endpoint (CreateDocumentBatchSerializer).
+
+    Returns:
+        DocumentBatch
+    """
+    fields = list(template.fields.all())
+    is_free = template.is_free or template.price == 0
+
+    with transaction.atomic():
+        batch = DocumentBatch.objects.create(
+            user=user,
+            template=template,
+            language=language,
+            source_file=source_file,
+            total_rows=len(rows),
+        )
+        documents = UserDocument.objects.bulk_create([
+            UserDocument(
+                user=user,
+                template=template,
+                language=language,
+                document_title=row['values'].get(TITLE_COLUMN) or template.name,
+                is_paid=is_free,
+                payment_amount=template.price if not template.is_free else 0,
+                batch=batch,
+                batch_row=row['row'],
+            )
+            for row in rows
+        ])
+        UserDocumentData.objects.bulk_create([
+            UserDocumentData(user_document=document, field=field, value=row['values'][field.field_name])
+            for document, row in zip(documents, rows)
+            for field in fields
+            if field.field_name in row['values']
+        ], batch_size=1000)
+
+        schedule_batch(batch.pk)
+
+    logger.info(f"📦 Document batch {batch.pk} created: {len(rows)} x {template.name}")
+    return batch
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='document-batches')
+        return _executor
+
+
+def _process_in_background(batch_id):
+    try:
+        process_batch(batch_id, workers=1)
+    except Exception as e:
+        logger.error(f"❌ Document batch {batch_id} could not be processed: {e}")
+    finally:
+        close_old_connections()
+
+
+def schedule_batch(batch_id):
+    """
+    Render a batch once the transaction that created it commits, unless it is
+    left queued for the process_document_batches worker (the default)
+    """
+    if not getattr(settings, 'DOCUMENT_BATCH_ASYNC', True):
+        transaction.on_commit(lambda: process_batch(batch_id, workers=1))
+    elif getattr(settings, 'DOCUMENT_BATCH_IN_PROCESS', False):
+        transaction.on_commit(lambda: _get_executor().submit(_process_in_background, batch_id))
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+def _render_all(jobs, workers):
+    """Yield render_document_job results in job order"""
+    # Starting a worker (django.setup()) costs about as much as rendering a
+    # handful of documents, so small batches and single-core hosts stay in-process
+    workers = min(workers, os.cpu_count() or 1, len(jobs) // MIN_ROWS_PER_WORKER)
+    if workers <= 1:
+        for job in jobs:
+            yield render_document_job(job)
+        return
+
+    # Spawned, not forked: the worker command may have other threads and an
+    # open DB connection. Render processes need no DB connection.
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_render_worker) as pool:
+        yield from pool.map(render_document_job, jobs, chunksize=max(1, len(jobs) // (workers * 4)))
+
+
+def batch_report(batch):
+    """
+    Per-row status of a batch.
+
+    Returns:
+        list: [{'row', 'document_id', 'document_title', 'status', 'error_message'}, ...]
+    """
+    return [
+        {
+            'row': document['batch_row'],
+            'document_id': document['id'],
+            'document_title': document['document_title'],
+            'status': document['status'],
+            'error_message': document['error_message'],
+        }
+        for document in batch.documents.order_by('batch_row').values(
+            'id', 'batch_row', 'document_title', 'status', 'error_message'
+        )
+    ]
+
+
+def _report_csv(report):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=REPORT_COLUMNS)
+    writer.writeheader()
+    writer.writerows(report)
+    return output.getvalue()
+
+
+def _archive_name(document):
+    title = slugify(document.document_title)[:60] or 'document'
+    return f"{document.batch_row:04d}_{title}.pdf"
+
+
+def _fail_batch(batch, error_message):
+    now = timezone.now()
+    batch.documents.filter(status__in=['draft', 'generating']).update(
+        status='failed', error_message=error_message, updated_at=now
+    )
+    DocumentBatch.objects.filter(pk=batch.pk).update(
+        status='failed', error_message=error_message, completed_at=now,
+        processed_rows=F('total_rows'), failed_rows=F('total_rows') - F('succeeded_rows'),
+    )
+
+
+def process_batch(batch_id, workers=None):
+    """
+    Render every pending document of a queued batch, then build its ZIP.
+    Documents completed by an earlier, interrupted run are reused.
+
+    Returns:
+        DocumentBatch or None if the batch was already picked up
+    """
+    # Claim the batch so a retried task cannot render it twice
+    now = timezone.now()
+    claimed = DocumentBatch.objects.filter(pk=batch_id, status='queued').update(
+        status='processing', started_at=now, updated_at=now
+    )
+    if not claimed:
+        return None
+    batch = DocumentBatch.objects.select_related('template').get(pk=batch_id)
+    template = batch.template
+    workers = workers or getattr(settings, 'DOCUMENT_BATCH_WORKERS', 4)
+
+    try:
+        template_content = load_template_content(template, batch.language)
+    except Exception as e:
+        logger.error(f"❌ Document batch {batch_id}: could not load template {template.pk}: {e}")
+        _fail_batch(batch, f"Template could not be loaded: {e}")
+        batch.refresh_from_db()
+        return batch
+
+    documents = {
+        document.pk: document
+        for document in batch.documents.filter(status='draft').prefetch_related('field_data__field')
+    }
+    # Left over from an interrupted run (see reclaim_stale_batches)
+    resumed = list(batch.documents.filter(status='completed').exclude(generated_file='').order_by('batch_row'))
+    jobs = [
+        (document.pk, template_content, {item.field.field_name: item.value for item in document.field_data.all()})
+        for document in sorted(documents.values(), key=lambda document: document.batch_row)
+    ]
+    batch.documents.filter(pk__in=documents).update(
+        status='generating', generation_started_at=timezone.now(), updated_at=timezone.now()
+    )
+    logger.info(f"🔄 Document batch {batch_id}: rendering {len(jobs)} documents with {workers} worker(s)")
+
+    succeeded = 0
+    try:
+        with tempfile.TemporaryFile() as archive_file:
+            with zipfile.ZipFile(archive_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+                for document in resumed:
+                    with document.generated_file.open('rb') as fh:
+                        archive.writestr(_archive_name(document), fh.read())
+                for document_id, content, error in _render_all(jobs, workers):
+                    document = documents[document_id]
+                    if content is None:
+                        document.mark_as_failed(error)
+                        counters = {'failed_rows': F('failed_rows') + 1}
+                    else:
+                        filename = f"{template.name.replace(' ', '_')}_{document.pk}_{uuid.uuid4().hex[:8]}.pdf"
+                        document.generated_file.save(filename, ContentFile(content), save=False)
+                        document.save(update_fields=['generated_file', 'updated_at'])
+                        document.mark_as_completed()
+                        archive.writestr(_archive_name(document), content)
+                        succeeded += 1
+                        counters = {'succeeded_rows': F('succeeded_rows') + 1}
+                    DocumentBatch.objects.filter(pk=batch_id).update(
+                        processed_rows=F('processed_rows') + 1, updated_at=timezone.now(), **counters
+                    )
+
+                archive.writestr('report.csv', _report_csv(batch_report(batch)))
+
+            archive_file.seek(0)
+            batch.refresh_from_db()
+            batch.archive.save(batch.archive_filename, File(archive_file), save=False)
+    except Exception as e:
+        logger.error(f"❌ Document batch {batch_id} failed: {e}")
+        _fail_batch(batch, str(e))
+        batch.refresh_from_db()
+        return batch
+
+    # usage_count is only bumped here, so resumed documents were never counted
+    generated = succeeded + len(resumed)
+    if generated:
+        DocumentTemplate.objects.filter(pk=template.pk).update(usage_count=F('usage_count') + generated)
+
+    batch.status = 'completed' if generated else 'failed'
+    batch.error_message = '' if generated else 'No document could be generated'
+    batch.completed_at = timezone.now()
+    batch.save(update_fields=['archive', 'status', 'error_message', 'completed_at', 'updated_at'])
+    logger.info(
+        f"✅ Document batch {batch_id}: {batch.succeeded_rows} generated, {batch.failed_rows} failed"
+    )
+    return batch
+
+
+# ---------------------------------------------------------------------------
+# Recovery
+# ---------------------------------------------------------------------------
+
+def reclaim_stale_batches(stale_seconds=None):
+    """
+    Re-queue processing batches whose heartbeat (``updated_at``) is older
+    than DOCUMENT_BATCH_STALE_SECONDS. Documents caught mid-render go back to
+    draft; completed ones are kept and reused by ``process_batch``.
+
+    Returns:
+        list: ids of the re-queued batches
+    """
+    if stale_seconds is None:
+        stale_seconds = getattr(settings, 'DOCUMENT_BATCH_STALE_SECONDS', 900)
+    now = timezone.now()
+    reclaimed = []
+    with transaction.atomic():
+        stale = DocumentBatch.objects.select_for_update(skip_locked=True).filter(
+            status='processing', updated_at__lt=now - timedelta(seconds=stale_seconds)
+        )
+        for batch_id in stale.values_list('id', flat=True):
+            UserDocument.objects.filter(batch_id=batch_id, status='generating').update(
+                status='draft', generation_started_at=None, updated_at=now
+            )
+            DocumentBatch.objects.filter(pk=batch_id).update(status='queued', updated_at=now)
+            reclaimed.append(batch_id)
+
+    for batch_id in reclaimed:
+        logger.warning(f"♻️ Document batch {batch_id} stalled while processing, re-queued")
+    return reclaimed
+
+
+def process_queued_batches():
+    """
+    Render every queued batch, oldest first (new uploads, and batches
+    re-queued by ``reclaim_stale_batches``).
+
+    Returns:
+        int: number of batches processed
+    """
+    processed = 0
+    for batch_id in DocumentBatch.objects.filter(status='queued').order_by('created_at').values_list('id', flat=True):
+        if process_batch(batch_id) is not None:
+            processed += 1
+    return processed
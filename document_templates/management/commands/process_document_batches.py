@@ -0,0 +1,54 @@
+"""
+Management command to resume batch document generation
+Usage: python manage.py process_document_batches [--stale-seconds 900] [--interval 60]
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from document_templates.batch_generation import process_queued_batches, reclaim_stale_batches
+
+
+class Command(BaseCommand):
+    help = 'Re-queue stalled document batches and render every queued batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--stale-seconds',
+            type=int,
+            default=None,
+            help='Re-queue processing batches idle this long (default: DOCUMENT_BATCH_STALE_SECONDS)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Repeat every N seconds as a long-lived worker (0 = run once)',
+        )
+
+    def handle(self, *args, **options):
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        while True:
+            reclaimed = reclaim_stale_batches(options['stale_seconds'])
+            if reclaimed:
+                self.stdout.write(self.style.WARNING(f'♻️  Re-queued {len(reclaimed)} stalled batch(es)'))
+            processed = process_queued_batches()
+            if processed or not options['interval']:
+                self.stdout.write(self.style.SUCCESS(f'✅ Document batches processed: {processed}'))
+            if not options['interval']:
+                break
+            deadline = time.monotonic() + options['interval']
+            while self._running and time.monotonic() < deadline:
+                time.sleep(1)
+            if not self._running:
+                break
+            close_old_connections()
+
+    def _stop(self, signum, frame):
+        self._running = False
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.7 on 2026-10-18 23:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_templates', '0002_documentcontent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userdocument',
+            name='batch_row',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='DocumentBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('language', models.CharField(choices=[('en', 'English'), ('sw', 'Swahili')], default='en', max_length=2)),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed')], default='queued', max_length=20)),
+                ('source_file', models.FileField(upload_to='document_batches/sources/%Y/%m/')),
+                ('archive', models.FileField(blank=True, help_text='ZIP of generated PDFs plus report.csv', null=True, upload_to='document_batches/archives/%Y/%m/')),
+                ('total_rows', models.PositiveIntegerField(default=0)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('succeeded_rows', models.PositiveIntegerField(default=0)),
+                ('failed_rows', models.PositiveIntegerField(default=0)),
+                ('error_message', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='batches', to='document_templates.documenttemplate')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_batches', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Document Batch',
+                'verbose_name_plural': 'Document Batches',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='userdocument',
+            name='batch',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='documents', to='document_templates.documentbatch'),
+        ),
+        migrations.AddIndex(
+            model_name='documentbatch',
+            index=models.Index(fields=['user', '-created_at'], name='document_te_user_id_a5483c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='documentbatch',
+            index=models.Index(fields=['status', '-created_at'], name='document_te_status_e769a3_idx'),
+        ),
+    ]
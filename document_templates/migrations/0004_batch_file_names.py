@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-19 00:44
+
+import document_templates.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('document_templates', '0003_document_batches'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='documentbatch',
+            name='archive',
+            field=models.FileField(blank=True, help_text='ZIP of generated PDFs plus report.csv', null=True, upload_to=document_templates.models.batch_archive_path),
+        ),
+        migrations.AlterField(
+            model_name='documentbatch',
+            name='source_file',
+            field=models.FileField(upload_to=document_templates.models.batch_source_path),
+        ),
+    ]
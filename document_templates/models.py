@@ -17,8 +17,11 @@ Templates include:
 from django.db import models
 from django.core.validators import MinValueValidator
 from django.utils import timezone
+from django.utils.text import slugify
 from authentication.models import PolaUser
 import json
+import os
+import uuid
 
 
 class DocumentTemplate(models.Model):
@@ -310,6 +313,16 @@ class UserDocument(models.Model):
     download_count = models.IntegerField(default=0)
     last_downloaded_at = models.DateTimeField(null=True, blank=True)
     
+    # Batch generation (spreadsheet row this document came from)
+    batch = models.ForeignKey(
+        'DocumentBatch',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='documents'
+    )
+    batch_row = models.PositiveIntegerField(null=True, blank=True)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -427,6 +440,87 @@ class UserDocumentData(models.Model):
         return f"{self.user_document} - {self.field.field_name}: {self.value[:50]}"
 
 
+def batch_source_path(instance, filename):
+    """Random name so uploaded staff spreadsheets cannot be guessed"""
+    extension = os.path.splitext(filename)[1].lower()
+    return f"document_batches/sources/{timezone.now():%Y/%m}/{uuid.uuid4().hex}{extension}"
+
+
+def batch_archive_path(instance, filename):
+    """Random name so batch ZIPs cannot be enumerated by batch id"""
+    return f"document_batches/archives/{timezone.now():%Y/%m}/{uuid.uuid4().hex}.zip"
+
+
+class DocumentBatch(models.Model):
+    """
+    Bulk generation of one template from a CSV/XLSX file
+    Each data row becomes a UserDocument; PDFs are bundled into one ZIP
+    """
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('processing', 'Processing'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(
+        PolaUser,
+        on_delete=models.CASCADE,
+        related_name='document_batches'
+    )
+    template = models.ForeignKey(
+        DocumentTemplate,
+        on_delete=models.CASCADE,
+        related_name='batches'
+    )
+    language = models.CharField(max_length=2, choices=UserDocument.LANGUAGE_CHOICES, default='en')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+
+    source_file = models.FileField(upload_to=batch_source_path)
+    archive = models.FileField(
+        upload_to=batch_archive_path,
+        null=True,
+        blank=True,
+        help_text="ZIP of generated PDFs plus report.csv"
+    )
+
+    # Progress
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    succeeded_rows = models.PositiveIntegerField(default=0)
+    failed_rows = models.PositiveIntegerField(default=0)
+
+    error_message = models.TextField(blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Document Batch'
+        verbose_name_plural = 'Document Batches'
+        indexes = [
+            models.Index(fields=['user', '-created_at']),
+            models.Index(fields=['status', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.template.name} x{self.total_rows} ({self.status})"
+
+    @property
+    def progress(self):
+        """Percentage of rows rendered (successfully or not)"""
+        if not self.total_rows:
+            return 0
+        return round(self.processed_rows * 100 / self.total_rows)
+
+    @property
+    def archive_filename(self):
+        """Download name for the ZIP (the stored name is random)"""
+        return f"{slugify(self.template.name) or 'documents'}_batch_{self.pk}.zip"
+
+
 class DocumentContent(models.Model):
     """
     Markdown-based documents for policies, terms, conditions, and general content
@@ -8,6 +8,7 @@ from .models import (
     TemplateField,
     UserDocument,
     UserDocumentData,
+    DocumentBatch,
     DocumentContent
 )
 
@@ -163,6 +164,42 @@ class ValidateDocumentDataSerializer(serializers.Serializer):
         return value
 
 
+class DocumentBatchSerializer(serializers.ModelSerializer):
+    """Serializer for batch generation progress"""
+    template_name = serializers.CharField(source='template.name', read_only=True)
+    progress = serializers.IntegerField(read_only=True)
+    has_archive = serializers.SerializerMethodField()
+
+    class Meta:
+        model = DocumentBatch
+        fields = [
+            'id', 'template', 'template_name', 'language', 'status',
+            'total_rows', 'processed_rows', 'succeeded_rows', 'failed_rows',
+            'progress', 'has_archive', 'error_message',
+            'started_at', 'completed_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_has_archive(self, obj):
+        return bool(obj.archive)
+
+
+class CreateDocumentBatchSerializer(serializers.Serializer):
+    """Serializer for batch generation request (multipart upload)"""
+    template_id = serializers.IntegerField(required=True)
+    language = serializers.ChoiceField(choices=['en', 'sw'], default='en')
+    file = serializers.FileField(required=True, help_text="CSV or XLSX, header row = field names")
+
+    def validate_template_id(self, value):
+        """Validate template exists, is active and free (batches have no payment step)"""
+        template = DocumentTemplate.objects.filter(id=value, is_active=True).first()
+        if template is None:
+            raise serializers.ValidationError("Template not found or inactive")
+        if not template.is_free and template.price > 0:
+            raise serializers.ValidationError("Paid templates cannot be generated in batches")
+        return value
+
+
 class DocumentContentListSerializer(serializers.ModelSerializer):
     """Serializer for document content list view"""
 
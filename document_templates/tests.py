@@ -1,3 +1,207 @@
-from django.test import TestCase
+import csv
+import io
+import shutil
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+
+from document_templates.batch_generation import _render_all, process_batch, read_rows, reclaim_stale_batches
+from document_templates.models import DocumentBatch, DocumentTemplate, TemplateField, UserDocument, UserDocumentData
+from utils.testing import create_test_admin
+
+TEMPLATE_HTML = '<html><body><h1>Contract</h1><p>{{ employee_name }} ({{ employee_email }}) - {{ salary }}</p></body></html>'
+
+
+class DocumentBatchTestCase(TestCase):
+    """Test suite for batch document generation"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            MEDIA_ROOT=self.tmpdir, DOCUMENT_BATCH_ASYNC=False, DOCUMENT_BATCH_WORKERS=1
+        )
+        self.settings_override.enable()
+        self.user = create_test_admin('batch-hr@test.com', 'Hr', 'Manager')
+        self.template = DocumentTemplate.objects.create(
+            name='Employment Contract', name_sw='Mkataba wa Ajira',
+            description='Contract', description_sw='Mkataba', category='employment',
+            template_content_en=TEMPLATE_HTML, template_content_sw=TEMPLATE_HTML
+        )
+        TemplateField.objects.create(
+            template=self.template, field_name='employee_name', label_en='Employee name',
+            label_sw='Jina', field_type='text', validation_rules={'min_length': 3}
+        )
+        TemplateField.objects.create(
+            template=self.template, field_name='employee_email', label_en='Employee email',
+            label_sw='Barua pepe', field_type='email'
+        )
+        TemplateField.objects.create(
+            template=self.template, field_name='salary', label_en='Salary',
+            label_sw='Mshahara', field_type='number'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = '/api/v1/doc-templates/batches/'
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _csv(self, rows, header=('employee_name', 'employee_email', 'salary', 'document_title')):
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(header)
+        writer.writerows(rows)
+        return SimpleUploadedFile('staff.csv', output.getvalue().encode('utf-8'), content_type='text/csv')
+
+    def _upload(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(
+                self.url, {'template_id': self.template.pk, 'language': 'en', 'file': upload}, format='multipart'
+            )
+
+    def test_invalid_rows_are_reported_and_nothing_is_created(self):
+        response = self._upload(self._csv([
+            ['Asha Juma', 'asha@example.com', '1500000', ''],
+            ['Al', 'not-an-email', '1200000', ''],
+            ['', 'john@example.com', 'lots', ''],
+        ]))
+
+        self.assertEqual(response.status_code, 400)
+        errors = {item['row']: item['errors'] for item in response.data['row_errors']}
+        self.assertEqual(set(errors), {3, 4})
+        self.assertEqual(set(errors[3]), {'employee_name', 'employee_email'})
+        self.assertEqual(set(errors[4]), {'employee_name', 'salary'})
+        self.assertFalse(DocumentBatch.objects.exists())
+        self.assertFalse(UserDocument.objects.exists())
+
+    def test_paid_templates_are_rejected(self):
+        DocumentTemplate.objects.filter(pk=self.template.pk).update(is_free=False, price=5000)
+        response = self._upload(self._csv([['Asha Juma', 'asha@example.com', '1500000', '']]))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('template_id', response.data)
+        self.assertFalse(DocumentBatch.objects.exists())
+        self.assertFalse(UserDocument.objects.exists())
+
+    def test_batch_generates_zip_with_report(self):
+        response = self._upload(self._csv([
+            ['Asha Juma', 'asha@example.com', '1500000', 'Contract - Asha'],
+            [],
+            ['John Mushi', 'john@example.com', '1200000', ''],
+        ]))
+
+        self.assertEqual(response.status_code, 202)
+        batch = DocumentBatch.objects.get(pk=response.data['batch']['id'])
+        self.assertEqual(batch.status, 'completed')
+        self.assertEqual((batch.total_rows, batch.succeeded_rows, batch.failed_rows), (2, 2, 0))
+        self.assertEqual(UserDocumentData.objects.filter(user_document__batch=batch).count(), 6)
+
+        documents = list(batch.documents.order_by('batch_row'))
+        self.assertEqual([d.batch_row for d in documents], [2, 4])
+        self.assertEqual([d.document_title for d in documents], ['Contract - Asha', 'Employment Contract'])
+        self.assertTrue(all(d.status == 'completed' and d.generated_file for d in documents))
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.usage_count, 2)
+
+        with batch.archive.open('rb') as fh, zipfile.ZipFile(fh) as archive:
+            names = sorted(archive.namelist())
+            self.assertEqual(names, ['0002_contract-asha.pdf', '0004_employment-contract.pdf', 'report.csv'])
+            self.assertTrue(archive.read('0002_contract-asha.pdf').startswith(b'%PDF'))
+            report = list(csv.DictReader(io.StringIO(archive.read('report.csv').decode())))
+        self.assertEqual([(r['row'], r['status']) for r in report], [('2', 'completed'), ('4', 'completed')])
+
+        progress = self.client.get(f'{self.url}{batch.pk}/')
+        self.assertEqual(progress.data['progress'], 100)
+        self.assertTrue(progress.data['has_archive'])
+        report = self.client.get(f'{self.url}{batch.pk}/report/')
+        self.assertEqual([row['document_id'] for row in report.data['rows']], [d.pk for d in documents])
+        download = self.client.get(f'{self.url}{batch.pk}/download/')
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download.data['filename'], f'employment-contract_batch_{batch.pk}.zip')
+        # Stored names are random, not derived from the batch id or template
+        self.assertRegex(batch.archive.name, r'^document_batches/archives/\d{4}/\d{2}/[0-9a-f]{32}\.zip$')
+        self.assertRegex(batch.source_file.name, r'^document_batches/sources/\d{4}/\d{2}/[0-9a-f]{32}\.csv$')
+
+    def test_progress_while_queued_and_rows_that_fail_to_render(self):
+        with self.settings(DOCUMENT_BATCH_ASYNC=True, DOCUMENT_BATCH_WORKERS=4):
+            # The web process leaves the batch queued for process_document_batches
+            response = self._upload(self._csv([['Asha Juma', 'asha@example.com', '1', '']]))
+        batch_id = response.data['batch']['id']
+        progress = self.client.get(f'{self.url}{batch_id}/')
+        self.assertEqual((progress.data['status'], progress.data['progress']), ('queued', 0))
+        self.assertEqual(self.client.get(f'{self.url}{batch_id}/download/').status_code, 404)
+
+        DocumentTemplate.objects.filter(pk=self.template.pk).update(template_content_en='<html>{% broken %}</html>')
+        batch = process_batch(batch_id)
+        self.assertEqual((batch.status, batch.failed_rows), ('failed', 1))
+        self.assertEqual(batch.documents.get().status, 'failed')
+        self.assertIsNone(process_batch(batch_id))
+
+    def test_request_processes_render_without_a_process_pool(self):
+        with self.settings(DOCUMENT_BATCH_WORKERS=4), \
+                mock.patch('document_templates.batch_generation._render_all', wraps=_render_all) as render:
+            response = self._upload(self._csv([['Asha Juma', 'asha@example.com', '1500000', '']]))
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(DocumentBatch.objects.get().status, 'completed')
+        self.assertEqual(render.call_args.args[1], 1)
+
+    def test_stalled_batch_is_reclaimed_and_resumed(self):
+        with self.settings(DOCUMENT_BATCH_ASYNC=True):
+            response = self.client.post(self.url, {
+                'template_id': self.template.pk,
+                'file': self._csv([
+                    ['Asha Juma', 'asha@example.com', '1', ''],
+                    ['John Mushi', 'john@example.com', '2', ''],
+                ]),
+            }, format='multipart')
+        batch = DocumentBatch.objects.get(pk=response.data['batch']['id'])
+
+        # The worker died after rendering the first row
+        first, second = batch.documents.order_by('batch_row')
+        first.generated_file.save('first.pdf', ContentFile(b'%PDF-rendered-before-crash'), save=False)
+        first.status = 'completed'
+        first.save()
+        UserDocument.objects.filter(pk=second.pk).update(status='generating')
+        DocumentBatch.objects.filter(pk=batch.pk).update(
+            status='processing', processed_rows=1, succeeded_rows=1, updated_at=timezone.now()
+        )
+        self.assertEqual(reclaim_stale_batches(), [])
+
+        DocumentBatch.objects.filter(pk=batch.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        call_command('process_document_batches', stdout=io.StringIO())
+
+        batch.refresh_from_db()
+        self.assertEqual(batch.status, 'completed')
+        self.assertEqual((batch.processed_rows, batch.succeeded_rows, batch.failed_rows), (2, 2, 0))
+        self.assertEqual(set(batch.documents.values_list('status', flat=True)), {'completed'})
+        self.template.refresh_from_db()
+        self.assertEqual(self.template.usage_count, 2)
+        with batch.archive.open('rb') as fh, zipfile.ZipFile(fh) as archive:
+            self.assertEqual(archive.read('0002_employment-contract.pdf'), b'%PDF-rendered-before-crash')
+            self.assertTrue(archive.read('0003_employment-contract.pdf').startswith(b'%PDF'))
+
+    def test_read_rows_from_xlsx(self):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet.append(['employee_name', 'employee_email', 'start_date', 'salary'])
+        sheet.append(['Asha Juma', 'asha@example.com', date(2026, 1, 5), 1500000.0])
+        sheet.append([None, None, None, None])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        rows = read_rows(SimpleUploadedFile('staff.xlsx', buffer.getvalue()))
+        self.assertEqual(rows, [{'row': 2, 'values': {
+            'employee_name': 'Asha Juma', 'employee_email': 'asha@example.com',
+            'start_date': '2026-01-05', 'salary': '1500000',
+        }}])
@@ -3,11 +3,12 @@ Document Template URLs
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import DocumentTemplateViewSet, UserDocumentViewSet, DocumentContentAdminViewSet, DocumentContentPublicViewSet
+from .views import DocumentTemplateViewSet, UserDocumentViewSet, DocumentBatchViewSet, DocumentContentAdminViewSet, DocumentContentPublicViewSet
 
 router = DefaultRouter()
 router.register(r'templates', DocumentTemplateViewSet, basename='document-template')
 router.register(r'documents', UserDocumentViewSet, basename='user-document')
+router.register(r'batches', DocumentBatchViewSet, basename='document-batch')
 router.register(r'admin/document-content', DocumentContentAdminViewSet, basename='document-content-admin')
 router.register(r'document-content', DocumentContentPublicViewSet, basename='document-content-public')
 
@@ -384,6 +384,96 @@ class PDFGenerator:
         pdf_path = self.html_to_pdf(rendered_html, output_path)
         
         return pdf_path
+    
+    def generate_pdf_bytes(self, template_content, user_data):
+        """
+        Render a document straight to PDF bytes (no temp file, no HTML fallback)
+        
+        Args:
+            template_content (str): HTML template
+            user_data (dict): User's filled data
+        
+        Returns:
+            bytes: PDF content
+        
+        Raises:
+            Exception: If xhtml2pdf reports errors or produces no output
+        """
+        from io import BytesIO
+        from xhtml2pdf import pisa
+        
+        rendered_html = self.render_template(template_content, user_data)
+        buffer = BytesIO()
+        pisa_status = pisa.CreatePDF(
+            self.add_css(rendered_html).encode('utf-8'),
+            dest=buffer,
+            encoding='utf-8'
+        )
+        if pisa_status.err:
+            raise Exception(f"PDF generation had {pisa_status.err} error(s)")
+        content = buffer.getvalue()
+        if not content:
+            raise Exception("PDF file was not created or is empty")
+        return content
+
+
+def init_render_worker():
+    """Process-pool initializer (spawned workers start without Django set up)"""
+    import django
+    
+    django.setup()
+
+
+def render_document_job(job):
+    """
+    Process-pool task: render one document to PDF bytes (no database access)
+    
+    Lives here rather than next to the models so a spawned worker can
+    unpickle it before django.setup() runs.
+    
+    Args:
+        job (tuple): (document id, template HTML, user data)
+    
+    Returns:
+        tuple: (document id, PDF bytes or None, error message or None)
+    """
+    document_id, template_content, data = job
+    try:
+        return document_id, PDFGenerator().generate_pdf_bytes(template_content, data), None
+    except Exception as e:
+        return document_id, None, str(e)
+
+
+def load_template_content(template, language='en'):
+    """
+    HTML of a template in the requested language
+    
+    The stored content is either full HTML (starts with <!DOCTYPE / <html>)
+    or a filename in document_templates/templates/
+    
+    Args:
+        template (DocumentTemplate): Template instance
+        language (str): 'en' or 'sw'
+    
+    Returns:
+        str: Template HTML
+    """
+    template_content_or_file = (
+        template.template_content_sw if language == 'sw'
+        else template.template_content_en
+    )
+    
+    if template_content_or_file.strip().startswith(('<!DOCTYPE', '<html', '<HTML')):
+        return template_content_or_file
+    
+    template_path = os.path.join(
+        settings.BASE_DIR,
+        'document_templates',
+        'templates',
+        template_content_or_file
+    )
+    with open(template_path, 'r', encoding='utf-8') as f:
+        return f.read()
 
 
 def validate_field_data(field, value):
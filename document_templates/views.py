@@ -19,6 +19,7 @@ from .models import (
     TemplateField,
     UserDocument,
     UserDocumentData,
+    DocumentBatch,
     DocumentContent
 )
 from .serializers import (
@@ -26,12 +27,24 @@ from .serializers import (
     DocumentTemplateDetailSerializer,
     UserDocumentSerializer,
     GenerateDocumentSerializer,
+    DocumentBatchSerializer,
+    CreateDocumentBatchSerializer,
     ValidateDocumentDataSerializer,
     DocumentContentListSerializer,
     DocumentContentDetailSerializer,
     DocumentContentCreateUpdateSerializer
 )
-from .utils.pdf_generator import PDFGenerator, validate_field_data
+from .batch_generation import BatchFileError, batch_report, create_batch, read_rows, validate_rows
+from .utils.pdf_generator import PDFGenerator, load_template_content, validate_field_data
+from utils.media_gateway import download_link, record_download
+
+DOWNLOAD_RESTRICTED_RESPONSE = {
+    'error': 'Subscription required',
+    'message': 'Free trial users can generate and preview documents but cannot download. Please subscribe to download your documents.',
+    'message_sw': 'Watumiaji wa jaribio bure wanaweza kutengeneza na kuona nyaraka lakini hawawezi kupakua. Tafadhali jiandikishe kupakua nyaraka zako.',
+    'upgrade_required': True,
+    'restriction': 'document_download'
+}
 
 
 class DocumentTemplateViewSet(viewsets.ReadOnlyModelViewSet):
@@ -197,42 +210,22 @@ class UserDocumentViewSet(viewsets.ModelViewSet):
         )
         
         # Save field data
-        for field in template.fields.all():
-            if field.field_name in user_data:
-                UserDocumentData.objects.create(
-                    user_document=user_document,
-                    field=field,
-                    value=str(user_data[field.field_name])
-                )
+        UserDocumentData.objects.bulk_create([
+            UserDocumentData(
+                user_document=user_document,
+                field=field,
+                value=str(user_data[field.field_name])
+            )
+            for field in template.fields.all()
+            if field.field_name in user_data
+        ])
         
         # Mark as generating
         user_document.mark_as_generating()
         
         try:
-            # Get template content/filename in requested language
-            template_content_or_file = (
-                template.template_content_sw if language == 'sw'
-                else template.template_content_en
-            )
-            
-            # Check if it's a filename or full HTML content
-            # If it starts with <!DOCTYPE or <html>, it's full HTML content
-            # Otherwise, treat it as a filename and load from file
-            if template_content_or_file.strip().startswith(('<!DOCTYPE', '<html', '<HTML')):
-                # It's full HTML content stored in database
-                template_content = template_content_or_file
-            else:
-                # It's a filename, load from templates directory
-                from django.conf import settings
-                template_path = os.path.join(
-                    settings.BASE_DIR,
-                    'document_templates',
-                    'templates',
-                    template_content_or_file
-                )
-                
-                with open(template_path, 'r', encoding='utf-8') as f:
-                    template_content = f.read()
+            # Get template HTML (stored content or file) in requested language
+            template_content = load_template_content(template, language)
             
             # Generate PDF
             pdf_generator = PDFGenerator()
@@ -313,23 +306,117 @@ class UserDocumentViewSet(viewsets.ModelViewSet):
         from subscriptions.permissions import check_subscription_permission
         if not request.user.is_staff and not request.user.is_superuser:
             if not check_subscription_permission(request.user, 'can_download_templates'):
-                return Response({
-                    'error': 'Subscription required',
-                    'message': 'Free trial users can generate and preview documents but cannot download. Please subscribe to download your documents.',
-                    'message_sw': 'Watumiaji wa jaribio bure wanaweza kutengeneza na kuona nyaraka lakini hawawezi kupakua. Tafadhali jiandikishe kupakua nyaraka zako.',
-                    'upgrade_required': True,
-                    'restriction': 'document_download'
-                }, status=status.HTTP_403_FORBIDDEN)
-        
-        # Increment download counter
-        user_document.increment_download()
-        
-        # Return file URL
+                return Response(DOWNLOAD_RESTRICTED_RESPONSE, status=status.HTTP_403_FORBIDDEN)
+        
+        # Increment download counter (off the request thread)
+        record_download(user_document, 'download_count', 'last_downloaded_at')
+        
+        # Return short-lived signed file URL
+        return Response(download_link(request, user_document.generated_file))
+
+
+class DocumentBatchViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Bulk document generation from a CSV/XLSX file (one document per row)
+    
+    Endpoints:
+    - POST /api/v1/batches/ - Upload rows for one template (multipart)
+    - GET /api/v1/batches/ - List user's batches
+    - GET /api/v1/batches/{id}/ - Progress (poll until completed/failed)
+    - GET /api/v1/batches/{id}/report/ - Per-row status
+    - GET /api/v1/batches/{id}/download/ - ZIP of PDFs + report.csv
+    """
+    permission_classes = [IsAuthenticated]
+    serializer_class = DocumentBatchSerializer
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
+    filterset_fields = ['template', 'status']
+    ordering_fields = ['created_at']
+    ordering = ['-created_at']
+    
+    def get_queryset(self):
+        """Only return user's own batches"""
+        if getattr(self, 'swagger_fake_view', False):
+            return DocumentBatch.objects.none()
+        
+        return DocumentBatch.objects.filter(user=self.request.user).select_related('template')
+    
+    def create(self, request):
+        """
+        Validate every row, then queue generation
+        
+        POST /api/v1/batches/
+        Form data: template_id, language, file (.csv/.xlsx; header row = field
+        names, optional document_title column)
+        
+        Nothing is created if any row is invalid; the response lists the
+        errors per spreadsheet row.
+        """
+        serializer = CreateDocumentBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        template = DocumentTemplate.objects.get(id=serializer.validated_data['template_id'])
+        language = serializer.validated_data['language']
+        upload = serializer.validated_data['file']
+        
+        try:
+            rows = read_rows(upload)
+        except BatchFileError as e:
+            return Response({'file': [str(e)]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        row_errors, unknown_columns = validate_rows(template, rows)
+        warnings = [f"Unknown columns will be ignored: {', '.join(unknown_columns)}"] if unknown_columns else []
+        if row_errors:
+            return Response({
+                'success': False,
+                'message': f'{len(row_errors)} of {len(rows)} rows are invalid',
+                'row_errors': row_errors,
+                'warnings': warnings
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        batch = create_batch(request.user, template, language, upload, rows)
+        batch.refresh_from_db()
+        return Response({
+            'success': True,
+            'message': f'Generating {len(rows)} documents',
+            'warnings': warnings,
+            'batch': DocumentBatchSerializer(batch).data
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=True, methods=['get'])
+    def report(self, request, pk=None):
+        """
+        Per-row generation status
+        
+        GET /api/v1/batches/{id}/report/
+        """
+        batch = self.get_object()
         return Response({
-            'download_url': request.build_absolute_uri(user_document.generated_file.url),
-            'filename': os.path.basename(user_document.generated_file.name),
-            'file_size': user_document.generated_file.size
+            'batch': DocumentBatchSerializer(batch).data,
+            'rows': batch_report(batch)
         })
+    
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        Download the batch ZIP
+        
+        GET /api/v1/batches/{id}/download/
+        """
+        batch = self.get_object()
+        
+        if not batch.archive:
+            return Response({
+                'error': 'Batch archive not available',
+                'status': batch.status
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        from subscriptions.permissions import check_subscription_permission
+        if not request.user.is_staff and not request.user.is_superuser:
+            if not check_subscription_permission(request.user, 'can_download_templates'):
+                return Response(DOWNLOAD_RESTRICTED_RESPONSE, status=status.HTTP_403_FORBIDDEN)
+        
+        return Response(download_link(request, batch.archive, filename=batch.archive_filename))
 
 
 class DocumentContentAdminViewSet(viewsets.ModelViewSet):
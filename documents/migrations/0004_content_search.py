@@ -0,0 +1,48 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:17
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+GIN_INDEX = django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='material_search_gin')
+
+
+def create_gin_index(apps, schema_editor):
+    """GIN indexes only exist on PostgreSQL; other databases use the python search backend"""
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.add_index(apps.get_model('documents', 'LearningMaterial'), GIN_INDEX)
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.remove_index(apps.get_model('documents', 'LearningMaterial'), GIN_INDEX)
+
+
+def backfill_search_vectors(apps, schema_editor):
+    from hubs.content_search import rebuild_search_index
+
+    rebuild_search_index(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_alter_learningmaterial_subtopic_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='learningmaterial',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Weighted title/description/content terms (PostgreSQL search backend)', null=True),
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddIndex(model_name='learningmaterial', index=GIN_INDEX),
+            ],
+            database_operations=[
+                migrations.RunPython(create_gin_index, drop_gin_index),
+            ],
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -8,6 +8,8 @@ This app manages all document-related functionality including:
 
 Moved from subscriptions app for better separation of concerns.
 """
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.utils import timezone
 from django.core.validators import MinValueValidator
@@ -205,6 +207,13 @@ class LearningMaterial(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Full-text search (maintained by hubs/content_search.py)
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Weighted title/description/content terms (PostgreSQL search backend)"
+    )
+    
     class Meta:
         ordering = ['-is_pinned', '-created_at']
         verbose_name = 'Hub Content'
@@ -218,6 +227,7 @@ class LearningMaterial(models.Model):
             models.Index(fields=['is_approved', 'is_active']),
             models.Index(fields=['topic', '-created_at']),
             models.Index(fields=['subtopic', '-created_at']),
+            GinIndex(fields=['search_vector'], name='material_search_gin'),
         ]
     
     def __str__(self):
@@ -312,7 +322,12 @@ class LearningMaterial(models.Model):
         # Update earnings
         self.uploader_earnings += uploader_share
         self.platform_earnings += app_share
-        self.save()
+        self.save(update_fields=[
+            'downloads_count', 'total_revenue', 'uploader_earnings', 'platform_earnings', 'updated_at'
+        ])
+        
+        from hubs.engagement_rollup import record_engagement
+        record_engagement(self.pk, 'downloads')
         
         # Create UploaderEarnings record for tracking (if uploader gets a share)
         earning = None
@@ -337,6 +352,9 @@ class LearningMaterial(models.Model):
             # Increment download for existing purchase
             purchase.increment_download()
         
+        from subscriptions.entitlements import MATERIAL, grant
+        grant(buyer.pk, MATERIAL, self.pk, source='direct_purchase', amount=self.price, label=self.title)
+        
         return {
             'uploader_share': uploader_share,
             'app_share': app_share,
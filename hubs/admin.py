@@ -5,7 +5,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
     LegalEdTopic, LegalEdSubTopic,
-    HubComment, ContentLike, HubCommentLike, ContentBookmark, HubMessage,
+    HubComment, ContentLike, HubCommentLike, ContentBookmark, HubMessage, MaterialPreview,
     StudentHubDownload, StudentHubComment  # These are deprecated
 )
 from documents.models import LearningMaterial  # Unified content model
@@ -143,6 +143,17 @@ class HubMessageAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
 
 
+@admin.register(MaterialPreview)
+class MaterialPreviewAdmin(admin.ModelAdmin):
+    """Preview queue: rendering status and errors per material"""
+    list_display = ['material', 'status', 'page_count', 'attempts', 'updated_at']
+    list_filter = ['status']
+    search_fields = ['material__title', 'source_name']
+    ordering = ['-updated_at']
+    raw_id_fields = ['material']
+    readonly_fields = ['source_name', 'thumbnails', 'page_count', 'extracted_text', 'last_error', 'created_at', 'updated_at']
+
+
 # ============================================================================
 # STUDENTS HUB ADMIN
 # ============================================================================
@@ -22,6 +22,9 @@ from documents.models import LearningMaterial, LearningMaterialPurchase, Lecture
 from .models import (
     HubComment, ContentLike, ContentBookmark, HubMessage
 )
+from .engagement_rollup import daily_trends, trending_content, uploader_totals, top_uploaders
+from .comment_threads import attach_thread_data
+from utils.db_routing import read_only_replica
 from .serializers import (
     HubContentSerializer, HubCommentSerializer,
     LecturerFollowSerializer, MaterialQuestionSerializer,
@@ -88,7 +91,7 @@ class AdminHubContentViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filter by hub_type and other params - works like public API"""
         queryset = LearningMaterial.objects.all().select_related(
-            'uploader', 'uploader__verification', 'topic', 'subtopic'
+            'uploader', 'uploader__verification', 'topic', 'subtopic', 'preview'
         ).prefetch_related('likes', 'comments', 'bookmarks', 'ratings', 'purchases')
         
         # Handle topic_slug parameter (like public API)
@@ -473,6 +476,7 @@ class AdminHubContentViewSet(viewsets.ModelViewSet):
         responses={200: 'Statistics retrieved'}
     )
     @action(detail=False, methods=['get'])
+    @read_only_replica
     def statistics(self, request):
         """Get comprehensive statistics"""
         hub_type = request.query_params.get('hub_type')
@@ -611,31 +615,27 @@ class AdminHubContentViewSet(viewsets.ModelViewSet):
         days = int(request.query_params.get('days', 7))
         limit = int(request.query_params.get('limit', 10))
         
-        since_date = timezone.now() - timedelta(days=days)
+        since_day = timezone.localdate(timezone.now() - timedelta(days=days))
         
         queryset = self.get_queryset()
         if hub_type:
             queryset = queryset.filter(hub_type=hub_type)
         
-        # Calculate engagement score based on recent activity
-        queryset = queryset.annotate(
-            recent_likes=Count('likes', filter=Q(likes__created_at__gte=since_date)),
-            recent_comments=Count('comments', filter=Q(comments__created_at__gte=since_date)),
-            recent_bookmarks=Count('bookmarks', filter=Q(bookmarks__created_at__gte=since_date))
-        ).annotate(
-            engagement_score=Count('likes', filter=Q(likes__created_at__gte=since_date)) * 2 +
-                           Count('comments', filter=Q(comments__created_at__gte=since_date)) * 3 +
-                           Count('bookmarks', filter=Q(bookmarks__created_at__gte=since_date)) * 4
-        ).filter(engagement_score__gt=0).order_by('-engagement_score')[:limit]
+        # Rank from the daily engagement rollup, then load only the winners
+        ranked = trending_content(since_day, queryset, limit)
+        contents = queryset.in_bulk([row['content_id'] for row in ranked])
         
         data = []
-        for content in queryset:
+        for row in ranked:
+            content = contents.get(row['content_id'])
+            if content is None:
+                continue
             serialized = self.get_serializer(content).data
             serialized['trending_stats'] = {
-                'recent_likes': content.recent_likes,
-                'recent_comments': content.recent_comments,
-                'recent_bookmarks': content.recent_bookmarks,
-                'engagement_score': content.engagement_score,
+                'recent_likes': row['recent_likes'],
+                'recent_comments': row['recent_comments'],
+                'recent_bookmarks': row['recent_bookmarks'],
+                'engagement_score': row['engagement_score'],
                 'trending_period_days': days
             }
             data.append(serialized)
@@ -658,58 +658,14 @@ class AdminHubContentViewSet(viewsets.ModelViewSet):
         hub_type = request.query_params.get('hub_type')
         days = int(request.query_params.get('days', 30))
         
-        since_date = timezone.now() - timedelta(days=days)
+        since_day = timezone.localdate(timezone.now() - timedelta(days=days))
         
         queryset = self.get_queryset()
         if hub_type:
             queryset = queryset.filter(hub_type=hub_type)
         
-        # Get daily engagement data
-        from django.db.models.functions import TruncDate
-        
-        likes_by_day = ContentLike.objects.filter(
-            content__in=queryset,
-            created_at__gte=since_date
-        ).annotate(date=TruncDate('created_at')).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
-        
-        comments_by_day = HubComment.objects.filter(
-            content__in=queryset,
-            created_at__gte=since_date
-        ).annotate(date=TruncDate('created_at')).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
-        
-        bookmarks_by_day = ContentBookmark.objects.filter(
-            content__in=queryset,
-            created_at__gte=since_date
-        ).annotate(date=TruncDate('created_at')).values('date').annotate(
-            count=Count('id')
-        ).order_by('date')
-        
-        # Combine data
-        trends = {}
-        for item in likes_by_day:
-            date_str = item['date'].strftime('%Y-%m-%d')
-            if date_str not in trends:
-                trends[date_str] = {'date': date_str, 'likes': 0, 'comments': 0, 'bookmarks': 0}
-            trends[date_str]['likes'] = item['count']
-        
-        for item in comments_by_day:
-            date_str = item['date'].strftime('%Y-%m-%d')
-            if date_str not in trends:
-                trends[date_str] = {'date': date_str, 'likes': 0, 'comments': 0, 'bookmarks': 0}
-            trends[date_str]['comments'] = item['count']
-        
-        for item in bookmarks_by_day:
-            date_str = item['date'].strftime('%Y-%m-%d')
-            if date_str not in trends:
-                trends[date_str] = {'date': date_str, 'likes': 0, 'comments': 0, 'bookmarks': 0}
-            trends[date_str]['bookmarks'] = item['count']
-        
-        # Sort by date
-        sorted_trends = sorted(trends.values(), key=lambda x: x['date'])
+        # Daily engagement data from the rollup (one grouped query)
+        sorted_trends = daily_trends(since_day, queryset)
         
         return Response({
             'period_days': days,
@@ -745,30 +701,36 @@ class AdminHubContentViewSet(viewsets.ModelViewSet):
         if hub_type:
             queryset = queryset.filter(hub_type=hub_type)
         
-        # Get top uploaders
+        # Rank uploaders by content count (single grouped query, no joins)
         from django.contrib.auth import get_user_model
         User = get_user_model()
         
-        contributors = User.objects.filter(
-            id__in=queryset.values_list('uploader_id', flat=True)
-        ).annotate(
-            content_count=Count('learning_materials', filter=Q(learning_materials__in=queryset)),
-            total_views=Sum('learning_materials__views_count', filter=Q(learning_materials__in=queryset)),
-            total_likes=Count('learning_materials__likes', filter=Q(learning_materials__in=queryset)),
-            total_downloads=Sum('learning_materials__downloads_count', filter=Q(learning_materials__in=queryset)),
-        ).filter(content_count__gt=0).order_by('-content_count')[:limit]
+        content_counts = list(
+            queryset.order_by().values('uploader_id').annotate(
+                content_count=Count('id')
+            ).order_by('-content_count', 'uploader_id')[:limit]
+        )
+        uploader_ids = [row['uploader_id'] for row in content_counts]
+        users = User.objects.in_bulk(uploader_ids)
+        # Lifetime engagement received, from the daily rollup
+        totals = uploader_totals(uploader_ids, hub_type=hub_type)
         
         data = []
-        for user in contributors:
+        for row in content_counts:
+            user = users.get(row['uploader_id'])
+            if user is None:
+                continue
+            engagement = totals.get(user.id, {})
+            total_views = engagement.get('views', 0)
             data.append({
                 'user_id': user.id,
                 'user_name': user.get_full_name() or user.email,
                 'user_email': user.email,
-                'content_count': user.content_count,
-                'total_views': user.total_views or 0,
-                'total_likes': user.total_likes or 0,
-                'total_downloads': user.total_downloads or 0,
-                'average_views_per_content': (user.total_views or 0) / max(user.content_count, 1),
+                'content_count': row['content_count'],
+                'total_views': total_views,
+                'total_likes': engagement.get('likes', 0),
+                'total_downloads': engagement.get('downloads', 0),
+                'average_views_per_content': total_views / max(row['content_count'], 1),
             })
         
         return Response(data)
@@ -890,14 +852,14 @@ class AdminHubContentViewSet(viewsets.ModelViewSet):
         """Get all comments for this content"""
         content = self.get_object()
         comments = HubComment.objects.filter(content=content).select_related(
-            'author'
-        ).prefetch_related('likes', 'replies').order_by('-created_at')
+            'author__verification'
+        ).order_by('-created_at')
         
         # Pagination
         from rest_framework.pagination import PageNumberPagination
         paginator = PageNumberPagination()
         paginator.page_size = int(request.query_params.get('page_size', 20))
-        paginated_comments = paginator.paginate_queryset(comments, request)
+        paginated_comments = attach_thread_data(paginator.paginate_queryset(comments, request), viewer=request.user)
         
         serializer = HubCommentSerializer(paginated_comments, many=True, context={'request': request})
         return paginator.get_paginated_response(serializer.data)
@@ -1029,6 +991,7 @@ class AdminHubContentViewSet(viewsets.ModelViewSet):
         ).select_related('user').order_by('-created_at')[:10]
         
         # Serialize recent activity
+        recent_comments = attach_thread_data(recent_comments, viewer=request.user)
         comments_data = HubCommentSerializer(recent_comments, many=True, context={'request': request}).data
         
         likes_data = [{
@@ -1427,6 +1390,7 @@ class AdminHubCommentViewSet(viewsets.ModelViewSet):
         responses={200: 'Statistics'}
     )
     @action(detail=False, methods=['get'])
+    @read_only_replica
     def statistics(self, request):
         """Get comment statistics"""
         hub_type = request.query_params.get('hub_type')
@@ -1554,18 +1518,22 @@ class AdminHubUserActivityViewSet(viewsets.ViewSet):
             ).annotate(
                 count=Count('id')
             ).order_by('-count')[:limit]
-        elif metric == 'views':
-            top_users = queryset.values(
-                'uploader__id', 'uploader__first_name', 'uploader__last_name', 'uploader__email'
-            ).annotate(
-                total_views=Sum('views_count')
-            ).order_by('-total_views')[:limit]
-        elif metric == 'downloads':
-            top_users = queryset.values(
-                'uploader__id', 'uploader__first_name', 'uploader__last_name', 'uploader__email'
-            ).annotate(
-                total_downloads=Sum('downloads_count')
-            ).order_by('-total_downloads')[:limit]
+        elif metric in ('views', 'downloads'):
+            # Ranked from the daily engagement rollup
+            from authentication.models import PolaUser
+            ranked = top_uploaders(metric, hub_type=hub_type, limit=limit)
+            users = PolaUser.objects.in_bulk([row['uploader_id'] for row in ranked])
+            top_users = [
+                {
+                    'uploader__id': row['uploader_id'],
+                    'uploader__first_name': users[row['uploader_id']].first_name,
+                    'uploader__last_name': users[row['uploader_id']].last_name,
+                    'uploader__email': users[row['uploader_id']].email,
+                    f'total_{metric}': row['total'],
+                }
+                for row in ranked
+                if row['uploader_id'] in users
+            ]
         elif metric == 'revenue':
             # Students Hub only
             purchases = LearningMaterialPurchase.objects.select_related('material__uploader')
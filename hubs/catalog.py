@@ -0,0 +1,211 @@
+"""
+Legal Education Catalog Snapshot
+
+The topic -> subtopic tree is nearly static but is read on every app launch.
+Instead of counting materials per topic/subtopic/language on each request,
+the whole tree is built with three queries (topics, subtopics, one grouped
+material count) and cached as a versioned blob. Saves/deletes of topics,
+subtopics and learning materials bump the version (see hubs/signals.py).
+"""
+
+from django.db.models import Count, Q
+from rest_framework import serializers
+
+from utils.versioned_cache import VersionedCache
+
+LANGUAGES = ('en', 'sw')
+
+catalog_cache = VersionedCache('legal_ed_catalog', timeout=300)
+
+_datetime_field = serializers.DateTimeField()
+
+
+def _empty_counts():
+    return {'all': 0, 'en': 0, 'sw': 0}
+
+
+def build_catalog():
+    """
+    Build the catalog snapshot from the database.
+
+    Returns:
+        dict: {
+            'topics': [topic dict, ...],          # active topics, display order
+            'subtopics': [subtopic dict, ...],    # active subtopics, display order
+        }
+        Each entry carries 'materials_count' as {'all': n, 'en': n, 'sw': n}.
+    """
+    from documents.models import LearningMaterial
+    from .models import LegalEdTopic, LegalEdSubTopic
+
+    topics = list(
+        LegalEdTopic.objects.filter(is_active=True)
+        .annotate(subtopics_total=Count('subtopics'))
+        .order_by('display_order', 'name')
+    )
+    subtopics = list(
+        LegalEdSubTopic.objects.filter(is_active=True)
+        .select_related('topic')
+        .order_by('topic__display_order', 'display_order', 'name')
+    )
+    subtopic_topic = dict(LegalEdSubTopic.objects.values_list('id', 'topic_id'))
+
+    topic_counts = {topic.id: _empty_counts() for topic in topics}
+    subtopic_counts = {subtopic.id: _empty_counts() for subtopic in subtopics}
+
+    # One grouped query for every approved material in the catalog
+    grouped = (
+        LearningMaterial.objects.filter(is_active=True, is_approved=True)
+        .filter(Q(topic__isnull=False) | Q(subtopic__isnull=False))
+        .values('topic_id', 'subtopic_id', 'language')
+        .annotate(total=Count('id'))
+    )
+    for row in grouped:
+        language, total = row['language'], row['total']
+        subtopic_id = row['subtopic_id']
+
+        if subtopic_id in subtopic_counts:
+            subtopic_counts[subtopic_id]['all'] += total
+            if language in LANGUAGES:
+                subtopic_counts[subtopic_id][language] += total
+
+        # A material belongs to its direct topic and its subtopic's topic (counted once)
+        owners = {row['topic_id'], subtopic_topic.get(subtopic_id)} - {None}
+        for topic_id in owners:
+            if topic_id in topic_counts:
+                topic_counts[topic_id]['all'] += total
+                if language in LANGUAGES:
+                    topic_counts[topic_id][language] += total
+
+    return {
+        'topics': [
+            {
+                'id': topic.id,
+                'name': topic.name,
+                'name_sw': topic.name_sw,
+                'slug': topic.slug,
+                'description': topic.description,
+                'description_sw': topic.description_sw,
+                'icon': topic.icon,
+                'display_order': topic.display_order,
+                'is_active': topic.is_active,
+                'subtopics_count': topic.subtopics_total,
+                'materials_count': topic_counts[topic.id],
+                'created_at': _datetime_field.to_representation(topic.created_at),
+                'last_updated': _datetime_field.to_representation(topic.last_updated),
+            }
+            for topic in topics
+        ],
+        'subtopics': [
+            {
+                'id': subtopic.id,
+                'topic': subtopic.topic_id,
+                'topic_slug': subtopic.topic.slug,
+                'topic_name': subtopic.topic.name,
+                'topic_name_sw': subtopic.topic.name_sw,
+                'name': subtopic.name,
+                'name_sw': subtopic.name_sw,
+                'description': subtopic.description,
+                'description_sw': subtopic.description_sw,
+                'slug': subtopic.slug,
+                'language': subtopic.language,
+                'display_order': subtopic.display_order,
+                'is_active': subtopic.is_active,
+                'materials_count': subtopic_counts[subtopic.id],
+                'created_at': _datetime_field.to_representation(subtopic.created_at),
+                'last_updated': _datetime_field.to_representation(subtopic.last_updated),
+            }
+            for subtopic in subtopics
+        ],
+    }
+
+
+def get_catalog():
+    """
+    Returns:
+        tuple: (version, snapshot dict)
+    """
+    return catalog_cache.get_or_build(build_catalog)
+
+
+def invalidate_catalog():
+    """Bump the catalog version once the current transaction commits"""
+    catalog_cache.bump()
+
+
+def materials_count_for(entry, language=None):
+    """Pick the per-language count from a snapshot entry"""
+    counts = entry['materials_count']
+    return counts[language] if language in LANGUAGES else counts['all']
+
+
+def _matches_search(entry, search):
+    needle = search.casefold()
+    return any(
+        needle in (entry.get(field) or '').casefold()
+        for field in ('name', 'name_sw', 'description')
+    )
+
+
+def topic_rows(snapshot, language='en', search=None):
+    """
+    Topic list rows in TopicListSerializer shape.
+    Topic materials_count is the all-language total (as before).
+    """
+    from .serializers import TopicListSerializer
+
+    rows = []
+    for topic in snapshot['topics']:
+        if search and not _matches_search(topic, search):
+            continue
+        row = dict(topic)
+        row['name_localized'] = topic['name_sw'] if language == 'sw' and topic['name_sw'] else topic['name']
+        row['description_localized'] = (
+            topic['description_sw'] if language == 'sw' and topic['description_sw'] else topic['description']
+        )
+        row['materials_count'] = materials_count_for(topic)
+        rows.append({field: row[field] for field in TopicListSerializer.Meta.fields})
+    return rows
+
+
+def subtopic_rows(snapshot, language=None, topic_id=None, topic_slug=None, search=None):
+    """
+    Subtopic list rows in SubtopicListSerializer shape, filtered like
+    SubtopicViewSet.get_queryset().
+    """
+    from .serializers import SubtopicListSerializer
+
+    rows = []
+    for subtopic in snapshot['subtopics']:
+        if topic_id and str(subtopic['topic']) != str(topic_id):
+            continue
+        if topic_slug and subtopic['topic_slug'] != topic_slug:
+            continue
+        if language == 'sw' and not (subtopic['language'] == 'sw' or subtopic['name_sw'] is not None):
+            continue
+        if language == 'en' and subtopic['language'] != 'en':
+            continue
+        if search and not _matches_search(subtopic, search):
+            continue
+
+        row = dict(subtopic)
+        if language == 'sw' and subtopic['topic_name_sw']:
+            row['topic_name'] = subtopic['topic_name_sw']
+        is_sw = subtopic['language'] == 'sw'
+        row['name_localized'] = subtopic['name_sw'] if is_sw and subtopic['name_sw'] else subtopic['name']
+        row['description_localized'] = (
+            subtopic['description_sw'] if is_sw and subtopic['description_sw'] else subtopic['description']
+        )
+        row['materials_count'] = materials_count_for(subtopic, language)
+        rows.append({field: row[field] for field in SubtopicListSerializer.Meta.fields})
+    return rows
+
+
+def subtopic_counts(snapshot):
+    """Map subtopic id -> per-language counts (serializer context helper)"""
+    return {subtopic['id']: subtopic['materials_count'] for subtopic in snapshot['subtopics']}
+
+
+def topic_counts(snapshot):
+    """Map topic id -> per-language counts (serializer context helper)"""
+    return {topic['id']: topic['materials_count'] for topic in snapshot['topics']}
@@ -0,0 +1,202 @@
+"""
+Comment Thread Loader
+
+Builds comment threads for HubCommentSerializer in a fixed number of queries
+instead of several per comment (counts, is_liked, mentions and a recursive
+replies query).
+
+For a page of comments the loader runs:
+    1. the first replies of every root comment (one windowed query)
+    2. like totals plus the viewer's likes for every comment on the page
+    3. reply totals for every comment on the page
+    4. mentions (with the mentioned user) for every comment on the page
+
+and attaches the results to the instances as ``thread_*`` attributes, which
+HubCommentSerializer reads before falling back to per-object queries.
+
+Roots and replies are paged with opaque keyset cursors over (created_at, id),
+so "load more" never re-counts or skips rows when new comments arrive.
+"""
+
+import base64
+from collections import defaultdict
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+from .models import CommentMention, HubComment, HubCommentLike
+
+# Replies embedded under each root comment
+DEFAULT_REPLIES_PER_THREAD = 10
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(comment):
+    """Opaque cursor pointing just after ``comment``"""
+    return encode_keyset(comment.created_at, comment.id)
+
+
+def encode_keyset(timestamp, pk):
+    """Opaque cursor for a (timestamp, id) keyset position"""
+    raw = f"{timestamp.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) for a cursor, or raise ValidationError"""
+    try:
+        created_at, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        created_at = parse_datetime(created_at)
+        comment_id = int(comment_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValidationError({'cursor': 'Invalid cursor'})
+    if created_at is None:
+        raise ValidationError({'cursor': 'Invalid cursor'})
+    return created_at, comment_id
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a ``limit`` query parameter to 1..MAX_PAGE_SIZE"""
+    if value in (None, ''):
+        return default
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        raise ValidationError({'limit': 'Must be an integer'})
+
+
+def _thread_queryset():
+    return HubComment.objects.filter(is_active=True).select_related('author__verification')
+
+
+def _keyset_page(queryset, cursor, limit):
+    """Slice an ascending (created_at, id) queryset after ``cursor``"""
+    queryset = queryset.order_by('created_at', 'id')
+    if cursor:
+        created_at, comment_id = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=comment_id)
+        )
+    if limit is None:
+        return list(queryset), None
+
+    rows = list(queryset[:limit + 1])
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def attach_thread_data(comments, viewer=None, replies_per_thread=DEFAULT_REPLIES_PER_THREAD):
+    """
+    Decorate comments (and the replies embedded under root comments) in bulk.
+
+    Args:
+        comments: list of HubComment instances (roots and/or replies)
+        viewer: user whose likes fill ``is_liked`` (anonymous or None for False)
+        replies_per_thread: replies embedded under each root comment
+
+    Returns:
+        list: the same comments, decorated in place
+    """
+    comments = list(comments)
+    if not comments:
+        return comments
+
+    root_ids = [comment.id for comment in comments if comment.parent_comment_id is None]
+    replies_by_root = defaultdict(list)
+    if root_ids and replies_per_thread:
+        replies = (
+            _thread_queryset()
+            .filter(parent_comment_id__in=root_ids)
+            .annotate(thread_position=Window(
+                RowNumber(),
+                partition_by=F('parent_comment_id'),
+                order_by=[F('created_at').asc(), F('id').asc()],
+            ))
+            .filter(thread_position__lte=replies_per_thread + 1)
+            .order_by('parent_comment_id', 'created_at', 'id')
+        )
+        for reply in replies:
+            replies_by_root[reply.parent_comment_id].append(reply)
+
+    everything = list(comments)
+    for comment in comments:
+        if comment.parent_comment_id is not None:
+            continue
+        thread = replies_by_root.get(comment.id, [])
+        comment.thread_replies = thread[:replies_per_thread]
+        comment.thread_replies_next_cursor = (
+            encode_cursor(comment.thread_replies[-1]) if len(thread) > replies_per_thread else None
+        )
+        everything.extend(comment.thread_replies)
+
+    ids = {comment.id for comment in everything}
+    viewer_id = viewer.id if viewer is not None and viewer.is_authenticated else None
+
+    likes = {
+        row['comment_id']: row
+        for row in HubCommentLike.objects.filter(comment_id__in=ids)
+        .values('comment_id')
+        .annotate(total=Count('id'), mine=Count('id', filter=Q(user_id=viewer_id)))
+        .order_by()
+    }
+    reply_totals = dict(
+        HubComment.objects.filter(parent_comment_id__in=ids)
+        .values('parent_comment_id')
+        .annotate(total=Count('id'))
+        .order_by()
+        .values_list('parent_comment_id', 'total')
+    )
+    mentions = defaultdict(list)
+    for mention in CommentMention.objects.filter(comment_id__in=ids).select_related('mentioned_user'):
+        mentions[mention.comment_id].append(mention)
+
+    for comment in everything:
+        like_row = likes.get(comment.id)
+        comment.thread_likes_count = like_row['total'] if like_row else 0
+        comment.thread_is_liked = bool(like_row and like_row['mine'])
+        comment.thread_replies_count = reply_totals.get(comment.id, 0)
+        comment.thread_mentions = mentions.get(comment.id, [])
+        if not hasattr(comment, 'thread_replies'):
+            comment.thread_replies = []
+            comment.thread_replies_next_cursor = None
+
+    return comments
+
+
+def load_root_comments(content, viewer=None, cursor=None, limit=None,
+                       replies_per_thread=DEFAULT_REPLIES_PER_THREAD):
+    """
+    Top-level comments of a content item, oldest first, with their threads.
+
+    ``limit=None`` returns every root comment.
+
+    Returns:
+        tuple: (decorated root comments, next cursor or None)
+    """
+    roots, next_cursor = _keyset_page(
+        _thread_queryset().filter(content=content, parent_comment=None),
+        cursor,
+        limit,
+    )
+    return attach_thread_data(roots, viewer, replies_per_thread), next_cursor
+
+
+def load_replies(parent, viewer=None, cursor=None, limit=None):
+    """
+    Replies to one comment, oldest first ("load more replies").
+
+    Returns:
+        tuple: (decorated replies, next cursor or None)
+    """
+    replies, next_cursor = _keyset_page(
+        _thread_queryset().filter(parent_comment=parent),
+        cursor,
+        limit,
+    )
+    return attach_thread_data(replies, viewer), next_cursor
@@ -0,0 +1,394 @@
+"""
+Hub Content Search
+
+Full-text search over LearningMaterial title, description and content,
+replacing ``icontains`` scans with an index and relevance ranking.
+
+Text goes through one bilingual analyzer (lowercase, strip accents, drop
+English/Swahili stopwords, light stemming by the material's language) so
+both backends see the same terms:
+
+    postgres   ``search_vector`` column (title A, description B, content and
+               text extracted from the file C) behind a GIN index; ranked
+               with ts_rank
+    python     in-process inverted index with the same weights, for SQLite
+               and other non-PostgreSQL databases (single process only)
+
+CONTENT_SEARCH_BACKEND picks the backend (auto = postgres on PostgreSQL).
+Materials are re-indexed from hubs/signals.py when a searchable field is
+saved; ``rebuild_search_index`` (also the management command
+``rebuild_content_search``) rebuilds everything.
+
+Query terms are matched as prefixes and all terms must match.
+"""
+
+import bisect
+import math
+import re
+import threading
+import unicodedata
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, F, FloatField, TextField, Value, When
+from django.utils.html import strip_tags
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+from documents.models import LearningMaterial
+
+# Fields whose changes require re-indexing
+SEARCH_FIELDS = {'title', 'description', 'content', 'language'}
+
+FIELD_WEIGHTS = (('title', 'A', 1.0), ('description', 'B', 0.4), ('content', 'C', 0.2))
+# ts_rank weights in {D, C, B, A} order
+RANK_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+
+# Long posts are indexed up to this many characters
+MAX_CONTENT_CHARS = 100_000
+MIN_PREFIX_LENGTH = 2
+
+STOPWORDS = {
+    'en': frozenset(
+        'a an and are as at be but by for from has have in into is it its of on or '
+        'that the their this to was were will with'.split()
+    ),
+    'sw': frozenset(
+        'na ya wa kwa za la cha vya katika ni au hii hizi huo hiyo kuwa kama lakini pia '
+        'ili juu bila tu sana yake wao sisi'.split()
+    ),
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase ASCII word tokens with accents stripped and markup removed"""
+    text = unicodedata.normalize('NFKD', strip_tags(text or ''))
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _stem_en(token):
+    """Minimal English plural stemming (cases -> case, parties -> party)"""
+    if len(token) < 4 or token.endswith(('ss', 'us', 'is')):
+        return token
+    if token.endswith('ies') and not token.endswith(('eies', 'aies')):
+        return token[:-3] + 'y'
+    if token.endswith('es') and not token.endswith(('aes', 'ees', 'oes')):
+        return token[:-1]
+    if token.endswith('s'):
+        return token[:-1]
+    return token
+
+
+def _stem_sw(token):
+    """Light Swahili stemming: drop the locative -ni (mahakamani -> mahakama)"""
+    if len(token) > 5 and token.endswith('ni'):
+        return token[:-2]
+    return token
+
+
+STEMMERS = {'en': _stem_en, 'sw': _stem_sw}
+
+
+def analyze(text, language='en'):
+    """Index terms for text written in ``language`` ('en' or 'sw')"""
+    stopwords = STOPWORDS.get(language, STOPWORDS['en'])
+    stem = STEMMERS.get(language, _stem_en)
+    return [stem(token) for token in tokenize(text) if token not in stopwords]
+
+
+def query_terms(query):
+    """
+    Query as a list of variant sets, one per word. A word matches if any of
+    its English or Swahili stems matches; stopwords in either language are
+    dropped.
+    """
+    terms = []
+    for token in tokenize(query):
+        if any(token in words for words in STOPWORDS.values()) or len(token) < MIN_PREFIX_LENGTH:
+            continue
+        variants = {stem(token) for stem in STEMMERS.values()}
+        # A shorter variant that prefixes a longer one already matches it
+        variants = {v for v in variants if not any(o != v and v.startswith(o) for o in variants)}
+        terms.append(variants)
+    return terms
+
+
+def material_fields(title, description, content, document_text=''):
+    """Searchable text per weighted field; the file's text counts as content"""
+    return {
+        'title': title or '',
+        'description': description or '',
+        'content': (strip_tags(content or '') + '\n' + (document_text or ''))[:MAX_CONTENT_CHARS],
+    }
+
+
+def document_text_field(Material):
+    """Lookup for a material's extracted file text (absent in older migration states)"""
+    names = {field.name for field in Material._meta.get_fields()}
+    return 'preview__extracted_text' if 'preview' in names else None
+
+
+def _search_rows(Material):
+    """(id, title, description, content, language, document text) for every material"""
+    text_field = document_text_field(Material)
+    fields = ['id', 'title', 'description', 'content', 'language']
+    rows = Material.objects.values_list(*fields, *([text_field] if text_field else [])).order_by('id')
+    if text_field:
+        return rows.iterator(chunk_size=500)
+    return (row + ('',) for row in rows.iterator(chunk_size=500))
+
+
+def backend():
+    name = getattr(settings, 'CONTENT_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        return 'postgres' if connection.vendor == 'postgresql' else 'python'
+    return name
+
+
+# ---------------------------------------------------------------------------
+# PostgreSQL backend
+# ---------------------------------------------------------------------------
+
+def vector_expression(title, description, content, language='en', document_text=''):
+    """Weighted tsvector of the analyzed fields (terms are pre-stemmed, so 'simple')"""
+    fields = material_fields(title, description, content, document_text)
+    vector = None
+    for name, weight, _ in FIELD_WEIGHTS:
+        part = SearchVector(
+            Value(' '.join(analyze(fields[name], language)), output_field=TextField()),
+            config='simple', weight=weight,
+        )
+        vector = part if vector is None else vector + part
+    return vector
+
+
+def tsquery(terms):
+    """Raw tsquery: every word must match one of its variants as a prefix"""
+    return ' & '.join(
+        '(' + ' | '.join(f'{variant}:*' for variant in sorted(variants)) + ')'
+        for variants in terms
+    )
+
+
+def _postgres_search(queryset, terms):
+    query = SearchQuery(tsquery(terms), search_type='raw', config='simple')
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query, weights=RANK_WEIGHTS)
+    )
+
+
+# ---------------------------------------------------------------------------
+# Pure-Python backend
+# ---------------------------------------------------------------------------
+
+class InvertedIndex:
+    """term -> {material id: weighted term frequency}, with prefix lookup"""
+
+    def __init__(self):
+        self._postings = {}
+        self._doc_terms = {}
+        self._sorted_terms = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_terms)
+
+    def add(self, doc_id, title, description, content, language='en', document_text=''):
+        fields = material_fields(title, description, content, document_text)
+        weights = {}
+        for name, _, weight in FIELD_WEIGHTS:
+            for term in analyze(fields[name], language):
+                weights[term] = weights.get(term, 0.0) + weight
+        with self._lock:
+            self._remove(doc_id)
+            for term, weight in weights.items():
+                self._postings.setdefault(term, {})[doc_id] = weight
+            self._doc_terms[doc_id] = set(weights)
+            self._sorted_terms = None
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+
+    def _remove(self, doc_id):
+        for term in self._doc_terms.pop(doc_id, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    self._sorted_terms = None
+
+    def _expand(self, prefix):
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        start = bisect.bisect_left(terms, prefix)
+        matches = []
+        for term in terms[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, terms):
+        """{material id: score} for materials matching every query word"""
+        with self._lock:
+            total = max(len(self._doc_terms), 1)
+            scores = None
+            for variants in terms:
+                word_scores = {}
+                for variant in variants:
+                    for term in self._expand(variant):
+                        postings = self._postings[term]
+                        idf = math.log(1 + total / len(postings))
+                        for doc_id, weight in postings.items():
+                            word_scores[doc_id] = word_scores.get(doc_id, 0.0) + weight * idf
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {doc_id: score + word_scores[doc_id] for doc_id, score in scores.items() if doc_id in word_scores}
+                if not scores:
+                    return {}
+            return scores or {}
+
+
+_python_index = None
+_python_index_lock = threading.Lock()
+
+
+def get_python_index():
+    """The process-wide inverted index, built from the database on first use"""
+    global _python_index
+    if _python_index is None:
+        with _python_index_lock:
+            if _python_index is None:
+                index = InvertedIndex()
+                for row in _search_rows(LearningMaterial):
+                    index.add(*row)
+                _python_index = index
+    return _python_index
+
+
+def reset_python_index():
+    global _python_index
+    _python_index = None
+
+
+def _python_search(queryset, terms):
+    scores = get_python_index().search(terms)
+    if not scores:
+        # Still annotated: search_materials orders by search_rank
+        return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+    return queryset.filter(pk__in=list(scores)).annotate(
+        search_rank=Case(
+            *[When(pk=doc_id, then=Value(score)) for doc_id, score in scores.items()],
+            default=Value(0.0), output_field=FloatField(),
+        )
+    )
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def search_materials(query, queryset=None, hub_type=None, content_type=None, language=None):
+    """
+    Materials matching ``query``, annotated with ``search_rank`` and ordered
+    best match first (newest first among equal ranks). A query with no
+    searchable words returns the queryset unchanged.
+    """
+    if queryset is None:
+        queryset = LearningMaterial.objects.filter(is_active=True, is_approved=True)
+    if hub_type:
+        queryset = queryset.filter(hub_type=hub_type)
+    if content_type:
+        queryset = queryset.filter(content_type=content_type)
+    if language:
+        queryset = queryset.filter(language=language)
+
+    terms = query_terms(query)
+    if not terms:
+        return queryset
+    if backend() == 'postgres':
+        queryset = _postgres_search(queryset, terms)
+    else:
+        queryset = _python_search(queryset, terms)
+    return queryset.order_by('-search_rank', '-created_at', '-id')
+
+
+def index_material(material):
+    """Re-index one material after its searchable fields or extracted file text changed"""
+    from .models import MaterialPreview
+
+    if backend() != 'postgres' and _python_index is None:
+        return
+    document_text = MaterialPreview.objects.filter(
+        material_id=material.pk, status='ready'
+    ).values_list('extracted_text', flat=True).first() or ''
+    if backend() == 'postgres':
+        LearningMaterial.objects.filter(pk=material.pk).update(search_vector=vector_expression(
+            material.title, material.description, material.content, material.language, document_text
+        ))
+    else:
+        _python_index.add(
+            material.pk, material.title, material.description, material.content, material.language, document_text
+        )
+
+
+def unindex_material(material_id):
+    if _python_index is not None:
+        _python_index.remove(material_id)
+
+
+def rebuild_search_index(get_model, batch_size=500):
+    """
+    Recompute every material's search vector.
+
+    ``get_model`` is ``django.apps.apps.get_model`` or a migration's
+    historical ``apps.get_model``. On the python backend the in-process index
+    is dropped and rebuilt on next use.
+
+    Returns:
+        int: number of materials indexed
+    """
+    Material = get_model('documents', 'LearningMaterial')
+    if backend() != 'postgres':
+        reset_python_index()
+        return Material.objects.count()
+
+    batch = []
+    total = 0
+    for doc_id, title, description, content, language, document_text in _search_rows(Material):
+        material = Material(pk=doc_id)
+        material.search_vector = vector_expression(title, description, content, language, document_text)
+        batch.append(material)
+        if len(batch) >= batch_size:
+            Material.objects.bulk_update(batch, ['search_vector'])
+            total += len(batch)
+            batch = []
+    if batch:
+        Material.objects.bulk_update(batch, ['search_vector'])
+        total += len(batch)
+    return total
+
+
+class ContentSearchFilter(BaseFilterBackend):
+    """
+    DRF filter backend for ``?search=`` on LearningMaterial querysets.
+    Results are ordered by relevance unless ``?ordering=`` is given; list it
+    after OrderingFilter.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        ranked = search_materials(query, queryset)
+        if request.query_params.get(OrderingFilter.ordering_param):
+            return ranked.order_by(*queryset.query.order_by)
+        return ranked
@@ -0,0 +1,218 @@
+"""
+Direct Message Conversations
+
+Groups HubMessages into one HubConversation per user pair and keeps each
+participant's inbox row (HubConversationParticipant) current:
+
+    send          pre_save assigns the conversation; post_save moves the
+                  last-message pointer and bumps the recipient's unread
+                  counter (hubs/signals.py)
+    inbox         one keyset-paginated index scan of the user's participant
+                  rows, newest conversation first
+    history       keyset-paginated messages of one conversation, newest first
+    mark read     one UPDATE over the unread messages plus one counter update
+                  per affected conversation
+
+Cursors are opaque (timestamp, id) positions, so pages never shift when new
+messages arrive.
+"""
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .comment_threads import decode_cursor, encode_keyset
+from .models import HubConversation, HubConversationParticipant, HubMessage
+
+
+def ordered_pair(user_a_id, user_b_id):
+    return (user_a_id, user_b_id) if user_a_id < user_b_id else (user_b_id, user_a_id)
+
+
+def get_or_create_conversation(user_a_id, user_b_id):
+    """The conversation for a user pair, with both participant rows"""
+    user_low_id, user_high_id = ordered_pair(user_a_id, user_b_id)
+    conversation, created = HubConversation.objects.get_or_create(
+        user_low_id=user_low_id, user_high_id=user_high_id
+    )
+    if created:
+        HubConversationParticipant.objects.bulk_create([
+            HubConversationParticipant(conversation=conversation, user_id=user_low_id, peer_id=user_high_id),
+            HubConversationParticipant(conversation=conversation, user_id=user_high_id, peer_id=user_low_id),
+        ], ignore_conflicts=True)
+    return conversation
+
+
+def record_sent(message):
+    """Advance the last-message pointer and the recipient's unread counter"""
+    HubConversation.objects.filter(pk=message.conversation_id).update(
+        last_message=message, last_message_at=message.created_at
+    )
+    HubConversationParticipant.objects.filter(conversation_id=message.conversation_id).update(
+        last_message_at=message.created_at
+    )
+    if not message.is_read:
+        HubConversationParticipant.objects.filter(
+            conversation_id=message.conversation_id, user_id=message.recipient_id
+        ).update(unread_count=F('unread_count') + 1)
+
+
+def record_deleted(message):
+    """Undo a deleted message's unread count and repoint the conversation"""
+    if not message.is_read:
+        HubConversationParticipant.objects.filter(
+            conversation_id=message.conversation_id, user_id=message.recipient_id
+        ).update(unread_count=Greatest(F('unread_count') - 1, 0))
+
+    latest = HubMessage.objects.filter(conversation_id=message.conversation_id).order_by('-created_at', '-id').first()
+    last_message_at = latest.created_at if latest else None
+    HubConversation.objects.filter(pk=message.conversation_id).update(
+        last_message=latest, last_message_at=last_message_at
+    )
+    HubConversationParticipant.objects.filter(conversation_id=message.conversation_id).update(
+        last_message_at=last_message_at
+    )
+
+
+def mark_read(user, messages):
+    """
+    Mark the user's unread messages in ``messages`` (a HubMessage queryset)
+    as read with one UPDATE, and lower the matching unread counters.
+
+    Returns:
+        int: number of messages marked read
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        rows = list(
+            messages.filter(recipient_id=user.id, is_read=False)
+            .select_for_update()
+            .values_list('id', 'conversation_id')
+        )
+        if not rows:
+            return 0
+        HubMessage.objects.filter(id__in=[message_id for message_id, _ in rows]).update(is_read=True, read_at=now)
+
+        per_conversation = {}
+        for _, conversation_id in rows:
+            per_conversation[conversation_id] = per_conversation.get(conversation_id, 0) + 1
+        for conversation_id, count in per_conversation.items():
+            HubConversationParticipant.objects.filter(
+                conversation_id=conversation_id, user_id=user.id
+            ).update(unread_count=Greatest(F('unread_count') - count, 0), last_read_at=now)
+    return len(rows)
+
+
+def mark_conversation_read(user, conversation_id, up_to=None):
+    """Mark a whole conversation (or everything up to message ``up_to``) read"""
+    messages = HubMessage.objects.filter(conversation_id=conversation_id)
+    if up_to is not None:
+        messages = messages.filter(id__lte=up_to)
+    return mark_read(user, messages)
+
+
+def unread_total(user):
+    """Unread messages across all of the user's conversations (one aggregate)"""
+    return HubConversationParticipant.objects.filter(user=user).aggregate(
+        total=Sum('unread_count')
+    )['total'] or 0
+
+
+def _descending_page(queryset, time_field, id_field, cursor, limit):
+    """Newest-first keyset page over (time_field, id_field)"""
+    queryset = queryset.order_by(f'-{time_field}', f'-{id_field}')
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{time_field}__lt': timestamp}) | Q(**{time_field: timestamp, f'{id_field}__lt': pk})
+        )
+    rows = list(queryset[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_keyset(getattr(last, time_field), getattr(last, id_field))
+    return rows, next_cursor
+
+
+def inbox_page(user, cursor=None, limit=20):
+    """
+    The user's conversations, most recent first.
+
+    Returns:
+        tuple: (participant rows with conversation, last message and peer loaded, next cursor)
+    """
+    participants = HubConversationParticipant.objects.filter(
+        user=user, last_message_at__isnull=False
+    ).select_related('peer__verification', 'conversation__last_message')
+    return _descending_page(participants, 'last_message_at', 'conversation_id', cursor, limit)
+
+
+def history_page(conversation_id, cursor=None, limit=20):
+    """Messages of one conversation, newest first"""
+    messages = HubMessage.objects.filter(conversation_id=conversation_id).select_related(
+        'sender__verification', 'recipient__verification'
+    )
+    return _descending_page(messages, 'created_at', 'id', cursor, limit)
+
+
+def participant_for(user, conversation_id):
+    """The user's participant row, or None if they are not in the conversation"""
+    return HubConversationParticipant.objects.filter(
+        user=user, conversation_id=conversation_id
+    ).select_related('peer').first()
+
+
+def backfill_conversations(get_model):
+    """
+    Group existing messages into conversations and rebuild counters.
+
+    ``get_model`` is ``django.apps.apps.get_model`` or a migration's
+    historical ``apps.get_model``.
+
+    Returns:
+        int: number of conversations
+    """
+    Message = get_model('hubs', 'HubMessage')
+    Conversation = get_model('hubs', 'HubConversation')
+    Participant = get_model('hubs', 'HubConversationParticipant')
+
+    pairs = set()
+    for sender_id, recipient_id in Message.objects.values_list('sender_id', 'recipient_id').order_by().distinct():
+        if sender_id != recipient_id:
+            pairs.add(ordered_pair(sender_id, recipient_id))
+
+    existing = {
+        (c.user_low_id, c.user_high_id): c for c in Conversation.objects.all()
+    }
+    Conversation.objects.bulk_create(
+        [Conversation(user_low_id=low, user_high_id=high) for low, high in pairs if (low, high) not in existing],
+        ignore_conflicts=True,
+    )
+    conversations = {(c.user_low_id, c.user_high_id): c for c in Conversation.objects.all()}
+
+    for (low, high), conversation in conversations.items():
+        Message.objects.filter(
+            Q(sender_id=low, recipient_id=high) | Q(sender_id=high, recipient_id=low)
+        ).update(conversation=conversation)
+
+        latest = Message.objects.filter(conversation=conversation).order_by('-created_at', '-id').first()
+        conversation.last_message = latest
+        conversation.last_message_at = latest.created_at if latest else None
+        conversation.save(update_fields=['last_message', 'last_message_at'])
+
+        unread = dict(
+            Message.objects.filter(conversation=conversation, is_read=False)
+            .values('recipient_id').annotate(total=Count('id')).values_list('recipient_id', 'total')
+        )
+        for user_id, peer_id in ((low, high), (high, low)):
+            Participant.objects.update_or_create(
+                conversation=conversation, user_id=user_id,
+                defaults={
+                    'peer_id': peer_id,
+                    'unread_count': unread.get(user_id, 0),
+                    'last_message_at': conversation.last_message_at,
+                },
+            )
+    return len(conversations)
@@ -0,0 +1,181 @@
+"""
+Engagement Rollup
+
+Admin hub analytics (trends, trending content, top contributors) read daily
+counters instead of scanning and joining the raw like/comment/bookmark tables.
+
+Two tables are kept in step (see hubs/models.py):
+    ContentEngagementDaily   (content, day)              -> views, likes, ...
+    UploaderEngagementDaily  (uploader, hub_type, day)   -> views, likes, ...
+
+Writes go through ``record_engagement`` from the like/comment/bookmark signals
+(hubs/signals.py) and the view/download endpoints. Each call is one upsert
+per table. Deletes decrement the day the row was created so the rollup always
+matches the raw tables. ``backfill_engagement_rollup`` rebuilds both tables.
+"""
+
+from django.db import connection, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from documents.models import LearningMaterial
+from .models import ContentEngagementDaily, UploaderEngagementDaily
+
+COUNTERS = ('views', 'likes', 'comments', 'bookmarks', 'downloads')
+
+# Weights used by the admin "trending" endpoint
+TRENDING_WEIGHTS = {'likes': 2, 'comments': 3, 'bookmarks': 4}
+
+
+def _day(when=None):
+    return timezone.localdate(when) if when else timezone.localdate()
+
+
+def _increment_sql(table, counters):
+    return ', '.join(f'{name} = {table}.{name} + EXCLUDED.{name}' for name in counters)
+
+
+def record_engagement(content_id, counter, delta=1, when=None):
+    """
+    Add ``delta`` to one counter for a content item and its uploader.
+
+    Args:
+        content_id: LearningMaterial id
+        counter: one of COUNTERS
+        delta: +1 for new activity, -1 when it is removed
+        when: datetime the activity happened (defaults to now)
+    """
+    if counter not in COUNTERS:
+        raise ValueError(f"Unknown engagement counter: {counter}")
+
+    day = _day(when)
+    content_table = ContentEngagementDaily._meta.db_table
+    uploader_table = UploaderEngagementDaily._meta.db_table
+    material_table = LearningMaterial._meta.db_table
+    values = [delta if name == counter else 0 for name in COUNTERS]
+    columns = ', '.join(COUNTERS)
+    placeholders = ', '.join(['%s'] * len(COUNTERS))
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        if delta >= 0:
+            cursor.execute(
+                f'INSERT INTO {content_table} (content_id, day, {columns}) '
+                f'VALUES (%s, %s, {placeholders}) '
+                f'ON CONFLICT (content_id, day) DO UPDATE SET {_increment_sql(content_table, COUNTERS)}',
+                [content_id, day, *values],
+            )
+            cursor.execute(
+                f'INSERT INTO {uploader_table} (uploader_id, hub_type, day, {columns}) '
+                f'SELECT uploader_id, hub_type, %s, {placeholders} FROM {material_table} WHERE id = %s '
+                f'ON CONFLICT (uploader_id, hub_type, day) DO UPDATE SET {_increment_sql(uploader_table, COUNTERS)}',
+                [day, *values, content_id],
+            )
+        else:
+            # Removals only touch existing rows and never go below zero
+            cursor.execute(
+                f'UPDATE {content_table} SET {counter} = GREATEST({counter} + %s, 0) '
+                f'WHERE content_id = %s AND day = %s',
+                [delta, content_id, day],
+            )
+            cursor.execute(
+                f'UPDATE {uploader_table} AS u SET {counter} = GREATEST(u.{counter} + %s, 0) '
+                f'FROM {material_table} AS m '
+                f'WHERE m.id = %s AND u.uploader_id = m.uploader_id AND u.hub_type = m.hub_type AND u.day = %s',
+                [delta, content_id, day],
+            )
+
+
+# ----------------------------------------------------------------------
+# Read side
+# ----------------------------------------------------------------------
+
+def _content_rows(since_day, content_queryset=None):
+    rows = ContentEngagementDaily.objects.filter(day__gte=since_day)
+    if content_queryset is not None:
+        rows = rows.filter(content_id__in=content_queryset.values('id'))
+    return rows
+
+
+def daily_trends(since_day, content_queryset=None):
+    """
+    Daily likes/comments/bookmarks totals, oldest first.
+
+    Returns:
+        list: [{'date': 'YYYY-MM-DD', 'likes': n, 'comments': n, 'bookmarks': n}, ...]
+    """
+    rows = (
+        _content_rows(since_day, content_queryset)
+        .values('day')
+        .annotate(likes_total=Sum('likes'), comments_total=Sum('comments'), bookmarks_total=Sum('bookmarks'))
+        .order_by('day')
+    )
+    return [
+        {
+            'date': row['day'].strftime('%Y-%m-%d'),
+            'likes': row['likes_total'],
+            'comments': row['comments_total'],
+            'bookmarks': row['bookmarks_total'],
+        }
+        for row in rows
+        if row['likes_total'] or row['comments_total'] or row['bookmarks_total']
+    ]
+
+
+def trending_content(since_day, content_queryset=None, limit=10):
+    """
+    Content ranked by weighted recent engagement.
+
+    Returns:
+        list: [{'content_id', 'recent_likes', 'recent_comments', 'recent_bookmarks', 'engagement_score'}, ...]
+    """
+    score = sum(F(f'recent_{name}') * weight for name, weight in TRENDING_WEIGHTS.items())
+    rows = (
+        _content_rows(since_day, content_queryset)
+        .values('content_id')
+        .annotate(
+            recent_likes=Sum('likes'),
+            recent_comments=Sum('comments'),
+            recent_bookmarks=Sum('bookmarks'),
+        )
+        .annotate(engagement_score=score)
+        .filter(engagement_score__gt=0)
+        .order_by('-engagement_score', 'content_id')[:limit]
+    )
+    return list(rows)
+
+
+def uploader_totals(uploader_ids, hub_type=None, since_day=None):
+    """
+    Engagement received per uploader.
+
+    Returns:
+        dict: {uploader_id: {'views': n, 'likes': n, 'comments': n, 'bookmarks': n, 'downloads': n}}
+    """
+    rows = UploaderEngagementDaily.objects.filter(uploader_id__in=uploader_ids)
+    if hub_type:
+        rows = rows.filter(hub_type=hub_type)
+    if since_day:
+        rows = rows.filter(day__gte=since_day)
+    rows = rows.values('uploader_id').annotate(**{f'{name}_total': Sum(name) for name in COUNTERS})
+    return {
+        row['uploader_id']: {name: row[f'{name}_total'] or 0 for name in COUNTERS}
+        for row in rows
+    }
+
+
+def top_uploaders(metric, hub_type=None, limit=10):
+    """
+    Uploaders ranked by a lifetime rollup counter ('views', 'downloads', ...).
+
+    Returns:
+        list: [{'uploader_id': id, 'total': n}, ...]
+    """
+    rows = UploaderEngagementDaily.objects.all()
+    if hub_type:
+        rows = rows.filter(hub_type=hub_type)
+    return list(
+        rows.values('uploader_id')
+        .annotate(total=Sum(metric))
+        .filter(total__gt=0)
+        .order_by('-total', 'uploader_id')[:limit]
+    )
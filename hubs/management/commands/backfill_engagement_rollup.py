@@ -0,0 +1,86 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from documents.models import LearningMaterial
+from hubs.engagement_rollup import COUNTERS
+from hubs.models import (
+    ContentBookmark, ContentEngagementDaily, ContentLike, HubComment, UploaderEngagementDaily
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the daily engagement rollup from likes, comments and bookmarks. '
+        'Lifetime view/download totals have no history and are booked on the content creation day. '
+        'Run during low traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        self.stdout.write('🔄 Rebuilding engagement rollup...')
+
+        materials = {
+            content_id: (uploader_id, hub_type)
+            for content_id, uploader_id, hub_type in LearningMaterial.objects.values_list('id', 'uploader_id', 'hub_type')
+        }
+        content_days = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+
+        # One grouped query per raw engagement table
+        for model, counter in ((ContentLike, 'likes'), (HubComment, 'comments'), (ContentBookmark, 'bookmarks')):
+            grouped = (
+                model.objects.annotate(day=TruncDate('created_at'))
+                .values('content_id', 'day')
+                .annotate(total=Count('id'))
+                .order_by()
+            )
+            for row in grouped:
+                content_days[(row['content_id'], row['day'])][counter] += row['total']
+
+        lifetime = LearningMaterial.objects.filter(
+            views_count__gt=0
+        ) | LearningMaterial.objects.filter(downloads_count__gt=0)
+        for content_id, views, downloads, created_at in lifetime.values_list(
+            'id', 'views_count', 'downloads_count', 'created_at'
+        ):
+            counts = content_days[(content_id, timezone.localdate(created_at))]
+            counts['views'] += views
+            counts['downloads'] += downloads
+
+        uploader_days = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        content_rows = []
+        for (content_id, day), counts in content_days.items():
+            if content_id not in materials:
+                continue
+            content_rows.append(ContentEngagementDaily(content_id=content_id, day=day, **counts))
+            uploader_id, hub_type = materials[content_id]
+            totals = uploader_days[(uploader_id, hub_type, day)]
+            for name in COUNTERS:
+                totals[name] += counts[name]
+
+        uploader_rows = [
+            UploaderEngagementDaily(uploader_id=uploader_id, hub_type=hub_type, day=day, **counts)
+            for (uploader_id, hub_type, day), counts in uploader_days.items()
+        ]
+
+        with transaction.atomic():
+            ContentEngagementDaily.objects.all().delete()
+            UploaderEngagementDaily.objects.all().delete()
+            ContentEngagementDaily.objects.bulk_create(content_rows, batch_size=batch_size)
+            UploaderEngagementDaily.objects.bulk_create(uploader_rows, batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Engagement rollup rebuilt: {len(content_rows)} content-days, {len(uploader_rows)} uploader-days'
+        ))
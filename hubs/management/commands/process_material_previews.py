@@ -0,0 +1,74 @@
+"""
+Management command running the material preview worker
+Usage: python manage.py process_material_previews [--once] [--enqueue-missing]
+"""
+
+import signal
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from hubs.material_previews import PreviewWorker, enqueue_missing, preview_stats
+
+
+class Command(BaseCommand):
+    help = 'Render thumbnails, page counts and text for uploaded hub content (run as a long-lived worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process everything currently due and exit',
+        )
+        parser.add_argument(
+            '--enqueue-missing',
+            action='store_true',
+            help='First queue materials that have a file but no preview',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=10,
+            help='Previews claimed per batch',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to sleep when the queue is empty',
+        )
+
+    def handle(self, *args, **options):
+        worker = PreviewWorker(batch_size=options['batch_size'])
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(self.style.HTTP_INFO('🖼️ Material preview worker started'))
+        if options['enqueue_missing']:
+            self.stdout.write(f'🔄 Queued {enqueue_missing(apps.get_model)} material(s) without previews')
+        released = worker.release_stale_locks()
+        if released:
+            self.stdout.write(self.style.WARNING(f'♻️  Re-queued {released} stale preview(s)'))
+
+        totals = {}
+        while self._running:
+            counts = worker.run_once()
+            for status, count in counts.items():
+                totals[status] = totals.get(status, 0) + count
+            if counts:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
+            # Long-lived worker: drop DB connections that died while idle
+            close_old_connections()
+
+        processed = ' '.join(f'{status}={count}' for status, count in sorted(totals.items())) or 'none'
+        queue = ' '.join(f'{status}={count}' for status, count in sorted(preview_stats().items()))
+        self.stdout.write(self.style.SUCCESS(f'✅ Preview worker stopped: processed {processed}; queue {queue}'))
+
+    def _stop(self, signum, frame):
+        self._running = False
@@ -0,0 +1,21 @@
+"""
+Management command to rebuild the hub content full-text search index
+Usage: python manage.py rebuild_content_search
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from hubs.content_search import backend, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Recompute search vectors for all hub content (title, description, content, file text)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows per bulk update')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'🔄 Rebuilding content search index ({backend()} backend)...')
+        total = rebuild_search_index(apps.get_model, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Materials indexed: {total}'))
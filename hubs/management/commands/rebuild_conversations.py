@@ -0,0 +1,20 @@
+"""
+Management command to rebuild direct-message conversations and unread counters
+Usage: python manage.py rebuild_conversations
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hubs.conversations import backfill_conversations
+
+
+class Command(BaseCommand):
+    help = 'Group HubMessages into conversations and recompute last-message pointers and unread counters'
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Rebuilding conversations...')
+        with transaction.atomic():
+            total = backfill_conversations(apps.get_model)
+        self.stdout.write(self.style.SUCCESS(f'✅ Conversations rebuilt: {total}'))
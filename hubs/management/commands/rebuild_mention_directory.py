@@ -0,0 +1,20 @@
+"""
+Management command to rebuild the @mention autocomplete directory
+Usage: python manage.py rebuild_mention_directory
+"""
+
+from django.core.management.base import BaseCommand
+
+from hubs.mention_directory import rebuild_mention_directory
+
+
+class Command(BaseCommand):
+    help = 'Rebuild MentionDirectoryEntry rows from users and their tagging privacy settings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Rebuilding mention directory...')
+        total = rebuild_mention_directory(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Mention directory rebuilt: {total} taggable users'))
@@ -0,0 +1,377 @@
+"""
+Material Previews
+
+Feed cards need a small image, a page count and some text, not the whole
+file. When a LearningMaterial's file changes a MaterialPreview row is queued
+(hubs/signals.py); the ``process_material_previews`` worker renders it:
+
+    images   Pillow thumbnails at MATERIAL_PREVIEW_SIZES widths
+    pdf      page count and text (pypdf); the cover is the largest image on
+             page one, or a rendered text card for text-only pages
+    docx     text (python-docx), page count from docProps/app.xml, text card
+
+Other formats are marked ``unsupported``. Thumbnails are stored as JPEGs under
+``material_previews/<material id>/`` and the extracted text is indexed by
+hubs.content_search. Failures retry with backoff up to
+MATERIAL_PREVIEW_MAX_ATTEMPTS.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import textwrap
+import zipfile
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageDraw, ImageFont, ImageOps, features
+
+from .content_search import MAX_CONTENT_CHARS, index_material
+from .models import MaterialPreview
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp', 'bmp'}
+# Pages read for text extraction; enough for search without parsing whole books
+MAX_TEXT_PAGES = 50
+# Width the feed card uses for ``thumbnail_url``
+CARD_WIDTH = 320
+# Text cards are rendered at A4 proportions
+CARD_SIZE = (640, 905)
+JPEG_QUALITY = 80
+
+STALE_LOCK_MINUTES = 10
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 3600
+
+
+class UnsupportedFormat(Exception):
+    pass
+
+
+def thumbnail_sizes():
+    return sorted(getattr(settings, 'MATERIAL_PREVIEW_SIZES', [160, 320, 640]))
+
+
+def extension(name):
+    return os.path.splitext(name or '')[1].lstrip('.').lower()
+
+
+# ---------------------------------------------------------------------------
+# Renderers: file object -> (cover image or None, page count, text)
+# ---------------------------------------------------------------------------
+
+def _load_font(size):
+    if features.check('freetype2'):
+        return ImageFont.load_default(size=size)
+    return ImageFont.load_default()
+
+
+def text_card(text):
+    """A page-shaped image showing the start of ``text``"""
+    image = Image.new('RGB', CARD_SIZE, 'white')
+    draw = ImageDraw.Draw(image)
+    font = _load_font(22)
+    y = 40
+    for paragraph in (text or '').splitlines():
+        for line in textwrap.wrap(paragraph, width=46) or ['']:
+            if y > CARD_SIZE[1] - 60:
+                return image
+            draw.text((40, y), line, fill=(40, 40, 40), font=font)
+            y += 30
+    return image
+
+
+def render_image(fh):
+    image = Image.open(fh)
+    # JPEGs decode straight at a reduced scale when only thumbnails are needed
+    largest = thumbnail_sizes()[-1]
+    image.draft('RGB', (largest, largest * 4))
+    image.load()
+    return ImageOps.exif_transpose(image), 1, ''
+
+
+def _largest_image(page):
+    best = None
+    try:
+        for embedded in page.images:
+            image = embedded.image
+            if image is not None and (best is None or image.width * image.height > best.width * best.height):
+                best = image
+    except Exception as e:
+        # Unusual image encodings are not worth failing the preview for
+        logger.warning(f"⚠️ Could not extract PDF page images: {e}")
+    return best
+
+
+def render_pdf(fh):
+    from pypdf import PdfReader
+
+    reader = PdfReader(fh)
+    if reader.is_encrypted:
+        raise UnsupportedFormat('encrypted PDF')
+    pages = reader.pages
+    texts = []
+    length = 0
+    for page in pages[:MAX_TEXT_PAGES]:
+        page_text = page.extract_text() or ''
+        texts.append(page_text)
+        length += len(page_text)
+        if length >= MAX_CONTENT_CHARS:
+            break
+    text = '\n'.join(texts)
+    cover = None
+    if len(pages):
+        cover = _largest_image(pages[0]) or text_card(texts[0] if texts else '')
+    return cover, len(pages), text
+
+
+def _docx_page_count(fh):
+    """Page count Word saved in docProps/app.xml (None if absent)"""
+    fh.seek(0)
+    with zipfile.ZipFile(fh) as archive:
+        try:
+            root = ElementTree.fromstring(archive.read('docProps/app.xml'))
+        except KeyError:
+            return None
+    for element in root:
+        if element.tag.endswith('}Pages') and (element.text or '').isdigit():
+            return int(element.text)
+    return None
+
+
+def render_docx(fh):
+    import docx
+
+    document = docx.Document(fh)
+    text = '\n'.join(paragraph.text for paragraph in document.paragraphs)
+    return text_card(text), _docx_page_count(fh), text
+
+
+RENDERERS = {'pdf': render_pdf, 'docx': render_docx, **{ext: render_image for ext in IMAGE_EXTENSIONS}}
+
+
+def render(name, fh):
+    renderer = RENDERERS.get(extension(name))
+    if renderer is None:
+        raise UnsupportedFormat(f"no renderer for .{extension(name)}")
+    return renderer(fh)
+
+
+def _thumbnail_bytes(image, width):
+    thumb = image.copy()
+    if thumb.mode not in ('RGB', 'L'):
+        background = Image.new('RGB', thumb.size, 'white')
+        background.paste(thumb.convert('RGBA'), mask=thumb.convert('RGBA').split()[-1])
+        thumb = background
+    thumb.thumbnail((width, width * 4))
+    buffer = io.BytesIO()
+    thumb.convert('RGB').save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def store_thumbnails(material_id, source_name, image):
+    """
+    Save one JPEG per configured width.
+
+    Returns:
+        dict: width (as str) -> stored name
+    """
+    # Names change with the source file so CDN/browser caches never serve a stale card
+    token = hashlib.sha1(source_name.encode()).hexdigest()[:10]
+    stored = {}
+    for width in thumbnail_sizes():
+        name = f'material_previews/{material_id}/{token}_{width}.jpg'
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        stored[str(width)] = default_storage.save(name, ContentFile(_thumbnail_bytes(image, width)))
+    return stored
+
+
+def delete_assets(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not delete preview asset {name}: {e}")
+
+
+# ---------------------------------------------------------------------------
+# Queue
+# ---------------------------------------------------------------------------
+
+def queue_preview(material):
+    """Queue (re-)rendering when the material's file changed; drop it when removed"""
+    name = material.file.name if material.file else ''
+    if not name:
+        MaterialPreview.objects.filter(material_id=material.pk).delete()
+        return None
+
+    reset = MaterialPreview.objects.filter(material_id=material.pk).exclude(source_name=name).update(
+        source_name=name, status='pending', attempts=0, last_error='', extracted_text='',
+        next_attempt_at=timezone.now(), locked_at=None,
+    )
+    preview, created = MaterialPreview.objects.get_or_create(material_id=material.pk, defaults={'source_name': name})
+    if (reset or created) and getattr(settings, 'MATERIAL_PREVIEW_EAGER', False):
+        transaction.on_commit(lambda: PreviewWorker().process_ids([material.pk]))
+    return preview
+
+
+def preview_urls(preview, request=None):
+    """{width: absolute URL} of a ready preview's thumbnails"""
+    if preview is None or preview.status != 'ready':
+        return {}
+    urls = {}
+    for width, name in preview.thumbnails.items():
+        url = default_storage.url(name)
+        urls[width] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def card_thumbnail(urls):
+    """The smallest thumbnail at least CARD_WIDTH wide (or the largest one)"""
+    if not urls:
+        return None
+    widths = sorted(int(width) for width in urls)
+    chosen = next((width for width in widths if width >= CARD_WIDTH), widths[-1])
+    return urls[str(chosen)]
+
+
+class PreviewWorker:
+    """Claims queued previews and renders them; several workers can run side by side"""
+
+    def __init__(self, batch_size=10):
+        self.batch_size = batch_size
+        self.max_attempts = getattr(settings, 'MATERIAL_PREVIEW_MAX_ATTEMPTS', 3)
+
+    def release_stale_locks(self):
+        """Return previews abandoned by a crashed worker to the queue"""
+        cutoff = timezone.now() - timedelta(minutes=STALE_LOCK_MINUTES)
+        return MaterialPreview.objects.filter(
+            status='processing', locked_at__lt=cutoff
+        ).update(status='pending', locked_at=None)
+
+    def _claim(self, queryset):
+        now = timezone.now()
+        with transaction.atomic():
+            ids = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by('next_attempt_at').values_list('material_id', flat=True)[:self.batch_size]
+            )
+            if ids:
+                MaterialPreview.objects.filter(material_id__in=ids).update(status='processing', locked_at=now)
+        return list(MaterialPreview.objects.filter(material_id__in=ids, status='processing'))
+
+    def claim_batch(self):
+        return self._claim(MaterialPreview.objects.filter(status='pending', next_attempt_at__lte=timezone.now()))
+
+    def process(self, preview):
+        """Render one claimed preview; returns the final status"""
+        source_name = preview.source_name
+        try:
+            with default_storage.open(source_name, 'rb') as fh:
+                cover, page_count, text = render(source_name, fh)
+            thumbnails = store_thumbnails(preview.material_id, source_name, cover) if cover is not None else {}
+        except UnsupportedFormat as e:
+            return self._finish(preview, 'unsupported', last_error=str(e))
+        except Exception as e:
+            return self._retry(preview, e)
+
+        status = self._finish(
+            preview, 'ready', thumbnails=thumbnails, page_count=page_count,
+            extracted_text=text[:MAX_CONTENT_CHARS].replace('\x00', ''),
+        )
+        if status == 'ready':
+            index_material(preview.material)
+            logger.info(f"🖼️ Preview ready for material {preview.material_id} ({page_count} page(s))")
+        return status
+
+    def _finish(self, preview, status, thumbnails=None, page_count=None, extracted_text='', last_error=''):
+        """Store the outcome and drop whichever thumbnails are no longer referenced"""
+        thumbnails = thumbnails or {}
+        # Only write if the file was not replaced while rendering
+        updated = MaterialPreview.objects.filter(
+            material_id=preview.material_id, source_name=preview.source_name, status='processing'
+        ).update(
+            status=status, thumbnails=thumbnails, page_count=page_count, extracted_text=extracted_text,
+            last_error=last_error, locked_at=None, attempts=preview.attempts + 1, updated_at=timezone.now(),
+        )
+        kept, dropped = (thumbnails, preview.thumbnails) if updated else (preview.thumbnails, thumbnails)
+        delete_assets(set(dropped.values()) - set(kept.values()))
+        return status if updated else 'pending'
+
+    def _retry(self, preview, error):
+        attempts = preview.attempts + 1
+        if attempts >= self.max_attempts:
+            logger.error(f"❌ Preview for material {preview.material_id} failed permanently: {error}")
+            return self._finish(preview, 'failed', last_error=str(error)[:2000])
+        delay = min(RETRY_BASE_SECONDS * (2 ** (attempts - 1)), RETRY_MAX_SECONDS)
+        logger.warning(f"⚠️ Preview for material {preview.material_id} attempt {attempts} failed, retrying in {delay}s: {error}")
+        MaterialPreview.objects.filter(
+            material_id=preview.material_id, source_name=preview.source_name, status='processing'
+        ).update(
+            status='pending', locked_at=None, attempts=attempts, last_error=str(error)[:2000],
+            next_attempt_at=timezone.now() + timedelta(seconds=delay), updated_at=timezone.now(),
+        )
+        return 'pending'
+
+    def run_once(self):
+        """
+        Render one batch of due previews.
+
+        Returns:
+            dict: status -> count
+        """
+        counts = {}
+        for preview in self.claim_batch():
+            status = self.process(preview)
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def process_ids(self, material_ids):
+        """Render specific queued previews immediately (eager mode)"""
+        claimed = self._claim(MaterialPreview.objects.filter(material_id__in=material_ids, status='pending'))
+        return [self.process(preview) for preview in claimed]
+
+
+def enqueue_missing(get_model, batch_size=500):
+    """
+    Queue previews for materials that have a file but no preview row.
+
+    ``get_model`` is ``django.apps.apps.get_model`` or a migration's
+    historical ``apps.get_model``.
+
+    Returns:
+        int: previews queued
+    """
+    Material = get_model('documents', 'LearningMaterial')
+    Preview = get_model('hubs', 'MaterialPreview')
+
+    missing = (
+        Material.objects.filter(preview__isnull=True).exclude(file='').exclude(file__isnull=True)
+        .values_list('id', 'file').order_by('id')
+    )
+    batch = []
+    total = 0
+    for material_id, name in missing.iterator(chunk_size=batch_size):
+        batch.append(Preview(material_id=material_id, source_name=name))
+        if len(batch) >= batch_size:
+            Preview.objects.bulk_create(batch, ignore_conflicts=True)
+            total += len(batch)
+            batch = []
+    if batch:
+        Preview.objects.bulk_create(batch, ignore_conflicts=True)
+        total += len(batch)
+    return total
+
+
+def preview_stats():
+    from django.db.models import Count
+
+    return dict(MaterialPreview.objects.values_list('status').annotate(total=Count('pk')).order_by())
@@ -0,0 +1,151 @@
+"""
+Mention Directory
+
+Prefix index behind @mention autocomplete. Each taggable user (active, and
+privacy settings not set to 'none') has one MentionDirectoryEntry with
+normalized keys for full name, last name, username and email local part.
+A search is one query: a prefix LIKE on those indexed keys joined to the
+user, cached per (prefix, limit) for MENTION_SEARCH_CACHE_TTL seconds.
+
+Entries are refreshed from hubs/signals.py when a user's name, username,
+email, active flag or tagging preference changes.
+"""
+
+import hashlib
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+from authentication.models import PolaUser
+from .models import MentionDirectoryEntry
+
+MIN_QUERY_LENGTH = 2
+MAX_RESULTS = 25
+
+# PolaUser fields that feed the directory
+DIRECTORY_USER_FIELDS = {'first_name', 'last_name', 'username', 'email', 'is_active'}
+
+
+def normalize(value):
+    """Lowercase, strip accents, drop a leading @ and collapse whitespace"""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = ''.join(ch for ch in value if not unicodedata.combining(ch))
+    return ' '.join(value.lower().lstrip('@').split())
+
+
+def entry_keys(first_name, last_name, username, email):
+    """Directory keys for one user"""
+    return {
+        'full_key': normalize(f'{first_name} {last_name}')[:255],
+        'last_key': normalize(last_name)[:150],
+        'username_key': normalize(username)[:150],
+        'email_key': normalize((email or '').split('@')[0])[:255],
+    }
+
+
+def _taggable(is_active, allow_tagging):
+    return is_active and allow_tagging != 'none'
+
+
+def _directory_rows(user_ids=None):
+    users = PolaUser.objects.all()
+    if user_ids is not None:
+        users = users.filter(id__in=user_ids)
+    return users.values_list(
+        'id', 'first_name', 'last_name', 'username', 'email', 'is_active', 'privacy_settings__allow_tagging'
+    )
+
+
+def _build_entry(user_id, first_name, last_name, username, email, allow_tagging):
+    return MentionDirectoryEntry(
+        user_id=user_id,
+        allow_tagging=allow_tagging or 'everyone',
+        **entry_keys(first_name, last_name, username, email),
+    )
+
+
+def refresh_mention_entry(user_id):
+    """Upsert or drop one user's entry"""
+    rows = list(_directory_rows([user_id]))
+    if not rows:
+        return None
+    user_id, first_name, last_name, username, email, is_active, allow_tagging = rows[0]
+    if not _taggable(is_active, allow_tagging):
+        MentionDirectoryEntry.objects.filter(user_id=user_id).delete()
+        return None
+
+    entry = _build_entry(user_id, first_name, last_name, username, email, allow_tagging)
+    MentionDirectoryEntry.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            field.name: getattr(entry, field.name)
+            for field in MentionDirectoryEntry._meta.concrete_fields
+            if field.name not in ('user', 'updated_at')
+        },
+    )
+    return entry
+
+
+def rebuild_mention_directory(batch_size=1000):
+    """Rebuild every entry from users and privacy settings"""
+    entries = [
+        _build_entry(user_id, first_name, last_name, username, email, allow_tagging)
+        for user_id, first_name, last_name, username, email, is_active, allow_tagging in _directory_rows().iterator()
+        if _taggable(is_active, allow_tagging)
+    ]
+    with transaction.atomic():
+        MentionDirectoryEntry.objects.all().delete()
+        MentionDirectoryEntry.objects.bulk_create(entries, batch_size=batch_size)
+    return len(entries)
+
+
+def search_users(query, limit=10):
+    """
+    Taggable users whose name, last name, username or email starts with
+    ``query``, ordered by full name. One query; privacy_settings is joined
+    so serializers can check it without further queries.
+    """
+    prefix = normalize(query)
+    if len(prefix) < MIN_QUERY_LENGTH:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+    match = (
+        Q(mention_entry__full_key__startswith=prefix)
+        | Q(mention_entry__last_key__startswith=prefix)
+        | Q(mention_entry__username_key__startswith=prefix)
+        | Q(mention_entry__email_key__startswith=prefix)
+    )
+    return list(
+        PolaUser.objects.filter(match)
+        .select_related('privacy_settings')
+        .order_by('mention_entry__full_key', 'id')[:limit]
+    )
+
+
+def cached_search(query, limit, serialize, namespace=''):
+    """
+    ``serialize(search_users(query, limit))`` cached per normalized prefix.
+
+    ``namespace`` separates callers whose serialized output differs (e.g.
+    absolute media URLs per host, viewer-dependent fields per user).
+    """
+    prefix = normalize(query)
+    ttl = getattr(settings, 'MENTION_SEARCH_CACHE_TTL', 30)
+    if ttl <= 0:
+        return serialize(search_users(prefix, limit))
+
+    digest = hashlib.md5(f'{namespace}|{prefix}|{limit}'.encode()).hexdigest()
+    key = f'mention_search:{digest}'
+    results = cache.get(key)
+    if results is None:
+        results = serialize(search_users(prefix, limit))
+        cache.set(key, results, ttl)
+    return results
+
+
+def resolve_mentions(user_ids):
+    """{id: PolaUser} for mentioned ids in one query, with privacy_settings joined"""
+    return PolaUser.objects.select_related('privacy_settings').in_bulk(set(user_ids))
@@ -5,7 +5,7 @@ from rest_framework import viewsets, status, filters
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Q, Count
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
@@ -17,6 +17,7 @@ from .serializers import (
     HubCommentSerializer
 )
 from .mention_notifications import notify_multiple_mentions
+from .mention_directory import MIN_QUERY_LENGTH, cached_search, normalize
 
 
 class UserMentionViewSet(viewsets.ReadOnlyModelViewSet):
@@ -53,30 +54,32 @@ class UserMentionViewSet(viewsets.ReadOnlyModelViewSet):
         Search users for autocomplete mention suggestions
         
         Query params:
-        - q: search query (name or email)
-        - limit: max results (default 10)
+        - q: search query (name, username or email prefix)
+        - limit: max results (default 10, max 25)
         
         Returns: List of users matching search
         """
         query = request.query_params.get('q', '').strip()
-        limit = int(request.query_params.get('limit', 10))
+        try:
+            limit = int(request.query_params.get('limit', 10))
+        except ValueError:
+            limit = 10
         
-        if not query or len(query) < 2:
+        if len(normalize(query)) < MIN_QUERY_LENGTH:
             return Response({
                 'error': 'Search query must be at least 2 characters'
             }, status=status.HTTP_400_BAD_REQUEST)
         
-        # Search by first name, last name, or email
-        users = self.get_queryset().filter(
-            Q(first_name__icontains=query) |
-            Q(last_name__icontains=query) |
-            Q(email__icontains=query)
-        )[:limit]
-        
-        serializer = self.get_serializer(users, many=True)
+        # Prefix search on the mention directory (taggable users only); cached
+        # per viewer because can_be_tagged depends on who is asking
+        results = cached_search(
+            query, limit,
+            serialize=lambda users: self.get_serializer(users, many=True).data,
+            namespace=f'{request.get_host()}|{request.user.pk}',
+        )
         return Response({
-            'count': users.count(),
-            'results': serializer.data
+            'count': len(results),
+            'results': results
         })
     
     @action(detail=True, methods=['get'])
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0003_alter_learningmaterial_subtopic_and_more'),
+        ('hubs', '0015_legaledtopic_language'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentEngagementDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('bookmarks', models.IntegerField(default=0)),
+                ('downloads', models.IntegerField(default=0)),
+                ('content', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='engagement_daily', to='documents.learningmaterial')),
+            ],
+            options={
+                'verbose_name': 'Content Engagement (Daily)',
+                'verbose_name_plural': 'Content Engagement (Daily)',
+                'indexes': [models.Index(fields=['day', 'content'], name='hubs_conten_day_d5e139_idx')],
+                'constraints': [models.UniqueConstraint(fields=('content', 'day'), name='unique_content_engagement_day')],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploaderEngagementDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hub_type', models.CharField(choices=[('advocates', 'Advocates Hub'), ('students', 'Students Hub'), ('forum', 'Forum'), ('legal_ed', 'Legal Education')], max_length=20)),
+                ('day', models.DateField()),
+                ('views', models.IntegerField(default=0)),
+                ('likes', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('bookmarks', models.IntegerField(default=0)),
+                ('downloads', models.IntegerField(default=0)),
+                ('uploader', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='engagement_daily', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Uploader Engagement (Daily)',
+                'verbose_name_plural': 'Uploader Engagement (Daily)',
+                'indexes': [models.Index(fields=['hub_type', 'day'], name='hubs_upload_hub_typ_40c8ad_idx')],
+                'constraints': [models.UniqueConstraint(fields=('uploader', 'hub_type', 'day'), name='unique_uploader_engagement_day')],
+            },
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_mention_directory(apps, schema_editor):
+    """One entry per active user who allows tagging"""
+    from hubs.mention_directory import entry_keys
+
+    PolaUser = apps.get_model('authentication', 'PolaUser')
+    MentionDirectoryEntry = apps.get_model('hubs', 'MentionDirectoryEntry')
+
+    rows = PolaUser.objects.filter(is_active=True).values_list(
+        'id', 'first_name', 'last_name', 'username', 'email', 'privacy_settings__allow_tagging'
+    )
+    batch = []
+    for user_id, first_name, last_name, username, email, allow_tagging in rows.iterator(chunk_size=1000):
+        if allow_tagging == 'none':
+            continue
+        batch.append(MentionDirectoryEntry(
+            user_id=user_id,
+            allow_tagging=allow_tagging or 'everyone',
+            **entry_keys(first_name, last_name, username, email),
+        ))
+        if len(batch) >= 5000:
+            MentionDirectoryEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        MentionDirectoryEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0005_verification_review_queue'),
+        ('hubs', '0016_engagement_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MentionDirectoryEntry',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='mention_entry', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('full_key', models.CharField(db_index=True, help_text="'first last'", max_length=255)),
+                ('last_key', models.CharField(db_index=True, max_length=150)),
+                ('username_key', models.CharField(blank=True, db_index=True, max_length=150)),
+                ('email_key', models.CharField(db_index=True, help_text='Email local part', max_length=255)),
+                ('allow_tagging', models.CharField(default='everyone', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Mention Directory Entry',
+                'verbose_name_plural': 'Mention Directory',
+            },
+        ),
+        migrations.RunPython(backfill_mention_directory, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,96 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_conversations(apps, schema_editor):
+    """Group existing messages by user pair and compute unread counters"""
+    from hubs.conversations import backfill_conversations as backfill
+
+    backfill(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hubs', '0017_mention_directory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HubConversationParticipant',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('unread_count', models.PositiveIntegerField(default=0)),
+                ('last_read_at', models.DateTimeField(blank=True, null=True)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Conversation Participant',
+                'verbose_name_plural': 'Conversation Participants',
+            },
+        ),
+        migrations.CreateModel(
+            name='HubConversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hubs.hubmessage')),
+                ('user_high', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('user_low', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Conversation',
+                'verbose_name_plural': 'Conversations',
+            },
+        ),
+        migrations.AddField(
+            model_name='hubmessage',
+            name='conversation',
+            field=models.ForeignKey(blank=True, help_text='Set automatically from the sender/recipient pair', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='messages', to='hubs.hubconversation'),
+        ),
+        migrations.AddIndex(
+            model_name='hubmessage',
+            index=models.Index(fields=['conversation', '-created_at', '-id'], name='hubs_hubmes_convers_f5b8ba_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hubmessage',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['conversation', 'recipient'], name='hub_message_unread_idx'),
+        ),
+        migrations.AddField(
+            model_name='hubconversationparticipant',
+            name='conversation',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='hubs.hubconversation'),
+        ),
+        migrations.AddField(
+            model_name='hubconversationparticipant',
+            name='peer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='hubconversationparticipant',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='hub_conversations', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='hubconversation',
+            constraint=models.UniqueConstraint(fields=('user_low', 'user_high'), name='unique_conversation_pair'),
+        ),
+        migrations.AddConstraint(
+            model_name='hubconversation',
+            constraint=models.CheckConstraint(condition=models.Q(('user_low__lt', models.F('user_high'))), name='conversation_pair_ordered'),
+        ),
+        migrations.AddIndex(
+            model_name='hubconversationparticipant',
+            index=models.Index(fields=['user', '-last_message_at', '-conversation'], name='hub_inbox_keyset_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='hubconversationparticipant',
+            constraint=models.UniqueConstraint(fields=('conversation', 'user'), name='unique_conversation_participant'),
+        ),
+        migrations.RunPython(backfill_conversations, migrations.RunPython.noop),
+    ]
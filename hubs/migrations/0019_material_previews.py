@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:36
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def queue_existing_files(apps, schema_editor):
+    """Queue previews for materials uploaded before the preview worker existed"""
+    from hubs.material_previews import enqueue_missing
+
+    enqueue_missing(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('documents', '0004_content_search'),
+        ('hubs', '0018_hub_conversations'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MaterialPreview',
+            fields=[
+                ('material', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='preview', serialize=False, to='documents.learningmaterial')),
+                ('source_name', models.CharField(help_text='File the assets were rendered from', max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], default='pending', max_length=12)),
+                ('thumbnails', models.JSONField(blank=True, default=dict, help_text='Thumbnail width -> stored file name')),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('extracted_text', models.TextField(blank=True, default='')),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Material Preview',
+                'verbose_name_plural': 'Material Previews',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='material_preview_queue_idx')],
+            },
+        ),
+        migrations.RunPython(queue_existing_files, migrations.RunPython.noop),
+    ]
@@ -179,6 +179,34 @@ class CommentMention(models.Model):
         self.save(update_fields=['is_read'])
 
 
+class MentionDirectoryEntry(models.Model):
+    """
+    Normalized (lowercased, accent-folded) name keys for @mention autocomplete.
+    Only users who can be tagged have a row. Maintained by hubs.mention_directory;
+    rebuild with `python manage.py rebuild_mention_directory`.
+    """
+    user = models.OneToOneField(
+        PolaUser,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='mention_entry'
+    )
+    # db_index on CharFields also creates a varchar_pattern_ops index for prefix LIKE
+    full_key = models.CharField(max_length=255, db_index=True, help_text="'first last'")
+    last_key = models.CharField(max_length=150, db_index=True)
+    username_key = models.CharField(max_length=150, db_index=True, blank=True)
+    email_key = models.CharField(max_length=255, db_index=True, help_text="Email local part")
+    allow_tagging = models.CharField(max_length=20, default='everyone')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Mention Directory Entry'
+        verbose_name_plural = 'Mention Directory'
+
+    def __str__(self):
+        return self.full_key
+
+
 class ContentBookmark(models.Model):
     """
     Track bookmarked content (posts/documents) across all hubs
@@ -204,6 +232,66 @@ class ContentBookmark(models.Model):
         return f"{self.user.get_full_name()} bookmarked {self.content.title}"
 
 
+class ContentEngagementDaily(models.Model):
+    """
+    Per-content daily engagement counters backing admin hub analytics.
+    Maintained incrementally by hubs.engagement_rollup; rebuild with
+    `python manage.py backfill_engagement_rollup`.
+    """
+    content = models.ForeignKey(
+        'documents.LearningMaterial',
+        on_delete=models.CASCADE,
+        related_name='engagement_daily'
+    )
+    day = models.DateField()
+    views = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    downloads = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Content Engagement (Daily)'
+        verbose_name_plural = 'Content Engagement (Daily)'
+        constraints = [
+            models.UniqueConstraint(fields=['content', 'day'], name='unique_content_engagement_day'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'content']),
+        ]
+
+    def __str__(self):
+        return f"Content {self.content_id} on {self.day}"
+
+
+class UploaderEngagementDaily(models.Model):
+    """
+    Per-uploader daily engagement counters (per hub) received on their content.
+    Maintained alongside ContentEngagementDaily.
+    """
+    uploader = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='engagement_daily')
+    hub_type = models.CharField(max_length=20, choices=HubComment.HUB_TYPES)
+    day = models.DateField()
+    views = models.IntegerField(default=0)
+    likes = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    bookmarks = models.IntegerField(default=0)
+    downloads = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = 'Uploader Engagement (Daily)'
+        verbose_name_plural = 'Uploader Engagement (Daily)'
+        constraints = [
+            models.UniqueConstraint(fields=['uploader', 'hub_type', 'day'], name='unique_uploader_engagement_day'),
+        ]
+        indexes = [
+            models.Index(fields=['hub_type', 'day']),
+        ]
+
+    def __str__(self):
+        return f"Uploader {self.uploader_id} ({self.hub_type}) on {self.day}"
+
+
 class HubMessage(models.Model):
     """
     Private messages between users across all hubs
@@ -219,6 +307,14 @@ class HubMessage(models.Model):
     hub_type = models.CharField(max_length=20, choices=HUB_TYPES, default='general', db_index=True)
     sender = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='sent_hub_messages')
     recipient = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='received_hub_messages')
+    conversation = models.ForeignKey(
+        'HubConversation',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='messages',
+        help_text="Set automatically from the sender/recipient pair"
+    )
     
     subject = models.CharField(max_length=255, blank=True)
     message = models.TextField()
@@ -235,12 +331,111 @@ class HubMessage(models.Model):
         indexes = [
             models.Index(fields=['hub_type', 'recipient', '-created_at']),
             models.Index(fields=['hub_type', 'sender', '-created_at']),
+            models.Index(fields=['conversation', '-created_at', '-id']),
+            models.Index(fields=['conversation', 'recipient'], condition=models.Q(is_read=False), name='hub_message_unread_idx'),
         ]
     
     def __str__(self):
         return f"[{self.hub_type}] {self.sender.get_full_name()} → {self.recipient.get_full_name()}"
 
 
+class HubConversation(models.Model):
+    """
+    Direct-message thread between two users, keyed by the ordered pair
+    (user_low < user_high). Maintained by hubs.conversations when messages
+    are sent; see HubConversationParticipant for per-user state.
+    """
+    user_low = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='+')
+    user_high = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='+')
+    last_message = models.ForeignKey(
+        HubMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Conversation'
+        verbose_name_plural = 'Conversations'
+        constraints = [
+            models.UniqueConstraint(fields=['user_low', 'user_high'], name='unique_conversation_pair'),
+            models.CheckConstraint(condition=models.Q(user_low__lt=models.F('user_high')), name='conversation_pair_ordered'),
+        ]
+
+    def __str__(self):
+        return f"Conversation {self.user_low_id} ↔ {self.user_high_id}"
+
+
+class HubConversationParticipant(models.Model):
+    """
+    One user's side of a conversation: the inbox row with their unread
+    counter. ``last_message_at`` is copied from the conversation so the inbox
+    is a single index scan on (user, -last_message_at, -conversation).
+    """
+    conversation = models.ForeignKey(HubConversation, on_delete=models.CASCADE, related_name='participants')
+    user = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='hub_conversations')
+    peer = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='+')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_at = models.DateTimeField(null=True, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Conversation Participant'
+        verbose_name_plural = 'Conversation Participants'
+        constraints = [
+            models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_participant'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-last_message_at', '-conversation'], name='hub_inbox_keyset_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} in conversation {self.conversation_id}"
+
+
+class MaterialPreview(models.Model):
+    """
+    Derived assets of a material's file: thumbnails, page count and extracted
+    text. Queued when the file changes and rendered by the
+    process_material_previews worker (hubs.material_previews).
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('unsupported', 'Unsupported'),
+        ('failed', 'Failed'),
+    ]
+
+    material = models.OneToOneField(
+        'documents.LearningMaterial',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='preview'
+    )
+    source_name = models.CharField(max_length=255, help_text="File the assets were rendered from")
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pending')
+    thumbnails = models.JSONField(default=dict, blank=True, help_text="Thumbnail width -> stored file name")
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    extracted_text = models.TextField(blank=True, default='')
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True, default='')
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Material Preview'
+        verbose_name_plural = 'Material Previews'
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='material_preview_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Preview of material {self.material_id} ({self.status})"
+
+
 # ============================================================================
 # LEGAL EDUCATION HUB - Topics & Subtopics (Educational Content)
 # ============================================================================
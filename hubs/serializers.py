@@ -5,7 +5,7 @@ from rest_framework import serializers
 from django.db.models import Avg
 from .models import (
     LegalEdTopic, LegalEdSubTopic, HubComment, ContentLike, 
-    ContentBookmark, HubCommentLike, HubMessage, CommentMention
+    ContentBookmark, HubCommentLike, HubMessage, CommentMention, MaterialPreview
 )
 from documents.models import (
     LearningMaterial, LearningMaterialPurchase, LecturerFollow, 
@@ -13,7 +13,10 @@ from documents.models import (
 )
 from authentication.models import PolaUser
 from decimal import Decimal
-from utils.base64_fields import Base64AnyFileField
+from uploads.fields import UploadSessionFileField
+from subscriptions.ownership import OwnershipPrimingListSerializer, can_access_material, ownership_index
+from .mention_directory import resolve_mentions
+from .material_previews import card_thumbnail, preview_urls
 
 
 class LearningMaterialMinimalSerializer(serializers.ModelSerializer):
@@ -28,17 +31,16 @@ class LearningMaterialMinimalSerializer(serializers.ModelSerializer):
             'file', 'file_size', 'downloads_count', 'uploader_name',
             'is_approved', 'is_active', 'created_at'
         ]
+        list_serializer_class = OwnershipPrimingListSerializer
     
     def get_uploader_name(self, obj):
         return f"{obj.uploader.first_name} {obj.uploader.last_name}"
     
     def get_file(self, obj):
-        """Get file URL if available"""
-        if obj.file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.file.url)
-        return None
+        """Signed file URL, only for viewers who may download it"""
+        if not obj.file or not can_access_material(self.context, obj):
+            return None
+        return self.context['request'].build_absolute_uri(obj.file.url)
 
 
 class SubtopicMinimalSerializer(serializers.ModelSerializer):
@@ -70,6 +72,9 @@ class SubtopicMinimalSerializer(serializers.ModelSerializer):
         return obj.description
 
     def get_materials_count(self, obj):
+        counts = self.context.get('subtopic_materials_counts')
+        if counts is not None and obj.id in counts:
+            return counts[obj.id]['all']
         return obj.get_materials_count()
 
 
@@ -106,6 +111,9 @@ class TopicListSerializer(serializers.ModelSerializer):
         return obj.get_subtopics_count()
 
     def get_materials_count(self, obj):
+        counts = self.context.get('topic_materials_counts')
+        if counts is not None and obj.id in counts:
+            return counts[obj.id]['all']
         return obj.get_materials_count()
 
 
@@ -127,6 +135,9 @@ class TopicDetailSerializer(serializers.ModelSerializer):
         return obj.get_subtopics_count()
     
     def get_materials_count(self, obj):
+        counts = self.context.get('topic_materials_counts')
+        if counts is not None and obj.id in counts:
+            return counts[obj.id]['all']
         return obj.get_materials_count()
 
 
@@ -169,6 +180,9 @@ class SubtopicListSerializer(serializers.ModelSerializer):
     def get_materials_count(self, obj):
         request = self.context.get('request')
         language = request.query_params.get('language') if request else None
+        counts = self.context.get('subtopic_materials_counts')
+        if counts is not None and obj.id in counts:
+            return counts[obj.id][language if language in ('en', 'sw') else 'all']
         if language in ('en', 'sw'):
             return obj.materials.filter(language=language, is_active=True, is_approved=True).count()
         return obj.get_materials_count()
@@ -214,6 +228,9 @@ class SubtopicDetailSerializer(serializers.ModelSerializer):
     def get_materials_count(self, obj):
         request = self.context.get('request')
         language = request.query_params.get('language') if request else None
+        counts = self.context.get('subtopic_materials_counts')
+        if counts is not None and obj.id in counts:
+            return counts[obj.id][language if language in ('en', 'sw') else 'all']
         if language in ('en', 'sw'):
             return obj.materials.filter(language=language, is_active=True, is_approved=True).count()
         return obj.get_materials_count()
@@ -224,7 +241,7 @@ class SubtopicDetailSerializer(serializers.ModelSerializer):
 # ============================================================================
 
 from .models import HubComment, ContentLike, ContentBookmark, HubCommentLike, HubMessage
-from documents.models import LearningMaterialPurchase, LecturerFollow, MaterialQuestion, MaterialRating
+from documents.models import LecturerFollow, MaterialQuestion, MaterialRating
 from authentication.models import PolaUser
 from django.db.models import Avg
 
@@ -269,12 +286,17 @@ class HubContentSerializer(serializers.ModelSerializer):
     average_rating = serializers.SerializerMethodField()
     ratings_count = serializers.SerializerMethodField()
     file = serializers.SerializerMethodField()
+    preview_status = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    thumbnails = serializers.SerializerMethodField()
+    page_count = serializers.SerializerMethodField()
     
     class Meta:
         model = LearningMaterial
         fields = [
             'id', 'hub_type', 'content_type', 'uploader_info', 'uploader_type',
             'title', 'description', 'content', 'file', 'file_size',
+            'preview_status', 'thumbnail_url', 'thumbnails', 'page_count',
             'video_url', 'language', 'price', 'is_downloadable',
             'is_lecture_material', 'is_verified_quality', 'is_pinned',
             'views_count', 'downloads_count', 
@@ -287,8 +309,10 @@ class HubContentSerializer(serializers.ModelSerializer):
             'id', 'uploader_info', 'downloads_count', 'views_count',
             'likes_count', 'comments_count', 'bookmarks_count',
             'is_liked', 'is_bookmarked', 'has_purchased', 'can_download',
-            'average_rating', 'ratings_count', 'file', 'created_at', 'updated_at'
+            'average_rating', 'ratings_count', 'file', 'preview_status', 'thumbnail_url',
+            'thumbnails', 'page_count', 'created_at', 'updated_at'
         ]
+        list_serializer_class = OwnershipPrimingListSerializer
     
     def get_likes_count(self, obj):
         return obj.get_likes_count()
@@ -327,11 +351,8 @@ class HubContentSerializer(serializers.ModelSerializer):
         if obj.price == 0:
             return True
         
-        # Check if purchased
-        return LearningMaterialPurchase.objects.filter(
-            buyer=request.user, 
-            material=obj
-        ).exists()
+        # Check if purchased (page-wide lookup shared through the context)
+        return ownership_index(self.context).owns_material(obj.id)
     
     def get_can_download(self, obj):
         """Check if user can download this content"""
@@ -360,6 +381,28 @@ class HubContentSerializer(serializers.ModelSerializer):
         """Get total number of ratings"""
         return obj.ratings.count()
     
+    def _preview(self, obj):
+        """Rendered preview (select_related('preview') avoids a query per row)"""
+        try:
+            return obj.preview
+        except MaterialPreview.DoesNotExist:
+            return None
+
+    def get_preview_status(self, obj):
+        preview = self._preview(obj)
+        return preview.status if preview else None
+
+    def get_thumbnails(self, obj):
+        """Card thumbnails by width; shown without purchase, unlike ``file``"""
+        return preview_urls(self._preview(obj), self.context.get('request'))
+
+    def get_thumbnail_url(self, obj):
+        return card_thumbnail(self.get_thumbnails(obj))
+
+    def get_page_count(self, obj):
+        preview = self._preview(obj)
+        return preview.page_count if preview and preview.status == 'ready' else None
+
     def get_file(self, obj):
         """Get file URL if user has access - UNIFIED logic for all hubs"""
         if not obj.file:
@@ -407,10 +450,11 @@ class HubContentSerializer(serializers.ModelSerializer):
 
 class HubContentCreateSerializer(serializers.ModelSerializer):
     """
-    Content creation serializer with Base64 file upload support
+    Content creation serializer; ``file`` takes an upload session id
+    (see uploads app), a multipart file or a Base64 data URL
     Used for creating content/posts/materials across all hubs
     """
-    file = Base64AnyFileField(
+    file = UploadSessionFileField(
         required=False, 
         allow_null=True,
         max_file_size=50 * 1024 * 1024,  # 50MB limit
@@ -561,12 +605,18 @@ class HubContentCreateSerializer(serializers.ModelSerializer):
 
 
 class HubCommentSerializer(serializers.ModelSerializer):
-    """Unified comment serializer for all hubs"""
+    """
+    Unified comment serializer for all hubs
+
+    Comments decorated by hubs.comment_threads (``thread_*`` attributes) are
+    rendered without further queries; anything else falls back to per-object lookups.
+    """
     author_info = UserMinimalSerializer(source='author', read_only=True)
     likes_count = serializers.SerializerMethodField()
     replies_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
+    replies_next_cursor = serializers.SerializerMethodField()
     mentions = serializers.SerializerMethodField()
     
     class Meta:
@@ -574,21 +624,27 @@ class HubCommentSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'hub_type', 'content', 'author_info', 'parent_comment',
             'comment_text', 'likes_count', 'replies_count', 'is_liked',
-            'replies', 'mentions', 'is_active', 'created_at', 'updated_at'
+            'replies', 'replies_next_cursor', 'mentions', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = [
             'id', 'author_info', 'likes_count', 'replies_count',
-            'is_liked', 'replies', 'mentions', 'created_at', 'updated_at'
+            'is_liked', 'replies', 'replies_next_cursor', 'mentions', 'created_at', 'updated_at'
         ]
     
     def get_likes_count(self, obj):
+        if hasattr(obj, 'thread_likes_count'):
+            return obj.thread_likes_count
         return obj.get_likes_count()
     
     def get_replies_count(self, obj):
+        if hasattr(obj, 'thread_replies_count'):
+            return obj.thread_replies_count
         return obj.get_replies_count()
     
     def get_is_liked(self, obj):
         """Check if current user liked this comment"""
+        if hasattr(obj, 'thread_is_liked'):
+            return obj.thread_is_liked
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return HubCommentLike.objects.filter(user=request.user, comment=obj).exists()
@@ -596,7 +652,10 @@ class HubCommentSerializer(serializers.ModelSerializer):
     
     def get_mentions(self, obj):
         """Get all user mentions in this comment"""
-        mentions = obj.mentions.select_related('mentioned_user').all()
+        if hasattr(obj, 'thread_mentions'):
+            mentions = obj.thread_mentions
+        else:
+            mentions = obj.mentions.select_related('mentioned_user').all()
         return [{
             'user_id': m.mentioned_user.id,
             'username': m.mentioned_user.username,
@@ -606,10 +665,17 @@ class HubCommentSerializer(serializers.ModelSerializer):
     
     def get_replies(self, obj):
         """Get nested replies (only for top-level comments)"""
-        if obj.parent_comment is None:
+        if obj.parent_comment_id is not None:
+            return []
+        if hasattr(obj, 'thread_replies'):
+            replies = obj.thread_replies
+        else:
             replies = obj.replies.filter(is_active=True).order_by('created_at')[:10]
-            return HubCommentSerializer(replies, many=True, context=self.context).data
-        return []
+        return HubCommentSerializer(replies, many=True, context=self.context).data
+    
+    def get_replies_next_cursor(self, obj):
+        """Cursor for loading the rest of this thread's replies"""
+        return getattr(obj, 'thread_replies_next_cursor', None)
 
 
 class ContentLikeSerializer(serializers.ModelSerializer):
@@ -785,23 +851,24 @@ class CreateCommentWithMentionsSerializer(serializers.ModelSerializer):
         if not request or not request.user.is_authenticated:
             raise serializers.ValidationError("You must be authenticated to mention users")
         
-        # Get all mentioned users
-        users = PolaUser.objects.filter(id__in=value)
-        if users.count() != len(value):
-            found_ids = set(users.values_list('id', flat=True))
-            missing_ids = set(value) - found_ids
+        # Resolve all mentioned users in one query
+        value = list(dict.fromkeys(value))
+        users = resolve_mentions(value)
+        missing_ids = [user_id for user_id in value if user_id not in users]
+        if missing_ids:
             raise serializers.ValidationError(
                 f"Users not found: {', '.join(map(str, missing_ids))}"
             )
         
         # Check privacy settings
-        for user in users:
+        for user in users.values():
             if hasattr(user, 'privacy_settings'):
                 if not user.privacy_settings.can_be_tagged_by(request.user):
                     raise serializers.ValidationError(
                         f"User {user.get_full_name()} does not allow being tagged"
                     )
         
+        self._mentioned = users
         return value
     
     def create(self, validated_data):
@@ -827,8 +894,9 @@ class CreateCommentWithMentionsSerializer(serializers.ModelSerializer):
             comment_text = validated_data['comment_text']
             logger.info(f"📝 [SERIALIZER] Processing {len(mentioned_user_ids)} mentions")
             
+            users = getattr(self, '_mentioned', None) or resolve_mentions(mentioned_user_ids)
             for user_id in mentioned_user_ids:
-                user = PolaUser.objects.get(id=user_id)
+                user = users[user_id]
                 # Find position of @username in text (try first_name, username, or any @word)
                 username_pattern = f"@{user.first_name}"
                 position = comment_text.lower().find(username_pattern.lower())
@@ -883,16 +951,47 @@ class HubMessageSerializer(serializers.ModelSerializer):
     """Serializer for private messages"""
     sender_info = UserMinimalSerializer(source='sender', read_only=True)
     recipient_info = UserMinimalSerializer(source='recipient', read_only=True)
+    recipient = serializers.PrimaryKeyRelatedField(
+        queryset=PolaUser.objects.filter(is_active=True), write_only=True
+    )
     
     class Meta:
         model = HubMessage
         fields = [
-            'id', 'hub_type', 'sender_info', 'recipient_info',
+            'id', 'hub_type', 'conversation', 'recipient', 'sender_info', 'recipient_info',
             'subject', 'message', 'is_read', 'read_at', 'created_at'
         ]
         read_only_fields = [
-            'id', 'sender_info', 'recipient_info', 'is_read', 'read_at', 'created_at'
+            'id', 'conversation', 'sender_info', 'recipient_info', 'is_read', 'read_at', 'created_at'
         ]
+    
+    def validate_recipient(self, value):
+        request = self.context.get('request')
+        if request and value.pk == request.user.pk:
+            raise serializers.ValidationError("You cannot send a message to yourself")
+        return value
+
+
+class HubConversationSerializer(serializers.Serializer):
+    """Inbox row: one HubConversationParticipant from the viewer's side"""
+    conversation_id = serializers.IntegerField(read_only=True)
+    peer = UserMinimalSerializer(read_only=True)
+    unread_count = serializers.IntegerField(read_only=True)
+    last_read_at = serializers.DateTimeField(read_only=True)
+    last_message_at = serializers.DateTimeField(read_only=True)
+    last_message = serializers.SerializerMethodField()
+    
+    def get_last_message(self, obj):
+        message = obj.conversation.last_message
+        if message is None:
+            return None
+        return {
+            'id': message.id,
+            'sender_id': message.sender_id,
+            'message': message.message[:200],
+            'is_read': message.is_read,
+            'created_at': message.created_at,
+        }
 
 
 # ============================================================================
@@ -909,7 +1008,7 @@ class AdminContentCreateSerializer(serializers.ModelSerializer):
     - Sets sensible defaults for price, active status
     - Supports topic creation if not exists
     """
-    file = Base64AnyFileField(
+    file = UploadSessionFileField(
         required=False, 
         allow_null=True,
         max_file_size=50 * 1024 * 1024,  # 50MB limit
@@ -1001,7 +1100,7 @@ class AdminContentUpdateSerializer(serializers.ModelSerializer):
     
     Allows updating all fields including moderation status
     """
-    file = Base64AnyFileField(
+    file = UploadSessionFileField(
         required=False, 
         allow_null=True,
         max_file_size=50 * 1024 * 1024,  # 50MB limit
@@ -1,9 +1,24 @@
 """
 Django signals for Hub models
 """
-from django.db.models.signals import pre_save
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import HubComment
+from .models import (
+    HubComment, ContentLike, ContentBookmark, LegalEdTopic, LegalEdSubTopic, HubMessage, HubConversation,
+    MaterialPreview
+)
+from .conversations import get_or_create_conversation, record_deleted, record_sent
+from notification.events import publish_event
+from .catalog import invalidate_catalog
+from .content_search import SEARCH_FIELDS, index_material, unindex_material
+from .engagement_rollup import record_engagement
+from .material_previews import delete_assets, queue_preview
+from .mention_directory import DIRECTORY_USER_FIELDS, refresh_mention_entry
+from authentication.models import PolaUser, UserPrivacySettings
+from documents.models import LearningMaterial
+
+# LearningMaterial fields that change the Legal Education catalog counts
+CATALOG_MATERIAL_FIELDS = {'topic', 'subtopic', 'language', 'is_active', 'is_approved', 'hub_type'}
 
 
 @receiver(pre_save, sender=HubComment)
@@ -13,4 +28,123 @@ def update_comment_hub_type(sender, instance, **kwargs):
     This ensures data consistency and prevents comment count issues
     """
     if instance.content and instance.content.hub_type:
-        instance.hub_type = instance.content.hub_type
\ No newline at end of file
+        instance.hub_type = instance.content.hub_type
+
+
+@receiver(post_save, sender=LegalEdTopic)
+@receiver(post_delete, sender=LegalEdTopic)
+@receiver(post_save, sender=LegalEdSubTopic)
+@receiver(post_delete, sender=LegalEdSubTopic)
+def invalidate_catalog_on_tree_change(sender, instance, **kwargs):
+    """Topic/subtopic edits change the cached Legal Education catalog"""
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=LearningMaterial)
+@receiver(post_delete, sender=LearningMaterial)
+def invalidate_catalog_on_material_change(sender, instance, update_fields=None, **kwargs):
+    """
+    Material saves change per-language catalog counts.
+    Counter-only updates (views_count, downloads_count) are ignored.
+    """
+    if update_fields is not None and not CATALOG_MATERIAL_FIELDS.intersection(update_fields):
+        return
+    invalidate_catalog()
+
+
+@receiver(post_save, sender=LearningMaterial)
+def index_material_on_save(sender, instance, update_fields=None, raw=False, **kwargs):
+    """Re-index title/description/content when they (or the language) change"""
+    if raw or (update_fields is not None and not SEARCH_FIELDS.intersection(update_fields)):
+        return
+    index_material(instance)
+
+
+@receiver(post_delete, sender=LearningMaterial)
+def unindex_material_on_delete(sender, instance, **kwargs):
+    unindex_material(instance.pk)
+
+
+@receiver(post_save, sender=LearningMaterial)
+def queue_preview_on_file_change(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Render thumbnails/page count/text in the background when the file changes"""
+    if raw or (update_fields is not None and 'file' not in update_fields):
+        return
+    if created and not instance.file:
+        return
+    queue_preview(instance)
+
+
+@receiver(post_delete, sender=MaterialPreview)
+def delete_preview_assets(sender, instance, **kwargs):
+    delete_assets(instance.thumbnails.values())
+
+
+# Raw engagement rows -> daily rollup counter
+ENGAGEMENT_COUNTERS = {ContentLike: 'likes', HubComment: 'comments', ContentBookmark: 'bookmarks'}
+
+
+@receiver(post_save, sender=ContentLike)
+@receiver(post_save, sender=HubComment)
+@receiver(post_save, sender=ContentBookmark)
+def rollup_engagement_created(sender, instance, created, raw=False, **kwargs):
+    """Count new likes/comments/bookmarks in the daily engagement rollup"""
+    if created and not raw:
+        record_engagement(instance.content_id, ENGAGEMENT_COUNTERS[sender], 1, instance.created_at)
+
+
+@receiver(post_delete, sender=ContentLike)
+@receiver(post_delete, sender=HubComment)
+@receiver(post_delete, sender=ContentBookmark)
+def rollup_engagement_deleted(sender, instance, **kwargs):
+    """Remove deleted likes/comments/bookmarks from the day they were counted"""
+    record_engagement(instance.content_id, ENGAGEMENT_COUNTERS[sender], -1, instance.created_at)
+
+
+@receiver(post_save, sender=PolaUser)
+def refresh_mention_directory_on_user_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Keep the mention directory in step with names, username, email and is_active"""
+    if raw:
+        return
+    if update_fields is not None and not DIRECTORY_USER_FIELDS.intersection(update_fields):
+        return
+    refresh_mention_entry(instance.pk)
+
+
+@receiver(post_save, sender=UserPrivacySettings)
+@receiver(post_delete, sender=UserPrivacySettings)
+def refresh_mention_directory_on_privacy_change(sender, instance, origin=None, **kwargs):
+    """Tagging preference decides whether the user is in the directory"""
+    if isinstance(origin, PolaUser):
+        return  # user deleted; the entry cascades with it
+    refresh_mention_entry(instance.user_id)
+
+
+@receiver(pre_save, sender=HubMessage)
+def assign_message_conversation(sender, instance, raw=False, **kwargs):
+    """File new messages under the sender/recipient conversation"""
+    if raw or instance.conversation_id or instance.sender_id == instance.recipient_id:
+        return
+    instance.conversation = get_or_create_conversation(instance.sender_id, instance.recipient_id)
+
+
+@receiver(post_save, sender=HubMessage)
+def update_conversation_on_send(sender, instance, created, raw=False, **kwargs):
+    """Move the conversation's last-message pointer and notify the recipient"""
+    if not created or raw or not instance.conversation_id:
+        return
+    record_sent(instance)
+    publish_event(instance.recipient_id, 'message', {
+        'conversation_id': instance.conversation_id,
+        'message_id': instance.id,
+        'sender_id': instance.sender_id,
+        'preview': instance.message[:200],
+    })
+
+
+@receiver(post_delete, sender=HubMessage)
+def update_conversation_on_delete(sender, instance, origin=None, **kwargs):
+    """Keep counters and the last-message pointer right when a message is removed"""
+    if not instance.conversation_id or isinstance(origin, (HubConversation, PolaUser)):
+        return  # conversation or user deleted; nothing left to maintain
+    record_deleted(instance)
@@ -1,13 +1,57 @@
-from django.test import TestCase
+import io
+import re
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+
+import docx
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from rest_framework.test import APITestCase, APIClient
-from rest_framework import status
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from PIL import Image
+from reportlab.pdfgen import canvas
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
+
+from authentication.device_models import UserDevice
+from authentication.models import UserPrivacySettings
+from documents.models import LearningMaterial, LearningMaterialPurchase
+from hubs import content_search
+from hubs.catalog import catalog_cache
+from hubs.comment_threads import load_root_comments
+from hubs.content_search import search_materials
+from hubs.material_previews import PreviewWorker
+from hubs.mention_directory import search_users
 from hubs.models import (
-    HubComment, ContentLike, ContentBookmark, HubMessage
+    CommentMention,
+    ContentBookmark,
+    ContentEngagementDaily,
+    ContentLike,
+    HubComment,
+    HubCommentLike,
+    HubConversationParticipant,
+    HubMessage,
+    LegalEdSubTopic,
+    LegalEdTopic,
+    MaterialPreview,
+    UploaderEngagementDaily,
 )
-from documents.models import LearningMaterial
-from datetime import datetime, timedelta
+from hubs.serializers import CreateCommentWithMentionsSerializer, HubContentSerializer, SubtopicDetailSerializer
+from subscriptions.entitlements import MATERIAL, grant
+from subscriptions.serializers import LearningMaterialSerializer
+from utils.testing import create_test_admin, create_test_user
+from utils.versioned_cache import LOCAL_CACHE_TIMEOUT
 
 User = get_user_model()
 
@@ -375,3 +419,813 @@ class AdminHubContentManagementTestCase(APITestCase):
         self.assertIn('total_content', response.data)
         self.assertIn('by_hub_type', response.data)
         self.assertIn('by_content_type', response.data)
+
+
+class LegalEducationCatalogTestCase(APITestCase):
+    """Test suite for the cached Legal Education catalog snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_test_user('reader@test.com', 'Legal', 'Reader')
+        self.topic = LegalEdTopic.objects.create(name='Constitutional Law', slug='constitutional-law')
+        self.other_topic = LegalEdTopic.objects.create(name='Criminal Law', slug='criminal-law', display_order=1)
+        self.subtopic_en = LegalEdSubTopic.objects.create(topic=self.topic, name='Bill of Rights', language='en')
+        self.subtopic_sw = LegalEdSubTopic.objects.create(
+            topic=self.topic, name='Haki za Msingi', name_sw='Haki za Msingi', language='sw'
+        )
+
+        for language, subtopic in [('en', self.subtopic_en), ('en', self.subtopic_en), ('sw', self.subtopic_sw)]:
+            LearningMaterial.objects.create(
+                uploader=self.user, uploader_type='admin', hub_type='legal_ed',
+                title='Material', language=language, topic=self.topic, subtopic=subtopic
+            )
+        # Not approved - must not be counted
+        LearningMaterial.objects.create(
+            uploader=self.user, uploader_type='admin', hub_type='legal_ed',
+            title='Draft', subtopic=self.subtopic_en, is_approved=False
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_topic_list_counts_each_material_once(self):
+        """Materials linked to both topic and subtopic are counted once"""
+        response = self.client.get(reverse('legal-education-topic-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        topics = {item['slug']: item for item in response.data['results']}
+        self.assertEqual(topics['constitutional-law']['materials_count'], 3)
+        self.assertEqual(topics['constitutional-law']['subtopics_count'], 2)
+        self.assertEqual(topics['criminal-law']['materials_count'], 0)
+
+    def test_subtopic_list_per_language_counts(self):
+        """Subtopic counts follow the requested language"""
+        url = reverse('legal-education-subtopic-list')
+
+        response = self.client.get(url, {'topic': self.topic.id, 'language': 'en'})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.subtopic_en.id])
+        self.assertEqual(response.data['results'][0]['materials_count'], 2)
+
+        response = self.client.get(url, {'topic': self.topic.id, 'language': 'sw'})
+        self.assertEqual(response.data['results'][0]['materials_count'], 1)
+        self.assertEqual(response.data['results'][0]['name_localized'], 'Haki za Msingi')
+
+    def test_catalog_is_built_once_and_served_from_cache(self):
+        """Repeat list calls do not recount materials"""
+        url = reverse('legal-education-subtopic-list')
+        self.client.get(url)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertFalse(any('subscriptions_learningmaterial' in q['sql'] for q in queries.captured_queries))
+
+    def test_etag_not_modified(self):
+        """Clients sending the current ETag get 304"""
+        url = reverse('legal-education-topic-list')
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_per_process_cache_expires_quickly(self):
+        """Without a shared cache other workers' bumps are invisible, so entries live briefly"""
+        self.assertEqual(catalog_cache.timeout, LOCAL_CACHE_TIMEOUT)
+        shared = {'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': 'redis://cache:6379/1',
+        }}
+        with override_settings(CACHES=shared):
+            self.assertEqual(catalog_cache.timeout, 300)
+
+    def test_material_save_invalidates_catalog(self):
+        """Adding a material bumps the version so counts and ETag change"""
+        url = reverse('legal-education-topic-list')
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            LearningMaterial.objects.create(
+                uploader=self.user, uploader_type='admin', hub_type='legal_ed',
+                title='New', topic=self.other_topic
+            )
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        topics = {item['slug']: item for item in response.data['results']}
+        self.assertEqual(topics['criminal-law']['materials_count'], 1)
+
+
+class MediaDownloadGatewayTestCase(APITestCase):
+    """Test suite for signed, entitlement-checked material downloads"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, DOWNLOAD_COUNTERS_ASYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.uploader = create_test_user('uploader@test.com', 'Up', 'Loader')
+        self.buyer = create_test_user('buyer@test.com', 'Buy', 'Er')
+        self.payload = bytes(range(256)) * 40
+        self.material = LearningMaterial.objects.create(
+            uploader=self.uploader, uploader_type='student', hub_type='students',
+            content_type='notes', title='Paid Notes', price=Decimal('1000')
+        )
+        self.material.file.save('notes.pdf', ContentFile(self.payload))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.buyer)
+        self.url = reverse('hub-content-download', args=[self.material.id])
+
+    def tearDown(self):
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def test_storage_url_is_signed(self):
+        """Protected files never expose their public /media/ path"""
+        self.assertNotIn('/media/learning_materials/', self.material.file.url)
+        self.assertIn('/media/download/', self.material.file.url)
+
+    def test_download_requires_purchase(self):
+        """Paid content is refused until purchased, then counted"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        LearningMaterialPurchase.objects.create(buyer=self.buyer, material=self.material, amount_paid=1000)
+        grant(self.buyer.id, MATERIAL, self.material.id, source='direct_purchase', amount=1000)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['file_size'], len(self.payload))
+        self.material.refresh_from_db()
+        self.assertEqual(self.material.downloads_count, 1)
+        self.assertEqual(self.material.purchases.get().download_count, 1)
+
+    def test_material_listings_only_link_files_for_entitled_viewers(self):
+        """Topic materials and subtopic detail hide paid file links from non-buyers"""
+        topic = LegalEdTopic.objects.create(name='Land Law', slug='land-law')
+        subtopic = LegalEdSubTopic.objects.create(topic=topic, name='Leases', language='en')
+        self.material.topic = topic
+        self.material.subtopic = subtopic
+        self.material.save(update_fields=['topic', 'subtopic'])
+        materials_url = reverse('legal-education-topic-materials', args=[topic.slug])
+
+        def listed_file(client):
+            response = client.get(materials_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data['results']['materials'][0]['file']
+
+        def detail_file(user):
+            request = Request(APIRequestFactory().get('/'))
+            request.user = user
+            data = SubtopicDetailSerializer(subtopic, context={'request': request}).data
+            return data['materials'][0]['file']
+
+        self.assertIsNone(listed_file(self.client))
+        self.assertIsNone(detail_file(self.buyer))
+        self.assertIsNone(detail_file(AnonymousUser()))
+
+        uploader_client = APIClient()
+        uploader_client.force_authenticate(user=self.uploader)
+        self.assertIn('/media/download/', listed_file(uploader_client))
+
+        grant(self.buyer.id, MATERIAL, self.material.id, source='direct_purchase', amount=1000)
+        self.client.force_authenticate(user=self.buyer)  # fresh request, fresh ownership index
+        self.assertIn('/media/download/', listed_file(self.client))
+        self.assertIn('/media/download/', detail_file(self.buyer))
+
+    def test_signed_link_supports_range_and_etag(self):
+        """Python fallback serves full files, byte ranges and 304s"""
+        grant(self.buyer.id, MATERIAL, self.material.id, source='direct_purchase', amount=1000)
+        # The link is the authorization, so it works without a session
+        link = self.client.get(self.url).data['download_url']
+        anonymous = APIClient()
+
+        response = anonymous.get(link)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.payload)
+        etag = response['ETag']
+
+        response = anonymous.get(link, HTTP_RANGE='bytes=100-199')
+        self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+        self.assertEqual(response['Content-Range'], f'bytes 100-199/{len(self.payload)}')
+        self.assertEqual(b''.join(response.streaming_content), self.payload[100:200])
+
+        # Several ranges are not supported: ignored, full body
+        response = anonymous.get(link, HTTP_RANGE='bytes=0-1,5-6')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), self.payload)
+
+        response = anonymous.get(link, HTTP_RANGE=f'bytes={len(self.payload)}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{len(self.payload)}')
+
+        response = anonymous.get(link, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = anonymous.get(link[:-3] + 'xx/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_accel_redirect_offloads_to_nginx(self):
+        """With an accel prefix Django only authorizes and nginx streams"""
+        with override_settings(MEDIA_ACCEL_REDIRECT_PREFIX='/protected-media/'):
+            response = APIClient().get(self.material.file.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.material.file.name}')
+        self.assertEqual(response.content, b'')
+
+    def test_nginx_denies_every_protected_prefix(self):
+        """Each nginx config that serves /media/ refuses every PROTECTED_MEDIA_PREFIXES directory"""
+        protected = {prefix.strip('/') for prefix in settings.PROTECTED_MEDIA_PREFIXES}
+        configs = sorted((settings.BASE_DIR / 'nginx').rglob('*.conf'))
+        checked = 0
+        for config in configs:
+            text = config.read_text()
+            if 'location /media/' not in text:
+                continue
+            denied = re.findall(r'location ~ \^/media/\(([^)]*)\)/', text)
+            self.assertTrue(denied, f'{config.name} serves /media/ without a deny location')
+            for group in denied:
+                self.assertFalse(protected - set(group.split('|')), f'{config.name} does not deny these prefixes')
+            checked += 1
+        self.assertEqual(checked, 4)
+
+
+class EngagementRollupTestCase(APITestCase):
+    """Test suite for the daily engagement rollup behind admin analytics"""
+
+    def setUp(self):
+        self.admin_user = create_test_admin('rollup-admin@test.com', 'Admin', 'User')
+        self.author = create_test_user('author@test.com', 'Ann', 'Author')
+        self.readers = [
+            create_test_user(f'reader{i}@test.com', 'Reader', str(i))
+            for i in range(3)
+        ]
+        self.popular = LearningMaterial.objects.create(
+            uploader=self.author, uploader_type='student', hub_type='forum',
+            content_type='discussion', title='Popular', content='text'
+        )
+        self.quiet = LearningMaterial.objects.create(
+            uploader=self.author, uploader_type='student', hub_type='forum',
+            content_type='discussion', title='Quiet', content='text'
+        )
+        for reader in self.readers:
+            ContentLike.objects.create(user=reader, content=self.popular)
+            HubComment.objects.create(author=reader, content=self.popular, comment_text='Nice')
+        ContentBookmark.objects.create(user=self.readers[0], content=self.quiet)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+    def _today(self):
+        return ContentEngagementDaily.objects.get(content=self.popular)
+
+    def test_write_paths_maintain_counters(self):
+        """Likes/comments are counted on create and removed on delete"""
+        row = self._today()
+        self.assertEqual((row.likes, row.comments, row.bookmarks), (3, 3, 0))
+
+        ContentLike.objects.filter(user=self.readers[0], content=self.popular).delete()
+        row.refresh_from_db()
+        self.assertEqual(row.likes, 2)
+
+        uploader_row = UploaderEngagementDaily.objects.get(uploader=self.author, hub_type='forum')
+        self.assertEqual((uploader_row.likes, uploader_row.comments, uploader_row.bookmarks), (2, 3, 1))
+
+    def test_backfill_matches_incremental(self):
+        """Rebuilding from the raw tables reproduces the live counters"""
+        def snapshot():
+            return (
+                sorted(ContentEngagementDaily.objects.values_list('content_id', 'day', 'likes', 'comments', 'bookmarks')),
+                sorted(UploaderEngagementDaily.objects.values_list('uploader_id', 'hub_type', 'day', 'likes', 'comments', 'bookmarks')),
+            )
+
+        live = snapshot()
+        ContentEngagementDaily.objects.all().delete()
+        call_command('backfill_engagement_rollup', stdout=StringIO())
+
+        self.assertEqual(snapshot(), live)
+
+    def test_admin_trending_reads_rollup(self):
+        """Trending ranks by weighted rollup counts without touching raw tables"""
+        url = reverse('admin-hub-content-trending')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'hub_type': 'forum'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['id'] for item in response.data], [self.popular.id, self.quiet.id])
+        self.assertEqual(response.data[0]['trending_stats']['engagement_score'], 3 * 2 + 3 * 3)
+        ranking_sql = [q['sql'] for q in queries.captured_queries if 'engagementdaily' in q['sql']]
+        self.assertEqual(len(ranking_sql), 1)
+        self.assertNotIn('hubs_contentlike', ranking_sql[0])
+
+    def test_admin_trends_and_contributors(self):
+        """Daily trends and contributor totals come from the rollup"""
+        response = self.client.get(reverse('admin-hub-content-engagement-trends'), {'hub_type': 'forum'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['total_likes'], 3)
+        self.assertEqual(response.data['summary']['total_comments'], 3)
+        self.assertEqual(response.data['summary']['total_bookmarks'], 1)
+
+        response = self.client.get(reverse('admin-hub-content-top-contributors'), {'hub_type': 'forum'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['user_id'], self.author.id)
+        self.assertEqual(response.data[0]['content_count'], 2)
+        self.assertEqual(response.data[0]['total_likes'], 3)
+
+
+class OwnershipIndexTestCase(APITestCase):
+    """Test suite for the shared per-request purchase ownership index"""
+
+    def setUp(self):
+        self.uploader = create_test_user('owner-uploader@test.com', 'Up', 'Loader')
+        self.buyer = create_test_user('owner-buyer@test.com', 'Buy', 'Er')
+        self.materials = [
+            LearningMaterial.objects.create(
+                uploader=self.uploader, uploader_type='student', hub_type='students',
+                content_type='notes', title=f'Paid Notes {i}', price=Decimal('500')
+            )
+            for i in range(6)
+        ]
+
+    def _purchase(self):
+        grant(self.buyer.id, MATERIAL, self.materials[0].id, source='direct_purchase', amount=Decimal('500'))
+        grant(self.buyer.id, MATERIAL, self.materials[1].id, source='payment', amount=Decimal('500'))
+
+    def _request(self):
+        django_request = APIRequestFactory().get('/')
+        force_authenticate(django_request, user=self.buyer)
+        request = Request(django_request)
+        request.user  # authenticate eagerly
+        return request
+
+    def _purchase_queries(self, serializer_class):
+        request = self._request()
+        with CaptureQueriesContext(connection) as ctx:
+            data = serializer_class(self.materials, many=True, context={'request': request}).data
+        purchase_queries = [q for q in ctx.captured_queries if 'entitlement' in q['sql'].lower()]
+        return data, purchase_queries
+
+    def test_hub_content_page_uses_one_ownership_query(self):
+        """A whole page resolves has_purchased with one ledger lookup"""
+        self._purchase()
+        data, purchase_queries = self._purchase_queries(HubContentSerializer)
+
+        self.assertEqual(len(purchase_queries), 1)
+        owned = {item['id']: item['has_purchased'] for item in data}
+        self.assertTrue(owned[self.materials[0].id])
+        self.assertTrue(owned[self.materials[1].id])
+        self.assertFalse(owned[self.materials[2].id])
+
+    def test_learning_material_serializer_shares_index(self):
+        """Purchase and download flags come from the same primed lookup"""
+        self._purchase()
+        data, purchase_queries = self._purchase_queries(LearningMaterialSerializer)
+
+        self.assertEqual(len(purchase_queries), 1)
+        by_id = {item['id']: item for item in data}
+        self.assertTrue(by_id[self.materials[1].id]['is_purchased_by_user'])
+        self.assertTrue(by_id[self.materials[0].id]['can_download'])
+        self.assertFalse(by_id[self.materials[3].id]['is_purchased_by_user'])
+
+
+class CommentThreadLoaderTestCase(APITestCase):
+    """Test suite for bulk-loaded comment threads"""
+
+    def setUp(self):
+        self.author = create_test_user('thread-author@test.com', 'Thread', 'Author')
+        self.viewer = create_test_user('thread-viewer@test.com', 'Thread', 'Viewer')
+        self.content = LearningMaterial.objects.create(
+            uploader=self.author, uploader_type='student', hub_type='forum',
+            content_type='discussion', title='Busy thread', content='text'
+        )
+        self.roots = []
+        for i in range(5):
+            root = HubComment.objects.create(
+                hub_type='forum', content=self.content, author=self.author, comment_text=f'Root {i}'
+            )
+            for j in range(3):
+                HubComment.objects.create(
+                    hub_type='forum', content=self.content, author=self.viewer,
+                    parent_comment=root, comment_text=f'Reply {i}.{j}'
+                )
+            self.roots.append(root)
+        HubCommentLike.objects.create(user=self.viewer, comment=self.roots[0])
+        HubCommentLike.objects.create(user=self.author, comment=self.roots[0])
+        CommentMention.objects.create(
+            comment=self.roots[1], mentioned_user=self.viewer, mentioned_by=self.author, position=0
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+        self.url = reverse('hub-content-comments', args=[self.content.id])
+
+    def _count_queries(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_thread_size(self):
+        """Adding roots and replies leaves the number of queries unchanged"""
+        response, baseline = self._count_queries()
+        self.assertEqual(len(response.data), 5)
+
+        for i in range(5):
+            root = HubComment.objects.create(
+                hub_type='forum', content=self.content, author=self.author, comment_text=f'More {i}'
+            )
+            HubComment.objects.create(
+                hub_type='forum', content=self.content, author=self.viewer,
+                parent_comment=root, comment_text='More reply'
+            )
+        response, queries = self._count_queries()
+
+        self.assertEqual(len(response.data), 10)
+        self.assertEqual(queries, baseline)
+
+    def test_thread_data_matches_raw_tables(self):
+        """Counts, likes, mentions and embedded replies are assembled correctly"""
+        response, _ = self._count_queries()
+        first, second = response.data[0], response.data[1]
+
+        self.assertEqual(first['likes_count'], 2)
+        self.assertTrue(first['is_liked'])
+        self.assertEqual(first['replies_count'], 3)
+        self.assertEqual([reply['comment_text'] for reply in first['replies']], ['Reply 0.0', 'Reply 0.1', 'Reply 0.2'])
+        self.assertIsNone(first['replies_next_cursor'])
+        self.assertFalse(second['is_liked'])
+        self.assertEqual(second['mentions'][0]['user_id'], self.viewer.id)
+
+    def test_cursor_pagination_of_roots(self):
+        """Roots are paged with a keyset cursor until exhausted"""
+        seen = []
+        params = {'limit': 2}
+        while True:
+            response, _ = self._count_queries(params)
+            seen.extend(comment['id'] for comment in response.data['results'])
+            if not response.data['next_cursor']:
+                break
+            params = {'limit': 2, 'cursor': response.data['next_cursor']}
+
+        self.assertEqual(seen, [root.id for root in self.roots])
+
+    def test_load_more_replies(self):
+        """A thread's replies_next_cursor continues on the replies endpoint"""
+        roots, _ = load_root_comments(self.content, viewer=self.viewer, replies_per_thread=2)
+        cursor = roots[0].thread_replies_next_cursor
+        self.assertIsNotNone(cursor)
+
+        response = self.client.get(
+            reverse('hub-comment-replies', args=[self.roots[0].id]), {'cursor': cursor}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([reply['comment_text'] for reply in response.data['results']], ['Reply 0.2'])
+        self.assertIsNone(response.data['next_cursor'])
+
+    def test_invalid_cursor_is_rejected(self):
+        """Malformed cursors return 400 instead of a server error"""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class MentionDirectoryTestCase(APITestCase):
+    """Test suite for the @mention prefix directory"""
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = create_test_user('viewer@test.com', 'Viewer', 'Person')
+        self.jose = create_test_user('jmartinez@test.com', 'José', 'Martínez')
+        self.joan = create_test_user('joan@test.com', 'Joan', 'Mushi')
+        self.content = LearningMaterial.objects.create(
+            uploader=self.viewer, uploader_type='student', hub_type='forum',
+            content_type='discussion', title='Mentions', content='text'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+
+    def test_prefix_search_is_one_query(self):
+        """Name, last name and email prefixes match accent-insensitively in one query"""
+        with self.assertNumQueries(1):
+            users = search_users('jo')
+        self.assertEqual([user.id for user in users], [self.joan.id, self.jose.id])
+        self.assertEqual([user.id for user in search_users('@MARTI')], [self.jose.id])
+        self.assertEqual([user.id for user in search_users('jmart')], [self.jose.id])
+        self.assertEqual([user.id for user in search_users('jose mar')], [self.jose.id])
+
+    def test_privacy_opt_out_leaves_directory(self):
+        """Users who forbid tagging (or are inactive) are not suggested"""
+        privacy = UserPrivacySettings.objects.create(user=self.joan, allow_tagging='none')
+        self.assertEqual([user.id for user in search_users('jo')], [self.jose.id])
+
+        privacy.allow_tagging = 'everyone'
+        privacy.save()
+        self.jose.is_active = False
+        self.jose.save()
+        self.assertEqual([user.id for user in search_users('jo')], [self.joan.id])
+
+    def test_search_endpoint_caches_per_prefix(self):
+        """Repeated keystrokes for the same prefix are served from cache"""
+        url = reverse('mention-user-search')
+        response = self.client.get(url, {'q': 'Jo'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertTrue(all(user['can_be_tagged'] for user in response.data['results']))
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url, {'q': 'jo'})
+        self.assertEqual(cached.data, response.data)
+
+        # can_be_tagged is per viewer, so another user does not get this entry
+        self.client.force_authenticate(user=self.joan)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.client.get(url, {'q': 'jo'}).data['count'], 2)
+        self.assertTrue(any('hubs_mentiondirectoryentry' in q['sql'] for q in ctx.captured_queries))
+
+        self.assertEqual(self.client.get(url, {'q': 'j'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_mentions_are_resolved_in_one_query(self):
+        """Comment creation validates and links mentioned users with a single lookup"""
+        request = APIRequestFactory().post('/')
+        request.user = self.viewer
+        serializer = CreateCommentWithMentionsSerializer(data={
+            'hub_type': 'forum', 'content': self.content.id,
+            'comment_text': 'Thoughts @José and @Joan?',
+            'mentioned_users': [self.jose.id, self.joan.id, self.jose.id],
+        }, context={'request': request})
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+            comment = serializer.save()
+
+        user_lookups = [q['sql'] for q in ctx.captured_queries if 'authentication_userprivacysettings' in q['sql']]
+        self.assertEqual(len(user_lookups), 1)
+        mentions = comment.mentions.order_by('position')
+        self.assertEqual([m.mentioned_user_id for m in mentions], [self.jose.id, self.joan.id])
+
+
+class HubConversationTestCase(APITestCase):
+    """Test suite for direct-message conversations and unread counters"""
+
+    def setUp(self):
+        self.me = create_test_user('dm-me@test.com', 'Me', 'User')
+        self.peers = [
+            create_test_user(f'dm-peer{i}@test.com', 'Peer', str(i))
+            for i in range(3)
+        ]
+        UserDevice.objects.create(user=self.me, device_id='dm-device', is_verified=True, is_current_device=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.me)
+
+    def _send(self, sender, recipient, text):
+        return HubMessage.objects.create(sender=sender, recipient=recipient, message=text)
+
+    def test_send_maintains_conversation_and_counters(self):
+        """Messages are filed under one conversation per pair with per-side unread counts"""
+        response = self.client.post(
+            reverse('hub-message-list'), {'recipient': self.peers[0].id, 'message': 'Hello'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        reply = self._send(self.peers[0], self.me, 'Hi back')
+        self._send(self.peers[0], self.me, 'Are you there?')
+
+        self.assertEqual(reply.conversation_id, response.data['conversation'])
+        counters = dict(
+            HubConversationParticipant.objects.filter(conversation_id=reply.conversation_id)
+            .values_list('user_id', 'unread_count')
+        )
+        self.assertEqual(counters, {self.me.id: 2, self.peers[0].id: 1})
+        self.assertEqual(reply.conversation.__class__.objects.get().last_message.message, 'Are you there?')
+
+        self_message = self.client.post(
+            reverse('hub-message-list'), {'recipient': self.me.id, 'message': 'Note to self'}, format='json'
+        )
+        self.assertEqual(self_message.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_inbox_is_keyset_paginated(self):
+        """The inbox pages newest-first by cursor with a constant number of queries"""
+        for peer in self.peers:
+            self._send(peer, self.me, f'From {peer.last_name}')
+        url = reverse('hub-message-conversation-list')
+
+        with CaptureQueriesContext(connection) as ctx:
+            first = self.client.get(url, {'limit': 2})
+        self.assertEqual([row['peer']['id'] for row in first.data['results']], [self.peers[2].id, self.peers[1].id])
+        self.assertEqual(first.data['results'][0]['unread_count'], 1)
+        self.assertEqual(first.data['results'][0]['last_message']['message'], 'From 2')
+
+        second = self.client.get(url, {'limit': 2, 'cursor': first.data['next_cursor']})
+        self.assertEqual([row['peer']['id'] for row in second.data['results']], [self.peers[0].id])
+        self.assertIsNone(second.data['next_cursor'])
+        self.assertLessEqual(len(ctx.captured_queries), 2)
+
+    def test_history_and_set_based_mark_read(self):
+        """History pages by cursor; mark_read updates messages and counters in bulk"""
+        messages = [self._send(self.peers[0], self.me, f'Message {i}') for i in range(5)]
+        self._send(self.peers[1], self.me, 'Elsewhere')
+        conversation_id = messages[0].conversation_id
+
+        history_url = reverse('hub-message-conversation-messages', args=[conversation_id])
+        page = self.client.get(history_url, {'limit': 3})
+        self.assertEqual([m['id'] for m in page.data['results']], [m.id for m in messages[:1:-1]])
+        rest = self.client.get(history_url, {'limit': 3, 'cursor': page.data['next_cursor']})
+        self.assertEqual([m['id'] for m in rest.data['results']], [messages[1].id, messages[0].id])
+
+        read_url = reverse('hub-message-conversation-mark-read', args=[conversation_id])
+        self.assertEqual(self.client.post(read_url, {'up_to': messages[2].id}, format='json').data['count'], 3)
+        self.assertEqual(self.client.get(reverse('hub-message-unread-count')).data['unread_count'], 3)
+
+        self.assertEqual(self.client.post(reverse('hub-message-mark-all-read')).data['count'], 3)
+        self.assertEqual(self.client.get(reverse('hub-message-unread-count')).data['unread_count'], 0)
+        self.assertFalse(HubMessage.objects.filter(recipient=self.me, is_read=False).exists())
+
+        outsider = APIClient()
+        outsider.force_authenticate(user=self.peers[2])
+        self.assertEqual(outsider.get(history_url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rebuild_matches_incremental(self):
+        """rebuild_conversations reproduces the maintained counters"""
+        for i in range(3):
+            self._send(self.peers[0], self.me, f'In {i}')
+            self._send(self.me, self.peers[i], f'Out {i}')
+        HubMessage.objects.filter(sender=self.me).first().delete()
+
+        def snapshot():
+            return sorted(HubConversationParticipant.objects.values_list(
+                'conversation_id', 'user_id', 'unread_count', 'last_message_at'
+            ))
+
+        before = snapshot()
+        HubConversationParticipant.objects.update(unread_count=0, last_message_at=None)
+        call_command('rebuild_conversations', stdout=StringIO())
+        self.assertEqual(snapshot(), before)
+
+
+class HubContentSearchTestCase(APITestCase):
+    """Test suite for ranked full-text search over hub content"""
+
+    def setUp(self):
+        self.user = create_test_user('search@test.com', 'Search', 'User')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.in_title = self._material('Land law basics', description='An overview')
+        self.in_description = self._material('Property overview', description='Registering land and titles')
+        self.in_content = self._material('Court practice', content='<p>Disputes over <b>lands</b> in court</p>')
+        self.unrelated = self._material('Criminal procedure', description='Bail and arrest')
+        self.swahili = self._material(
+            'Sheria ya ardhi', description='Kesi za ardhi mahakamani', language='sw'
+        )
+
+    def _material(self, title, description='', content='', language='en', hub_type='forum'):
+        return LearningMaterial.objects.create(
+            uploader=self.user, uploader_type='student', hub_type=hub_type, content_type='article',
+            title=title, description=description, content=content, language=language,
+        )
+
+    def _search(self, **params):
+        response = self.client.get(reverse('hub-content-list'), {'hub_type': 'forum', **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_results_ranked_by_field_weight(self):
+        """Title matches outrank description matches, which outrank body matches"""
+        expected = [self.in_title.id, self.in_description.id, self.in_content.id]
+        self.assertEqual(self._search(search='land'), expected)
+        self.assertEqual(self._search(search='Lands'), expected)
+        self.assertEqual(self._search(search='land court'), [self.in_content.id])
+        self.assertEqual(self._search(search='the land', ordering='created_at'), expected)
+
+    def test_bilingual_terms_and_filters(self):
+        """Swahili stems match, and language/hub filters apply to results"""
+        self.assertEqual(self._search(search='mahakama'), [self.swahili.id])
+        self.assertEqual(self._search(search='ardhi', language='en'), [])
+        self.assertEqual(self._search(search='ardhi', language='sw'), [self.swahili.id])
+
+        self._material('Land tenure', hub_type='students')
+        self.assertEqual(
+            list(search_materials('land', hub_type='students').values_list('title', flat=True)), ['Land tenure']
+        )
+
+    def test_index_follows_saves(self):
+        """Saving searchable fields re-indexes; counter-only saves do not touch the vector"""
+        self.unrelated.title = 'Land appeals'
+        self.unrelated.save()
+        self.assertIn(self.unrelated.id, self._search(search='appeal'))
+        self.assertNotIn(self.unrelated.id, self._search(search='criminal'))
+
+        LearningMaterial.objects.filter(pk=self.unrelated.pk).update(search_vector=None)
+        self.unrelated.views_count = 5
+        self.unrelated.save(update_fields=['views_count'])
+        self.assertNotIn(self.unrelated.id, self._search(search='appeal'))
+
+    def test_python_backend_matches_postgres(self):
+        """The in-process inverted index ranks like the tsvector backend"""
+        queries = ['land', 'land court', 'mahakama', 'overview']
+        expected = {query: self._search(search=query) for query in queries}
+        with override_settings(CONTENT_SEARCH_BACKEND='python'):
+            content_search.reset_python_index()
+            try:
+                self.assertEqual({query: self._search(search=query) for query in queries}, expected)
+                self.in_title.delete()
+                self.assertNotIn(self.in_title.id, self._search(search='land'))
+            finally:
+                content_search.reset_python_index()
+
+    def test_python_backend_returns_empty_page_for_no_hits(self):
+        """A query matching nothing is an empty result, not an ordering error"""
+        with override_settings(CONTENT_SEARCH_BACKEND='python'):
+            content_search.reset_python_index()
+            try:
+                self.assertEqual(self._search(search='zebra'), [])
+                self.assertEqual(list(content_search.search_materials('zebra')), [])
+            finally:
+                content_search.reset_python_index()
+
+
+class MaterialPreviewTestCase(APITestCase):
+    """Test suite for background thumbnails, page counts and extracted text"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root, MATERIAL_PREVIEW_SIZES=[160, 320, 640])
+        self.settings_override.enable()
+        self.user = create_test_user('preview@test.com', 'Preview', 'User')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root, ignore_errors=True)
+
+    def _material(self, name, payload, title='Attached file'):
+        material = LearningMaterial(
+            uploader=self.user, uploader_type='student', hub_type='forum', content_type='document', title=title,
+        )
+        material.file.save(name, ContentFile(payload), save=False)
+        material.save()
+        return material
+
+    def _png(self, size=(1200, 800)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, (30, 90, 160)).save(buffer, 'PNG')
+        return buffer.getvalue()
+
+    def _pdf(self, pages):
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer)
+        for text in pages:
+            pdf.drawString(72, 720, text)
+            pdf.showPage()
+        pdf.save()
+        return buffer.getvalue()
+
+    def _process(self):
+        return PreviewWorker().run_once()
+
+    def test_image_thumbnails_in_feed(self):
+        """Uploads are queued, rendered by the worker and exposed on feed cards"""
+        material = self._material('diagram.png', self._png())
+        self.assertEqual(MaterialPreview.objects.get(pk=material.pk).status, 'pending')
+        self.assertEqual(self._process(), {'ready': 1})
+
+        preview = MaterialPreview.objects.get(pk=material.pk)
+        self.assertEqual(sorted(preview.thumbnails, key=int), ['160', '320', '640'])
+        with default_storage.open(preview.thumbnails['640'], 'rb') as fh:
+            self.assertEqual(Image.open(fh).size, (640, 427))
+
+        response = self.client.get(reverse('hub-content-list'), {'hub_type': 'forum'})
+        card = response.data['results'][0]
+        self.assertEqual(card['preview_status'], 'ready')
+        self.assertEqual(card['page_count'], 1)
+        self.assertTrue(card['thumbnail_url'].endswith('_320.jpg'))
+        self.assertEqual(set(card['thumbnails']), {'160', '320', '640'})
+
+    def test_pdf_page_count_and_text_feed_search(self):
+        """PDF text is extracted and matched by content search"""
+        material = self._material('notes.pdf', self._pdf(['Adverse possession doctrine', 'Limitation periods']))
+        self._process()
+
+        preview = MaterialPreview.objects.get(pk=material.pk)
+        self.assertEqual((preview.status, preview.page_count), ('ready', 2))
+        self.assertIn('Limitation periods', preview.extracted_text)
+        self.assertIn('640', preview.thumbnails)
+        self.assertEqual(list(search_materials('adverse possession')), [material])
+
+    def test_replaced_file_requeues_and_cleans_up(self):
+        """A new file re-renders; old thumbnails and unsupported formats are handled"""
+        document = docx.Document()
+        document.add_paragraph('Marriage and succession law')
+        buffer = io.BytesIO()
+        document.save(buffer)
+        material = self._material('brief.docx', buffer.getvalue())
+        self._process()
+        preview = MaterialPreview.objects.get(pk=material.pk)
+        self.assertIn('succession', preview.extracted_text)
+        old_thumbnails = list(preview.thumbnails.values())
+
+        material.file.save('slides.pptx', ContentFile(b'PK\x03\x04 not rendered'), save=True)
+        self.assertEqual(MaterialPreview.objects.get(pk=material.pk).status, 'pending')
+        self.assertEqual(self._process(), {'unsupported': 1})
+        self.assertFalse(any(default_storage.exists(name) for name in old_thumbnails))
+
+        material.file = None
+        material.save()
+        self.assertFalse(MaterialPreview.objects.filter(pk=material.pk).exists())
@@ -9,17 +9,23 @@ from django.db.models import Q, Count, Avg
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from notification.notification_service import notification_service
+from utils.media_gateway import download_link, record_download
+from subscriptions.entitlements import MATERIAL, has_entitlement
 
 from documents.models import (
     LearningMaterial, LearningMaterialPurchase,
     LecturerFollow, MaterialQuestion, MaterialRating
 )
 from .models import HubComment, ContentLike, ContentBookmark, HubCommentLike, HubMessage, CommentMention
+from .engagement_rollup import record_engagement
+from .content_search import ContentSearchFilter
+from .comment_threads import attach_thread_data, load_replies, load_root_comments, parse_limit
+from . import conversations
 from .serializers import (
     HubContentSerializer, HubContentCreateSerializer, HubCommentSerializer, ContentLikeSerializer,
     ContentBookmarkSerializer, LecturerFollowSerializer,
     MaterialQuestionSerializer, MaterialRatingSerializer, HubMessageSerializer,
-    CreateCommentWithMentionsSerializer
+    HubConversationSerializer, CreateCommentWithMentionsSerializer
 )
 from authentication.models import PolaUser
 from authentication.device_models import UserDevice
@@ -39,15 +45,15 @@ class HubContentViewSet(viewsets.ModelViewSet):
     - hub_type: advocates|students|forum|legal_ed
     - content_type: discussion|question|article|news|document|notes|past_papers|etc
     - uploader_type: student|lecturer|advocate|admin
-    - search: search in title, description, content
+    - language: en|sw
+    - search: full-text search in title, description, content (ranked by relevance)
     - ordering: -created_at (default), -views_count, -likes_count, price, etc
     """
     queryset = LearningMaterial.objects.filter(is_active=True, is_approved=True)
     serializer_class = HubContentSerializer
     permission_classes = [CanAccessHub, CanCreateContent | IsOwnerOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
-    filterset_fields = ['hub_type', 'content_type', 'uploader_type', 'is_pinned', 'is_lecture_material']
-    search_fields = ['title', 'description', 'content']
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ContentSearchFilter]
+    filterset_fields = ['hub_type', 'content_type', 'uploader_type', 'language', 'is_pinned', 'is_lecture_material']
     ordering_fields = ['created_at', 'views_count', 'downloads_count', 'price', 'is_pinned']
     ordering = ['-created_at']  # Latest content first, regardless of pinned status
     
@@ -79,7 +85,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
         if pinned_only == 'true':
             queryset = queryset.filter(is_pinned=True)
         
-        return queryset.select_related('uploader').prefetch_related('likes', 'comments', 'bookmarks')
+        return queryset.select_related('uploader', 'preview').prefetch_related('likes', 'comments', 'bookmarks')
     
     def perform_create(self, serializer):
         """Set uploader to current user"""
@@ -93,6 +99,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
         LearningMaterial.objects.filter(pk=instance.pk).update(
             views_count=instance.views_count + 1
         )
+        record_engagement(instance.pk, 'views')
         instance.refresh_from_db()
         
         serializer = self.get_serializer(instance)
@@ -189,7 +196,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
             id__in=bookmarked_content_ids,
             is_active=True,
             is_approved=True
-        ).select_related('uploader').prefetch_related('likes', 'comments', 'bookmarks')
+        ).select_related('uploader', 'preview').prefetch_related('likes', 'comments', 'bookmarks')
         
         # Apply manual filters using the same logic as main viewset
         hub_type = request.query_params.get('hub_type')
@@ -243,7 +250,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
             id__in=liked_content_ids,
             is_active=True,
             is_approved=True
-        ).select_related('uploader').prefetch_related('likes', 'comments', 'bookmarks')
+        ).select_related('uploader', 'preview').prefetch_related('likes', 'comments', 'bookmarks')
         
         # Apply manual filters (same as bookmarked)
         hub_type = request.query_params.get('hub_type')
@@ -295,7 +302,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
             is_active=True,
             is_approved=True,
             created_at__gte=thirty_days_ago
-        ).select_related('uploader').prefetch_related('likes', 'comments', 'bookmarks')
+        ).select_related('uploader', 'preview').prefetch_related('likes', 'comments', 'bookmarks')
         
         # Apply hub type filter
         hub_type = request.query_params.get('hub_type')
@@ -335,7 +342,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
         queryset = LearningMaterial.objects.filter(
             is_active=True,
             is_approved=True
-        ).select_related('uploader').prefetch_related('likes', 'comments', 'bookmarks')
+        ).select_related('uploader', 'preview').prefetch_related('likes', 'comments', 'bookmarks')
         
         # Apply hub type filter
         hub_type = request.query_params.get('hub_type')
@@ -361,15 +368,27 @@ class HubContentViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def comments(self, request, pk=None):
-        """Get comments for this content"""
-        content = self.get_object()
-        comments = HubComment.objects.filter(
-            content=content,
-            parent_comment=None,  # Top-level only
-            is_active=True
-        ).select_related('author').prefetch_related('replies')
+        """
+        Get comment threads for this content
         
+        Without query params returns every top-level comment (with its first replies).
+        Pass `limit` and/or `cursor` to page top-level comments:
+        {"results": [...], "next_cursor": "..."}
+        """
+        content = self.get_object()
+        cursor = request.query_params.get('cursor')
+        limit = request.query_params.get('limit')
+        paginated = cursor is not None or limit is not None
+        
+        comments, next_cursor = load_root_comments(
+            content,
+            viewer=request.user,
+            cursor=cursor,
+            limit=parse_limit(limit) if paginated else None,
+        )
         serializer = HubCommentSerializer(comments, many=True, context={'request': request})
+        if paginated:
+            return Response({'results': serializer.data, 'next_cursor': next_cursor})
         return Response(serializer.data)
     
     @action(detail=True, methods=['post'], permission_classes=[])
@@ -381,6 +400,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
             # Increment view count
             content.views_count += 1
             content.save(update_fields=['views_count'])
+            record_engagement(content.pk, 'views')
             
             return Response({
                 'message': 'View tracked successfully',
@@ -429,7 +449,7 @@ class HubContentViewSet(viewsets.ModelViewSet):
         content = self.get_object()
         
         # Check if already purchased
-        if LearningMaterialPurchase.objects.filter(buyer=request.user, material=content).exists():
+        if has_entitlement(request.user, MATERIAL, content.pk):
             return Response(
                 {'message': 'Already purchased'},
                 status=status.HTTP_400_BAD_REQUEST
@@ -445,6 +465,41 @@ class HubContentViewSet(viewsets.ModelViewSet):
             'platform_share': float(result['app_share'])
         }, status=status.HTTP_201_CREATED)
     
+    @action(detail=True, methods=['get'], permission_classes=[IsAuthenticated])
+    def download(self, request, pk=None):
+        """
+        Get a short-lived signed download link (free, purchased or admin)
+        
+        GET /api/v1/hubs/content/{id}/download/
+        """
+        content = self.get_object()
+        
+        if not content.file:
+            return Response({'error': 'No file attached'}, status=status.HTTP_404_NOT_FOUND)
+        
+        is_admin = request.user.is_staff or request.user.is_superuser
+        if not content.is_downloadable and not is_admin:
+            return Response({'error': 'This content is not downloadable'}, status=status.HTTP_403_FORBIDDEN)
+        
+        purchase = None
+        if content.price > 0 and not is_admin:
+            if not has_entitlement(request.user, MATERIAL, content.pk):
+                return Response({
+                    'error': 'Purchase required',
+                    'message': 'Purchase this content to download it.',
+                    'message_sw': 'Nunua maudhui haya ili kuyapakua.',
+                    'price': float(content.price)
+                }, status=status.HTTP_403_FORBIDDEN)
+        
+        record_download(content, 'downloads_count')
+        record_engagement(content.pk, 'downloads')
+        if content.price > 0 and not is_admin:
+            purchase = LearningMaterialPurchase.objects.filter(buyer=request.user, material=content).only('pk').first()
+        if purchase is not None:
+            record_download(purchase, 'download_count', 'last_downloaded')
+        
+        return Response(download_link(request, content.file))
+    
     @action(detail=True, methods=['get', 'post'])
     def questions(self, request, pk=None):
         """Get or ask questions about this material"""
@@ -509,7 +564,17 @@ class HubCommentViewSet(viewsets.ModelViewSet):
         if content_id:
             queryset = queryset.filter(content_id=content_id)
         
-        return queryset.select_related('author', 'content').prefetch_related('replies', 'mentions').order_by('-created_at')
+        return queryset.select_related('author__verification', 'content').order_by('-created_at')
+    
+    def list(self, request, *args, **kwargs):
+        """List comments, loading likes/replies/mentions for the whole page at once"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        comments = attach_thread_data(page if page is not None else queryset, viewer=request.user)
+        serializer = self.get_serializer(comments, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
     
     def get_serializer_class(self):
         """Use CreateCommentWithMentionsSerializer for creation if mentions are provided"""
@@ -703,11 +768,26 @@ class HubCommentViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['get'])
     def replies(self, request, pk=None):
-        """Get all replies to this comment"""
-        comment = self.get_object()
-        replies = comment.replies.filter(is_active=True).select_related('author')
+        """
+        Get replies to this comment
         
+        Pass `cursor` (a thread's `replies_next_cursor`) and/or `limit` to load more:
+        {"results": [...], "next_cursor": "..."}
+        """
+        comment = self.get_object()
+        cursor = request.query_params.get('cursor')
+        limit = request.query_params.get('limit')
+        paginated = cursor is not None or limit is not None
+        
+        replies, next_cursor = load_replies(
+            comment,
+            viewer=request.user,
+            cursor=cursor,
+            limit=parse_limit(limit) if paginated else None,
+        )
         serializer = self.get_serializer(replies, many=True)
+        if paginated:
+            return Response({'results': serializer.data, 'next_cursor': next_cursor})
         return Response(serializer.data)
 
 
@@ -898,10 +978,75 @@ class HubMessageViewSet(viewsets.ModelViewSet):
         if message.recipient != request.user:
             return Response({'error': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
         
-        if not message.is_read:
-            from django.utils import timezone
-            message.is_read = True
-            message.read_at = timezone.now()
-            message.save()
+        conversations.mark_read(request.user, HubMessage.objects.filter(pk=message.pk))
         
         return Response({'message': 'Marked as read'})
+    
+    @action(detail=False, methods=['post'])
+    def mark_all_read(self, request):
+        """Mark every received message as read"""
+        count = conversations.mark_read(request.user, HubMessage.objects.all())
+        return Response({'message': f'{count} messages marked as read', 'count': count})
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Total unread messages across conversations"""
+        return Response({'unread_count': conversations.unread_total(request.user)})
+    
+    @action(detail=False, methods=['get'], url_path='conversations')
+    def conversation_list(self, request):
+        """
+        Inbox: conversations, most recent first
+        
+        GET /api/v1/hubs/messages/conversations/?limit=20&cursor=<next_cursor>
+        """
+        participants, next_cursor = conversations.inbox_page(
+            request.user,
+            cursor=request.query_params.get('cursor'),
+            limit=parse_limit(request.query_params.get('limit')),
+        )
+        serializer = HubConversationSerializer(participants, many=True, context=self.get_serializer_context())
+        return Response({'results': serializer.data, 'next_cursor': next_cursor})
+    
+    @action(detail=False, methods=['get'], url_path=r'conversations/(?P<conversation_id>\d+)/messages')
+    def conversation_messages(self, request, conversation_id=None):
+        """
+        Message history of one conversation, newest first
+        
+        GET /api/v1/hubs/messages/conversations/{id}/messages/?limit=20&cursor=<next_cursor>
+        """
+        participant = conversations.participant_for(request.user, conversation_id)
+        if participant is None:
+            return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        messages, next_cursor = conversations.history_page(
+            conversation_id,
+            cursor=request.query_params.get('cursor'),
+            limit=parse_limit(request.query_params.get('limit')),
+        )
+        serializer = self.get_serializer(messages, many=True)
+        return Response({
+            'conversation_id': int(conversation_id),
+            'unread_count': participant.unread_count,
+            'results': serializer.data,
+            'next_cursor': next_cursor,
+        })
+    
+    @action(detail=False, methods=['post'], url_path=r'conversations/(?P<conversation_id>\d+)/mark_read')
+    def conversation_mark_read(self, request, conversation_id=None):
+        """
+        Mark a conversation read (optionally only up to message ``up_to``)
+        
+        POST /api/v1/hubs/messages/conversations/{id}/mark_read/  {"up_to": 123}
+        """
+        if conversations.participant_for(request.user, conversation_id) is None:
+            return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        up_to = request.data.get('up_to')
+        try:
+            up_to = int(up_to) if up_to not in (None, '') else None
+        except (TypeError, ValueError):
+            return Response({'error': 'up_to must be a message id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        count = conversations.mark_conversation_read(request.user, conversation_id, up_to=up_to)
+        return Response({'message': f'{count} messages marked as read', 'count': count})
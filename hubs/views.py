@@ -12,10 +12,41 @@ from .serializers import (
     TopicListSerializer, TopicDetailSerializer,
     SubtopicListSerializer, SubtopicDetailSerializer
 )
+from .content_search import search_materials
+from .catalog import get_catalog, topic_rows, subtopic_rows, topic_counts, subtopic_counts
 from documents.models import LearningMaterial
+from utils.conditional import make_etag, not_modified_response, with_cache_headers
 
 
-class TopicViewSet(viewsets.ReadOnlyModelViewSet):
+class CatalogSnapshotMixin:
+    """
+    Serve Legal Education list endpoints from the cached catalog snapshot.
+    Responses carry an ETag so repeat app launches get a 304.
+    """
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        _, snapshot = get_catalog()
+        context['topic_materials_counts'] = topic_counts(snapshot)
+        context['subtopic_materials_counts'] = subtopic_counts(snapshot)
+        return context
+
+    def catalog_response(self, request, rows_builder, paginate=True):
+        version, snapshot = get_catalog()
+        etag = make_etag('legal-ed', version, request.get_full_path())
+        cached = not_modified_response(request, etag)
+        if cached:
+            return cached
+
+        rows = rows_builder(snapshot)
+        if paginate:
+            page = self.paginate_queryset(rows)
+            if page is not None:
+                return with_cache_headers(self.get_paginated_response(page), etag)
+        return with_cache_headers(Response(rows), etag)
+
+
+class TopicViewSet(CatalogSnapshotMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Topics
     
@@ -46,32 +77,33 @@ class TopicViewSet(viewsets.ReadOnlyModelViewSet):
             )
         
         return queryset.order_by('display_order', 'name')
+
+    def list(self, request, *args, **kwargs):
+        """List topics from the catalog snapshot (ETag / 304 aware)"""
+        return self.catalog_response(request, lambda snapshot: topic_rows(
+            snapshot,
+            language=request.query_params.get('language', 'en'),
+            search=request.query_params.get('search'),
+        ))
     
     @action(detail=True, methods=['get'])
     def subtopics(self, request, slug=None):
         """Get all subtopics in a topic"""
         topic = self.get_object()
-        subtopics = topic.subtopics.filter(is_active=True)
-
-        # Language filter - with legacy fallback for name_sw
+        # Language filter (with legacy fallback for name_sw) is applied by subtopic_rows
         language = request.query_params.get('language')
-        if language == 'sw':
-            subtopics = subtopics.filter(
-                Q(language='sw') | Q(name_sw__isnull=False)
-            )
-        elif language == 'en':
-            subtopics = subtopics.filter(language='en')
 
-        subtopics = subtopics.order_by('display_order', 'name')
+        def build(snapshot):
+            subtopics = subtopic_rows(snapshot, language=language, topic_id=topic.id)
+            return {
+                'topic_id': topic.id,
+                'topic_name': topic.name,
+                'topic_name_sw': topic.name_sw,
+                'subtopics_count': len(subtopics),
+                'subtopics': subtopics
+            }
 
-        serializer = SubtopicListSerializer(subtopics, many=True, context={'request': request})
-        return Response({
-            'topic_id': topic.id,
-            'topic_name': topic.name,
-            'topic_name_sw': topic.name_sw,
-            'subtopics_count': subtopics.count(),
-            'subtopics': serializer.data
-        })
+        return self.catalog_response(request, build, paginate=False)
     
     @action(detail=True, methods=['get'])
     def materials(self, request, slug=None):
@@ -94,14 +126,10 @@ class TopicViewSet(viewsets.ReadOnlyModelViewSet):
         if language:
             materials = materials.filter(language=language)
         
-        # Basic search if provided
+        # Full-text search, best match first
         search = request.query_params.get('search')
         if search:
-            from django.db.models import Q
-            materials = materials.filter(
-                Q(title__icontains=search) |
-                Q(description__icontains=search)
-            )
+            materials = search_materials(search, materials)
         
         # Pagination
         page = self.paginate_queryset(materials)
@@ -112,7 +140,7 @@ class TopicViewSet(viewsets.ReadOnlyModelViewSet):
                 'topic_id': topic.id,
                 'topic_name': topic.name,
                 'topic_name_sw': topic.name_sw,
-                'materials_count': materials.count(),
+                'materials_count': self.paginator.page.paginator.count,
                 'materials': serializer.data
             })
         
@@ -129,7 +157,7 @@ class TopicViewSet(viewsets.ReadOnlyModelViewSet):
         })
 
 
-class SubtopicViewSet(viewsets.ReadOnlyModelViewSet):
+class SubtopicViewSet(CatalogSnapshotMixin, viewsets.ReadOnlyModelViewSet):
     """
     ViewSet for Subtopics
     
@@ -199,6 +227,17 @@ class SubtopicViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
         return queryset.order_by('topic__display_order', 'display_order', 'name')
+
+    def list(self, request, *args, **kwargs):
+        """List subtopics from the catalog snapshot (ETag / 304 aware)"""
+        params = request.query_params
+        return self.catalog_response(request, lambda snapshot: subtopic_rows(
+            snapshot,
+            language=params.get('language'),
+            topic_id=params.get('topic') or params.get('topic_id'),
+            topic_slug=params.get('topic_slug'),
+            search=params.get('search'),
+        ))
     
     @action(detail=True, methods=['get'])
     def materials(self, request, id=None):
@@ -231,14 +270,10 @@ class SubtopicViewSet(viewsets.ReadOnlyModelViewSet):
             if language in ('en', 'sw'):
                 materials = materials.filter(language=language)
 
-            # Basic search if provided
+            # Full-text search, best match first
             search = request.query_params.get('search')
             if search:
-                from django.db.models import Q
-                materials = materials.filter(
-                    Q(title__icontains=search) |
-                    Q(description__icontains=search)
-                )
+                materials = search_materials(search, materials)
 
             # Pagination
             paginator = PageNumberPagination()
@@ -263,7 +298,7 @@ class SubtopicViewSet(viewsets.ReadOnlyModelViewSet):
                     'topic_id': subtopic.topic.id,
                     'topic_name': topic_name,
                     'language': language or subtopic.language,
-                    'materials_count': materials.count(),
+                    'materials_count': paginator.page.paginator.count,
                     'materials': serializer.data
                 })
 
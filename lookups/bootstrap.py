@@ -0,0 +1,110 @@
+"""
+Lookup Bootstrap Snapshot
+
+Roles, regions, districts, specializations, places of work, academic roles
+and regional chapters change only when an admin edits them, yet the app
+fetches every list on signup and profile screens. They are serialized once
+per language into a single versioned blob; saves/deletes of any lookup model
+bump the version (see lookups/signals.py), which is also the ETag seed for
+the bootstrap and the individual list endpoints.
+"""
+
+from django.db.models import Case, IntegerField, Value, When
+
+from authentication.models import (
+    UserRole, Region, District, Specialization,
+    PlaceOfWork, AcademicRole, RegionalChapter
+)
+from utils.versioned_cache import VersionedCache
+from .serializers import (
+    UserRoleSerializer,
+    RegionSerializer,
+    DistrictSerializer,
+    SpecializationSerializer,
+    PlaceOfWorkSerializer,
+    AcademicRoleSerializer,
+    RegionalChapterSerializer,
+)
+
+LANGUAGES = ('en', 'sw')
+
+LOOKUP_MODELS = (UserRole, Region, District, Specialization, PlaceOfWork, AcademicRole, RegionalChapter)
+
+# Role ordering by significance (index position)
+ROLE_ORDER = ['citizen', 'advocate', 'lawyer', 'paralegal', 'law_firm', 'law_student', 'lecturer']
+
+lookup_cache = VersionedCache('lookup_bootstrap', timeout=3600)
+
+
+def ordered_roles():
+    """Roles ordered by ROLE_ORDER in the database (unknown roles last)"""
+    return UserRole.objects.annotate(
+        significance=Case(
+            *[When(role_name=role, then=Value(idx)) for idx, role in enumerate(ROLE_ORDER)],
+            default=Value(len(ROLE_ORDER)),
+            output_field=IntegerField(),
+        )
+    ).order_by('significance', 'id')
+
+
+def _label(row, language):
+    """Display label in ``language`` for any lookup row shape"""
+    if language == 'sw':
+        return row.get('name_sw') or row.get('name_en') or row.get('name')
+    return row.get('name_en') or row.get('name')
+
+
+def _localized(rows, language):
+    return [{**row, 'label': _label(row, language)} for row in rows]
+
+
+def build_bootstrap():
+    """
+    Serialize every lookup list once and localize it per language.
+
+    Returns:
+        dict: {language: {'language', 'ui', 'roles', 'regions', 'districts',
+                          'specializations', 'places_of_work',
+                          'academic_roles', 'regional_chapters'}}
+    Rows match the individual list endpoints plus a localized 'label'.
+    """
+    from .views import ROLE_SELECTION_UI
+
+    lists = {
+        'roles': UserRoleSerializer(ordered_roles(), many=True).data,
+        'regions': RegionSerializer(Region.objects.all(), many=True).data,
+        'districts': DistrictSerializer(District.objects.select_related('region'), many=True).data,
+        'specializations': SpecializationSerializer(Specialization.objects.all(), many=True).data,
+        'places_of_work': PlaceOfWorkSerializer(PlaceOfWork.objects.all(), many=True).data,
+        'academic_roles': AcademicRoleSerializer(AcademicRole.objects.all(), many=True).data,
+        'regional_chapters': RegionalChapterSerializer(
+            RegionalChapter.objects.filter(is_active=True).select_related('region'), many=True
+        ).data,
+    }
+    return {
+        language: {
+            'language': language,
+            'ui': {key: text[language] for key, text in ROLE_SELECTION_UI.items()},
+            **{name: _localized(rows, language) for name, rows in lists.items()},
+        }
+        for language in LANGUAGES
+    }
+
+
+def get_bootstrap(language='en'):
+    """
+    Returns:
+        tuple: (version, payload for ``language``)
+    """
+    version, snapshot = lookup_cache.get_or_build(build_bootstrap)
+    return version, snapshot[language if language in LANGUAGES else 'en']
+
+
+def lookup_version():
+    """Current lookup version token (cheap: one cache GET)"""
+    return lookup_cache.version()
+
+
+def invalidate_lookups():
+    """Bump the lookup version once the current transaction commits"""
+    lookup_cache.bump()
@@ -0,0 +1,16 @@
+"""
+Django signals for lookup/reference data
+"""
+from django.db.models.signals import post_save, post_delete
+
+from .bootstrap import LOOKUP_MODELS, invalidate_lookups
+
+
+def invalidate_lookups_on_change(sender, instance, **kwargs):
+    """Any lookup edit changes the bootstrap payload and list ETags"""
+    invalidate_lookups()
+
+
+for model in LOOKUP_MODELS:
+    post_save.connect(invalidate_lookups_on_change, sender=model, dispatch_uid=f'lookups_save_{model.__name__}')
+    post_delete.connect(invalidate_lookups_on_change, sender=model, dispatch_uid=f'lookups_delete_{model.__name__}')
@@ -1,3 +1,51 @@
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from authentication.models import UserRole, Region, District, PlaceOfWork
+from .bootstrap import lookup_cache
+
+
+class LookupBootstrapTestCase(TestCase):
+    """Test suite for the cached lookup bootstrap and conditional list endpoints"""
+
+    def setUp(self):
+        lookup_cache.bump_now()
+        self.client = APIClient()
+        for role in ('lecturer', 'advocate', 'citizen'):
+            UserRole.objects.get_or_create(role_name=role)
+        self.region = Region.objects.create(name='Arusha')
+        District.objects.create(name='Meru', region=self.region)
+        PlaceOfWork.objects.create(code='court', name_en='Court', name_sw='Mahakama')
+
+    def test_bootstrap_combines_localized_lists(self):
+        response = self.client.get('/api/v1/lookups/bootstrap/', {'language': 'sw'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['language'], 'sw')
+        self.assertEqual(
+            [role['role_name'] for role in response.data['roles']][:3], ['citizen', 'advocate', 'lecturer']
+        )
+        self.assertEqual(response.data['districts'][0]['region_name'], 'Arusha')
+        place = next(p for p in response.data['places_of_work'] if p['code'] == 'court')
+        self.assertEqual(place['label'], 'Mahakama')
+        self.assertIn('max-age=300', response['Cache-Control'])
+
+    def test_etag_revalidates_until_a_lookup_changes(self):
+        response = self.client.get('/api/v1/lookups/bootstrap/')
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/lookups/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        regions = self.client.get('/api/v1/lookups/regions/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/v1/lookups/regions/', HTTP_IF_NONE_MATCH=regions['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Region.objects.create(name='Dodoma')
+        response = self.client.get('/api/v1/lookups/bootstrap/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Dodoma', [region['name'] for region in response.data['regions']])
+        response = self.client.get('/api/v1/lookups/regions/', HTTP_IF_NONE_MATCH=regions['ETag'])
+        self.assertEqual(response.status_code, 200)
@@ -9,6 +9,7 @@ from . import views
 app_name = 'lookups'
 
 urlpatterns = [
+    path('bootstrap/', views.LookupBootstrapView.as_view(), name='bootstrap'),
     path('roles/', views.UserRoleListView.as_view(), name='user-roles'),
     path('regions/', views.RegionListView.as_view(), name='regions'),
     path('districts/', views.DistrictListView.as_view(), name='districts'),
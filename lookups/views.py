@@ -3,12 +3,15 @@ Lookups Views
 Provides lookup/reference data for dropdowns and selections
 """
 
+from django.conf import settings
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 from authentication.models import (
-    UserRole, Region, District, Specialization, 
+    Region, District, Specialization, 
     PlaceOfWork, AcademicRole, RegionalChapter, PolaUser
 )
 from .serializers import (
@@ -20,6 +23,8 @@ from .serializers import (
     AcademicRoleSerializer,
     RegionalChapterSerializer,
 )
+from .bootstrap import LANGUAGES, get_bootstrap, lookup_version, ordered_roles
+from utils.conditional import make_etag, not_modified_response, with_cache_headers
 
 # UI Translation constants for role selection
 ROLE_SELECTION_UI = {
@@ -35,11 +40,63 @@ ROLE_SELECTION_UI = {
     }
 }
 
-# Role ordering by significance (index position)
-ROLE_ORDER = ['citizen', 'advocate', 'lawyer', 'paralegal', 'law_firm', 'law_student', 'lecturer']
 
+def lookups_max_age():
+    return getattr(settings, 'LOOKUPS_MAX_AGE', 300)
 
-class UserRoleListView(generics.ListAPIView):
+
+class ConditionalLookupMixin:
+    """
+    ETag the list endpoints with the lookup version so unchanged lists get a
+    304 without touching the database.
+    """
+
+    def list(self, request, *args, **kwargs):
+        etag = make_etag('lookups', lookup_version(), request.get_full_path())
+        cached = not_modified_response(request, etag, lookups_max_age())
+        if cached:
+            return cached
+        return with_cache_headers(super().list(request, *args, **kwargs), etag, lookups_max_age())
+
+
+class LookupBootstrapView(APIView):
+    """All signup/profile reference lists in one versioned, cacheable payload"""
+    permission_classes = [permissions.AllowAny]
+
+    @swagger_auto_schema(
+        operation_description="""Get every lookup list in one response: roles, regions, districts,
+        specializations, places of work, academic roles and regional chapters.
+
+        Rows match the individual endpoints plus a `label` in the requested language.
+        Send the previous `ETag` as `If-None-Match` to get a 304 when nothing changed.
+        """,
+        manual_parameters=[
+            openapi.Parameter(
+                'language',
+                openapi.IN_QUERY,
+                description="Label language (en or sw, default en)",
+                type=openapi.TYPE_STRING
+            )
+        ],
+        tags=['Lookups']
+    )
+    def get(self, request, *args, **kwargs):
+        language = request.query_params.get('language', 'en')
+        if language not in LANGUAGES:
+            language = 'en'
+
+        version = lookup_version()
+        etag = make_etag('lookups-bootstrap', version, language)
+        cached = not_modified_response(request, etag, lookups_max_age())
+        if cached:
+            return cached
+
+        version, payload = get_bootstrap(language)
+        etag = make_etag('lookups-bootstrap', version, language)
+        return with_cache_headers(Response({'version': version, **payload}), etag, lookups_max_age())
+
+
+class UserRoleListView(ConditionalLookupMixin, generics.ListAPIView):
     """List all available user roles for signup process
     
     Returns roles ordered by significance:
@@ -58,10 +115,7 @@ class UserRoleListView(generics.ListAPIView):
     
     def get_queryset(self):
         """Return roles ordered by significance"""
-        roles = UserRole.objects.all()
-        # Sort by the predefined order
-        role_order_map = {role: idx for idx, role in enumerate(ROLE_ORDER)}
-        return sorted(roles, key=lambda r: role_order_map.get(r.role_name, 999))
+        return ordered_roles()
     
     @swagger_auto_schema(
         operation_description="""Get list of all user roles for signup process.
@@ -87,6 +141,8 @@ class UserRoleListView(generics.ListAPIView):
     def list(self, request, *args, **kwargs):
         """Override list to include UI translations"""
         response = super().list(request, *args, **kwargs)
+        if response.status_code == 304:
+            return response
         # Add UI translations to the response
         response.data = {
             'ui': ROLE_SELECTION_UI,
@@ -95,7 +151,7 @@ class UserRoleListView(generics.ListAPIView):
         return response
 
 
-class RegionListView(generics.ListAPIView):
+class RegionListView(ConditionalLookupMixin, generics.ListAPIView):
     """List all regions"""
     queryset = Region.objects.all()
     serializer_class = RegionSerializer
@@ -109,7 +165,7 @@ class RegionListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class DistrictListView(generics.ListAPIView):
+class DistrictListView(ConditionalLookupMixin, generics.ListAPIView):
     """List all districts, optionally filtered by region"""
     serializer_class = DistrictSerializer
     permission_classes = [permissions.AllowAny]
@@ -137,7 +193,7 @@ class DistrictListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class SpecializationListView(generics.ListAPIView):
+class SpecializationListView(ConditionalLookupMixin, generics.ListAPIView):
     """List all legal specializations"""
     queryset = Specialization.objects.all()
     serializer_class = SpecializationSerializer
@@ -151,7 +207,7 @@ class SpecializationListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class PlaceOfWorkListView(generics.ListAPIView):
+class PlaceOfWorkListView(ConditionalLookupMixin, generics.ListAPIView):
     """List all place of work options"""
     queryset = PlaceOfWork.objects.all()
     serializer_class = PlaceOfWorkSerializer
@@ -165,7 +221,7 @@ class PlaceOfWorkListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class AcademicRoleListView(generics.ListAPIView):
+class AcademicRoleListView(ConditionalLookupMixin, generics.ListAPIView):
     """List all academic roles"""
     queryset = AcademicRole.objects.all()
     serializer_class = AcademicRoleSerializer
@@ -179,7 +235,7 @@ class AcademicRoleListView(generics.ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class RegionalChapterListView(generics.ListAPIView):
+class RegionalChapterListView(ConditionalLookupMixin, generics.ListAPIView):
     """List all TLS regional chapters"""
     serializer_class = RegionalChapterSerializer
     permission_classes = [permissions.AllowAny]
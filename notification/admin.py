@@ -1,5 +1,5 @@
 from django.contrib import admin 
-from . models import FcmNotification
+from . models import FcmNotification, OutboundEmail
 
 # NOTE: FcmTokenModel has been deprecated.
 # FCM tokens are now stored in authentication.device_models.UserDevice
@@ -13,3 +13,11 @@ class FcmNotificationAdmin(admin.ModelAdmin):
 admin.site.register(FcmNotification, FcmNotificationAdmin)
 
 
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('to_email', 'subject', 'priority', 'status', 'attempts', 'latency_ms', 'created_at', 'sent_at')
+    list_filter = ('status', 'priority', 'created_at')
+    search_fields = ('to_email', 'subject')
+    readonly_fields = ('created_at', 'sent_at', 'latency_ms', 'locked_at')
+    ordering = ('-created_at',)
+
+admin.site.register(OutboundEmail, OutboundEmailAdmin)
@@ -0,0 +1,320 @@
+"""
+Email Outbox
+
+Durable, batched email delivery.
+
+Request handlers call ``enqueue_email`` / ``enqueue_template_email`` which only
+insert an ``OutboundEmail`` row. The ``process_email_outbox`` management command
+runs ``EmailDispatcher`` in a loop: it claims due rows (OTP lane first), sends
+them over one reused ``get_connection()`` session, paces sends to a configurable
+rate and reschedules failures with exponential backoff.
+
+Settings:
+    EMAIL_OUTBOX_EAGER        Deliver right after commit instead of waiting for the worker
+    EMAIL_OUTBOX_BATCH_SIZE   Messages claimed per batch
+    EMAIL_OUTBOX_RATE_LIMIT   Max messages per second per worker (0 = unlimited)
+    EMAIL_OUTBOX_MAX_ATTEMPTS Delivery attempts before a message is marked failed
+"""
+
+import logging
+import time
+from datetime import timedelta
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# Rows stuck in 'sending' longer than this belong to a dead worker
+STALE_LOCK_MINUTES = 10
+# Backoff: 30s, 60s, 120s, ... capped at one hour
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 3600
+
+
+@lru_cache(maxsize=64)
+def _compiled_template(template_name):
+    """Load and compile a template once per process"""
+    return get_template(template_name)
+
+
+def render_email_template(template_name, context):
+    """Render an email template using the per-process compiled template cache"""
+    return _compiled_template(template_name).render(context)
+
+
+def enqueue_email(
+    to_email,
+    subject,
+    body='',
+    html_body='',
+    from_email=None,
+    reply_to=None,
+    priority=OutboundEmail.PRIORITY_NORMAL,
+    template_name='',
+):
+    """
+    Persist an email for background delivery
+
+    Returns:
+        OutboundEmail: the queued message
+    """
+    if from_email is None:
+        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@pola.co.tz')
+
+    message = OutboundEmail.objects.create(
+        to_email=to_email,
+        from_email=from_email,
+        reply_to=reply_to or '',
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        template_name=template_name,
+        priority=priority,
+        max_attempts=getattr(settings, 'EMAIL_OUTBOX_MAX_ATTEMPTS', 5),
+    )
+    logger.info(f"📨 Email queued #{message.id} to {to_email} (priority={priority})")
+
+    if getattr(settings, 'EMAIL_OUTBOX_EAGER', False):
+        transaction.on_commit(lambda: EmailDispatcher().deliver_ids([message.id]))
+
+    return message
+
+
+def enqueue_template_email(
+    to_email,
+    subject,
+    template_name,
+    context,
+    from_email=None,
+    reply_to=None,
+    priority=OutboundEmail.PRIORITY_NORMAL,
+):
+    """Render an HTML template and queue the result"""
+    return enqueue_email(
+        to_email=to_email,
+        subject=subject,
+        html_body=render_email_template(template_name, context),
+        from_email=from_email,
+        reply_to=reply_to,
+        priority=priority,
+        template_name=template_name,
+    )
+
+
+class EmailDispatcher:
+    """
+    Delivers queued emails over a single reused backend connection.
+    One instance per worker process; call ``close()`` when idle.
+    """
+
+    def __init__(self, batch_size=None, rate_limit=None, connection=None):
+        self.batch_size = batch_size or getattr(settings, 'EMAIL_OUTBOX_BATCH_SIZE', 50)
+        if rate_limit is None:
+            rate_limit = getattr(settings, 'EMAIL_OUTBOX_RATE_LIMIT', 5)
+        self.min_interval = 1.0 / rate_limit if rate_limit else 0
+        self._connection = connection
+        self._last_send = 0.0
+
+    # ------------------------------------------------------------------
+    # Connection handling
+    # ------------------------------------------------------------------
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = get_connection(fail_silently=False)
+        self._connection.open()
+        return self._connection
+
+    def close(self):
+        """Close the SMTP session (the next send reopens it)"""
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception as e:
+                logger.warning(f"⚠️ Error closing email connection: {e}")
+            self._connection = None
+
+    # ------------------------------------------------------------------
+    # Claiming
+    # ------------------------------------------------------------------
+
+    def release_stale_locks(self):
+        """Return messages abandoned by a crashed worker to the queue"""
+        cutoff = timezone.now() - timedelta(minutes=STALE_LOCK_MINUTES)
+        return OutboundEmail.objects.filter(
+            status='sending', locked_at__lt=cutoff
+        ).update(status='pending', locked_at=None)
+
+    def claim_batch(self, priority=None):
+        """
+        Atomically claim due messages, OTP lane first.
+        SKIP LOCKED lets several workers run side by side.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            queryset = OutboundEmail.objects.filter(
+                status='pending', next_attempt_at__lte=now
+            )
+            if priority is not None:
+                queryset = queryset.filter(priority=priority)
+            ids = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by('priority', 'next_attempt_at')
+                .values_list('id', flat=True)[:self.batch_size]
+            )
+            if ids:
+                OutboundEmail.objects.filter(id__in=ids).update(status='sending', locked_at=now)
+        return list(OutboundEmail.objects.filter(id__in=ids).order_by('priority', 'next_attempt_at'))
+
+    # ------------------------------------------------------------------
+    # Sending
+    # ------------------------------------------------------------------
+
+    def _build_message(self, outbound, connection):
+        email = EmailMultiAlternatives(
+            subject=outbound.subject,
+            body=outbound.body,
+            from_email=outbound.from_email,
+            to=[outbound.to_email],
+            reply_to=[outbound.reply_to] if outbound.reply_to else None,
+            connection=connection,
+        )
+        if outbound.html_body:
+            email.attach_alternative(outbound.html_body, 'text/html')
+        return email
+
+    def _throttle(self):
+        if not self.min_interval:
+            return
+        wait = self.min_interval - (time.monotonic() - self._last_send)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _mark_sent(self, outbound):
+        now = timezone.now()
+        outbound.status = 'sent'
+        outbound.sent_at = now
+        outbound.locked_at = None
+        outbound.attempts += 1
+        outbound.last_error = ''
+        outbound.latency_ms = int((now - outbound.created_at).total_seconds() * 1000)
+        outbound.save(update_fields=[
+            'status', 'sent_at', 'locked_at', 'attempts', 'last_error', 'latency_ms'
+        ])
+        logger.info(
+            f"✅ Email #{outbound.id} sent to {outbound.to_email} "
+            f"(priority={outbound.priority}, latency={outbound.latency_ms}ms)"
+        )
+
+    def _mark_failed(self, outbound, error):
+        outbound.attempts += 1
+        outbound.last_error = str(error)[:2000]
+        outbound.locked_at = None
+        if outbound.attempts >= outbound.max_attempts:
+            outbound.status = 'failed'
+            logger.error(f"❌ Email #{outbound.id} to {outbound.to_email} failed permanently: {error}")
+        else:
+            delay = min(RETRY_BASE_SECONDS * (2 ** (outbound.attempts - 1)), RETRY_MAX_SECONDS)
+            outbound.status = 'pending'
+            outbound.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+            logger.warning(
+                f"⚠️ Email #{outbound.id} attempt {outbound.attempts} failed, retrying in {delay}s: {error}"
+            )
+        outbound.save(update_fields=['attempts', 'last_error', 'locked_at', 'status', 'next_attempt_at'])
+
+    def send_batch(self, messages):
+        """
+        Send claimed messages over one connection.
+
+        Returns:
+            tuple: (sent_count, failed_count)
+        """
+        if not messages:
+            return 0, 0
+
+        sent = failed = 0
+        try:
+            connection = self._get_connection()
+        except Exception as e:
+            logger.error(f"❌ Could not open email connection: {e}")
+            self.close()
+            for outbound in messages:
+                self._mark_failed(outbound, e)
+            return 0, len(messages)
+
+        for index, outbound in enumerate(messages):
+            self._throttle()
+            try:
+                connection.send_messages([self._build_message(outbound, connection)])
+                self._last_send = time.monotonic()
+                self._mark_sent(outbound)
+                sent += 1
+            except Exception as e:
+                self._last_send = time.monotonic()
+                self._mark_failed(outbound, e)
+                failed += 1
+                # A broken SMTP session fails every following message; start fresh
+                self.close()
+                try:
+                    connection = self._get_connection()
+                except Exception as conn_error:
+                    logger.error(f"❌ Could not reopen email connection: {conn_error}")
+                    remaining = messages[index + 1:]
+                    for pending in remaining:
+                        self._mark_failed(pending, conn_error)
+                    return sent, failed + len(remaining)
+
+        return sent, failed
+
+    def dispatch_once(self):
+        """
+        Drain one OTP batch, then one batch of anything due.
+
+        Returns:
+            tuple: (sent_count, failed_count)
+        """
+        sent, failed = self.send_batch(self.claim_batch(priority=OutboundEmail.PRIORITY_OTP))
+        more_sent, more_failed = self.send_batch(self.claim_batch())
+        return sent + more_sent, failed + more_failed
+
+    def deliver_ids(self, ids):
+        """Deliver specific queued messages immediately (eager mode)"""
+        with transaction.atomic():
+            claimed = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(id__in=ids, status='pending')
+                .values_list('id', flat=True)
+            )
+            OutboundEmail.objects.filter(id__in=claimed).update(
+                status='sending', locked_at=timezone.now()
+            )
+        try:
+            return self.send_batch(list(OutboundEmail.objects.filter(id__in=claimed)))
+        finally:
+            self.close()
+
+
+def outbox_stats():
+    """Queue depth and delivery latency summary for monitoring"""
+    from django.db.models import Avg, Count, Max, Q
+
+    since = timezone.now() - timedelta(hours=1)
+    return OutboundEmail.objects.aggregate(
+        pending=Count('id', filter=Q(status='pending')),
+        sending=Count('id', filter=Q(status='sending')),
+        failed=Count('id', filter=Q(status='failed')),
+        sent_last_hour=Count('id', filter=Q(status='sent', sent_at__gte=since)),
+        otp_avg_latency_ms=Avg(
+            'latency_ms', filter=Q(priority=OutboundEmail.PRIORITY_OTP, sent_at__gte=since)
+        ),
+        otp_max_latency_ms=Max(
+            'latency_ms', filter=Q(priority=OutboundEmail.PRIORITY_OTP, sent_at__gte=since)
+        ),
+    )
@@ -0,0 +1,271 @@
+"""
+Real-time Events
+
+Per-user events (new notification, unread count, payment status, call state)
+pushed to clients over the server-sent-events endpoint in
+notification/stream_views.py instead of being polled.
+
+Writers call ``publish_event(user_id, 'call_state', {...})``. The event is
+handed to the pub/sub backend after the current transaction commits, and
+every process that has a stream open for that user delivers it.
+
+Backends (EVENT_STREAM_BACKEND):
+    memory    in-process only; tests and single-process development
+    postgres  LISTEN/NOTIFY on the primary database (default, no extra services)
+    redis     Redis PUBLISH/SUBSCRIBE on EVENT_STREAM_REDIS_URL (or CACHE_URL)
+
+A dotted path to a class with ``publish(message)`` and ``start(dispatch)``
+also works. Listener threads are only started in processes that actually
+serve a stream, so WSGI workers only publish.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'pola_events'
+
+# Events a slow client may have queued before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class _Subscription:
+    """One open stream: an asyncio queue bound to the stream's event loop"""
+
+    def __init__(self, user_id, loop):
+        self.user_id = user_id
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def _put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    def deliver(self, message):
+        """Thread-safe hand-off from listener threads"""
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class EventHub:
+    """Routes messages to the streams open in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, user_id):
+        subscription = _Subscription(user_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        ensure_listener()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def dispatch(self, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(message.get('user_id'), ()))
+        for subscription in subscribers:
+            try:
+                subscription.deliver(message)
+            except RuntimeError:
+                # Stream's loop already closed
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+hub = EventHub()
+
+
+# ----------------------------------------------------------------------
+# Backends
+# ----------------------------------------------------------------------
+
+class InProcessBackend:
+    """Delivers straight to this process's hub"""
+
+    def publish(self, message):
+        hub.dispatch(message)
+
+    def start(self, dispatch):
+        pass
+
+
+class _ListenerThreadBackend:
+    """Runs ``listen(dispatch)`` in a daemon thread, reconnecting on failure"""
+
+    retry_delay = 2
+
+    def start(self, dispatch):
+        thread = threading.Thread(target=self._run, args=(dispatch,), name=f'{type(self).__name__}-listener', daemon=True)
+        thread.start()
+
+    def _run(self, dispatch):
+        while True:
+            try:
+                self.listen(dispatch)
+            except Exception as e:
+                logger.error(f"❌ Event stream listener error ({type(self).__name__}): {e}")
+            time.sleep(self.retry_delay)
+
+    def listen(self, dispatch):
+        raise NotImplementedError
+
+
+def listen_connection_params():
+    """
+    Connection parameters for the LISTEN session: the default database's, or
+    EVENT_STREAM_LISTEN_HOST/PORT when set (a direct connection that bypasses
+    a transaction pooler, which cannot hold session state)
+    """
+    params = connection.get_connection_params()
+    host = getattr(settings, 'EVENT_STREAM_LISTEN_HOST', '')
+    if host:
+        params['host'] = host
+        params['port'] = getattr(settings, 'EVENT_STREAM_LISTEN_PORT', params.get('port'))
+    return params
+
+
+class PostgresBackend(_ListenerThreadBackend):
+    """
+    LISTEN/NOTIFY on the default database (payloads must stay under 8000 bytes).
+    NOTIFY works through any pooler; LISTEN uses listen_connection_params().
+    """
+
+    def publish(self, message):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, json.dumps(message, default=str)])
+
+    def listen(self, dispatch):
+        import select
+        import psycopg2
+
+        listener = psycopg2.connect(**listen_connection_params())
+        listener.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        try:
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            logger.info(f"📡 Event stream listening on Postgres channel {CHANNEL}")
+            while True:
+                if select.select([listener], [], [], 30) == ([], [], []):
+                    continue
+                listener.poll()
+                while listener.notifies:
+                    notify = listener.notifies.pop(0)
+                    dispatch(json.loads(notify.payload))
+        finally:
+            listener.close()
+
+
+class RedisBackend(_ListenerThreadBackend):
+    """Redis PUBLISH/SUBSCRIBE"""
+
+    def __init__(self):
+        import redis
+
+        url = getattr(settings, 'EVENT_STREAM_REDIS_URL', '') or getattr(settings, 'CACHE_URL', '')
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, message):
+        self.client.publish(CHANNEL, json.dumps(message, default=str))
+
+    def listen(self, dispatch):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(CHANNEL)
+        logger.info(f"📡 Event stream listening on Redis channel {CHANNEL}")
+        try:
+            for item in pubsub.listen():
+                dispatch(json.loads(item['data']))
+        finally:
+            pubsub.close()
+
+
+BACKENDS = {
+    'memory': InProcessBackend,
+    'postgres': PostgresBackend,
+    'redis': RedisBackend,
+}
+
+_backend_lock = threading.Lock()
+_backend = (None, None)
+_listener_started = set()
+
+
+def get_backend():
+    """The configured backend (rebuilt if EVENT_STREAM_BACKEND changes, e.g. in tests)"""
+    global _backend
+    name = getattr(settings, 'EVENT_STREAM_BACKEND', 'postgres')
+    current_name, current = _backend
+    if current_name == name:
+        return current
+    with _backend_lock:
+        backend_class = BACKENDS.get(name) or import_string(name)
+        _backend = (name, backend_class())
+        return _backend[1]
+
+
+def ensure_listener():
+    """Start the backend's listener once per process"""
+    backend = get_backend()
+    with _backend_lock:
+        if id(backend) in _listener_started:
+            return
+        _listener_started.add(id(backend))
+    backend.start(hub.dispatch)
+
+
+# ----------------------------------------------------------------------
+# Publishing
+# ----------------------------------------------------------------------
+
+def publish_event(user_id, event, data):
+    """
+    Queue an event for one user, sent once the current transaction commits.
+
+    Args:
+        user_id: recipient PolaUser id
+        event: event name (notification, unread_count, payment_status, call_state)
+        data: JSON-serialisable payload (keep it small)
+    """
+    message = {'id': uuid.uuid4().hex, 'user_id': user_id, 'event': event, 'data': data}
+
+    def send():
+        try:
+            get_backend().publish(message)
+        except Exception as e:
+            logger.error(f"❌ Failed to publish {event} event for user {user_id}: {e}")
+
+    transaction.on_commit(send)
+
+
+def publish_unread_count(user_id):
+    """Publish the user's current unread notification count"""
+    from .models import UserNotification
+
+    def send():
+        count = UserNotification.objects.filter(user_id=user_id, is_read=False).count()
+        publish_event(user_id, 'unread_count', {'count': count})
+
+    transaction.on_commit(send)
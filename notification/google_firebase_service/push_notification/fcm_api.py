@@ -13,6 +13,16 @@ class FCM:
             'Content-Type': 'application/json; UTF-8',
         }
 
+    def _send(self, payload):
+        """POST one message; dead registration tokens are reported for cleanup"""
+        from authentication.device_registry import is_invalid_token_error, report_invalid_token
+
+        response = requests.post(self.url, headers=self.headers, data=json.dumps(payload))
+        body = response.json()
+        if is_invalid_token_error(response.status_code, body):
+            report_invalid_token(payload['message'].get('token'))
+        return response.status_code, body
+
     def send_notification(self, device_registration_token, title, body, data):
         """
         Send a general push notification with high priority
@@ -47,8 +57,7 @@ class FCM:
                 }
             }
         }
-        response = requests.post(self.url, headers=self.headers, data=json.dumps(payload))
-        return response.status_code, response.json()
+        return self._send(payload)
     
     def send_call_notification(self, device_registration_token, call_data):
         """
@@ -111,8 +120,7 @@ class FCM:
             }
         }
         
-        response = requests.post(self.url, headers=self.headers, data=json.dumps(payload))
-        return response.status_code, response.json()
+        return self._send(payload)
     
     def send_call_status_notification(self, device_registration_token, status_data):
         """
@@ -147,5 +155,4 @@ class FCM:
             }
         }
         
-        response = requests.post(self.url, headers=self.headers, data=json.dumps(payload))
-        return response.status_code, response.json()    
+        return self._send(payload)    
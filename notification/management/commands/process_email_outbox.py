@@ -0,0 +1,90 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notification.email_outbox import EmailDispatcher, outbox_stats
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued emails from the outbox (run as a long-lived worker)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Process everything currently due and exit',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Messages claimed per batch (default: EMAIL_OUTBOX_BATCH_SIZE)',
+        )
+        parser.add_argument(
+            '--rate',
+            type=float,
+            default=None,
+            help='Max messages per second (default: EMAIL_OUTBOX_RATE_LIMIT, 0 = unlimited)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--idle-close',
+            type=float,
+            default=30.0,
+            help='Close the SMTP session after this many idle seconds',
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = EmailDispatcher(
+            batch_size=options['batch_size'],
+            rate_limit=options['rate'],
+        )
+        self._running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        self.stdout.write(self.style.HTTP_INFO('📬 Email outbox worker started'))
+        released = dispatcher.release_stale_locks()
+        if released:
+            self.stdout.write(self.style.WARNING(f'♻️  Re-queued {released} stale message(s)'))
+
+        total_sent = total_failed = 0
+        idle_since = None
+        try:
+            while self._running:
+                sent, failed = dispatcher.dispatch_once()
+                total_sent += sent
+                total_failed += failed
+
+                if sent or failed:
+                    idle_since = None
+                    continue
+
+                if options['once']:
+                    break
+
+                # Keep the SMTP session warm for bursts, drop it when idle
+                idle_since = idle_since or time.monotonic()
+                if time.monotonic() - idle_since > options['idle_close']:
+                    dispatcher.close()
+                time.sleep(options['poll_interval'])
+                # Long-lived worker: drop DB connections that died while idle
+                close_old_connections()
+        finally:
+            dispatcher.close()
+
+        stats = outbox_stats()
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Outbox worker stopped: sent={total_sent} failed={total_failed} '
+            f'pending={stats["pending"]} permanently_failed={stats["failed"]}'
+        ))
+
+    def _stop(self, signum, frame):
+        self._running = False
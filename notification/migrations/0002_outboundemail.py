@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:12
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notification', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.EmailField(max_length=254)),
+                ('from_email', models.CharField(max_length=255)),
+                ('reply_to', models.CharField(blank=True, default='', max_length=255)),
+                ('subject', models.CharField(max_length=255)),
+                ('body', models.TextField(blank=True, default='')),
+                ('html_body', models.TextField(blank=True, default='')),
+                ('template_name', models.CharField(blank=True, default='', help_text='Template used to render html_body (for reporting only)', max_length=255)),
+                ('priority', models.PositiveSmallIntegerField(choices=[(0, 'OTP / Critical'), (10, 'Normal')], default=10)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('max_attempts', models.PositiveSmallIntegerField(default=5)),
+                ('last_error', models.TextField(blank=True, default='')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('locked_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True)),
+                ('latency_ms', models.PositiveIntegerField(blank=True, help_text='Milliseconds between enqueue and successful delivery', null=True)),
+            ],
+            options={
+                'verbose_name': 'Outbound Email',
+                'verbose_name_plural': 'Outbound Emails',
+                'ordering': ['priority', 'next_attempt_at'],
+                'indexes': [models.Index(fields=['status', 'priority', 'next_attempt_at'], name='notificatio_status_ce76fc_idx'), models.Index(fields=['status', 'locked_at'], name='notificatio_status_7cc42b_idx')],
+            },
+        ),
+    ]
@@ -146,7 +146,82 @@ class UserNotification(models.Model):
             self.save(update_fields=['is_read', 'read_at'])
 
 
+class OutboundEmail(models.Model):
+    """
+    Durable email outbox.
+    Requests enqueue messages here; the process_email_outbox worker delivers
+    them in batches over a single reused SMTP connection.
+    """
+    PRIORITY_OTP = 0
+    PRIORITY_NORMAL = 10
+    PRIORITY_CHOICES = [
+        (PRIORITY_OTP, 'OTP / Critical'),
+        (PRIORITY_NORMAL, 'Normal'),
+    ]
 
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
 
-    
-    
\ No newline at end of file
+    to_email = models.EmailField()
+    from_email = models.CharField(max_length=255)
+    reply_to = models.CharField(max_length=255, blank=True, default='')
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True, default='')
+    html_body = models.TextField(blank=True, default='')
+    template_name = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        help_text="Template used to render html_body (for reporting only)"
+    )
+
+    priority = models.PositiveSmallIntegerField(choices=PRIORITY_CHOICES, default=PRIORITY_NORMAL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True, default='')
+
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    latency_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        help_text="Milliseconds between enqueue and successful delivery"
+    )
+
+    class Meta:
+        ordering = ['priority', 'next_attempt_at']
+        verbose_name = 'Outbound Email'
+        verbose_name_plural = 'Outbound Emails'
+        indexes = [
+            models.Index(fields=['status', 'priority', 'next_attempt_at']),
+            models.Index(fields=['status', 'locked_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.status})"
+
+
+class EventStreamTicket(models.Model):
+    """
+    Short-lived, single-use credential for opening the event stream.
+    EventSource cannot send headers, so the stream URL carries a ticket
+    instead of the JWT. Only the SHA-256 of the ticket is stored.
+    """
+    key = models.CharField(max_length=64, primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='event_stream_tickets')
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Event Stream Ticket'
+        verbose_name_plural = 'Event Stream Tickets'
+
+    def __str__(self):
+        return f"Stream ticket for {self.user_id} (expires {self.expires_at})"
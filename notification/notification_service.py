@@ -10,6 +10,7 @@ from typing import Dict, Optional, List
 from django.utils import timezone
 from authentication.models import PolaUser
 from authentication.device_models import UserDevice
+from authentication.device_registry import invalid_token_batch, push_devices
 from .google_firebase_service.push_notification.auth_api import GoogleAuth
 from .google_firebase_service.push_notification.fcm_api import FCM
 
@@ -34,12 +35,7 @@ class NotificationService:
     @staticmethod
     def _get_user_devices(user: PolaUser) -> List[UserDevice]:
         """Get active devices with FCM tokens for a user"""
-        return UserDevice.objects.filter(
-            user=user,
-            is_current_device=True,
-            is_active=True,
-            fcm_token__isnull=False
-        ).exclude(fcm_token='')
+        return push_devices([user.id])
     
     @staticmethod
     def send_notification_to_user(
@@ -64,68 +60,93 @@ class NotificationService:
         Returns:
             bool: True if at least one notification sent successfully
         """
-        # Save notification to database first
-        from .models import UserNotification
-        
-        logger.info(f"📤 Creating notification for user {user.id} ({user.email}): {title}")
-        
-        notification_record = UserNotification.objects.create(
-            user=user,
-            notification_type=notification_type,
-            title=title,
-            body=body,
-            data=data,
-            fcm_sent=False  # Will update after FCM send
+        delivered = NotificationService.send_notification_to_users(
+            [user], title, body, data, notification_type=notification_type, priority=priority
         )
+        return user.id in delivered
+    
+    @staticmethod
+    def send_notification_to_users(
+        users: List[PolaUser],
+        title: str,
+        body: str,
+        data: Dict,
+        notification_type: str = 'general',
+        priority: str = 'high'
+    ) -> set:
+        """
+        Send the same notification to several users.
+        
+        Devices for all users are resolved in one query and invalid FCM tokens
+        reported during the send are cleared in one update.
         
-        logger.info(f"📝 Notification record created: ID={notification_record.id}")
+        Returns:
+            set: ids of users reached on at least one device
+        """
+        # Save notifications to database first
+        from .models import UserNotification
         
-        devices = NotificationService._get_user_devices(user)
+        records = {}
+        for user in users:
+            logger.debug("📤 Creating notification for user %s: %s", user.id, title)
+            records[user.id] = UserNotification.objects.create(
+                user=user,
+                notification_type=notification_type,
+                title=title,
+                body=body,
+                data=data,
+                fcm_sent=False  # Will update after FCM send
+            )
+            logger.debug("📝 Notification record created: ID=%s", records[user.id].id)
         
-        if not devices.exists():
-            logger.warning(f"⚠️ No active devices with FCM token found for user {user.id} ({user.email})")
-            logger.warning(f"   User needs to: 1) Log in on app 2) Accept notification permission 3) Device must register FCM token")
-            return False
+        devices = push_devices(records)
+        reachable = {device.user_id for device in devices}
+        for user in users:
+            if user.id not in reachable:
+                logger.info("⚠️ No active devices with FCM token found for user %s", user.id)
+        if not devices:
+            return set()
         
-        logger.info(f"📱 Found {devices.count()} active device(s) for user {user.email}")
+        logger.info("📱 Found %s active device(s) for %s user(s)", len(devices), len(reachable))
         
         fcm = NotificationService._get_fcm_instance()
         if not fcm:
             logger.error(f"❌ Failed to initialize FCM client")
-            return False
+            return set()
         
         # Ensure all data values are strings
         data_payload = {k: str(v) for k, v in data.items()}
         data_payload['type'] = notification_type
         data_payload['timestamp'] = str(int(timezone.now().timestamp() * 1000))
         
-        successful_sends = 0
-        
-        for device in devices:
-            try:
-                status_code, response = fcm.send_notification(
-                    device.fcm_token,
-                    title,
-                    body,
-                    data_payload
-                )
+        delivered = set()
+        with invalid_token_batch():
+            for device in devices:
+                try:
+                    status_code, response = fcm.send_notification(
+                        device.fcm_token,
+                        title,
+                        body,
+                        data_payload
+                    )
+                    
+                    if status_code == 200:
+                        delivered.add(device.user_id)
+                        logger.debug("✅ Notification sent to user %s - device %s", device.user_id, device.id)
+                    else:
+                        logger.error("❌ FCM failed for user %s device %s: %s", device.user_id, device.id, response)
                 
-                if status_code == 200:
-                    successful_sends += 1
-                    logger.info(f"✅ Notification sent to {user.email} - Device: {device.device_name or device.device_id[:8]}")
-                else:
-                    logger.error(f"❌ FCM failed for {user.email}: {response}")
-            
-            except Exception as e:
-                logger.error(f"❌ Error sending notification to {user.email}: {str(e)}")
-                continue
-        
-        # Update notification record
-        if successful_sends > 0:
-            notification_record.fcm_sent = True
-            notification_record.save(update_fields=['fcm_sent'])
-        
-        return successful_sends > 0
+                except Exception as e:
+                    logger.error("❌ Error sending notification to user %s device %s: %s", device.user_id, device.id, e)
+                    continue
+        
+        # Update notification records
+        if delivered:
+            UserNotification.objects.filter(
+                id__in=[records[user_id].id for user_id in delivered]
+            ).update(fcm_sent=True)
+        
+        return delivered
     
     @staticmethod
     def send_mention_notification(
@@ -273,21 +294,18 @@ class NotificationService:
             logger.warning("No admin users found to send consultation request notification")
             return False
         
-        successful_sends = 0
-        for admin in admins:
-            result = NotificationService.send_notification_to_user(
-                user=admin,
-                title=title,
-                body=body,
-                data=data,
-                notification_type='consultation_request',
-                priority='high'
-            )
-            if result:
-                successful_sends += 1
+        admins = list(admins)
+        delivered = NotificationService.send_notification_to_users(
+            admins,
+            title=title,
+            body=body,
+            data=data,
+            notification_type='consultation_request',
+            priority='high'
+        )
         
-        logger.info(f"Consultation request notification sent to {successful_sends}/{admins.count()} admins")
-        return successful_sends > 0
+        logger.info(f"Consultation request notification sent to {len(delivered)}/{len(admins)} admins")
+        return bool(delivered)
     
     @staticmethod
     def send_payment_received_notification(
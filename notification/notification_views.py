@@ -8,6 +8,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from .models import UserNotification
 from .serializers import UserNotificationSerializer
+from .events import publish_event
 
 
 class UserNotificationViewSet(viewsets.ModelViewSet):
@@ -75,6 +76,8 @@ class UserNotificationViewSet(viewsets.ModelViewSet):
         
         count = unread_notifications.count()
         unread_notifications.update(is_read=True, read_at=timezone.now())
+        if count:
+            publish_event(request.user.id, 'unread_count', {'count': 0})
         
         return Response({
             'success': True,
@@ -0,0 +1,33 @@
+"""
+Publish real-time events for notification changes
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .events import publish_event, publish_unread_count
+from .models import UserNotification
+
+# Keep NOTIFY payloads well under Postgres' 8000 byte limit
+_BODY_PREVIEW_LENGTH = 500
+
+
+@receiver(post_save, sender=UserNotification)
+def publish_notification_event(sender, instance, created, update_fields=None, **kwargs):
+    if created:
+        publish_event(instance.user_id, 'notification', {
+            'id': instance.id,
+            'notification_type': instance.notification_type,
+            'title': instance.title,
+            'body': instance.body[:_BODY_PREVIEW_LENGTH],
+            'data': instance.data,
+            'created_at': instance.created_at.isoformat(),
+        })
+    elif update_fields is not None and 'is_read' not in update_fields:
+        return
+    publish_unread_count(instance.user_id)
+
+
+@receiver(post_delete, sender=UserNotification)
+def publish_unread_count_on_delete(sender, instance, **kwargs):
+    if not instance.is_read:
+        publish_unread_count(instance.user_id)
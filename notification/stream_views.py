@@ -0,0 +1,139 @@
+"""
+Server-Sent Events endpoint
+
+POST /api/v1/notification/event-tickets/    (JWT)  -> {"ticket": ..., "expires_in": 30}
+GET  /api/v1/notification/events/?ticket=<ticket>
+
+Streams the authenticated user's real-time events (see notification/events.py):
+
+    event: unread_count
+    id: 3f0c...
+    data: {"count": 4}
+
+The current unread count is sent on connect. A comment line is sent every
+EVENT_STREAM_KEEPALIVE seconds so proxies keep the connection open.
+EventSource cannot set headers, and a JWT in the URL ends up in proxy and
+access logs. Clients instead POST for a ticket that is valid for
+EVENT_STREAM_TICKET_TTL seconds and works once. Clients that can set
+headers may send ``Authorization: Bearer`` instead.
+
+Serve through the ASGI application (pola_settings.asgi) so an open stream costs
+a coroutine rather than a worker thread.
+"""
+
+import asyncio
+import hashlib
+import json
+import secrets
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from authentication.principal import principal_from_header
+from .events import hub
+from .models import EventStreamTicket, UserNotification
+
+
+def _format_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id:
+        lines.append(f'id: {event_id}')
+    lines.append(f'data: {json.dumps(data, default=str)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def _ticket_key(ticket):
+    return hashlib.sha256(ticket.encode('utf-8')).hexdigest()
+
+
+def issue_stream_ticket(user):
+    """
+    Create a single-use stream ticket for ``user``.
+
+    Returns:
+        tuple: (ticket, seconds until it expires)
+    """
+    ttl = getattr(settings, 'EVENT_STREAM_TICKET_TTL', 30)
+    ticket = secrets.token_urlsafe(32)
+    now = timezone.now()
+    EventStreamTicket.objects.filter(expires_at__lte=now).delete()
+    EventStreamTicket.objects.create(key=_ticket_key(ticket), user=user, expires_at=now + timedelta(seconds=ttl))
+    return ticket, ttl
+
+
+def redeem_stream_ticket(ticket):
+    """Consume a ticket; returns its user id, or None if unknown, expired or already used"""
+    key = _ticket_key(ticket)
+    with transaction.atomic():
+        user_id = (
+            EventStreamTicket.objects.select_for_update()
+            .filter(key=key, expires_at__gt=timezone.now())
+            .values_list('user_id', flat=True)
+            .first()
+        )
+        if user_id is not None:
+            EventStreamTicket.objects.filter(key=key).delete()
+    return user_id
+
+
+def _authenticate(request):
+    """Return the user id for the request's stream ticket or JWT header, or None"""
+    ticket = request.GET.get('ticket')
+    if ticket:
+        return redeem_stream_ticket(ticket)
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    if not header:
+        return None
+    principal = principal_from_header(header)
+    return principal.id if principal else None
+
+
+def _unread_count(user_id):
+    return UserNotification.objects.filter(user_id=user_id, is_read=False).count()
+
+
+async def _event_source(user_id):
+    keepalive = getattr(settings, 'EVENT_STREAM_KEEPALIVE', 15)
+    subscription = hub.subscribe(user_id)
+    try:
+        yield 'retry: 3000\n\n'
+        count = await sync_to_async(_unread_count)(user_id)
+        yield _format_event('unread_count', {'count': count})
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.get(), timeout=keepalive)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            yield _format_event(message['event'], message['data'], message.get('id'))
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def stream_ticket(request):
+    """Issue a single-use ticket for opening the event stream"""
+    ticket, ttl = issue_stream_ticket(request.user)
+    return Response({'ticket': ticket, 'expires_in': ttl}, status=201)
+
+
+@require_GET
+async def event_stream(request):
+    """Per-user server-sent event stream"""
+    user_id = await sync_to_async(_authenticate)(request)
+    if user_id is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'}, status=401)
+
+    response = StreamingHttpResponse(_event_source(user_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -1,3 +1,248 @@
-from django.test import TestCase
+import asyncio
+import os
+import subprocess
+import sys
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend as LocmemBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.email_utils import send_password_reset_otp_email
+from notification.email_outbox import (
+    EmailDispatcher,
+    _compiled_template,
+    enqueue_email,
+    render_email_template,
+)
+from notification.events import hub, listen_connection_params, publish_event
+from notification.models import EventStreamTicket, OutboundEmail, UserNotification
+from notification.stream_views import _event_source
+from subscriptions.models import CallSession
+from utils.email_service import EmailService
+from utils.testing import create_test_user
+
+
+class CountingBackend(LocmemBackend):
+    """locmem backend that records how many sessions were opened"""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class FailingBackend(LocmemBackend):
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP unavailable')
+
+
+class EmailOutboxTestCase(TestCase):
+    """Test suite for the durable email outbox"""
+
+    def test_send_email_only_enqueues(self):
+        """Request-path helpers queue messages instead of talking to SMTP"""
+        self.assertTrue(EmailService.send_welcome_email('new@test.com', 'New User'))
+        self.assertTrue(send_password_reset_otp_email('reset@test.com', '123456'))
+
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 2)
+        reset = OutboundEmail.objects.get(to_email='reset@test.com')
+        self.assertEqual(reset.priority, OutboundEmail.PRIORITY_OTP)
+        self.assertIn('123456', reset.body)
+
+    def test_otp_lane_is_sent_first_with_latency(self):
+        """OTP mail jumps ahead of normal mail and records delivery latency"""
+        for i in range(3):
+            enqueue_email(f'user{i}@test.com', 'Newsletter', body='hello')
+        EmailService.send_otp_email('otp@test.com', '654321')
+
+        sent, failed = EmailDispatcher(rate_limit=0).dispatch_once()
+
+        self.assertEqual((sent, failed), (4, 0))
+        self.assertEqual(mail.outbox[0].to, ['otp@test.com'])
+        otp = OutboundEmail.objects.get(to_email='otp@test.com')
+        self.assertEqual(otp.status, 'sent')
+        self.assertIsNotNone(otp.latency_ms)
+
+    @override_settings(EMAIL_BACKEND='notification.tests.CountingBackend')
+    def test_batch_reuses_one_connection(self):
+        """A whole batch goes out over a single backend session"""
+        CountingBackend.opened = 0
+        for i in range(5):
+            enqueue_email(f'user{i}@test.com', 'Hello', body='hi')
+
+        dispatcher = EmailDispatcher(batch_size=10, rate_limit=0)
+        dispatcher.send_batch(dispatcher.claim_batch())
+        dispatcher.close()
+
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(CountingBackend.opened, 1)
+
+    @override_settings(EMAIL_BACKEND='notification.tests.FailingBackend', EMAIL_OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_are_retried_then_marked_failed(self):
+        """Failed sends back off and give up after max_attempts"""
+        message = enqueue_email('down@test.com', 'Hello', body='hi')
+        dispatcher = EmailDispatcher(rate_limit=0)
+
+        dispatcher.dispatch_once()
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'pending')
+        self.assertEqual(message.attempts, 1)
+        self.assertGreater(message.next_attempt_at, timezone.now())
+
+        OutboundEmail.objects.filter(id=message.id).update(next_attempt_at=timezone.now())
+        dispatcher.dispatch_once()
+        message.refresh_from_db()
+        self.assertEqual(message.status, 'failed')
+        self.assertIn('SMTP unavailable', message.last_error)
+
+    def test_templates_are_compiled_once(self):
+        """Repeated renders reuse the compiled template"""
+        _compiled_template.cache_clear()
+        context = {'otp_code': '111111', 'expiry_minutes': 10, 'current_year': 2026, 'app_name': 'POLA'}
+        render_email_template('emails/otp_verification.html', context)
+        html = render_email_template('emails/otp_verification.html', context)
+
+        self.assertIn('111111', html)
+        self.assertEqual(_compiled_template.cache_info().misses, 1)
+
+    def test_worker_command_drains_queue(self):
+        """process_email_outbox --once delivers everything due"""
+        for i in range(3):
+            enqueue_email(f'user{i}@test.com', 'Hello', body='hi')
+
+        call_command('process_email_outbox', once=True, rate=0, stdout=StringIO())
+
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+
+
+@override_settings(EVENT_STREAM_BACKEND='memory')
+class EventStreamTestCase(TestCase):
+    """Real-time events published after commit and served over SSE"""
+
+    def setUp(self):
+        self.user = create_test_user('stream@test.com', 'Stream', 'User')
+        self.consultant = create_test_user('consultant@test.com', 'Con', 'Sultant')
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def _subscribe(self, user_id):
+        async def subscribe():
+            return hub.subscribe(user_id)
+        subscription = self.loop.run_until_complete(subscribe())
+        self.addCleanup(hub.unsubscribe, subscription)
+        return subscription
+
+    def _drain(self, subscription):
+        self.loop.run_until_complete(asyncio.sleep(0))
+        messages = []
+        while not subscription.queue.empty():
+            messages.append(subscription.queue.get_nowait())
+        return messages
+
+    def test_events_are_sent_only_after_commit(self):
+        """Nothing is delivered until the transaction commits"""
+        subscription = self._subscribe(self.user.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            publish_event(self.user.id, 'unread_count', {'count': 1})
+        self.assertEqual(self._drain(subscription), [])
+
+        callbacks[0]()
+        messages = self._drain(subscription)
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0]['data'], {'count': 1})
+
+    def test_new_notification_is_pushed(self):
+        """Creating a notification pushes it together with the unread count"""
+        subscription = self._subscribe(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            UserNotification.objects.create(user=self.user, notification_type='system', title='Hi', body='Hello')
+
+        messages = self._drain(subscription)
+        self.assertEqual([message['event'] for message in messages], ['notification', 'unread_count'])
+        self.assertEqual(messages[0]['data']['title'], 'Hi')
+        self.assertEqual(messages[1]['data'], {'count': 1})
+
+    def test_call_state_reaches_both_parties(self):
+        """Call status changes are pushed to caller and consultant only"""
+        caller_sub = self._subscribe(self.user.id)
+        consultant_sub = self._subscribe(self.consultant.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            call = CallSession.objects.create(caller=self.user, consultant=self.consultant, channel_name='call_1')
+        with self.captureOnCommitCallbacks(execute=True):
+            call.status = 'rejected'
+            call.save()
+
+        for subscription in (caller_sub, consultant_sub):
+            statuses = [message['data']['status'] for message in self._drain(subscription)]
+            self.assertEqual(statuses, ['ringing', 'rejected'])
+
+    def test_stream_requires_ticket(self):
+        """The SSE endpoint rejects anonymous clients and JWTs in the URL"""
+        response = self.client.get(reverse('event-stream'))
+        self.assertEqual(response.status_code, 401)
+
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(reverse('event-stream'), {'token': str(token)})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(self.client.post(reverse('event-stream-ticket')).status_code, 401)
+
+    def test_stream_tickets_are_single_use_and_short_lived(self):
+        """A ticket opens one stream, and only until it expires"""
+        header = f'Bearer {AccessToken.for_user(self.user)}'
+        response = self.client.post(reverse('event-stream-ticket'), HTTP_AUTHORIZATION=header)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['expires_in'], settings.EVENT_STREAM_TICKET_TTL)
+        ticket = response.data['ticket']
+        self.assertFalse(EventStreamTicket.objects.filter(key=ticket).exists())
+
+        self.assertEqual(self.client.get(reverse('event-stream'), {'ticket': ticket}).status_code, 200)
+        self.assertEqual(self.client.get(reverse('event-stream'), {'ticket': ticket}).status_code, 401)
+
+        ticket = self.client.post(reverse('event-stream-ticket'), HTTP_AUTHORIZATION=header).data['ticket']
+        EventStreamTicket.objects.update(expires_at=timezone.now())
+        self.assertEqual(self.client.get(reverse('event-stream'), {'ticket': ticket}).status_code, 401)
+
+    def test_stream_starts_with_unread_count(self):
+        """A new stream gets the retry hint and the current unread count"""
+        UserNotification.objects.create(user=self.user, notification_type='system', title='Hi', body='Hello')
+        response = self.client.get(reverse('event-stream'), HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        async def first_events():
+            stream = _event_source(self.user.id)
+            try:
+                return [await stream.__anext__(), await stream.__anext__()]
+            finally:
+                await stream.aclose()
+
+        retry, unread = async_to_sync(first_events)()
+        self.assertEqual(retry, 'retry: 3000\n\n')
+        self.assertEqual(unread, 'event: unread_count\ndata: {"count": 1}\n\n')
+
+    def test_listen_session_bypasses_transaction_pooler(self):
+        """LISTEN connects to EVENT_STREAM_LISTEN_HOST; transaction pooling without one is refused"""
+        default = listen_connection_params()
+        with override_settings(EVENT_STREAM_LISTEN_HOST='db-direct', EVENT_STREAM_LISTEN_PORT=6543):
+            direct = listen_connection_params()
+        self.assertEqual((direct['host'], direct['port']), ('db-direct', 6543))
+        self.assertEqual(direct['dbname'], default['dbname'])
+
+        env = {**os.environ, 'DB_POOLER_MODE': 'transaction', 'EVENT_STREAM_BACKEND': 'postgres',
+               'EVENT_STREAM_LISTEN_HOST': ''}
+        result = subprocess.run(
+            [sys.executable, '-c', 'import pola_settings.settings'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('EVENT_STREAM_LISTEN_HOST', result.stderr)
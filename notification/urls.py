@@ -4,6 +4,7 @@ from django.conf import settings
 from rest_framework import routers
 from .views import SendFcmNotification, FcmNotificationViewSet, update_heartbeat
 from .notification_views import UserNotificationViewSet
+from .stream_views import event_stream, stream_ticket
 
 router = routers.DefaultRouter()
 router.register(r'send-notification', SendFcmNotification, basename='send')
@@ -17,4 +18,7 @@ API_VERSION =  settings.API_VERSION
 urlpatterns = [
     path('', include(router.urls)),
     path('heartbeat/', update_heartbeat, name='heartbeat'),
+    path('events/', event_stream, name='event-stream'),
+    # Outside events/ so it is served by the WSGI app, not the ASGI stream server
+    path('event-tickets/', stream_ticket, name='event-stream-ticket'),
 ]
@@ -17,6 +17,7 @@ from datetime import timedelta
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 from decouple import config
+from django.core.exceptions import ImproperlyConfigured
 
 
 
@@ -74,10 +75,16 @@ INSTALLED_APPS = [
     'notification',  # FCM push notifications and online status
     'django_filters',
     'corsheaders',
-    'hubs'
+    'hubs',
+    'uploads',  # Chunked, resumable file uploads
+    'lookups',  # Reference data for signup/profile dropdowns
+    'benchmarks',  # Scale-data generator and API benchmark runner
+    'utils',  # Shared infrastructure; operational commands (probe_database)
 ]
 
 MIDDLEWARE = [
+    'utils.structured_logging.RequestIdMiddleware',  # X-Request-ID on every response and log record
+    'utils.instrumentation.InstrumentationMiddleware',  # Server-Timing, slow/N+1 query log, /admin/metrics/
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -88,6 +95,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'authentication.middleware.SecurityTrackingMiddleware',  # Automatic device, session & online status tracking
+    'utils.db_routing.ReplicaPinningMiddleware',  # Read-your-writes for replica-routed reports
 ]
 
 ROOT_URLCONF = 'pola_settings.urls'
@@ -122,9 +130,45 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT', cast=int),
+        # Reuse a connection per worker thread for DB_CONN_MAX_AGE seconds instead of
+        # reconnecting (TCP + auth) on every request; health checks replace a
+        # connection the server dropped before it is handed to the next request.
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        'OPTIONS': {
+            'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+        },
     }
 }
 
+# External pooler in front of Postgres: none | session | transaction.
+# PgBouncer transaction pooling hands each transaction a possibly different
+# server connection, so named (server-side) cursors cannot be used.
+DB_POOLER_MODE = config('DB_POOLER_MODE', default='none')
+if DB_POOLER_MODE == 'transaction':
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+# Optional streaming replica for admin analytics, statistics and exports
+# (utils/db_routing.py). Reads only go there inside @read_only_replica, fall back
+# to the primary when it lags or is down, and stay on the primary for a user
+# right after their own writes.
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': config('DB_REPLICA_NAME', default=DATABASES['default']['NAME']),
+        'USER': config('DB_REPLICA_USER', default=DATABASES['default']['USER']),
+        'PASSWORD': config('DB_REPLICA_PASSWORD', default=DATABASES['default']['PASSWORD']),
+        'HOST': DB_REPLICA_HOST,
+        'PORT': config('DB_REPLICA_PORT', default=DATABASES['default']['PORT'], cast=int),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['utils.db_routing.ReplicaRouter']
+REPLICA_DATABASE_ALIAS = 'replica'
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=30, cast=float)
+REPLICA_LAG_CHECK_SECONDS = config('REPLICA_LAG_CHECK_SECONDS', default=5, cast=int)
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=15, cast=int)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -146,7 +190,8 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # simplejwt JWTAuthentication, resolved once per request and shared with SecurityTrackingMiddleware
+        'authentication.principal.PrincipalJWTAuthentication',
     ),      
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -172,6 +217,63 @@ REST_FRAMEWORK = {
 
 API_VERSION = config('API_VERSION', default='v1')
 
+# Seconds an authenticated user's principal snapshot (role, flags, subscription
+# status) is cached; invalidated on user/role/verification/subscription saves. 0 disables.
+# Invalidation only reaches other workers through a shared cache, so without
+# CACHE_URL (per-process LocMem) the snapshot is not cached by default.
+PRINCIPAL_CACHE_TTL = config('PRINCIPAL_CACHE_TTL', default=60 if config('CACHE_URL', default='') else 0, cast=int)
+
+# Real-time event stream (notification/events.py): memory | postgres | redis
+EVENT_STREAM_BACKEND = config('EVENT_STREAM_BACKEND', default='postgres')
+EVENT_STREAM_REDIS_URL = config('EVENT_STREAM_REDIS_URL', default='')
+EVENT_STREAM_KEEPALIVE = config('EVENT_STREAM_KEEPALIVE', default=15, cast=int)
+# Seconds a single-use ?ticket= for opening the stream stays valid
+EVENT_STREAM_TICKET_TTL = config('EVENT_STREAM_TICKET_TTL', default=30, cast=int)
+# The postgres backend holds a session-level LISTEN, which a transaction pooler
+# cannot keep; behind PgBouncer transaction pooling it must connect to Postgres
+# directly (or session pooling) via EVENT_STREAM_LISTEN_HOST/PORT.
+EVENT_STREAM_LISTEN_HOST = config('EVENT_STREAM_LISTEN_HOST', default='')
+EVENT_STREAM_LISTEN_PORT = config('EVENT_STREAM_LISTEN_PORT', default=DATABASES['default']['PORT'], cast=int)
+if DB_POOLER_MODE == 'transaction' and EVENT_STREAM_BACKEND == 'postgres' and not EVENT_STREAM_LISTEN_HOST:
+    raise ImproperlyConfigured(
+        "EVENT_STREAM_BACKEND=postgres needs a direct Postgres connection for LISTEN when "
+        "DB_POOLER_MODE=transaction: set EVENT_STREAM_LISTEN_HOST (and EVENT_STREAM_LISTEN_PORT) "
+        "or use EVENT_STREAM_BACKEND=redis"
+    )
+
+# Seconds clients may reuse lookup lists / the lookup bootstrap before revalidating
+# with If-None-Match (the ETag changes whenever a lookup model is saved)
+LOOKUPS_MAX_AGE = config('LOOKUPS_MAX_AGE', default=300, cast=int)
+
+# Request instrumentation (utils/instrumentation.py): Server-Timing headers, slow
+# request / suspected N+1 logging and per-endpoint metrics at /api/v1/admin/metrics/
+INSTRUMENTATION_ENABLED = config('INSTRUMENTATION_ENABLED', default=True, cast=bool)
+INSTRUMENTATION_SERVER_TIMING = config('INSTRUMENTATION_SERVER_TIMING', default=True, cast=bool)
+INSTRUMENTATION_SLOW_REQUEST_MS = config('INSTRUMENTATION_SLOW_REQUEST_MS', default=500, cast=int)
+# Same statement shape this many times in one request is logged as a suspected N+1
+INSTRUMENTATION_N_PLUS_ONE_THRESHOLD = config('INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', default=10, cast=int)
+# How often each worker publishes its histograms to the cache for the metrics endpoint
+INSTRUMENTATION_FLUSH_SECONDS = config('INSTRUMENTATION_FLUSH_SECONDS', default=10, cast=int)
+# Bearer token a Prometheus scraper can use instead of a staff JWT (empty disables)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Seconds to cache @mention autocomplete results per prefix (0 disables)
+MENTION_SEARCH_CACHE_TTL = config('MENTION_SEARCH_CACHE_TTL', default=30, cast=int)
+
+# Hub content search (hubs/content_search.py): auto | postgres | python
+# auto uses the tsvector/GIN index on PostgreSQL and the in-process inverted index elsewhere
+CONTENT_SEARCH_BACKEND = config('CONTENT_SEARCH_BACKEND', default='auto')
+
+# Material previews (hubs/material_previews.py): thumbnail widths rendered by the
+# process_material_previews worker; set MATERIAL_PREVIEW_EAGER=True to render
+# right after commit when no worker is running
+MATERIAL_PREVIEW_SIZES = [int(width) for width in config('MATERIAL_PREVIEW_SIZES', default='160,320,640').split(',')]
+MATERIAL_PREVIEW_EAGER = config('MATERIAL_PREVIEW_EAGER', default=False, cast=bool)
+MATERIAL_PREVIEW_MAX_ATTEMPTS = config('MATERIAL_PREVIEW_MAX_ATTEMPTS', default=3, cast=int)
+
+# Devices not seen for this many days are deactivated by compact_devices
+DEVICE_STALE_DAYS = config('DEVICE_STALE_DAYS', default=90, cast=int)
+
 
 SIMPLE_JWT = {
    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=config('ACCESS_TOKEN_LIFETIME', default=60, cast=int)),
@@ -238,6 +340,45 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Protected media (learning materials, generated and verification documents)
+# is served through short-lived signed URLs (utils.media_gateway). When nginx
+# fronts the app set MEDIA_ACCEL_REDIRECT_PREFIX=/protected-media/ so Django only
+# authorizes and nginx streams the file from an `internal` location.
+# Keep the nginx deny location (`location ~ ^/media/(...)/` in every nginx/*.conf)
+# in step with this list; hubs.tests checks that it does.
+PROTECTED_MEDIA_PREFIXES = [
+    'learning_materials/', 'generated_documents/', 'user_documents/', 'uploads/', 'disbursement_receipts/',
+    'document_batches/',
+]
+MEDIA_ACCEL_REDIRECT_PREFIX = config('MEDIA_ACCEL_REDIRECT_PREFIX', default='')
+MEDIA_SIGNED_URL_TTL = config('MEDIA_SIGNED_URL_TTL', default=3600, cast=int)
+# Record download counters off the request thread
+DOWNLOAD_COUNTERS_ASYNC = config('DOWNLOAD_COUNTERS_ASYNC', default=True, cast=bool)
+# Render disbursement receipts off the request thread once a disbursement completes/fails
+DISBURSEMENT_RECEIPTS_ASYNC = config('DISBURSEMENT_RECEIPTS_ASYNC', default=True, cast=bool)
+# Batch document generation (document_templates/batch_generation.py): batches
+# stay queued for the process_document_batches worker, which renders rows across
+# a process pool of DOCUMENT_BATCH_WORKERS. DOCUMENT_BATCH_IN_PROCESS renders on a
+# thread of the web process instead (local dev without the worker). Batches idle
+# for DOCUMENT_BATCH_STALE_SECONDS are re-queued by the worker
+DOCUMENT_BATCH_ASYNC = config('DOCUMENT_BATCH_ASYNC', default=True, cast=bool)
+DOCUMENT_BATCH_IN_PROCESS = config('DOCUMENT_BATCH_IN_PROCESS', default=False, cast=bool)
+DOCUMENT_BATCH_WORKERS = config('DOCUMENT_BATCH_WORKERS', default=4, cast=int)
+DOCUMENT_BATCH_MAX_ROWS = config('DOCUMENT_BATCH_MAX_ROWS', default=500, cast=int)
+DOCUMENT_BATCH_STALE_SECONDS = config('DOCUMENT_BATCH_STALE_SECONDS', default=900, cast=int)
+
+# Chunked uploads (uploads/sessions.py): partial files live in UPLOAD_TEMP_DIR
+# until complete; sessions expire UPLOAD_SESSION_TTL seconds after the last chunk.
+# Keep UPLOAD_TEMP_DIR outside MEDIA_ROOT so partial chunks are never served
+UPLOAD_TEMP_DIR = config('UPLOAD_TEMP_DIR', default=str(BASE_DIR / 'upload_tmp'))
+UPLOAD_CHUNK_MAX_SIZE = config('UPLOAD_CHUNK_MAX_SIZE', default=8 * 1024 * 1024, cast=int)
+UPLOAD_SESSION_TTL = config('UPLOAD_SESSION_TTL', default=24 * 3600, cast=int)
+
+STORAGES = {
+    "default": {"BACKEND": "utils.media_gateway.ProtectedMediaStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -247,6 +388,30 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = "authentication.PolaUser"
 
 
+# ==============================================================================
+# CACHE CONFIGURATION
+# ==============================================================================
+# Versioned snapshots (utils.versioned_cache) are invalidated through the cache.
+# Set CACHE_URL (e.g. redis://redis:6379/1) so all gunicorn workers share one
+# cache; without it each process keeps its own LocMem copy until it expires.
+CACHE_URL = config('CACHE_URL', default='')
+
+if CACHE_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+            'KEY_PREFIX': 'pola',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'pola-default',
+        }
+    }
+
 # ==============================================================================
 # AZAMPAY PAYMENT GATEWAY CONFIGURATION
 # ==============================================================================
@@ -273,36 +438,97 @@ AZAM_PAY_WEBHOOK_URL = config('AZAM_PAY_WEBHOOK_URL', default='http://localhost:
 # LOGGING CONFIGURATION
 # ==============================================================================
 
+# Records are handed to a background QueueListener (utils/structured_logging.py),
+# so request threads never block on console/file I/O. LOG_FORMAT=json writes one
+# JSON object per line; every record carries the request id (X-Request-ID).
+LOG_FORMAT = config('LOG_FORMAT', default='verbose')
+LOG_LEVEL = config('LOG_LEVEL', default='INFO')
+# Per-item DEBUG/INFO lines on hot paths: at most this many per message per second
+LOG_SAMPLE_BURST = config('LOG_SAMPLE_BURST', default=20, cast=int)
+# ...then this fraction of the rest (0 drops them; the next line reports how many)
+LOG_SAMPLE_RATE = config('LOG_SAMPLE_RATE', default=0.0, cast=float)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
+            'format': '{levelname} {asctime} {module} [{request_id}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'utils.structured_logging.JSONFormatter',
+        },
+    },
+    'filters': {
+        'request_id': {
+            '()': 'utils.structured_logging.RequestIdFilter',
+        },
+        'sampled': {
+            '()': 'utils.structured_logging.SampledFilter',
+            'burst': LOG_SAMPLE_BURST,
+            'rate': LOG_SAMPLE_RATE,
+        },
     },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
+            'formatter': LOG_FORMAT,
         },
         'file': {
             'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'azampay.log',
-            'formatter': 'verbose',
+            'formatter': LOG_FORMAT,
+        },
+        'queue': {
+            '()': 'utils.structured_logging.QueueingHandler',
+            'handlers': ['console'],
+            'filters': ['request_id'],
+        },
+        # Payment logs also go to logs/azampay.log (console via the root logger)
+        'queue_file': {
+            '()': 'utils.structured_logging.QueueingHandler',
+            'handlers': ['file'],
+            'filters': ['request_id'],
         },
     },
+    # Every module logs through the root logger's queue; the entries below
+    # only raise levels, add sampling or add the payment log file
+    'root': {
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
+    },
     'loggers': {
+        # Replaces Django's default console/mail_admins handlers
+        'django': {
+            'level': LOG_LEVEL,
+        },
         'subscriptions.azampay_integration': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue_file'],
             'level': 'INFO',
-            'propagate': False,
         },
         'subscriptions.webhook_views': {
-            'handlers': ['console', 'file'],
+            'handlers': ['queue_file'],
             'level': 'INFO',
-            'propagate': False,
+        },
+        'utils.instrumentation': {
+            'level': 'INFO',
+        },
+        'utils.db_routing': {
+            'level': 'INFO',
+        },
+        # Hot paths with per-professional / per-device lines
+        'authentication.nearby_views': {
+            'filters': ['sampled'],
+            'level': LOG_LEVEL,
+        },
+        'subscriptions.call_management_views': {
+            'filters': ['sampled'],
+            'level': LOG_LEVEL,
+        },
+        'notification.notification_service': {
+            'filters': ['sampled'],
+            'level': LOG_LEVEL,
         },
     },
 }
@@ -340,5 +566,12 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='polatanzania@gmail.com')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='vqnglfidgpfqezrx')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default='polatanzania@gmail.com')
 PASSWORD_RESET_OTP_TTL_MINUTES = config('PASSWORD_RESET_OTP_TTL_MINUTES', default=15, cast=int)
+
+# Email outbox (notification.email_outbox) - delivered by `manage.py process_email_outbox`
+# Set EMAIL_OUTBOX_EAGER=True to send right after commit when no worker is running
+EMAIL_OUTBOX_EAGER = config('EMAIL_OUTBOX_EAGER', default=False, cast=bool)
+EMAIL_OUTBOX_BATCH_SIZE = config('EMAIL_OUTBOX_BATCH_SIZE', default=50, cast=int)
+EMAIL_OUTBOX_RATE_LIMIT = config('EMAIL_OUTBOX_RATE_LIMIT', default=5, cast=float)
+EMAIL_OUTBOX_MAX_ATTEMPTS = config('EMAIL_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
 APP_NAME = config('APP_NAME', default='POLA')
 
@@ -13,6 +13,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import logging
+
 from django.contrib import admin
 from django.urls import path, include, re_path
 from django.conf import settings
@@ -22,16 +24,35 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 from subscriptions.webhook_views import azampay_webhook
+from utils.media_gateway import protected_media_download
+from utils.instrumentation import metrics_view
+from utils.db_connections import probe_databases
+
+logger = logging.getLogger(__name__)
 
 
 # Health check endpoint for Docker/Kubernetes
 def health_check(request):
-    """Simple health check endpoint for container orchestration."""
-    return JsonResponse({
+    """
+    Simple health check endpoint for container orchestration.
+    ?db=1 also checks every database alias (503 when the primary is down).
+    """
+    payload = {
         'status': 'healthy',
         'service': 'pola-backend',
         'version': settings.API_VERSION
-    })
+    }
+    if request.GET.get('db'):
+        healthy, results = probe_databases(reconnect=False)
+        # Unauthenticated endpoint: details (errors, timings) only go to the log
+        payload['databases'] = {alias: 'ok' if result['ok'] else 'fail' for alias, result in results.items()}
+        for alias, result in results.items():
+            if not result['ok']:
+                logger.warning(f"⚠️ Health check: database '{alias}' failed: {result['error']}")
+        if not healthy:
+            payload['status'] = 'unhealthy'
+            return JsonResponse(payload, status=503)
+    return JsonResponse(payload)
 
 API_VERSION = settings.API_VERSION
 
@@ -154,6 +175,12 @@ urlpatterns = [
     # Webhook endpoints (for external payment providers)
     path('webhooks/azampay/', azampay_webhook, name='azampay-webhook'),
     
+    # Signed downloads for protected media (learning materials, documents)
+    path(f"api/{API_VERSION}/media/download/<str:token>/", protected_media_download, name='protected-media-download'),
+    
+    # Per-endpoint latency / query metrics (Prometheus text format)
+    path(f"api/{API_VERSION}/admin/metrics/", metrics_view, name='admin-metrics'),
+    
     # Admin
     path('admin/', admin.site.urls),
     
@@ -173,6 +200,7 @@ urlpatterns = [
     path(f"api/{API_VERSION}/security/", include("authentication.device_urls")),  # Security & Device Tracking APIs
     path(f"api/{API_VERSION}/notifications/", include("notification.urls")),  # Notification APIs
     path(f"api/{API_VERSION}/notification/", include("notification.urls")),  # Notification APIs (singular alias)
+    path(f"api/{API_VERSION}/uploads/", include("uploads.urls")),  # Chunked, resumable uploads
     
     # API Documentation
     path('swagger<format>/', schema_view.without_ui(cache_timeout=0), name='schema-json'),
@@ -30,6 +30,7 @@ from .models import (
     
     # Payment Models (NEW)
     PaymentTransaction,
+    Entitlement,
     
     # Legacy Models (Keep for backward compatibility)
     ConsultationVoucher,
@@ -557,6 +558,22 @@ class PaymentTransactionAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Entitlement)
+class EntitlementAdmin(admin.ModelAdmin):
+    """Append-only ownership ledger (read-only)"""
+    list_display = ['user', 'resource_type', 'resource_id', 'label', 'amount', 'source', 'granted_at']
+    list_filter = ['resource_type', 'source']
+    search_fields = ['user__email', 'label', 'payment__payment_reference']
+    raw_id_fields = ['user', 'payment']
+    date_hierarchy = 'granted_at'
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 # ============================================================================
 # LEGACY MODELS ADMIN (Keep for backward compatibility)
 # ============================================================================
@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
 from django.utils import timezone
 from django.db.models import Sum, Count, Q, Avg
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek, TruncYear
 from datetime import timedelta
 from decimal import Decimal
 
@@ -21,10 +22,12 @@ from .models import (
 )
 from documents.models import LearningMaterial
 from authentication.models import PolaUser
+from utils.db_routing import read_only_replica
 
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@read_only_replica
 def dashboard_overview(request):
     """
     Main dashboard with key metrics
@@ -193,6 +196,7 @@ def dashboard_overview(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@read_only_replica
 def revenue_analytics(request):
     """
     Detailed revenue analytics
@@ -216,37 +220,45 @@ def revenue_analytics(request):
     payments = PaymentTransaction.objects.filter(
         status='completed',
         created_at__gte=start_date
-    ).order_by('created_at')
+    )
     
     if transaction_type:
         payments = payments.filter(transaction_type=transaction_type)
     
-    # Group by period
+    # Group by period and type in the database
+    trunc = {'weekly': TruncWeek, 'monthly': TruncMonth, 'yearly': TruncYear}.get(period, TruncDay)
+    rows = (
+        payments.annotate(bucket=trunc('created_at'))
+        .values('bucket', 'transaction_type')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by('bucket')
+    )
+    
     revenue_data = {}
-    for payment in payments:
+    for row in rows:
+        bucket = row['bucket']
         if period == 'weekly':
-            key = f"{payment.created_at.year}-W{payment.created_at.isocalendar()[1]}"
+            iso_year, iso_week, _ = bucket.isocalendar()
+            key = f"{iso_year}-W{iso_week}"
         elif period == 'monthly':
-            key = payment.created_at.strftime('%Y-%m')
+            key = bucket.strftime('%Y-%m')
         elif period == 'yearly':
-            key = str(payment.created_at.year)
+            key = str(bucket.year)
         else:  # daily
-            key = payment.created_at.strftime('%Y-%m-%d')
+            key = bucket.strftime('%Y-%m-%d')
         
         if key not in revenue_data:
             revenue_data[key] = {
                 'period': key,
                 'total_revenue': Decimal('0'),
-                'subscription': Decimal('0'),
-                'call_credit': Decimal('0'),
-                'physical_consultation': Decimal('0'),
-                'document_download': Decimal('0'),
+                **{choice: Decimal('0') for choice, _ in PaymentTransaction.TRANSACTION_TYPES},
                 'transaction_count': 0
             }
         
-        revenue_data[key]['total_revenue'] += payment.amount
-        revenue_data[key][payment.transaction_type] += payment.amount
-        revenue_data[key]['transaction_count'] += 1
+        entry = revenue_data[key]
+        entry['total_revenue'] += row['total']
+        entry[row['transaction_type']] = entry.get(row['transaction_type'], Decimal('0')) + row['total']
+        entry['transaction_count'] += row['count']
     
     return Response({
         'period': period,
@@ -257,6 +269,7 @@ def revenue_analytics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@read_only_replica
 def user_analytics(request):
     """
     User analytics and trends
@@ -340,6 +353,7 @@ def user_analytics(request):
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
+@read_only_replica
 def platform_health(request):
     """
     Platform health metrics
@@ -5,13 +5,18 @@ This module provides admin APIs for managing disbursements (payouts) to consulta
 Admins can initiate payouts through AzamPay, track disbursement status, and view earnings.
 """
 
-from rest_framework import viewsets, status
+from rest_framework import renderers, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAdminUser
+from rest_framework.settings import api_settings
 from django.db.models import Q, Sum, Count, Case, When, DecimalField, Value
+from django.http import HttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.http import content_disposition_header, quote_etag
 from decimal import Decimal
+import base64
 
 from .models import (
     Disbursement,
@@ -28,7 +33,39 @@ from .serializers import (
 )
 from .azampay_integration import azampay_client, AzamPayError
 from authentication.models import PolaUser
-from .disbursement_pdf_generator import DisbursementPDFGenerator
+from .disbursement_pdf_generator import RECEIPT_MIMETYPES, DisbursementPDFGenerator
+from .disbursement_receipts import receipt_for
+from utils.conditional import not_modified_response, with_cache_headers
+from utils.db_routing import read_only_replica
+
+
+class _ReceiptFileRenderer(renderers.BaseRenderer):
+    """Lets receipt downloads negotiate raw file types; the view returns the bytes itself"""
+    format = 'file'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Errors and 304s still go through Response
+        return renderers.JSONRenderer().render(data)
+
+
+class PDFReceiptRenderer(_ReceiptFileRenderer):
+    media_type = RECEIPT_MIMETYPES['pdf']
+
+
+class ExcelReceiptRenderer(_ReceiptFileRenderer):
+    media_type = RECEIPT_MIMETYPES['excel']
+
+
+class OctetStreamReceiptRenderer(_ReceiptFileRenderer):
+    media_type = 'application/octet-stream'
+
+
+RECEIPT_RENDERERS = api_settings.DEFAULT_RENDERER_CLASSES + [
+    PDFReceiptRenderer, ExcelReceiptRenderer, OctetStreamReceiptRenderer
+]
 
 
 class AdminDisbursementViewSet(viewsets.ModelViewSet):
@@ -418,28 +455,36 @@ class AdminDisbursementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
     
-    @action(detail=True, methods=['get'], url_path='download-pdf', url_name='download-pdf')
+    @action(detail=True, methods=['get'], url_path='download-pdf', url_name='download-pdf',
+            renderer_classes=RECEIPT_RENDERERS)
     def download_pdf(self, request, pk=None):
-        """Generate and download disbursement receipt as PDF"""
-        return self._generate_receipt(pk, 'pdf')
+        """Download the disbursement receipt as PDF (raw bytes with Accept: application/pdf)"""
+        return self._generate_receipt(request, pk, 'pdf')
     
-    @action(detail=True, methods=['get'], url_path='download-excel', url_name='download-excel')
+    @action(detail=True, methods=['get'], url_path='download-excel', url_name='download-excel',
+            renderer_classes=RECEIPT_RENDERERS)
     def download_excel_receipt(self, request, pk=None):
-        """Generate and download disbursement receipt as Excel"""
-        return self._generate_receipt(pk, 'excel')
+        """Download the disbursement receipt as Excel (raw bytes with Accept: the xlsx type)"""
+        return self._generate_receipt(request, pk, 'excel')
     
-    def _generate_receipt(self, pk, format_type):
-        """Internal method to generate receipts"""
+    def _generate_receipt(self, request, pk, format_type):
+        """
+        Serve a receipt. Terminal disbursements use the stored receipt (ETag is
+        its SHA-256 plus the representation, so repeat downloads get 304);
+        others are rendered per request.
+        
+        Clients that send ``Accept: <receipt mimetype>`` or
+        ``application/octet-stream`` get the file itself; others get the
+        original JSON envelope with base64 content.
+        """
         import logging
         logger = logging.getLogger(__name__)
-        logger.info(f"Generating {format_type} receipt for disbursement pk={pk}")
         
         # Fetch directly from database, bypassing get_queryset filters
         try:
             disbursement = Disbursement.objects.select_related('recipient').prefetch_related(
                 'consultant_earnings', 'uploader_earnings'
             ).get(pk=pk)
-            logger.info(f"Found disbursement: {disbursement.id}")
         except Disbursement.DoesNotExist:
             logger.error(f"Disbursement {pk} not found in database")
             return Response(
@@ -447,35 +492,55 @@ class AdminDisbursementViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
+        mimetype = RECEIPT_MIMETYPES[format_type]
+        # The raw file and the JSON envelope are different bodies: each gets its own ETag
+        raw = isinstance(request.accepted_renderer, _ReceiptFileRenderer)
         try:
-            if format_type == 'excel':
-                document_data = DisbursementPDFGenerator.generate_excel(disbursement)
-                base64_key = 'excel_base64'
+            receipt = receipt_for(disbursement, format_type)
+            if receipt is not None:
+                etag = quote_etag(f"{receipt.sha256}-{'raw' if raw else 'json'}")
+                cached = not_modified_response(request, etag)
+                if cached:
+                    patch_vary_headers(cached, ['Accept'])
+                    return cached
+                with receipt.file.open('rb') as fh:
+                    content = fh.read()
+                filename = DisbursementPDFGenerator.receipt_filename(disbursement, format_type, receipt.generated_at)
             else:
-                document_data = DisbursementPDFGenerator.generate_pdf(disbursement)
-                base64_key = 'pdf_base64'
-            
-            return Response({
+                logger.info(f"Rendering {format_type} receipt for {disbursement.status} disbursement pk={pk}")
+                etag = None
+                content = DisbursementPDFGenerator.render_bytes(disbursement, format_type)
+                filename = DisbursementPDFGenerator.receipt_filename(disbursement, format_type)
+        except Exception as e:
+            logger.exception(f"Error generating {format_type} receipt")
+            return Response(
+                {'error': f'Failed to generate receipt: {str(e)}'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+        
+        if raw:
+            response = HttpResponse(content, content_type=mimetype)
+            response['Content-Disposition'] = content_disposition_header(True, filename)
+        else:
+            response = Response({
                 'success': True,
                 'document': {
-                    'base64': document_data[base64_key],
-                    'filename': document_data['filename'],
-                    'size_bytes': document_data['size_bytes'],
-                    'mimetype': document_data['mimetype']
+                    'base64': base64.b64encode(content).decode('utf-8'),
+                    'filename': filename,
+                    'size_bytes': len(content),
+                    'mimetype': mimetype
                 },
                 'disbursement_id': disbursement.id,
                 'external_reference': disbursement.external_reference,
                 'format': format_type
             })
-        
-        except Exception as e:
-            logger.exception(f"Error generating {format_type} receipt")
-            return Response(
-                {'error': f'Failed to generate receipt: {str(e)}'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        patch_vary_headers(response, ['Accept'])
+        if etag:
+            with_cache_headers(response, etag)
+        return response
     
     @action(detail=False, methods=['get'])
+    @read_only_replica
     def export_excel(self, request):
         """
         Export disbursements to Excel with flexible filtering
@@ -590,6 +655,7 @@ class AdminDisbursementViewSet(viewsets.ModelViewSet):
         })
     
     @action(detail=False, methods=['get'])
+    @read_only_replica
     def statistics(self, request):
         """Get disbursement statistics"""
         queryset = self.get_queryset()
@@ -9,7 +9,7 @@ from .models import PaymentTransaction, UploaderEarnings
 from authentication.models import PolaUser
 from django.db.models import Sum, Count, Q, Avg
 from decimal import Decimal
-from utils.base64_fields import Base64AnyFileField
+from uploads.fields import UploadSessionFileField
 
 
 class UploaderUserSerializer(serializers.ModelSerializer):
@@ -45,13 +45,13 @@ class LearningMaterialAdminSerializer(serializers.ModelSerializer):
     file_size_mb = serializers.SerializerMethodField()
     file_url = serializers.SerializerMethodField()  # Add absolute URL field
     
-    # Support Base64 file uploads
-    file = Base64AnyFileField(
+    # Support chunked upload ids and Base64 file uploads
+    file = UploadSessionFileField(
         required=False,
         allow_null=True,
         max_file_size=50 * 1024 * 1024,  # 50MB max for learning materials
         allowed_types=['pdf', 'doc', 'docx', 'png', 'jpg', 'jpeg'],
-        help_text="Upload file as Base64 data URL or multipart file"
+        help_text="Upload session id, Base64 data URL or multipart file"
     )
     
     class Meta:
@@ -14,7 +14,7 @@ import logging
 
 from .models import CallSession, UserCallCredit
 from authentication.models import PolaUser
-from authentication.device_models import UserDevice
+from authentication.device_registry import invalid_token_batch, push_devices
 from notification.models import UserOnlineStatus
 from notification.google_firebase_service.push_notification.auth_api import GoogleAuth
 from notification.google_firebase_service.push_notification.fcm_api import FCM
@@ -48,17 +48,13 @@ class CallManagementViewSet(viewsets.ViewSet):
             "call_type": "voice"  # or "video"
         }
         """
-        logger.info("🔥 INITIATE METHOD CALLED IN CallManagementViewSet")
         user = request.user
         consultant_id = request.data.get('consultant_id')
         channel_name = request.data.get('channel_name')
         call_type = request.data.get('call_type', 'voice')
         
-        # DEBUG: Log all received data
-        logger.info(f"📥 Request from: {user.email} (User ID: {user.id})")
-        logger.info(f"📥 consultant_id received: {consultant_id} (type: {type(consultant_id).__name__})")
-        logger.info(f"📥 channel_name: {channel_name}")
-        logger.info(f"📥 call_type: {call_type}")
+        logger.debug("📥 Initiate from user %s: consultant_id=%r channel=%s call_type=%s",
+                     user.id, consultant_id, channel_name, call_type)
         
         # Validation
         if not consultant_id:
@@ -75,10 +71,10 @@ class CallManagementViewSet(viewsets.ViewSet):
         # Get consultant (consultant_id is the ConsultantProfile ID)
         try:
             from .models import ConsultantProfile
-            logger.info(f"🔍 Looking for ConsultantProfile with ID: {consultant_id}")
+            logger.debug("🔍 Looking for ConsultantProfile with ID: %s", consultant_id)
             consultant_profile = ConsultantProfile.objects.get(id=consultant_id)
             consultant = consultant_profile.user
-            logger.info(f"✅ Found consultant: {consultant.email} (User ID: {consultant.id})")
+            logger.debug("✅ Found consultant: user %s", consultant.id)
         except ConsultantProfile.DoesNotExist:
             logger.error(f"❌ ConsultantProfile with ID {consultant_id} NOT FOUND")
             return Response({
@@ -148,36 +144,12 @@ class CallManagementViewSet(viewsets.ViewSet):
             logger.info(f"📞 Call initiated: {user.email} → {consultant.email} (Call ID: {call_session.id})")
             logger.info(f"📺 Channel: {channel_name}")
         
-        # DEBUG: Log consultant info
-        logger.info(f"🔍 Looking for devices for consultant: {consultant.email} (User ID: {consultant.id})")
-        
-        # DEBUG: Check ALL devices for this consultant
-        all_devices = UserDevice.objects.filter(user=consultant)
-        logger.info(f"🔍 Total devices for consultant: {all_devices.count()}")
-        for d in all_devices:
-            logger.info(f"   Device {d.id}: {d.device_name} | active={d.is_active} | current={d.is_current_device} | fcm_token={bool(d.fcm_token)}")
-        
         # Get consultant's devices with FCM token
-        # First try current device, then fall back to any active device
-        consultant_devices = UserDevice.objects.filter(
-            user=consultant,
-            is_current_device=True,
-            is_active=True,
-            fcm_token__isnull=False
-        ).exclude(fcm_token='')
-        
-        logger.info(f"🔍 Devices with current=True, active=True, fcm_token: {consultant_devices.count()}")
-        
-        # If no current device, try any active device with FCM token
-        if not consultant_devices.exists():
-            consultant_devices = UserDevice.objects.filter(
-                user=consultant,
-                is_active=True,
-                fcm_token__isnull=False
-            ).exclude(fcm_token='').order_by('-last_seen')
-            logger.info(f"🔍 Fallback - Devices with active=True, fcm_token: {consultant_devices.count()}")
-        
-        if not consultant_devices.exists():
+        # Current device first, falling back to any active device
+        consultant_devices = push_devices([consultant.id], fallback_to_active=True)
+        logger.info("🔍 Devices to notify for consultant %s: %s", consultant.id, len(consultant_devices))
+        
+        if not consultant_devices:
             call_session.status = 'cancelled'
             call_session.save()
             logger.warning(f"⚠️ Consultant {consultant.email} has no devices with FCM tokens")
@@ -189,42 +161,43 @@ class CallManagementViewSet(viewsets.ViewSet):
         # Send FCM notifications to all consultant devices
         successful_notifications = 0
         
-        for device in consultant_devices:
-            try:
-                # Get FCM access token (auto-reads project_id from service account file)
-                google_auth = GoogleAuth()
-                access_token = google_auth.get_access_token()
-                project_id = google_auth.get_project_id()
-                
-                # Send notification
-                fcm = FCM(project_id, access_token)
-                caller_phone = ''
+        with invalid_token_batch():
+            for device in consultant_devices:
                 try:
-                    caller_phone = user.contact.phone_number or ''
-                except Exception:
-                    pass
-                call_data = {
-                    'call_id': call_session.id,
-                    'channel_name': channel_name,
-                    'caller_id': user.id,
-                    'caller_name': user.get_full_name() or user.email,
-                    'caller_photo': user.profile_picture.url if hasattr(user, 'profile_picture') and user.profile_picture else '',
-                    'caller_phone': caller_phone,
-                    'call_type': call_type,
-                    'timestamp': int(timezone.now().timestamp() * 1000)
-                }
+                    # Get FCM access token (auto-reads project_id from service account file)
+                    google_auth = GoogleAuth()
+                    access_token = google_auth.get_access_token()
+                    project_id = google_auth.get_project_id()
                 
-                status_code, response = fcm.send_call_notification(device.fcm_token, call_data)
+                    # Send notification
+                    fcm = FCM(project_id, access_token)
+                    caller_phone = ''
+                    try:
+                        caller_phone = user.contact.phone_number or ''
+                    except Exception:
+                        pass
+                    call_data = {
+                        'call_id': call_session.id,
+                        'channel_name': channel_name,
+                        'caller_id': user.id,
+                        'caller_name': user.get_full_name() or user.email,
+                        'caller_photo': user.profile_picture.url if hasattr(user, 'profile_picture') and user.profile_picture else '',
+                        'caller_phone': caller_phone,
+                        'call_type': call_type,
+                        'timestamp': int(timezone.now().timestamp() * 1000)
+                    }
                 
-                if status_code == 200:
-                    successful_notifications += 1
-                    logger.info(f"✅ FCM sent to device: {device.device_name or device.device_id[:8]}")
-                else:
-                    logger.error(f"❌ FCM failed for device {device.id}: {response}")
+                    status_code, response = fcm.send_call_notification(device.fcm_token, call_data)
+                
+                    if status_code == 200:
+                        successful_notifications += 1
+                        logger.debug("✅ FCM sent to device %s", device.id)
+                    else:
+                        logger.error("❌ FCM failed for device %s: %s", device.id, response)
             
-            except Exception as e:
-                logger.error(f"❌ Error sending FCM to device {device.id}: {str(e)}")
-                continue
+                except Exception as e:
+                    logger.error("❌ Error sending FCM to device %s: %s", device.id, e)
+                    continue
         
         if successful_notifications == 0:
             return Response({
@@ -281,13 +254,9 @@ class CallManagementViewSet(viewsets.ViewSet):
         
         # Send notification to caller (call accepted)
         try:
-            caller_devices = UserDevice.objects.filter(
-                user=call_session.caller,
-                is_active=True,
-                fcm_token__isnull=False
-            ).exclude(fcm_token='')
+            caller_devices = push_devices([call_session.caller.id], fallback_to_active=True)
             
-            if caller_devices.exists():
+            if caller_devices:
                 google_auth = GoogleAuth()
                 access_token = google_auth.get_access_token()
                 project_id = google_auth.get_project_id()
@@ -299,11 +268,12 @@ class CallManagementViewSet(viewsets.ViewSet):
                     'message': 'Call accepted. Join the channel.'
                 }
                 
-                for device in caller_devices:
-                    try:
-                        fcm.send_call_status_notification(device.fcm_token, status_data)
-                    except Exception as e:
-                        logger.error(f"Error sending acceptance notification: {e}")
+                with invalid_token_batch():
+                    for device in caller_devices:
+                        try:
+                            fcm.send_call_status_notification(device.fcm_token, status_data)
+                        except Exception as e:
+                            logger.error(f"Error sending acceptance notification: {e}")
         
         except Exception as e:
             logger.error(f"Error notifying caller of acceptance: {e}")
@@ -363,13 +333,9 @@ class CallManagementViewSet(viewsets.ViewSet):
         
         # Send notification to caller (call rejected)
         try:
-            caller_devices = UserDevice.objects.filter(
-                user=call_session.caller,
-                is_active=True,
-                fcm_token__isnull=False
-            ).exclude(fcm_token='')
+            caller_devices = push_devices([call_session.caller.id], fallback_to_active=True)
             
-            if caller_devices.exists():
+            if caller_devices:
                 google_auth = GoogleAuth()
                 access_token = google_auth.get_access_token()
                 project_id = google_auth.get_project_id()
@@ -381,11 +347,12 @@ class CallManagementViewSet(viewsets.ViewSet):
                     'message': f'Call {reason}'
                 }
                 
-                for device in caller_devices:
-                    try:
-                        fcm.send_call_status_notification(device.fcm_token, status_data)
-                    except Exception as e:
-                        logger.error(f"Error sending rejection notification: {e}")
+                with invalid_token_batch():
+                    for device in caller_devices:
+                        try:
+                            fcm.send_call_status_notification(device.fcm_token, status_data)
+                        except Exception as e:
+                            logger.error(f"Error sending rejection notification: {e}")
         
         except Exception as e:
             logger.error(f"Error notifying caller of rejection: {e}")
@@ -449,13 +416,9 @@ class CallManagementViewSet(viewsets.ViewSet):
         # Send notification to the other participant (call ended)
         other_user = call_session.consultant if call_session.caller == request.user else call_session.caller
         try:
-            other_devices = UserDevice.objects.filter(
-                user=other_user,
-                is_active=True,
-                fcm_token__isnull=False
-            ).exclude(fcm_token='')
+            other_devices = push_devices([other_user.id], fallback_to_active=True)
             
-            if other_devices.exists():
+            if other_devices:
                 google_auth = GoogleAuth()
                 access_token = google_auth.get_access_token()
                 project_id = google_auth.get_project_id()
@@ -469,12 +432,13 @@ class CallManagementViewSet(viewsets.ViewSet):
                     'duration_minutes': call_session.duration_minutes
                 }
                 
-                for device in other_devices:
-                    try:
-                        fcm.send_call_status_notification(device.fcm_token, status_data)
-                        logger.info(f"📲 Call end notification sent to {other_user.email}")
-                    except Exception as e:
-                        logger.error(f"Error sending call end notification: {e}")
+                with invalid_token_batch():
+                    for device in other_devices:
+                        try:
+                            fcm.send_call_status_notification(device.fcm_token, status_data)
+                            logger.info(f"📲 Call end notification sent to {other_user.email}")
+                        except Exception as e:
+                            logger.error(f"Error sending call end notification: {e}")
         
         except Exception as e:
             logger.error(f"Error notifying other participant of call end: {e}")
@@ -521,13 +485,9 @@ class CallManagementViewSet(viewsets.ViewSet):
         
         # Send missed call notification to consultant
         try:
-            consultant_devices = UserDevice.objects.filter(
-                user=call_session.consultant,
-                is_active=True,
-                fcm_token__isnull=False
-            ).exclude(fcm_token='')
+            consultant_devices = push_devices([call_session.consultant.id], fallback_to_active=True)
             
-            if consultant_devices.exists():
+            if consultant_devices:
                 google_auth = GoogleAuth()
                 access_token = google_auth.get_access_token()
                 project_id = google_auth.get_project_id()
@@ -539,11 +499,12 @@ class CallManagementViewSet(viewsets.ViewSet):
                     'message': f'You missed a call from {call_session.caller.get_full_name() or call_session.caller.email}'
                 }
                 
-                for device in consultant_devices:
-                    try:
-                        fcm.send_call_status_notification(device.fcm_token, status_data)
-                    except Exception as e:
-                        logger.error(f"Error sending missed call notification: {e}")
+                with invalid_token_batch():
+                    for device in consultant_devices:
+                        try:
+                            fcm.send_call_status_notification(device.fcm_token, status_data)
+                        except Exception as e:
+                            logger.error(f"Error sending missed call notification: {e}")
         
         except Exception as e:
             logger.error(f"Error notifying consultant of missed call: {e}")
@@ -584,13 +545,9 @@ class CallManagementViewSet(viewsets.ViewSet):
         
         # Send cancellation notification to consultant
         try:
-            consultant_devices = UserDevice.objects.filter(
-                user=call_session.consultant,
-                is_active=True,
-                fcm_token__isnull=False
-            ).exclude(fcm_token='')
+            consultant_devices = push_devices([call_session.consultant.id], fallback_to_active=True)
             
-            if consultant_devices.exists():
+            if consultant_devices:
                 google_auth = GoogleAuth()
                 access_token = google_auth.get_access_token()
                 project_id = google_auth.get_project_id()
@@ -602,11 +559,12 @@ class CallManagementViewSet(viewsets.ViewSet):
                     'message': f'{call_session.caller.get_full_name() or call_session.caller.email} cancelled the call'
                 }
                 
-                for device in consultant_devices:
-                    try:
-                        fcm.send_call_status_notification(device.fcm_token, status_data)
-                    except Exception as e:
-                        logger.error(f"Error sending call cancelled notification: {e}")
+                with invalid_token_batch():
+                    for device in consultant_devices:
+                        try:
+                            fcm.send_call_status_notification(device.fcm_token, status_data)
+                        except Exception as e:
+                            logger.error(f"Error sending call cancelled notification: {e}")
         
         except Exception as e:
             logger.error(f"Error notifying consultant of cancelled call: {e}")
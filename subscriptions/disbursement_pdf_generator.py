@@ -2,6 +2,9 @@
 Disbursement PDF Generator
 
 Generates professional PDF receipts for disbursements that can be downloaded by admins.
+Terminal disbursements keep the rendered bytes (subscriptions.disbursement_receipts);
+bump RECEIPT_TEMPLATE_VERSION when the layout below changes so stored receipts are
+re-rendered by `python manage.py regenerate_disbursement_receipts`.
 """
 
 import base64
@@ -12,38 +15,48 @@ from xhtml2pdf import pisa
 from django.template.loader import render_to_string
 from django.utils import timezone
 
+RECEIPT_TEMPLATE_VERSION = 1
+
+RECEIPT_MIMETYPES = {
+    'pdf': 'application/pdf',
+    'excel': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+RECEIPT_EXTENSIONS = {'pdf': 'pdf', 'excel': 'xlsx'}
+
 
 class DisbursementPDFGenerator:
     """Generate PDF receipts for disbursements"""
     
     @staticmethod
-    def generate_pdf(disbursement):
-        """
-        Generate a PDF receipt for a disbursement
-        
-        Args:
-            disbursement: Disbursement model instance
-            
-        Returns:
-            dict: {
-                'pdf_base64': str,  # Base64 encoded PDF
-                'filename': str,    # Suggested filename
-                'size_bytes': int   # File size in bytes
-            }
-        """
-        # Prepare data for template
+    def receipt_filename(disbursement, format_type, generated_at=None):
+        """Suggested download name, dated by when the receipt was rendered"""
+        generated_at = generated_at or datetime.now()
+        return (
+            f"disbursement_{disbursement.external_reference}_{generated_at.strftime('%Y%m%d')}"
+            f".{RECEIPT_EXTENSIONS[format_type]}"
+        )
+    
+    @staticmethod
+    def render_bytes(disbursement, format_type, generated_at=None):
+        """Render a receipt ('pdf' or 'excel') to raw bytes"""
+        if format_type == 'excel':
+            return DisbursementPDFGenerator.render_excel_bytes(disbursement)
+        return DisbursementPDFGenerator.render_pdf_bytes(disbursement, generated_at)
+    
+    @staticmethod
+    def render_pdf_bytes(disbursement, generated_at=None):
+        """Render the PDF receipt to raw bytes"""
+        # Evaluate each relation once (uses prefetched rows when available)
+        consultant_earnings = list(disbursement.consultant_earnings.all())
+        uploader_earnings = list(disbursement.uploader_earnings.all())
         context = {
             'disbursement': disbursement,
             'recipient': disbursement.recipient,
-            'generated_at': timezone.now(),
-            'consultant_earnings': disbursement.consultant_earnings.all(),
-            'uploader_earnings': disbursement.uploader_earnings.all(),
-            'total_consultant_earnings': sum(
-                e.net_earnings for e in disbursement.consultant_earnings.all()
-            ),
-            'total_uploader_earnings': sum(
-                e.net_earnings for e in disbursement.uploader_earnings.all()
-            ),
+            'generated_at': generated_at or timezone.now(),
+            'consultant_earnings': consultant_earnings,
+            'uploader_earnings': uploader_earnings,
+            'total_consultant_earnings': sum(e.net_earnings for e in consultant_earnings),
+            'total_uploader_earnings': sum(e.net_earnings for e in uploader_earnings),
         }
         
         # Render HTML template
@@ -60,21 +73,32 @@ class DisbursementPDFGenerator:
         if pisa_status.err:
             raise Exception(f"PDF generation failed with error code: {pisa_status.err}")
         
-        # Get PDF bytes
         pdf_bytes = pdf_buffer.getvalue()
         pdf_buffer.close()
+        return pdf_bytes
+    
+    @staticmethod
+    def generate_pdf(disbursement):
+        """
+        Generate a PDF receipt for a disbursement
         
-        # Encode to base64
-        pdf_base64 = base64.b64encode(pdf_bytes).decode('utf-8')
-        
-        # Generate filename
-        filename = f"disbursement_{disbursement.external_reference}_{datetime.now().strftime('%Y%m%d')}.pdf"
+        Args:
+            disbursement: Disbursement model instance
+            
+        Returns:
+            dict: {
+                'pdf_base64': str,  # Base64 encoded PDF
+                'filename': str,    # Suggested filename
+                'size_bytes': int   # File size in bytes
+            }
+        """
+        pdf_bytes = DisbursementPDFGenerator.render_pdf_bytes(disbursement)
         
         return {
-            'pdf_base64': pdf_base64,
-            'filename': filename,
+            'pdf_base64': base64.b64encode(pdf_bytes).decode('utf-8'),
+            'filename': DisbursementPDFGenerator.receipt_filename(disbursement, 'pdf'),
             'size_bytes': len(pdf_bytes),
-            'mimetype': 'application/pdf'
+            'mimetype': RECEIPT_MIMETYPES['pdf']
         }
     
     @staticmethod
@@ -313,7 +337,6 @@ class DisbursementPDFGenerator:
             """
             
             for earning in uploader_earnings:
-                material_name = earning.material.title if earning.material else 'Document Template'
                 html += f"""
                     <tr>
                         <td>{earning.created_at.strftime('%Y-%m-%d')}</td>
@@ -373,6 +396,18 @@ class DisbursementPDFGenerator:
                 'size_bytes': int     # File size in bytes
             }
         """
+        excel_bytes = DisbursementPDFGenerator.render_excel_bytes(disbursement)
+        
+        return {
+            'excel_base64': base64.b64encode(excel_bytes).decode('utf-8'),
+            'filename': DisbursementPDFGenerator.receipt_filename(disbursement, 'excel'),
+            'size_bytes': len(excel_bytes),
+            'mimetype': RECEIPT_MIMETYPES['excel']
+        }
+    
+    @staticmethod
+    def render_excel_bytes(disbursement):
+        """Render the Excel receipt to raw bytes"""
         from openpyxl import Workbook
         from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
         
@@ -491,19 +526,7 @@ class DisbursementPDFGenerator:
         wb.save(excel_buffer)
         excel_bytes = excel_buffer.getvalue()
         excel_buffer.close()
-        
-        # Encode to base64
-        excel_base64 = base64.b64encode(excel_bytes).decode('utf-8')
-        
-        # Generate filename
-        filename = f"disbursement_{disbursement.external_reference}_{datetime.now().strftime('%Y%m%d')}.xlsx"
-        
-        return {
-            'excel_base64': excel_base64,
-            'filename': filename,
-            'size_bytes': len(excel_bytes),
-            'mimetype': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        }
+        return excel_bytes
     
     @staticmethod
     def generate_bulk_excel(disbursements_queryset, title="Disbursements Report"):
@@ -0,0 +1,232 @@
+"""
+Disbursement Receipts
+
+A disbursement in a terminal state (completed, failed, cancelled) no longer
+changes, so its PDF and Excel receipts are rendered once and stored
+(DisbursementReceipt) instead of being re-rendered and base64-encoded on
+every download. A retried failure renders again when its status changes.
+
+    schedule_receipts(id)   called by Disbursement.mark_completed/mark_failed;
+                            renders after commit on a background thread
+                            (DISBURSEMENT_RECEIPTS_ASYNC) or inline
+    receipt_for(d, fmt)     the stored receipt of a terminal disbursement,
+                            rendered on first use if it is missing or stale
+    regenerate_receipts()   re-render receipts from older template versions
+                            across a process pool (management command
+                            ``regenerate_disbursement_receipts``)
+
+Stored files are named by their SHA-256, which is also the download ETag.
+Disbursements that are still pending or processing are rendered per request.
+"""
+
+import hashlib
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .disbursement_pdf_generator import RECEIPT_EXTENSIONS, RECEIPT_TEMPLATE_VERSION, DisbursementPDFGenerator
+from .models import Disbursement, DisbursementReceipt
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+FORMATS = ('pdf', 'excel')
+
+
+def is_terminal(disbursement):
+    return disbursement.status in TERMINAL_STATUSES
+
+
+def _load(disbursement_id):
+    return Disbursement.objects.select_related('recipient').prefetch_related(
+        'consultant_earnings', 'uploader_earnings'
+    ).get(pk=disbursement_id)
+
+
+def store_receipt(disbursement, format_type):
+    """Render one receipt, store it under its content hash and record it"""
+    generated_at = timezone.now()
+    content = DisbursementPDFGenerator.render_bytes(disbursement, format_type, generated_at)
+    sha256 = hashlib.sha256(content).hexdigest()
+    name = default_storage.save(
+        f'disbursement_receipts/{disbursement.external_reference}/{sha256[:16]}.{RECEIPT_EXTENSIONS[format_type]}',
+        ContentFile(content),
+    )
+
+    previous = DisbursementReceipt.objects.filter(disbursement=disbursement, format=format_type).first()
+    receipt, _ = DisbursementReceipt.objects.update_or_create(
+        disbursement=disbursement, format=format_type,
+        defaults={
+            'file': name,
+            'sha256': sha256,
+            'size_bytes': len(content),
+            'template_version': RECEIPT_TEMPLATE_VERSION,
+            'disbursement_status': disbursement.status,
+            'generated_at': generated_at,
+        },
+    )
+    if previous is not None and previous.file.name != name:
+        default_storage.delete(previous.file.name)
+    return receipt
+
+
+def store_receipts(disbursement_id, formats=FORMATS):
+    """
+    Render and store the receipts of a terminal disbursement.
+
+    Returns:
+        int: receipts stored (0 if the disbursement is not terminal)
+    """
+    disbursement = _load(disbursement_id)
+    if not is_terminal(disbursement):
+        return 0
+    for format_type in formats:
+        store_receipt(disbursement, format_type)
+    return len(formats)
+
+
+def _is_current(receipt, disbursement):
+    return (
+        receipt.template_version == RECEIPT_TEMPLATE_VERSION
+        and receipt.disbursement_status == disbursement.status
+    )
+
+
+def receipt_for(disbursement, format_type):
+    """
+    The stored receipt of a terminal disbursement, rendering it on first use.
+
+    Returns:
+        DisbursementReceipt or None for disbursements that can still change
+    """
+    if not is_terminal(disbursement):
+        return None
+    receipt = DisbursementReceipt.objects.filter(disbursement=disbursement, format=format_type).first()
+    if receipt is None or not _is_current(receipt, disbursement):
+        receipt = store_receipt(disbursement, format_type)
+    return receipt
+
+
+# ---------------------------------------------------------------------------
+# Rendering after a status change
+# ---------------------------------------------------------------------------
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='disbursement-receipts')
+        return _executor
+
+
+def _store_safely(disbursement_id):
+    try:
+        store_receipts(disbursement_id)
+    except Exception as e:
+        # Downloads render on demand, so a failure here only costs latency
+        logger.error(f"❌ Failed to render receipts for disbursement {disbursement_id}: {e}")
+
+
+def _store_in_background(disbursement_id):
+    try:
+        _store_safely(disbursement_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_receipts(disbursement_id):
+    """Render a disbursement's receipts once the status change commits"""
+    if not getattr(settings, 'DISBURSEMENT_RECEIPTS_ASYNC', True):
+        transaction.on_commit(lambda: _store_safely(disbursement_id))
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_store_in_background, disbursement_id))
+
+
+# ---------------------------------------------------------------------------
+# Batch regeneration
+# ---------------------------------------------------------------------------
+
+def stale_disbursement_ids(include_current=False):
+    """Terminal disbursements missing a receipt or holding one from an older template"""
+    terminal = Disbursement.objects.filter(status__in=TERMINAL_STATUSES)
+    if include_current:
+        return list(terminal.order_by('pk').values_list('pk', flat=True))
+    current = DisbursementReceipt.objects.filter(template_version=RECEIPT_TEMPLATE_VERSION)
+    complete = (
+        current.values('disbursement_id').order_by()
+        .annotate(formats=Count('pk')).filter(formats=len(FORMATS))
+        .values_list('disbursement_id', flat=True)
+    )
+    return list(terminal.exclude(pk__in=complete).order_by('pk').values_list('pk', flat=True))
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _regenerate_chunk(disbursement_ids):
+    """Returns (rendered ids, {id: error})"""
+    done, errors = [], {}
+    for disbursement_id in disbursement_ids:
+        try:
+            store_receipts(disbursement_id)
+            done.append(disbursement_id)
+        except Exception as e:
+            errors[disbursement_id] = str(e)
+    return done, errors
+
+
+def _regenerate_chunk_in_worker(disbursement_ids):
+    """Process-pool task"""
+    try:
+        return _regenerate_chunk(disbursement_ids)
+    finally:
+        connections.close_all()
+
+
+def regenerate_receipts(disbursement_ids, workers=None, chunk_size=20, progress=None):
+    """
+    Re-render receipts for ``disbursement_ids``.
+
+    PDF rendering is CPU-bound, so chunks of ids are spread over a process
+    pool; each worker opens its own database connection. ``workers=1`` runs
+    in-process.
+
+    Returns:
+        tuple: (rendered count, {disbursement id: error})
+    """
+    chunks = [disbursement_ids[i:i + chunk_size] for i in range(0, len(disbursement_ids), chunk_size)]
+    rendered, errors = 0, {}
+
+    def collect(result):
+        nonlocal rendered
+        done, failed = result
+        rendered += len(done)
+        errors.update(failed)
+        if progress:
+            progress(rendered, len(disbursement_ids))
+
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            collect(_regenerate_chunk(chunk))
+        return rendered, errors
+
+    # Forked workers must not share the parent's database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        for result in pool.map(_regenerate_chunk_in_worker, chunks):
+            collect(result)
+    return rendered, errors
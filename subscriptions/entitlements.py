@@ -0,0 +1,227 @@
+"""
+Entitlement Ledger
+
+One append-only row per (user, resource) the user owns, in ``Entitlement``.
+Replaces picking between MaterialPurchase, LearningMaterialPurchase,
+DocumentPurchase, GeneratedDocumentPurchase and UserDocument.is_paid for
+"can this user access X": every check is a single lookup on the covering
+unique index.
+
+Writers:
+    PaymentService.fulfill_payment   grant_for_payment(payment_txn)
+    LearningMaterial.record_purchase grant(..., source='direct_purchase')
+
+The legacy tables are still written (earnings, download counters, admin
+reports) but are no longer read for access.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, F, Sum, Value, When, Window
+from django.db.models.functions import RowNumber
+
+MATERIAL = 'material'
+DOCUMENT = 'document'
+GENERATED_DOCUMENT = 'generated_document'
+LEGACY_DOCUMENT = 'legacy_document'
+
+DOCUMENT_TYPES = (DOCUMENT, GENERATED_DOCUMENT, LEGACY_DOCUMENT)
+
+RECENT_PER_GROUP = 5
+
+
+def _model():
+    from .models import Entitlement
+    return Entitlement
+
+
+def grant(user_id, resource_type, resource_id, *, source, amount=Decimal('0'), payment=None,
+          label='', metadata=None, granted_at=None):
+    """
+    Record that a user owns a resource. Idempotent: an existing entitlement
+    is kept unchanged.
+
+    Returns:
+        bool: True if a new entitlement was written
+    """
+    defaults = {
+        'source': source,
+        'payment': payment,
+        'amount': amount or Decimal('0'),
+        'label': (label or '')[:255],
+        'metadata': metadata or {},
+    }
+    if granted_at is not None:
+        defaults['granted_at'] = granted_at
+    _, created = _model().objects.get_or_create(
+        user_id=user_id, resource_type=resource_type, resource_id=resource_id, defaults=defaults
+    )
+    return created
+
+
+def grant_for_payment(payment_txn):
+    """Entitlement for a fulfilled material/document payment (other categories own nothing)"""
+    if payment_txn.transaction_type == 'material' and payment_txn.related_material_id:
+        return grant(
+            payment_txn.user_id, MATERIAL, payment_txn.related_material_id,
+            source='payment', payment=payment_txn, amount=payment_txn.amount,
+            label=payment_txn.item_metadata.get('material_title', ''),
+        )
+    if payment_txn.transaction_type == 'document':
+        document_id = payment_txn.item_metadata.get('document_id')
+        if document_id:
+            return grant(
+                payment_txn.user_id, DOCUMENT, document_id,
+                source='payment', payment=payment_txn, amount=payment_txn.amount,
+                label=payment_txn.item_metadata.get('template_name', ''),
+                metadata={'template_name': payment_txn.item_metadata.get('template_name', '')},
+            )
+    return False
+
+
+def has_entitlement(user, resource_type, resource_id):
+    """One index-only lookup"""
+    if not (user and user.is_authenticated):
+        return False
+    return _model().objects.filter(
+        user_id=user.pk, resource_type=resource_type, resource_id=resource_id
+    ).exists()
+
+
+def entitled_ids(user, resource_type, resource_ids=None):
+    """Set of resource ids of one type the user owns (optionally restricted to ``resource_ids``)"""
+    if not (user and user.is_authenticated):
+        return set()
+    entitlements = _model().objects.filter(user_id=user.pk, resource_type=resource_type)
+    if resource_ids is not None:
+        entitlements = entitlements.filter(resource_id__in=list(resource_ids))
+    return set(entitlements.values_list('resource_id', flat=True))
+
+
+def _group():
+    """'materials' or 'documents' for each ledger row"""
+    return Case(
+        When(resource_type=MATERIAL, then=Value('materials')),
+        default=Value('documents'),
+        output_field=CharField(),
+    )
+
+
+def purchase_summary(user):
+    """
+    Totals and the most recent purchases per group, for profile display.
+    Two queries: one grouped aggregate and one windowed "latest N per group".
+    """
+    Entitlement = _model()
+    groups = {
+        name: {'total_count': 0, 'total_spent': 0.0, 'recent': []}
+        for name in ('materials', 'documents')
+    }
+    entitlements = Entitlement.objects.filter(user_id=user.pk)
+
+    totals = entitlements.annotate(group=_group()).values('group').annotate(
+        total_count=Count('id'), total_spent=Sum('amount')
+    ).order_by()
+    for row in totals:
+        groups[row['group']]['total_count'] = row['total_count']
+        groups[row['group']]['total_spent'] = float(row['total_spent'] or 0)
+
+    recent = entitlements.annotate(
+        group=_group(),
+        rank=Window(RowNumber(), partition_by=[_group()], order_by=F('granted_at').desc()),
+    ).filter(rank__lte=RECENT_PER_GROUP).order_by('-granted_at')
+    for entry in recent:
+        item = {
+            'id': entry.resource_id,
+            'title': entry.label,
+            'type': 'material' if entry.resource_type == MATERIAL else 'document',
+            'price_paid': float(entry.amount),
+            'purchased_at': entry.granted_at.isoformat(),
+        }
+        if entry.resource_type != MATERIAL:
+            item['template_name'] = entry.metadata.get('template_name', '')
+        groups[entry.group]['recent'].append(item)
+
+    return {
+        'materials': groups['materials'],
+        'documents': groups['documents'],
+        'total_purchases': groups['materials']['total_count'] + groups['documents']['total_count'],
+        'total_spent': groups['materials']['total_spent'] + groups['documents']['total_spent'],
+    }
+
+
+def backfill_entitlements(get_model, batch_size=1000):
+    """
+    Copy ownership from the legacy purchase tables into the ledger.
+
+    ``get_model`` is ``django.apps.apps.get_model`` (command) or the
+    migration's historical ``apps.get_model``. Idempotent.
+
+    Returns:
+        dict: rows written per source
+    """
+    Entitlement = get_model('subscriptions', 'Entitlement')
+    PaymentTransaction = get_model('subscriptions', 'PaymentTransaction')
+    MaterialPurchase = get_model('subscriptions', 'MaterialPurchase')
+    GeneratedDocumentPurchase = get_model('subscriptions', 'GeneratedDocumentPurchase')
+    DocumentPurchase = get_model('subscriptions', 'DocumentPurchase')
+    LearningMaterialPurchase = get_model('documents', 'LearningMaterialPurchase')
+    UserDocument = get_model('document_templates', 'UserDocument')
+
+    # Completed material payments, to link entitlements to their transaction
+    material_payments = {
+        (user_id, material_id): payment_id
+        for payment_id, user_id, material_id in PaymentTransaction.objects.filter(
+            transaction_type='material', status='completed', related_material__isnull=False
+        ).order_by('created_at').values_list('id', 'user_id', 'related_material_id')
+    }
+    document_payments = {}
+    for payment_id, user_id, metadata in PaymentTransaction.objects.filter(
+        transaction_type='document', status='completed'
+    ).order_by('created_at').values_list('id', 'user_id', 'item_metadata'):
+        document_id = (metadata or {}).get('document_id')
+        if document_id:
+            document_payments[(user_id, int(document_id))] = payment_id
+
+    sources = [
+        ('material_purchase', MATERIAL, MaterialPurchase.objects.values_list(
+            'buyer_id', 'material_id', 'amount_paid', 'created_at', 'material__title'
+        ), material_payments),
+        ('learning_material_purchase', MATERIAL, LearningMaterialPurchase.objects.values_list(
+            'buyer_id', 'material_id', 'amount_paid', 'purchase_date', 'material__title'
+        ), material_payments),
+        ('user_document', DOCUMENT, UserDocument.objects.filter(is_paid=True, payment_amount__gt=0, user__isnull=False).values_list(
+            'user_id', 'id', 'payment_amount', 'created_at', 'template__name'
+        ), document_payments),
+        ('generated_document_purchase', GENERATED_DOCUMENT, GeneratedDocumentPurchase.objects.values_list(
+            'user_id', 'document_id', 'amount_paid', 'created_at', 'document__title'
+        ), {}),
+        ('document_purchase', LEGACY_DOCUMENT, DocumentPurchase.objects.values_list(
+            'user_id', 'id', 'amount_paid', 'purchase_date', 'document_type__name'
+        ), {}),
+    ]
+
+    written = {}
+    for source, resource_type, rows, payments in sources:
+        before = Entitlement.objects.filter(source=source).count()
+        batch = []
+        for user_id, resource_id, amount, granted_at, label in rows.iterator(chunk_size=batch_size):
+            metadata = {'template_name': label or ''} if resource_type != MATERIAL else {}
+            batch.append(Entitlement(
+                user_id=user_id,
+                resource_type=resource_type,
+                resource_id=resource_id,
+                source=source,
+                payment_id=payments.get((user_id, resource_id)),
+                amount=amount or Decimal('0'),
+                label=(label or '')[:255],
+                metadata=metadata,
+                granted_at=granted_at,
+            ))
+            if len(batch) >= batch_size:
+                Entitlement.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            Entitlement.objects.bulk_create(batch, ignore_conflicts=True)
+        written[source] = Entitlement.objects.filter(source=source).count() - before
+    return written
@@ -0,0 +1,27 @@
+"""
+Management command to copy legacy purchase records into the entitlement ledger
+Usage: python manage.py backfill_entitlements
+
+Reads MaterialPurchase, LearningMaterialPurchase, paid UserDocuments,
+GeneratedDocumentPurchase and DocumentPurchase. Safe to re-run: existing
+entitlements are left untouched.
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from subscriptions.entitlements import backfill_entitlements
+
+
+class Command(BaseCommand):
+    help = 'Backfill the Entitlement ledger from the legacy purchase tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Backfilling entitlements...')
+        written = backfill_entitlements(apps.get_model, batch_size=options['batch_size'])
+        for source, count in written.items():
+            self.stdout.write(f'  {source:<28} {count} new')
+        self.stdout.write(self.style.SUCCESS(f'✅ Entitlements backfilled: {sum(written.values())} new rows'))
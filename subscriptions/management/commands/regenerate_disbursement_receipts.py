@@ -0,0 +1,41 @@
+"""
+Management command to re-render stored disbursement receipts
+Usage: python manage.py regenerate_disbursement_receipts [--all] [--workers N] [--ids 1 2 3]
+
+By default only terminal disbursements whose receipts are missing or were
+rendered with an older RECEIPT_TEMPLATE_VERSION are processed, so bumping the
+version and re-running this command refreshes every receipt.
+"""
+
+import os
+
+from django.core.management.base import BaseCommand
+
+from subscriptions.disbursement_receipts import regenerate_receipts, stale_disbursement_ids
+
+
+class Command(BaseCommand):
+    help = 'Re-render stored disbursement receipts across a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render current receipts too')
+        parser.add_argument('--ids', type=int, nargs='+', help='Only these disbursement ids')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes')
+        parser.add_argument('--chunk-size', type=int, default=20, help='Disbursements per worker task')
+
+    def handle(self, *args, **options):
+        ids = options['ids'] or stale_disbursement_ids(include_current=options['all'])
+        if not ids:
+            self.stdout.write(self.style.SUCCESS('✅ All disbursement receipts are current'))
+            return
+
+        self.stdout.write(f"🔄 Rendering receipts for {len(ids)} disbursement(s) on {options['workers']} worker(s)...")
+        rendered, errors = regenerate_receipts(
+            ids,
+            workers=options['workers'],
+            chunk_size=options['chunk_size'],
+            progress=lambda done, total: self.stdout.write(f'  {done}/{total}'),
+        )
+        for disbursement_id, error in errors.items():
+            self.stdout.write(self.style.WARNING(f'⚠️  Disbursement {disbursement_id}: {error}'))
+        self.stdout.write(self.style.SUCCESS(f'✅ Receipts regenerated for {rendered} disbursement(s), {len(errors)} failed'))
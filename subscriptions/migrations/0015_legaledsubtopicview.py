@@ -0,0 +1,64 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:19
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_subtopic_views(apps, schema_editor):
+    """Copy UserSubscription.viewed_subtopic_ids JSON lists into LegalEdSubtopicView rows"""
+    UserSubscription = apps.get_model('subscriptions', 'UserSubscription')
+    LegalEdSubtopicView = apps.get_model('subscriptions', 'LegalEdSubtopicView')
+    LegalEdSubTopic = apps.get_model('hubs', 'LegalEdSubTopic')
+
+    existing_subtopics = set(LegalEdSubTopic.objects.values_list('id', flat=True))
+    now = django.utils.timezone.now()
+    batch = []
+
+    subscriptions = UserSubscription.objects.exclude(viewed_subtopic_ids=[]).values_list(
+        'user_id', 'viewed_subtopic_ids'
+    )
+    for user_id, subtopic_ids in subscriptions.iterator(chunk_size=1000):
+        for subtopic_id in set(subtopic_ids or []):
+            try:
+                subtopic_id = int(subtopic_id)
+            except (TypeError, ValueError):
+                continue
+            if subtopic_id in existing_subtopics:
+                batch.append(LegalEdSubtopicView(user_id=user_id, subtopic_id=subtopic_id, viewed_at=now))
+        if len(batch) >= 5000:
+            LegalEdSubtopicView.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    if batch:
+        LegalEdSubtopicView.objects.bulk_create(batch, ignore_conflicts=True)
+    # legal_ed_subtopics_viewed already equals len(viewed_subtopic_ids) and is kept as-is,
+    # so views of since-deleted subtopics still count towards the trial limit.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hubs', '0015_legaledtopic_language'),
+        ('subscriptions', '0014_alter_paymenttransaction_payment_method'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LegalEdSubtopicView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('viewed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('subtopic', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='user_views', to='hubs.legaledsubtopic')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='legal_ed_subtopic_views', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Legal Education Subtopic View',
+                'verbose_name_plural': 'Legal Education Subtopic Views',
+                'ordering': ['-viewed_at'],
+                'constraints': [models.UniqueConstraint(fields=('user', 'subtopic'), name='unique_legal_ed_subtopic_view')],
+            },
+        ),
+        migrations.RunPython(backfill_subtopic_views, migrations.RunPython.noop),
+    ]
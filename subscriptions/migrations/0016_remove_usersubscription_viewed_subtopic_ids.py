@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-18 21:19
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0015_legaledsubtopicview'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='usersubscription',
+            name='viewed_subtopic_ids',
+        ),
+    ]
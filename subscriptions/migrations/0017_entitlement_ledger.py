@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_entitlements(apps, schema_editor):
+    """Copy existing purchases into the ledger (also: manage.py backfill_entitlements)"""
+    from subscriptions.entitlements import backfill_entitlements as backfill
+
+    backfill(apps.get_model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0016_remove_usersubscription_viewed_subtopic_ids'),
+        ('documents', '0003_alter_learningmaterial_subtopic_and_more'),
+        ('document_templates', '0002_documentcontent'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Entitlement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource_type', models.CharField(choices=[('material', 'Learning Material'), ('document', 'Generated Document (template)'), ('generated_document', 'Generated Document'), ('legacy_document', 'Legacy Document Purchase')], max_length=30)),
+                ('resource_id', models.PositiveBigIntegerField()),
+                ('source', models.CharField(choices=[('payment', 'Payment'), ('direct_purchase', 'Direct Purchase'), ('material_purchase', 'MaterialPurchase (backfill)'), ('learning_material_purchase', 'LearningMaterialPurchase (backfill)'), ('user_document', 'UserDocument (backfill)'), ('generated_document_purchase', 'GeneratedDocumentPurchase (backfill)'), ('document_purchase', 'DocumentPurchase (backfill)')], max_length=30)),
+                ('amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('label', models.CharField(blank=True, help_text='Title at time of purchase', max_length=255)),
+                ('metadata', models.JSONField(blank=True, default=dict)),
+                ('granted_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('payment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entitlements', to='subscriptions.paymenttransaction')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entitlements', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Entitlement',
+                'verbose_name_plural': 'Entitlements',
+                'ordering': ['-granted_at'],
+                'indexes': [models.Index(fields=['user', '-granted_at'], name='subscriptio_user_id_3efbd7_idx'), models.Index(fields=['resource_type', 'resource_id'], name='subscriptio_resourc_cee666_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'resource_type', 'resource_id'), include=('granted_at',), name='unique_user_entitlement')],
+            },
+        ),
+        migrations.RunPython(backfill_entitlements, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-18 22:44
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subscriptions', '0017_entitlement_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DisbursementReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('format', models.CharField(choices=[('pdf', 'PDF'), ('excel', 'Excel')], max_length=10)),
+                ('file', models.FileField(max_length=255, upload_to='disbursement_receipts/')),
+                ('sha256', models.CharField(max_length=64)),
+                ('size_bytes', models.PositiveIntegerField()),
+                ('template_version', models.PositiveSmallIntegerField()),
+                ('disbursement_status', models.CharField(help_text='Disbursement status the receipt was rendered for', max_length=20)),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('disbursement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='subscriptions.disbursement')),
+            ],
+            options={
+                'verbose_name': 'Disbursement Receipt',
+                'verbose_name_plural': 'Disbursement Receipts',
+                'indexes': [models.Index(fields=['template_version'], name='subscriptio_templat_36852c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('disbursement', 'format'), name='unique_disbursement_receipt_format')],
+            },
+        ),
+    ]
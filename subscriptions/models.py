@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, connection, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
@@ -199,8 +200,8 @@ class UserSubscription(models.Model):
     last_reset_date = models.DateField(auto_now_add=True, help_text="Last date monthly limits were reset")
     
     # Free Trial tracking - Legal Education subtopics viewed
+    # Denormalized count of LegalEdSubtopicView rows, maintained atomically
     legal_ed_subtopics_viewed = models.IntegerField(default=0, help_text="Number of legal education subtopics viewed (for trial limit)")
-    viewed_subtopic_ids = models.JSONField(default=list, blank=True, help_text="List of subtopic IDs user has viewed")
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -268,6 +269,10 @@ class UserSubscription(models.Model):
     # FREE TRIAL RESTRICTIONS - Legal Education Subtopics
     # ========================================================================
     
+    def has_viewed_legal_ed_subtopic(self, subtopic_id):
+        """Single indexed probe on (user, subtopic)"""
+        return LegalEdSubtopicView.objects.filter(user_id=self.user_id, subtopic_id=subtopic_id).exists()
+    
     def can_view_legal_ed_subtopic(self, subtopic_id):
         """
         Check if user can view a legal education subtopic.
@@ -280,7 +285,7 @@ class UserSubscription(models.Model):
             return (True, None)
         
         # If user has already viewed this subtopic, allow
-        if subtopic_id in (self.viewed_subtopic_ids or []):
+        if self.has_viewed_legal_ed_subtopic(subtopic_id):
             return (True, None)
         
         # Check if limit reached
@@ -294,12 +299,42 @@ class UserSubscription(models.Model):
         Track that user has viewed a subtopic.
         Only counts unique subtopics towards the limit.
         """
-        if subtopic_id not in (self.viewed_subtopic_ids or []):
-            if self.viewed_subtopic_ids is None:
-                self.viewed_subtopic_ids = []
-            self.viewed_subtopic_ids.append(subtopic_id)
-            self.legal_ed_subtopics_viewed = len(self.viewed_subtopic_ids)
-            self.save(update_fields=['viewed_subtopic_ids', 'legal_ed_subtopics_viewed'])
+        with transaction.atomic():
+            if LegalEdSubtopicView.record(self.user_id, subtopic_id):
+                UserSubscription.objects.filter(pk=self.pk).update(
+                    legal_ed_subtopics_viewed=F('legal_ed_subtopics_viewed') + 1
+                )
+        self.refresh_from_db(fields=['legal_ed_subtopics_viewed'])
+    
+    def claim_legal_ed_subtopic_view(self, subtopic_id):
+        """
+        Check the free trial limit and record the view in one step.
+        
+        Re-reading a subtopic is a single existence probe. A first view inserts
+        the (user, subtopic) row and bumps the counter only while it is below the
+        plan limit, so concurrent requests cannot exceed the limit or lose views.
+        
+        Returns tuple: (can_view: bool, reason: str or None)
+        """
+        if self.has_viewed_legal_ed_subtopic(subtopic_id):
+            return (True, None)
+        
+        limit = self.plan.legal_ed_subtopics_limit
+        allowed = True
+        with transaction.atomic():
+            if LegalEdSubtopicView.record(self.user_id, subtopic_id):
+                counter = UserSubscription.objects.filter(pk=self.pk)
+                if limit:
+                    counter = counter.filter(legal_ed_subtopics_viewed__lt=limit)
+                if not counter.update(legal_ed_subtopics_viewed=F('legal_ed_subtopics_viewed') + 1):
+                    # Limit reached: drop the row we just inserted
+                    transaction.set_rollback(True)
+                    allowed = False
+        
+        self.refresh_from_db(fields=['legal_ed_subtopics_viewed'])
+        if not allowed:
+            return (False, 'legal_ed_limit_reached')
+        return (True, None)
     
     def get_legal_ed_remaining(self):
         """Get remaining legal education subtopics user can view"""
@@ -461,6 +496,43 @@ class UserSubscription(models.Model):
         return permissions
 
 
+class LegalEdSubtopicView(models.Model):
+    """
+    Append-only record of the Legal Education subtopics a user has opened.
+    Backs the free trial subtopic limit (one row per user and subtopic).
+    """
+    user = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='legal_ed_subtopic_views')
+    subtopic = models.ForeignKey('hubs.LegalEdSubTopic', on_delete=models.CASCADE, related_name='user_views')
+    viewed_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-viewed_at']
+        verbose_name = 'Legal Education Subtopic View'
+        verbose_name_plural = 'Legal Education Subtopic Views'
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'subtopic'], name='unique_legal_ed_subtopic_view'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user_id} viewed subtopic {self.subtopic_id}"
+    
+    @classmethod
+    def record(cls, user_id, subtopic_id):
+        """
+        INSERT ... ON CONFLICT DO NOTHING.
+        
+        Returns:
+            bool: True if this call created the row (first view)
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {cls._meta.db_table} (user_id, subtopic_id, viewed_at) '
+                'VALUES (%s, %s, %s) ON CONFLICT (user_id, subtopic_id) DO NOTHING RETURNING id',
+                [user_id, subtopic_id, timezone.now()],
+            )
+            return cursor.fetchone() is not None
+
+
 # ============================================================================
 # CONSULTANT REGISTRATION & APPROVAL MODELS
 # ============================================================================
@@ -1396,6 +1468,9 @@ class Disbursement(models.Model):
             self.consultant_earnings.update(paid_out=True, payout_date=timezone.now())
         elif self.disbursement_type == 'uploader':
             self.uploader_earnings.update(paid_out=True, payout_date=timezone.now())
+        
+        from .disbursement_receipts import schedule_receipts
+        schedule_receipts(self.pk)
     
     def mark_failed(self, reason: str):
         """Mark disbursement as failed"""
@@ -1403,6 +1478,46 @@ class Disbursement(models.Model):
         self.failure_reason = reason
         self.processed_at = timezone.now()
         self.save()
+        
+        from .disbursement_receipts import schedule_receipts
+        schedule_receipts(self.pk)
+
+
+class DisbursementReceipt(models.Model):
+    """
+    Receipt rendered once when a disbursement reaches a terminal state and
+    served as stored bytes afterwards (see subscriptions.disbursement_receipts).
+    ``template_version`` identifies receipts to re-render after a template
+    change: `python manage.py regenerate_disbursement_receipts`.
+    """
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF'),
+        ('excel', 'Excel'),
+    ]
+
+    disbursement = models.ForeignKey(Disbursement, on_delete=models.CASCADE, related_name='receipts')
+    format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    file = models.FileField(upload_to='disbursement_receipts/', max_length=255)
+    sha256 = models.CharField(max_length=64)
+    size_bytes = models.PositiveIntegerField()
+    template_version = models.PositiveSmallIntegerField()
+    disbursement_status = models.CharField(
+        max_length=20, help_text="Disbursement status the receipt was rendered for"
+    )
+    generated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = 'Disbursement Receipt'
+        verbose_name_plural = 'Disbursement Receipts'
+        constraints = [
+            models.UniqueConstraint(fields=['disbursement', 'format'], name='unique_disbursement_receipt_format'),
+        ]
+        indexes = [
+            models.Index(fields=['template_version']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_format_display()} receipt for {self.disbursement_id}"
 
 
 # ============================================================================
@@ -1606,6 +1721,65 @@ class PaymentTransaction(models.Model):
         return None
 
 
+class Entitlement(models.Model):
+    """
+    Append-only ledger of what each user owns (materials, paid documents).
+    The single source of truth for access checks and purchase summaries;
+    written by PaymentService.fulfill_payment and direct purchases, see
+    subscriptions.entitlements. Existing purchase tables are migrated with
+    `python manage.py backfill_entitlements`.
+    """
+    RESOURCE_TYPES = [
+        ('material', 'Learning Material'),
+        ('document', 'Generated Document (template)'),
+        ('generated_document', 'Generated Document'),
+        ('legacy_document', 'Legacy Document Purchase'),
+    ]
+
+    SOURCES = [
+        ('payment', 'Payment'),
+        ('direct_purchase', 'Direct Purchase'),
+        ('material_purchase', 'MaterialPurchase (backfill)'),
+        ('learning_material_purchase', 'LearningMaterialPurchase (backfill)'),
+        ('user_document', 'UserDocument (backfill)'),
+        ('generated_document_purchase', 'GeneratedDocumentPurchase (backfill)'),
+        ('document_purchase', 'DocumentPurchase (backfill)'),
+    ]
+
+    user = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='entitlements')
+    resource_type = models.CharField(max_length=30, choices=RESOURCE_TYPES)
+    resource_id = models.PositiveBigIntegerField()
+
+    source = models.CharField(max_length=30, choices=SOURCES)
+    payment = models.ForeignKey(
+        PaymentTransaction, on_delete=models.SET_NULL, null=True, blank=True, related_name='entitlements'
+    )
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    label = models.CharField(max_length=255, blank=True, help_text="Title at time of purchase")
+    metadata = models.JSONField(default=dict, blank=True)
+    granted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-granted_at']
+        verbose_name = 'Entitlement'
+        verbose_name_plural = 'Entitlements'
+        constraints = [
+            # Covering index: ownership checks are index-only scans
+            models.UniqueConstraint(
+                fields=['user', 'resource_type', 'resource_id'],
+                include=['granted_at'],
+                name='unique_user_entitlement',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-granted_at']),
+            models.Index(fields=['resource_type', 'resource_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} owns {self.resource_type} #{self.resource_id}"
+
+
 # ============================================================================
 # EXISTING MODELS (Keep for backward compatibility - will deprecate later)
 # ============================================================================
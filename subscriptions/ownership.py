@@ -0,0 +1,105 @@
+"""
+Ownership Index
+
+Per-request lookup of which materials the current user owns.
+
+Material serializers used to ask the database once per item (and again from
+``can_download``/``file``), or reload the user's whole purchase history via
+``PolaUser.purchased_material_ids``. The index instead loads ownership for a
+page's ids in one ``IN`` query on the entitlement ledger
+(subscriptions.entitlements), and is shared by every serializer rendering the
+same request.
+
+Usage in a serializer:
+    index = ownership_index(self.context)
+    index.owns_material(obj.id)
+
+    can_access_material(self.context, obj)   # gate for file links
+
+List serializers declare ``list_serializer_class = OwnershipPrimingListSerializer``
+so the whole page is primed before its items are rendered.
+"""
+
+from django.db import models
+from rest_framework import serializers
+
+from .entitlements import MATERIAL, entitled_ids
+
+
+class OwnershipIndex:
+    """Memoised ownership lookups for one user"""
+
+    def __init__(self, user):
+        self.user = user
+        self._materials = {}
+
+    @property
+    def is_active(self):
+        return bool(self.user and self.user.is_authenticated)
+
+    def prime_materials(self, material_ids):
+        """Load ownership for any ids not seen yet (one query)"""
+        missing = {material_id for material_id in material_ids if material_id not in self._materials}
+        if not missing:
+            return
+        if not self.is_active:
+            self._materials.update(dict.fromkeys(missing, False))
+            return
+
+        owned = entitled_ids(self.user, MATERIAL, missing)
+        for material_id in missing:
+            self._materials[material_id] = material_id in owned
+
+    def owns_material(self, material_id):
+        self.prime_materials([material_id])
+        return self._materials[material_id]
+
+
+def ownership_index(context):
+    """
+    The request's OwnershipIndex, created on first use.
+
+    Cached on the request so separately constructed serializers (and nested
+    ones, which share their parent's context) reuse the same lookups.
+    """
+    index = context.get('ownership_index')
+    if index is not None:
+        return index
+
+    request = context.get('request')
+    if request is None:
+        index = OwnershipIndex(None)
+    else:
+        index = getattr(request, '_ownership_index', None)
+        if index is None:
+            index = OwnershipIndex(request.user)
+            request._ownership_index = index
+    context['ownership_index'] = index
+    return index
+
+
+def can_access_material(context, material):
+    """
+    True if the request's user may receive the material's (signed) file link:
+    its uploader, staff, free material, or a purchase/grant on the ledger.
+    """
+    request = context.get('request')
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated):
+        return False
+    if user.is_staff or user.is_superuser or material.uploader_id == user.pk:
+        return True
+    if material.price == 0:
+        return True
+    return ownership_index(context).owns_material(material.pk)
+
+
+class OwnershipPrimingListSerializer(serializers.ListSerializer):
+    """Primes the ownership index with every material id on the page"""
+
+    def to_representation(self, data):
+        if isinstance(data, models.manager.BaseManager):
+            data = data.all()
+        items = list(data)
+        ownership_index(self.context).prime_materials(item.pk for item in items)
+        return super().to_representation(items)
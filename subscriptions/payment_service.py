@@ -23,6 +23,7 @@ from .models import (
     UserSubscription, UserCallCredit
 )
 from .azampay_integration import azampay_client, format_phone_number, detect_mobile_provider
+from .entitlements import grant_for_payment
 
 logger = logging.getLogger(__name__)
 
@@ -234,6 +235,9 @@ class PaymentService:
                 else:
                     raise PaymentServiceError(f"Unknown category: {category}")
                 
+                # Record ownership in the entitlement ledger
+                grant_for_payment(payment_txn)
+                
                 # Mark as fulfilled
                 payment_txn.mark_fulfilled(f"Fulfilled at {timezone.now()}")
                 
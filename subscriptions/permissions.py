@@ -643,11 +643,10 @@ def check_legal_education_access(user, subtopic_id):
                 'upgrade_required': True
             })
         
-        can_view, reason = subscription.can_view_legal_ed_subtopic(subtopic_id)
+        # Limit check and view tracking happen atomically
+        can_view, reason = subscription.claim_legal_ed_subtopic_view(subtopic_id)
         
         if can_view:
-            # Track the view
-            subscription.track_subtopic_view(subtopic_id)
             return (True, None)
         else:
             return (False, {
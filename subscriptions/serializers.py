@@ -17,6 +17,7 @@ from .models import (
 )
 from documents.models import LearningMaterial, LearningMaterialPurchase
 from authentication.models import PolaUser
+from .ownership import OwnershipPrimingListSerializer, can_access_material, ownership_index
 
 
 class SubscriptionPlanSerializer(serializers.ModelSerializer):
@@ -222,21 +223,16 @@ class LearningMaterialSerializer(serializers.ModelSerializer):
             'uploader', 'downloads_count', 'total_revenue', 'uploader_earnings',
             'is_approved', 'created_at', 'updated_at'
         ]
+        list_serializer_class = OwnershipPrimingListSerializer
     
     def get_uploader_name(self, obj):
         return f"{obj.uploader.first_name} {obj.uploader.last_name}"
     
     def get_file(self, obj):
-        """Return absolute URL for file field"""
-        if obj.file:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(obj.file.url)
-            else:
-                # Fallback if no request context available
-                from django.conf import settings
-                return f"http://localhost:8000{obj.file.url}"
-        return None
+        """Signed file URL, only for viewers who may download it"""
+        if not obj.file or not can_access_material(self.context, obj):
+            return None
+        return self.context['request'].build_absolute_uri(obj.file.url)
     
     def get_revenue_split_info(self, obj):
         split = obj.get_revenue_split()
@@ -277,7 +273,7 @@ class LearningMaterialSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.id in request.user.purchased_material_ids
+        return ownership_index(self.context).owns_material(obj.id)
     
     def get_can_download(self, obj):
         """Check if user can download (downloadable + free or purchased)"""
@@ -288,7 +284,7 @@ class LearningMaterialSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
             return False
-        return obj.id in request.user.purchased_material_ids
+        return ownership_index(self.context).owns_material(obj.id)
 
 
 class LearningMaterialPurchaseSerializer(serializers.ModelSerializer):
@@ -1,9 +1,11 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from datetime import timedelta
 from authentication.models import PolaUser
-from .models import UserSubscription, SubscriptionPlan
+from authentication.principal import invalidate_principal
+from notification.events import publish_event
+from .models import UserSubscription, SubscriptionPlan, PaymentTransaction, CallSession
 
 
 @receiver(post_save, sender=PolaUser)
@@ -26,3 +28,36 @@ def create_user_trial_subscription(sender, instance, created, **kwargs):
         except SubscriptionPlan.DoesNotExist:
             # Free trial plan not found, skip
             pass
+
+
+@receiver(post_save, sender=UserSubscription)
+@receiver(post_delete, sender=UserSubscription)
+def invalidate_subscription_principal(sender, instance, **kwargs):
+    """Subscription status is part of the cached principal snapshot"""
+    invalidate_principal(instance.user_id)
+
+
+@receiver(post_save, sender=PaymentTransaction)
+def publish_payment_status(sender, instance, **kwargs):
+    """Push payment status to the payer instead of them polling check_status"""
+    publish_event(instance.user_id, 'payment_status', {
+        'transaction_id': instance.id,
+        'payment_reference': instance.payment_reference,
+        'transaction_type': instance.transaction_type,
+        'status': instance.status,
+        'is_fulfilled': instance.is_fulfilled,
+    })
+
+
+@receiver(post_save, sender=CallSession)
+def publish_call_state(sender, instance, **kwargs):
+    """Push call state changes (ringing/active/rejected/completed/...) to both parties"""
+    data = {
+        'call_id': instance.id,
+        'status': instance.status,
+        'channel_name': instance.channel_name,
+        'caller_id': instance.caller_id,
+        'consultant_id': instance.consultant_id,
+    }
+    for user_id in {instance.caller_id, instance.consultant_id} - {None}:
+        publish_event(user_id, 'call_state', data)
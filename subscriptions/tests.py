@@ -1,3 +1,242 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from document_templates.models import DocumentTemplate, UserDocument
+from documents.models import LearningMaterial, LearningMaterialPurchase
+from hubs.models import LegalEdTopic, LegalEdSubTopic
+from subscriptions import disbursement_receipts
+from subscriptions.entitlements import DOCUMENT, grant
+from subscriptions.models import (
+    Disbursement,
+    DisbursementReceipt,
+    Entitlement,
+    LegalEdSubtopicView,
+    MaterialPurchase,
+    PaymentTransaction,
+    SubscriptionPlan,
+    UserSubscription,
+)
+from subscriptions.payment_service import PaymentService
+from subscriptions.permissions import check_legal_education_access
+from utils.testing import create_test_admin, create_test_user
+
+
+class LegalEdSubtopicViewTestCase(TestCase):
+    """Test suite for free trial Legal Education subtopic tracking"""
+
+    def setUp(self):
+        self.plan = SubscriptionPlan.objects.create(
+            plan_type='free_trial',
+            name='Free Trial',
+            name_sw='Majaribio',
+            description='Trial',
+            description_sw='Majaribio',
+            price=Decimal('0'),
+            duration_days=1,
+            legal_ed_subtopics_limit=2,
+        )
+        # The post_save signal creates the trial subscription
+        self.user = create_test_user('trial@test.com', 'Trial', 'User')
+        self.subscription = UserSubscription.objects.get(user=self.user)
+
+        topic = LegalEdTopic.objects.create(name='Constitutional Law', slug='constitutional-law')
+        self.subtopics = [
+            LegalEdSubTopic.objects.create(topic=topic, name=f'Subtopic {i}') for i in range(3)
+        ]
+
+    def test_first_view_records_row_and_counts(self):
+        """A first view inserts one row and bumps the counter"""
+        can_view, reason = self.subscription.claim_legal_ed_subtopic_view(self.subtopics[0].id)
+
+        self.assertEqual((can_view, reason), (True, None))
+        self.assertEqual(self.subscription.legal_ed_subtopics_viewed, 1)
+        self.assertTrue(self.subscription.has_viewed_legal_ed_subtopic(self.subtopics[0].id))
+
+    def test_repeat_view_is_free(self):
+        """Re-reading a subtopic neither inserts nor counts again"""
+        subtopic_id = self.subtopics[0].id
+        self.subscription.claim_legal_ed_subtopic_view(subtopic_id)
+        self.subscription.track_subtopic_view(subtopic_id)
+
+        with self.assertNumQueries(1):
+            can_view, _ = self.subscription.claim_legal_ed_subtopic_view(subtopic_id)
+
+        self.assertTrue(can_view)
+        self.assertEqual(LegalEdSubtopicView.objects.filter(user=self.user).count(), 1)
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.legal_ed_subtopics_viewed, 1)
+
+    def test_limit_is_enforced(self):
+        """Once the limit is reached new subtopics are refused and nothing is recorded"""
+        for subtopic in self.subtopics[:2]:
+            self.assertTrue(check_legal_education_access(self.user, subtopic.id)[0])
+
+        can_access, message = check_legal_education_access(self.user, self.subtopics[2].id)
+
+        self.assertFalse(can_access)
+        self.assertEqual(message['legal_education_reads'], 2)
+        self.assertFalse(self.subscription.has_viewed_legal_ed_subtopic(self.subtopics[2].id))
+        # Already-viewed subtopics stay readable
+        self.assertTrue(check_legal_education_access(self.user, self.subtopics[0].id)[0])
+
+
+class EntitlementLedgerTestCase(TestCase):
+    """Test suite for the unified purchase/entitlement ledger"""
+
+    def setUp(self):
+        self.uploader = create_test_user('ledger-uploader@test.com', 'Up', 'Loader')
+        self.buyer = create_test_user('ledger-buyer@test.com', 'Buy', 'Er')
+        self.materials = [
+            LearningMaterial.objects.create(
+                uploader=self.uploader, uploader_type='student', hub_type='students',
+                content_type='notes', title=f'Notes {i}', price=Decimal('1000')
+            )
+            for i in range(3)
+        ]
+
+    def _completed_payment(self, material):
+        return PaymentTransaction.objects.create(
+            user=self.buyer, transaction_type='material', amount=material.price,
+            payment_method='Mpesa', payment_reference=f'PAY_MAT_{material.id}', status='completed',
+            related_material=material, item_metadata={'item_id': material.id, 'material_title': material.title},
+        )
+
+    def test_fulfilled_payment_grants_entitlement(self):
+        """fulfill_payment writes one ledger row linked to its transaction"""
+        payment = self._completed_payment(self.materials[0])
+        PaymentService().fulfill_payment(payment)
+
+        entitlement = Entitlement.objects.get(user=self.buyer)
+        self.assertEqual((entitlement.resource_type, entitlement.resource_id), ('material', self.materials[0].id))
+        self.assertEqual(entitlement.payment, payment)
+        with self.assertNumQueries(1):
+            self.assertTrue(self.buyer.has_purchased_material(self.materials[0].id))
+        self.assertFalse(self.buyer.has_purchased_material(self.materials[1].id))
+
+    def test_backfill_copies_legacy_purchases_once(self):
+        """The backfill command reads every legacy table and is idempotent"""
+        payment = self._completed_payment(self.materials[0])
+        MaterialPurchase.objects.create(
+            buyer=self.buyer, material=self.materials[0], amount_paid=Decimal('1000'),
+            platform_commission=Decimal('500'), uploader_earnings=Decimal('500')
+        )
+        LearningMaterialPurchase.objects.create(buyer=self.buyer, material=self.materials[0], amount_paid=1000)
+        LearningMaterialPurchase.objects.create(buyer=self.buyer, material=self.materials[1], amount_paid=1000)
+        template = DocumentTemplate.objects.create(
+            name='Affidavit', name_sw='Kiapo', description='d', description_sw='d', category='general',
+            is_free=False, price=Decimal('2000')
+        )
+        document = UserDocument.objects.create(
+            user=self.buyer, template=template, is_paid=True, payment_amount=Decimal('2000')
+        )
+        UserDocument.objects.create(user=self.buyer, template=template, is_paid=False)
+
+        call_command('backfill_entitlements', stdout=StringIO())
+        call_command('backfill_entitlements', stdout=StringIO())
+
+        owned = set(Entitlement.objects.values_list('resource_type', 'resource_id'))
+        self.assertEqual(owned, {
+            ('material', self.materials[0].id), ('material', self.materials[1].id), ('document', document.id)
+        })
+        self.assertEqual(
+            Entitlement.objects.get(resource_type='material', resource_id=self.materials[0].id).payment, payment
+        )
+
+    def test_purchase_summary_reads_the_ledger(self):
+        """Totals and recent purchases come from two ledger queries"""
+        for material in self.materials:
+            material.record_purchase(buyer=self.buyer)
+        grant(self.buyer.id, DOCUMENT, 99, source='payment', amount=Decimal('2000'),
+              label='Affidavit', metadata={'template_name': 'Affidavit'})
+
+        with self.assertNumQueries(2):
+            summary = self.buyer.get_purchase_summary()
+
+        self.assertEqual(summary['materials']['total_count'], 3)
+        self.assertEqual(summary['materials']['total_spent'], 3000.0)
+        self.assertEqual(summary['documents']['recent'][0]['template_name'], 'Affidavit')
+        self.assertEqual(summary['total_purchases'], 4)
+        self.assertEqual(summary['total_spent'], 5000.0)
+
+
+class DisbursementReceiptTestCase(TestCase):
+    """Test suite for stored disbursement receipts"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.tmpdir, DISBURSEMENT_RECEIPTS_ASYNC=False)
+        self.settings_override.enable()
+        self.admin = create_test_admin('receipts-admin@test.com', 'Ad', 'Min')
+        self.recipient = create_test_user('receipts-consultant@test.com', 'Con', 'Sultant')
+        self.disbursement = Disbursement.objects.create(
+            recipient=self.recipient, recipient_phone='255712345678',
+            amount=Decimal('25000'), payment_method='mpesa', initiated_by=self.admin
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = f'/api/v1/admin/disbursements/{self.disbursement.pk}/download-pdf/'
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _complete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.disbursement.mark_completed('AZM-123')
+
+    def test_receipts_are_stored_when_disbursement_completes(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertFalse(DisbursementReceipt.objects.exists())
+
+        self._complete()
+        receipts = {r.format: r for r in DisbursementReceipt.objects.filter(disbursement=self.disbursement)}
+        self.assertEqual(set(receipts), {'pdf', 'excel'})
+        with receipts['pdf'].file.open('rb') as fh:
+            self.assertTrue(fh.read().startswith(b'%PDF'))
+        self.assertEqual(receipts['pdf'].disbursement_status, 'completed')
+
+    def test_download_serves_stored_receipt_with_etag(self):
+        self._complete()
+        receipt = DisbursementReceipt.objects.get(disbursement=self.disbursement, format='pdf')
+
+        with mock.patch(
+            'subscriptions.disbursement_pdf_generator.DisbursementPDFGenerator.render_bytes'
+        ) as render:
+            response = self.client.get(self.url, HTTP_ACCEPT='application/pdf')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['ETag'], f'"{receipt.sha256}-raw"')
+            self.assertIn('Accept', response['Vary'])
+            self.assertEqual(len(response.content), receipt.size_bytes)
+            self.assertIn('attachment', response['Content-Disposition'])
+
+            raw_etag = response['ETag']
+            response = self.client.get(self.url, HTTP_ACCEPT='application/pdf', HTTP_IF_NONE_MATCH=raw_etag)
+            self.assertEqual(response.status_code, 304)
+
+            # The JSON envelope does not match the raw file's ETag
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=raw_etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['ETag'], f'"{receipt.sha256}-json"')
+            self.assertEqual(response.data['document']['size_bytes'], receipt.size_bytes)
+            render.assert_not_called()
+
+    def test_regenerate_rerenders_older_template_versions(self):
+        self._complete()
+        self.assertEqual(disbursement_receipts.stale_disbursement_ids(), [])
+
+        with mock.patch.object(disbursement_receipts, 'RECEIPT_TEMPLATE_VERSION', 2):
+            stale = disbursement_receipts.stale_disbursement_ids()
+            self.assertEqual(stale, [self.disbursement.pk])
+            rendered, errors = disbursement_receipts.regenerate_receipts(stale, workers=1)
+
+        self.assertEqual((rendered, errors), (1, {}))
+        self.assertEqual(
+            set(DisbursementReceipt.objects.values_list('template_version', flat=True)), {2}
+        )
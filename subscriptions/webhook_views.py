@@ -66,7 +66,8 @@ def azampay_webhook(request):
         payload = request.data
         signature = request.headers.get('X-Signature', '')
         
-        logger.info(f"Received AzamPay webhook: {payload}")
+        # Full payloads only at DEBUG; the summary line below is enough to correlate
+        logger.debug("Received AzamPay webhook payload: %s", payload)
         
         # Extract transaction details from AzamPay payload format
         # AzamPay sends multiple formats:
@@ -90,6 +91,11 @@ def azampay_webhook(request):
             payload.get('external_reference')
         )
         utility_ref = payload.get('utilityref') or payload.get('utility_ref')
+        logger.info(
+            "Received AzamPay webhook: transaction=%s status=%s external=%s utility=%s",
+            transaction_id, azam_status, external_reference, utility_ref,
+            extra={'transaction_id': transaction_id, 'gateway_status': azam_status},
+        )
         
         if not transaction_id:
             logger.warning("No transaction ID in webhook payload")
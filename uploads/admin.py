@@ -0,0 +1,26 @@
+from django.contrib import admin
+
+from .models import UploadBlob, UploadSession
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    """Read-only view of chunked upload sessions"""
+    list_display = ['filename', 'user', 'purpose', 'status', 'received_bytes', 'total_size', 'created_at']
+    list_filter = ['status', 'purpose', 'created_at']
+    search_fields = ['filename', 'user__email', 'blob__sha256']
+    readonly_fields = [field.name for field in UploadSession._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(UploadBlob)
+class UploadBlobAdmin(admin.ModelAdmin):
+    """Deduplicated stored uploads"""
+    list_display = ['sha256', 'mime_type', 'size', 'created_at']
+    search_fields = ['sha256']
+    readonly_fields = [field.name for field in UploadBlob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,49 @@
+"""
+Serializer file field that accepts a completed upload session id.
+
+Drop-in replacement for Base64AnyFileField: the value may be an upload
+session id (preferred), a multipart file or, for older clients, a base64 data
+URL. An upload id resolves to the deduplicated stored file, which the model's
+FileField references without copying.
+"""
+import uuid
+
+from rest_framework import serializers
+
+from utils.base64_fields import Base64AnyFileField
+from .sessions import UploadError, resolve_upload
+
+
+def _as_upload_id(data):
+    if isinstance(data, uuid.UUID):
+        return data
+    if isinstance(data, str) and len(data) == 36:
+        try:
+            return uuid.UUID(data)
+        except ValueError:
+            return None
+    return None
+
+
+class UploadSessionFileField(Base64AnyFileField):
+    """File field accepting ``<upload session id>`` in place of inline base64"""
+
+    def to_internal_value(self, data):
+        upload_id = _as_upload_id(data)
+        if upload_id is None:
+            return super().to_internal_value(data)
+
+        request = self.context.get('request')
+        user = getattr(request, 'user', None)
+        if not (user and user.is_authenticated):
+            raise serializers.ValidationError({'file_upload': 'Authentication required to use an upload id.'})
+
+        max_size = self.max_file_size
+        if self.document_type and self.document_type in self.DOCUMENT_SIZE_LIMITS:
+            max_size = self.DOCUMENT_SIZE_LIMITS[self.document_type]
+        try:
+            blob = resolve_upload(upload_id, user, self.allowed_types or self.ALLOWED_TYPES, max_size)
+        except UploadError as e:
+            raise serializers.ValidationError({'file_upload': str(e)}) from e
+        # Stored name: the model FileField references the blob without re-saving it
+        return blob.file.name
@@ -0,0 +1,17 @@
+"""
+Management command to delete expired upload sessions and their temp files
+Usage: python manage.py purge_upload_sessions
+"""
+
+from django.core.management.base import BaseCommand
+
+from uploads.sessions import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Delete expired chunked upload sessions and their partial files'
+
+    def handle(self, *args, **options):
+        self.stdout.write('🔄 Purging expired upload sessions...')
+        total = purge_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f'✅ Upload sessions purged: {total}'))
@@ -0,0 +1,77 @@
+"""
+Uploads App - Chunked, resumable file uploads
+
+Clients upload files in chunks to an UploadSession, then pass the session id
+to any serializer file field (see uploads/fields.py) instead of embedding the
+file as a base64 data URL. Completed uploads are stored once per content hash
+as an UploadBlob.
+"""
+import uuid
+
+from django.db import models
+from authentication.models import PolaUser
+
+
+class UploadBlob(models.Model):
+    """One stored file per distinct content (SHA-256)"""
+
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='uploads/', max_length=255)
+    size = models.BigIntegerField()
+    mime_type = models.CharField(max_length=100)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Upload Blob'
+        verbose_name_plural = 'Upload Blobs'
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.mime_type}, {self.size} bytes)"
+
+
+class UploadSession(models.Model):
+    """A resumable upload: chunks are appended to a temp file until complete"""
+
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+        ('failed', 'Failed'),
+    ]
+
+    PURPOSE_CHOICES = [
+        ('verification', 'Verification Document'),
+        ('hub_content', 'Hub Content'),
+        ('admin_document', 'Admin Document'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(PolaUser, on_delete=models.CASCADE, related_name='upload_sessions')
+    purpose = models.CharField(max_length=20, choices=PURPOSE_CHOICES)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField(help_text="Declared file size in bytes")
+    received_bytes = models.BigIntegerField(default=0)
+    mime_type = models.CharField(max_length=100, blank=True, help_text="Sniffed from the first chunk")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    error = models.CharField(max_length=255, blank=True)
+    blob = models.ForeignKey(
+        UploadBlob, on_delete=models.SET_NULL, null=True, blank=True, related_name='sessions'
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = 'Upload Session'
+        verbose_name_plural = 'Upload Sessions'
+        indexes = [
+            models.Index(fields=['status', 'expires_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size}, {self.status})"
+
+    @property
+    def is_complete(self):
+        return self.status == 'complete'
@@ -0,0 +1,33 @@
+from rest_framework import serializers
+
+from .models import UploadSession
+from .sessions import POLICIES, chunk_size_limit
+
+
+class UploadSessionCreateSerializer(serializers.Serializer):
+    """Start a chunked upload"""
+    purpose = serializers.ChoiceField(choices=list(POLICIES))
+    filename = serializers.CharField(max_length=255)
+    size = serializers.IntegerField(min_value=1, help_text="Total file size in bytes")
+    sha256 = serializers.RegexField(
+        r'^[0-9a-fA-F]{64}$', required=False,
+        help_text="Optional content hash; a file you already uploaded completes immediately"
+    )
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Upload session state; ``offset`` is where the next chunk starts"""
+    offset = serializers.IntegerField(source='received_bytes', read_only=True)
+    sha256 = serializers.CharField(source='blob.sha256', read_only=True, default=None)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'purpose', 'filename', 'total_size', 'offset', 'status', 'mime_type',
+            'sha256', 'chunk_size', 'error', 'expires_at', 'created_at'
+        ]
+        read_only_fields = fields
+
+    def get_chunk_size(self, obj):
+        return chunk_size_limit()
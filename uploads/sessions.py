@@ -0,0 +1,400 @@
+"""
+Upload Sessions
+
+Chunked, resumable uploads streamed to disk instead of base64 data URLs
+decoded in memory:
+
+    create_session()   validate purpose, declared size and extension; a
+                       client-supplied SHA-256 the same user already
+                       uploaded completes the session without any bytes
+    write_chunk()      stream one chunk at ``offset`` to its own temp file,
+                       reading the request in COPY_SIZE pieces with no lock
+                       held; size limits are enforced as bytes arrive and the
+                       MIME type is sniffed from the first SNIFF_BYTES only.
+                       The session row is locked just to re-check the offset,
+                       rename the chunk into place and advance the offset
+    finalize()         concatenate and hash the chunks, store the file once
+                       per content hash (UploadBlob) and drop the temp files
+    resolve_upload()   the completed blob behind an upload id, checked
+                       against a serializer field's type and size limits
+
+Peak memory per request is one COPY_SIZE buffer regardless of file size.
+"""
+
+import glob
+import hashlib
+import logging
+import mimetypes
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import UploadBlob, UploadSession
+
+logger = logging.getLogger(__name__)
+
+try:
+    import magic
+
+    HAS_MAGIC = True
+except ImportError:
+    HAS_MAGIC = False
+
+COPY_SIZE = 64 * 1024
+SNIFF_BYTES = 8 * 1024
+
+MIME_TYPES = {
+    'pdf': 'application/pdf',
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'doc': 'application/msword',
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'ppt': 'application/vnd.ms-powerpoint',
+    'pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    'xls': 'application/vnd.ms-excel',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+# Container formats libmagic may report from a partial buffer
+CONTAINER_MIME_TYPES = {
+    'application/zip': {'docx', 'pptx', 'xlsx'},
+    'application/x-ole-storage': {'doc', 'ppt', 'xls'},
+    'application/cdfv2': {'doc', 'ppt', 'xls'},
+    'application/octet-stream': {'docx', 'pptx', 'xlsx', 'doc', 'ppt', 'xls'},
+}
+
+OFFICE_TYPES = ['pdf', 'doc', 'docx', 'jpg', 'jpeg', 'png', 'ppt', 'pptx', 'xls', 'xlsx']
+
+POLICIES = {
+    'verification': {'max_size': 10 * 1024 * 1024, 'types': ['pdf', 'jpg', 'jpeg', 'png', 'doc', 'docx']},
+    'hub_content': {'max_size': 50 * 1024 * 1024, 'types': OFFICE_TYPES},
+    'admin_document': {'max_size': 50 * 1024 * 1024, 'types': OFFICE_TYPES},
+}
+
+
+class UploadError(Exception):
+    """Upload rejected; ``status`` is the HTTP status the API should return"""
+
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+def chunk_size_limit():
+    return getattr(settings, 'UPLOAD_CHUNK_MAX_SIZE', 8 * 1024 * 1024)
+
+
+def _ttl():
+    return timedelta(seconds=getattr(settings, 'UPLOAD_SESSION_TTL', 24 * 3600))
+
+
+def _temp_dir():
+    directory = str(settings.UPLOAD_TEMP_DIR)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def temp_path(session):
+    """The assembled file, written by ``finalize``"""
+    return os.path.join(_temp_dir(), f'{session.pk}.part')
+
+
+def _chunk_path(session, offset):
+    # Zero-padded so the chunks sort by offset
+    return os.path.join(_temp_dir(), f'{session.pk}.{offset:015d}.chunk')
+
+
+def extension(filename):
+    return os.path.splitext(filename or '')[1].lstrip('.').lower()
+
+
+def resolve_mime(sniffed, filename):
+    """
+    The MIME type of an upload from the sniffed type and file name. Office
+    formats are containers (zip / OLE) that libmagic cannot always tell apart
+    from a partial buffer; the extension decides between them.
+    """
+    ext = extension(filename)
+    sniffed = (sniffed or '').lower()
+    if not sniffed:
+        return MIME_TYPES.get(ext) or mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if ext in CONTAINER_MIME_TYPES.get(sniffed, ()):
+        return MIME_TYPES[ext]
+    return sniffed
+
+
+def sniff(head, filename):
+    """MIME type of the first bytes of a file"""
+    detected = magic.from_buffer(head, mime=True) if HAS_MAGIC else None
+    return resolve_mime(detected, filename)
+
+
+def allowed_mime_types(types):
+    return {MIME_TYPES.get(t, t) for t in types}
+
+
+def create_session(user, purpose, filename, size, sha256=None):
+    """
+    Open an upload session.
+
+    Returns:
+        UploadSession: ``status == 'complete'`` when ``sha256`` matches a
+        file this user already uploaded (nothing to send)
+    """
+    policy = POLICIES.get(purpose)
+    if policy is None:
+        raise UploadError(f"Unknown upload purpose '{purpose}'. Choose from: {', '.join(POLICIES)}")
+    if extension(filename) not in policy['types']:
+        raise UploadError(
+            f"File format '{extension(filename)}' is not allowed. Allowed formats: {', '.join(policy['types'])}"
+        )
+    if size <= 0:
+        raise UploadError('File size must be greater than zero')
+    if size > policy['max_size']:
+        raise UploadError(
+            f"File size is {size / (1024 * 1024):.2f}MB. "
+            f"Maximum allowed size is {policy['max_size'] / (1024 * 1024):.0f}MB.",
+            status=413,
+        )
+
+    session = UploadSession(
+        user=user, purpose=purpose, filename=filename[:255], total_size=size,
+        expires_at=timezone.now() + _ttl(),
+    )
+    if sha256:
+        # Only shortcut to the user's own earlier uploads: a bare hash must not
+        # grant access to someone else's file
+        blob = UploadBlob.objects.filter(
+            sha256=sha256.lower(), size=size, sessions__user=user, sessions__status='complete'
+        ).first()
+        if blob is not None:
+            session.blob = blob
+            session.status = 'complete'
+            session.received_bytes = size
+            session.mime_type = blob.mime_type
+    session.save()
+    return session
+
+
+def _user_session(session_id, user, queryset=None):
+    """The user's session for ``session_id``, or None (also for ids that are not UUIDs)"""
+    try:
+        session_id = uuid.UUID(str(session_id))
+    except ValueError:
+        return None
+    queryset = UploadSession.objects.all() if queryset is None else queryset
+    return queryset.filter(pk=session_id, user=user).first()
+
+
+def _fail(session, message):
+    UploadSession.objects.filter(pk=session.pk, status='uploading').update(
+        status='failed', error=message[:255], updated_at=timezone.now()
+    )
+    session.status = 'failed'
+    session.error = message[:255]
+    _remove_temp(session)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_temp(session):
+    for path in glob.glob(os.path.join(_temp_dir(), f'{session.pk}.*')):
+        _remove(path)
+
+
+def _check_writable(session, offset, length):
+    if session is None:
+        raise UploadError('Upload session not found', status=404)
+    if session.status != 'uploading':
+        raise UploadError(f'Upload session is {session.status}', status=409, offset=session.received_bytes)
+    if offset != session.received_bytes:
+        raise UploadError(
+            f'Expected offset {session.received_bytes}', status=409, offset=session.received_bytes
+        )
+    if session.received_bytes == session.total_size:
+        raise UploadError('Upload is being finalized', status=409, offset=session.received_bytes)
+    remaining = session.total_size - offset
+    if length is not None and (length > remaining or length > chunk_size_limit()):
+        raise UploadError(
+            f'Chunk of {length} bytes exceeds the remaining {remaining} bytes '
+            f'or the {chunk_size_limit()} byte chunk limit',
+            status=413,
+        )
+
+
+def write_chunk(session_id, user, stream, offset, length=None):
+    """
+    Append a chunk read from ``stream`` at byte ``offset``.
+
+    ``offset`` must equal the bytes already received, so a client that lost a
+    response resumes from the offset reported by the session. The chunk is
+    rejected as soon as it would exceed the declared size. Of two requests
+    racing for the same offset, the first to commit wins; the other gets 409.
+
+    Returns:
+        UploadSession
+    """
+    session = _user_session(session_id, user)
+    _check_writable(session, offset, length)
+    if session.expires_at <= timezone.now():
+        _fail(session, 'Upload session expired')
+        raise UploadError('Upload session expired', status=410)
+
+    incoming = os.path.join(_temp_dir(), f'{session.pk}.{uuid.uuid4().hex}.incoming')
+    try:
+        written, mime, failure = _receive(session, stream, incoming, offset)
+        if failure is not None:
+            _fail(session, str(failure))
+            raise failure
+
+        with transaction.atomic():
+            session = UploadSession.objects.select_for_update().get(pk=session.pk)
+            _check_writable(session, offset, length)
+            os.replace(incoming, _chunk_path(session, offset))
+            session.received_bytes = offset + written
+            session.mime_type = mime or session.mime_type
+            session.expires_at = timezone.now() + _ttl()
+            session.save(update_fields=['received_bytes', 'mime_type', 'expires_at', 'updated_at'])
+    finally:
+        _remove(incoming)
+
+    if session.received_bytes == session.total_size:
+        try:
+            finalize(session)
+        except Exception as e:
+            logger.error(f"❌ Upload {session.pk} could not be stored: {e}")
+            _fail(session, f'Upload could not be stored: {e}')
+            raise UploadError('Upload could not be stored', status=500)
+    return session
+
+
+def _receive(session, stream, path, offset):
+    """
+    Stream one chunk into ``path``.
+
+    Returns:
+        tuple: (bytes written, sniffed MIME type or None, UploadError or None)
+    """
+    remaining = session.total_size - offset
+    written = 0
+    head = b''
+    with open(path, 'wb') as fh:
+        while True:
+            data = stream.read(COPY_SIZE)
+            if not data:
+                break
+            written += len(data)
+            if written > remaining or written > chunk_size_limit():
+                return written, None, UploadError('Upload exceeded the declared size', status=413)
+            if offset == 0 and len(head) < SNIFF_BYTES:
+                head += data[:SNIFF_BYTES - len(head)]
+            fh.write(data)
+
+    mime = None
+    if offset == 0 and head:
+        mime = sniff(head, session.filename)
+        if mime not in allowed_mime_types(POLICIES[session.purpose]['types']):
+            return written, None, UploadError(f'File type {mime} is not allowed', status=415)
+    return written, mime, None
+
+
+def _assemble(session):
+    """Concatenate the session's chunks into its temp file; returns (path, sha256)"""
+    digest = hashlib.sha256()
+    path = temp_path(session)
+    with open(path, 'wb') as out:
+        for chunk in sorted(glob.glob(os.path.join(_temp_dir(), f'{session.pk}.*.chunk'))):
+            with open(chunk, 'rb') as fh:
+                for block in iter(lambda: fh.read(COPY_SIZE), b''):
+                    digest.update(block)
+                    out.write(block)
+    return path, digest.hexdigest()
+
+
+def finalize(session):
+    """Store the completed upload, reusing an existing blob with the same content"""
+    path, sha256 = _assemble(session)
+    blob = UploadBlob.objects.filter(sha256=sha256).first()
+    if blob is None:
+        ext = extension(session.filename)
+        name = f'uploads/{sha256[:2]}/{sha256}{"." + ext if ext else ""}'
+        with open(path, 'rb') as fh:
+            stored = default_storage.save(name, File(fh))
+        try:
+            with transaction.atomic():
+                blob = UploadBlob.objects.create(
+                    sha256=sha256, file=stored, size=session.total_size, mime_type=session.mime_type
+                )
+        except IntegrityError:
+            # Same content finished concurrently
+            default_storage.delete(stored)
+            blob = UploadBlob.objects.get(sha256=sha256)
+    else:
+        logger.info(f"♻️ Upload {session.pk} deduplicated to blob {sha256[:12]}")
+    _remove_temp(session)
+
+    session.blob = blob
+    session.status = 'complete'
+    session.save()
+    return session
+
+
+def abort_session(session_id, user):
+    session = _user_session(session_id, user)
+    if session is None:
+        raise UploadError('Upload session not found', status=404)
+    _remove_temp(session)
+    session.delete()
+
+
+def resolve_upload(upload_id, user, allowed_types=None, max_size=None):
+    """
+    The completed UploadBlob for an upload id owned by ``user``.
+
+    Raises:
+        UploadError: unknown, incomplete, too large or disallowed type
+    """
+    session = _user_session(upload_id, user, UploadSession.objects.select_related('blob'))
+    if session is None:
+        raise UploadError('Upload not found')
+    if not session.is_complete or session.blob is None:
+        raise UploadError(f'Upload is not complete ({session.received_bytes}/{session.total_size} bytes)')
+    blob = session.blob
+    if max_size is not None and blob.size > max_size:
+        raise UploadError(
+            f"File size is {blob.size / (1024 * 1024):.2f}MB. Maximum allowed size is {max_size / (1024 * 1024):.0f}MB."
+        )
+    if allowed_types and blob.mime_type not in allowed_mime_types(allowed_types):
+        raise UploadError(
+            f"File format is not allowed. Allowed formats: {', '.join(allowed_types)}. Detected type: {blob.mime_type}"
+        )
+    return blob
+
+
+def purge_expired_sessions():
+    """
+    Delete expired sessions and their temp files. Blobs stay: records
+    created from them reference the stored file directly.
+
+    Returns:
+        int: sessions deleted
+    """
+    expired = list(UploadSession.objects.filter(expires_at__lt=timezone.now()))
+    for session in expired:
+        if session.status != 'complete':
+            _remove_temp(session)
+    UploadSession.objects.filter(pk__in=[session.pk for session in expired]).delete()
+    return len(expired)
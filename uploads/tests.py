@@ -0,0 +1,146 @@
+import glob
+import hashlib
+import io
+import shutil
+import tempfile
+
+from django.test import override_settings
+from rest_framework import serializers, status
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from utils.testing import create_test_user
+from .fields import UploadSessionFileField
+from .models import UploadBlob, UploadSession
+from .sessions import UploadError, write_chunk
+
+PDF = b'%PDF-1.4\n' + b'1 0 obj << /Type /Catalog >> endobj\n' * 400 + b'%%EOF\n'
+
+
+class ChunkedUploadTestCase(APITestCase):
+    """Test suite for resumable chunked uploads"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.settings_override = override_settings(UPLOAD_TEMP_DIR=self.tmpdir, MEDIA_ROOT=self.tmpdir)
+        self.settings_override.enable()
+        self.user = create_test_user('uploader@test.com', 'Up', 'Loader')
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+    def _start(self, filename='brief.pdf', size=len(PDF), **extra):
+        return self.client.post(
+            '/api/v1/uploads/', {'purpose': 'hub_content', 'filename': filename, 'size': size, **extra},
+            format='json'
+        )
+
+    def _send(self, upload_id, chunk, offset):
+        return self.client.patch(
+            f'/api/v1/uploads/{upload_id}/', data=chunk, content_type='application/octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset)
+        )
+
+    def _upload(self, content=PDF, filename='brief.pdf'):
+        upload_id = self._start(filename, len(content)).data['id']
+        half = len(content) // 2
+        self._send(upload_id, content[:half], 0)
+        response = self._send(upload_id, content[half:], half)
+        self.assertEqual(response.data['status'], 'complete')
+        return upload_id
+
+    def test_chunked_upload_resumes_from_reported_offset(self):
+        upload_id = self._start().data['id']
+        half = len(PDF) // 2
+
+        response = self._send(upload_id, PDF[:half], 0)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Upload-Offset'], str(half))
+        self.assertEqual(response.data['mime_type'], 'application/pdf')
+
+        # A retried chunk at a stale offset reports where to resume
+        response = self._send(upload_id, PDF[:half], 0)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data['offset'], half)
+
+        response = self._send(upload_id, PDF[half:], response.data['offset'])
+        self.assertEqual(response.data['status'], 'complete')
+        self.assertEqual(response.data['sha256'], hashlib.sha256(PDF).hexdigest())
+        blob = UploadBlob.objects.get()
+        with blob.file.open('rb') as fh:
+            self.assertEqual(fh.read(), PDF)
+
+    def test_racing_chunks_for_one_offset_commit_once(self):
+        upload_id = self._start().data['id']
+        half = len(PDF) // 2
+        user = self.user
+
+        class RacedStream(io.BytesIO):
+            """Another request commits the same offset while this body is still arriving"""
+            raced = False
+
+            def read(self, size=-1):
+                if not self.raced:
+                    self.raced = True
+                    write_chunk(upload_id, user, io.BytesIO(PDF[:half]), 0)
+                return super().read(size)
+
+        with self.assertRaises(UploadError) as raised:
+            write_chunk(upload_id, user, RacedStream(b'%PDF-1.4 other body'), 0)
+        self.assertEqual((raised.exception.status, raised.exception.extra), (409, {'offset': half}))
+
+        response = self._send(upload_id, PDF[half:], half)
+        self.assertEqual(response.data['status'], 'complete')
+        with UploadBlob.objects.get().file.open('rb') as fh:
+            self.assertEqual(fh.read(), PDF)
+        self.assertEqual(glob.glob(f'{self.tmpdir}/{upload_id}.*'), [])
+
+    def test_rejects_oversized_and_disallowed_chunks(self):
+        upload_id = self._start(size=10).data['id']
+        response = self._send(upload_id, PDF[:20], 0)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        text = b'plain text pretending to be a pdf\n' * 10
+        upload_id = self._start(size=len(text)).data['id']
+        response = self._send(upload_id, text, 0)
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        self.assertEqual(UploadSession.objects.get(pk=upload_id).status, 'failed')
+
+        response = self._start(size=100 * 1024 * 1024)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    def test_malformed_upload_ids_are_not_found(self):
+        self.assertEqual(self._send('abc', PDF, 0).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.delete('/api/v1/uploads/abc/').status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get('/api/v1/uploads/abc/').status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_identical_content_is_stored_once(self):
+        first = self._upload()
+        second = self._upload(filename='copy.pdf')
+        self.assertEqual(UploadBlob.objects.count(), 1)
+        self.assertEqual(
+            UploadSession.objects.get(pk=first).blob_id, UploadSession.objects.get(pk=second).blob_id
+        )
+
+        # A known hash completes without sending bytes, but only for the owner
+        response = self._start(sha256=hashlib.sha256(PDF).hexdigest())
+        self.assertEqual(response.data['status'], 'complete')
+        other = create_test_user('other@test.com', 'Other', 'User')
+        self.client.force_authenticate(other)
+        response = self._start(sha256=hashlib.sha256(PDF).hexdigest())
+        self.assertEqual(response.data['status'], 'uploading')
+
+    def test_serializer_field_resolves_upload_id(self):
+        upload_id = self._upload()
+        request = APIRequestFactory().post('/')
+        request.user = self.user
+        field = UploadSessionFileField(allowed_types=['pdf'], max_file_size=1024 * 1024)
+        field._context = {'request': request}
+
+        self.assertEqual(field.to_internal_value(upload_id), UploadBlob.objects.get().file.name)
+
+        images_only = UploadSessionFileField(allowed_types=['png'])
+        images_only._context = {'request': request}
+        with self.assertRaises(serializers.ValidationError):
+            images_only.to_internal_value(upload_id)
@@ -0,0 +1,11 @@
+from django.urls import include, path
+from rest_framework.routers import SimpleRouter
+
+from .views import UploadSessionViewSet
+
+router = SimpleRouter()
+router.register(r'', UploadSessionViewSet, basename='upload-session')
+
+urlpatterns = [
+    path('', include(router.urls)),
+]
@@ -0,0 +1,70 @@
+"""
+Chunked upload API
+
+    POST   /api/v1/uploads/                 {purpose, filename, size, sha256?} -> session
+    GET    /api/v1/uploads/{id}/            session state (resume from ``offset``)
+    PATCH  /api/v1/uploads/{id}/            raw chunk body, ``Upload-Offset: <offset>`` header
+    DELETE /api/v1/uploads/{id}/            abort
+
+Send chunks as ``application/octet-stream``; the body is streamed to disk and
+never parsed. Once ``status`` is ``complete`` pass the session ``id`` as the
+``file`` value of any upload-aware serializer.
+"""
+from rest_framework import status, viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .models import UploadSession
+from .serializers import UploadSessionCreateSerializer, UploadSessionSerializer
+from .sessions import UploadError, abort_session, create_session, write_chunk
+
+
+def _error_response(error):
+    return Response({'error': str(error), **error.extra}, status=error.status)
+
+
+class UploadSessionViewSet(viewsets.GenericViewSet):
+    """Resumable chunked uploads"""
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(user=self.request.user).select_related('blob')
+
+    def create(self, request):
+        serializer = UploadSessionCreateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = create_session(request.user, **serializer.validated_data)
+        except UploadError as e:
+            return _error_response(e)
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        session = self.get_object()
+        response = Response(UploadSessionSerializer(session).data)
+        response['Upload-Offset'] = str(session.received_bytes)
+        return response
+
+    def partial_update(self, request, pk=None):
+        offset = request.META.get('HTTP_UPLOAD_OFFSET')
+        if offset is None or not offset.isdigit():
+            return Response({'error': 'Upload-Offset header is required'}, status=status.HTTP_400_BAD_REQUEST)
+        length = request.META.get('CONTENT_LENGTH')
+        try:
+            session = write_chunk(
+                pk, request.user, request._request, int(offset),
+                length=int(length) if length and length.isdigit() else None,
+            )
+        except UploadError as e:
+            return _error_response(e)
+        response = Response(UploadSessionSerializer(session).data)
+        response['Upload-Offset'] = str(session.received_bytes)
+        return response
+
+    def destroy(self, request, pk=None):
+        try:
+            abort_session(pk, request.user)
+        except UploadError as e:
+            return _error_response(e)
+        return Response(status=status.HTTP_204_NO_CONTENT)
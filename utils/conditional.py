@@ -0,0 +1,44 @@
+"""
+Conditional GET helpers for DRF views (ETag / If-None-Match -> 304)
+"""
+
+import hashlib
+
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts):
+    """Build a quoted strong ETag from arbitrary version parts"""
+    digest = hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'"{digest}"'
+
+
+def not_modified_response(request, etag, max_age=0):
+    """
+    Return a 304 response if the client already has ``etag``, else None.
+
+    Usage:
+        etag = make_etag(version, request.get_full_path())
+        cached = not_modified_response(request, etag)
+        if cached:
+            return cached
+        ...
+        return with_cache_headers(Response(data), etag)
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return None
+    client_etags = parse_etags(if_none_match)
+    if '*' in client_etags or etag in client_etags or f'W/{etag}' in client_etags:
+        return with_cache_headers(Response(status=status.HTTP_304_NOT_MODIFIED), etag, max_age)
+    return None
+
+
+def with_cache_headers(response, etag, max_age=0):
+    """Attach ETag and Cache-Control (private; revalidate once max_age expires)"""
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, max_age=max_age, must_revalidate=True)
+    return response
@@ -0,0 +1,85 @@
+"""
+Database Connection Probe
+
+Checks every configured alias the way the app will use it: a connection can
+be opened (and how long that takes), answers a query, passes the health
+check, and is reused across a request boundary when ``CONN_MAX_AGE`` allows
+it. Used by ``manage.py probe_database`` (container start-up probe) and by
+``GET /api/health/?db=1``.
+"""
+
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def _backend_pid(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_backend_pid()')
+        return cursor.fetchone()[0]
+
+
+def probe_alias(alias, reconnect=True):
+    """
+    Returns:
+        dict: ok, error, connect_ms, query_ms, conn_max_age, health_checks,
+              server_side_cursors, reused (None when not checked)
+    """
+    connection = connections[alias]
+    settings_dict = connection.settings_dict
+    result = {
+        'ok': False,
+        'error': None,
+        'connect_ms': None,
+        'query_ms': None,
+        'conn_max_age': settings_dict.get('CONN_MAX_AGE'),
+        'health_checks': settings_dict.get('CONN_HEALTH_CHECKS'),
+        'server_side_cursors': not settings_dict.get('DISABLE_SERVER_SIDE_CURSORS'),
+        'reused': None,
+    }
+    pooler_mode = getattr(settings, 'DB_POOLER_MODE', 'none')
+    if pooler_mode == 'transaction' and result['server_side_cursors']:
+        result['error'] = 'transaction pooling requires DISABLE_SERVER_SIDE_CURSORS'
+        return result
+
+    try:
+        if reconnect and not connection.in_atomic_block:
+            connection.close()
+            started = time.perf_counter()
+            connection.ensure_connection()
+            result['connect_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        started = time.perf_counter()
+        pid = _backend_pid(connection)
+        result['query_ms'] = round((time.perf_counter() - started) * 1000, 2)
+
+        if reconnect and not connection.in_atomic_block:
+            # What request_finished / request_started do between two requests
+            connection.close_if_unusable_or_obsolete()
+            # Behind a transaction pooler the server connection may change
+            # per transaction, so reuse cannot be observed from here.
+            if pooler_mode != 'transaction':
+                result['reused'] = connection.connection is not None and _backend_pid(connection) == pid
+                if result['conn_max_age'] != 0 and not result['reused']:
+                    result['error'] = 'connection was not reused across requests'
+                    return result
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+
+    result['ok'] = True
+    return result
+
+
+def probe_databases(reconnect=True):
+    """
+    Probe every configured alias.
+
+    Returns:
+        tuple: (healthy, {alias: probe_alias() result}) - healthy only
+               requires the default alias; a failing replica is bypassed by
+               the router
+    """
+    results = {alias: probe_alias(alias, reconnect=reconnect) for alias in connections}
+    return results[DEFAULT_DB_ALIAS]['ok'], results
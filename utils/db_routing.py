@@ -0,0 +1,215 @@
+"""
+Read-replica Routing
+
+Reporting reads (admin analytics, statistics, exports) can be sent to a
+streaming replica so heavy aggregates do not compete with app traffic on the
+primary. Routing is opt-in:
+
+    @read_only_replica
+    def revenue_analytics(request): ...
+
+    with read_only_replica(user=request.user):
+        rows = list(Disbursement.objects.filter(...))
+
+Inside that scope ``ReplicaRouter`` sends reads to ``REPLICA_DATABASE_ALIAS``
+unless:
+
+    - no replica is configured (``DB_REPLICA_HOST`` empty): everything stays on
+      ``default``
+    - the replica lags more than ``REPLICA_MAX_LAG_SECONDS`` or cannot be
+      reached (checked at most every ``REPLICA_LAG_CHECK_SECONDS`` per process)
+    - the user wrote within the last ``REPLICA_STICKY_SECONDS``
+      (read-your-writes; recorded by ``ReplicaPinningMiddleware``), or the
+      current request / scope already wrote
+
+Writes always go to ``default``.
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+logger = logging.getLogger(__name__)
+
+_replica_scope = contextvars.ContextVar('replica_scope', default=None)
+_request_writes = contextvars.ContextVar('request_writes', default=None)
+
+_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+_lag_lock = threading.Lock()
+_lag_state = {'checked_at': 0.0, 'lag': None}
+
+
+def replica_alias():
+    """Configured replica alias, or None"""
+    alias = getattr(settings, 'REPLICA_DATABASE_ALIAS', 'replica')
+    return alias if alias and alias in connections else None
+
+
+def pin_key(user_id):
+    return f'db:pinned:{user_id}'
+
+
+def pin_user(user_id):
+    """Keep this user's reporting reads on the primary for REPLICA_STICKY_SECONDS"""
+    timeout = getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+    if user_id and timeout:
+        cache.set(pin_key(user_id), True, timeout)
+
+
+def replica_lag(alias):
+    """
+    Replication lag in seconds (cached per process), or None when the
+    replica cannot be queried.
+    """
+    interval = getattr(settings, 'REPLICA_LAG_CHECK_SECONDS', 5)
+    now = time.monotonic()
+    with _lag_lock:
+        if _lag_state['checked_at'] and now - _lag_state['checked_at'] < interval:
+            return _lag_state['lag']
+        _lag_state['checked_at'] = now
+
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute(_LAG_SQL)
+            lag = float(cursor.fetchone()[0])
+    except Exception as e:
+        logger.warning(f"⚠️ Replica '{alias}' unavailable, reading from primary: {e}")
+        lag = None
+
+    with _lag_lock:
+        _lag_state['lag'] = lag
+    return lag
+
+
+class _ReplicaScope:
+    def __init__(self, user_id):
+        self.user_id = user_id
+        self.wrote = False
+        self.alias = None
+
+    def resolve(self):
+        """Alias reads in this scope should use"""
+        if self.wrote or (_request_writes.get() or [False])[0]:
+            return DEFAULT_DB_ALIAS
+        if self.alias is None:
+            self.alias = self._choose()
+        return self.alias
+
+    def _choose(self):
+        alias = replica_alias()
+        if alias is None:
+            return DEFAULT_DB_ALIAS
+        if self.user_id and cache.get(pin_key(self.user_id)):
+            return DEFAULT_DB_ALIAS
+        lag = replica_lag(alias)
+        if lag is None:
+            return DEFAULT_DB_ALIAS
+        if lag > getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 30):
+            logger.warning(f"⚠️ Replica '{alias}' is {lag:.1f}s behind, reading from primary")
+            return DEFAULT_DB_ALIAS
+        return alias
+
+
+class _ReplicaContext:
+    def __init__(self, user=None):
+        self.user_id = getattr(user, 'pk', None) if getattr(user, 'is_authenticated', False) else None
+        self._tokens = []
+
+    def __enter__(self):
+        self._tokens.append(_replica_scope.set(_ReplicaScope(self.user_id)))
+        return self
+
+    def __exit__(self, *exc_info):
+        _replica_scope.reset(self._tokens.pop())
+
+
+def _find_request(args):
+    # view functions get (request, ...), view methods (self, request, ...)
+    for arg in args[:2]:
+        if hasattr(arg, 'method') and hasattr(arg, 'user'):
+            return arg
+    return None
+
+
+def read_only_replica(func=None, *, user=None):
+    """
+    Route reads to the replica, as a view decorator (the request user is
+    used for read-your-writes) or a context manager.
+    """
+    if func is None:
+        return _ReplicaContext(user)
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        request = _find_request(args)
+        with _ReplicaContext(getattr(request, 'user', None)):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """``DATABASE_ROUTERS`` entry: replica reads only inside ``read_only_replica``"""
+
+    def db_for_read(self, model, **hints):
+        scope = _replica_scope.get()
+        if scope is None:
+            return None
+        return scope.resolve()
+
+    def db_for_write(self, model, **hints):
+        scope = _replica_scope.get()
+        if scope is not None:
+            scope.wrote = True
+        writes = _request_writes.get()
+        if writes is not None:
+            writes[0] = True
+        # Explicit, so instances loaded from the replica are saved to the primary
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db != DEFAULT_DB_ALIAS and db == replica_alias():
+            return False
+        return None
+
+
+class ReplicaPinningMiddleware:
+    """
+    Pin a user to the primary for a short while after an unsafe-method
+    request that wrote (GETs that bump counters do not count).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        writes = [False]
+        token = _request_writes.set(writes)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_writes.reset(token)
+        if writes[0] and request.method not in ('GET', 'HEAD', 'OPTIONS') and replica_alias():
+            user = getattr(request, 'user', None)
+            if getattr(user, 'is_authenticated', False):
+                pin_user(user.pk)
+        return response
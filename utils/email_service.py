@@ -1,15 +1,20 @@
 # utils/email_service.py
 import logging
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 
+from notification.email_outbox import enqueue_template_email
+from notification.models import OutboundEmail
+
 logger = logging.getLogger(__name__)
 
 
 class EmailService:
-    """Service for sending HTML emails with templates"""
+    """
+    Service for sending HTML emails with templates.
+    Messages are queued in the email outbox and delivered by the
+    process_email_outbox worker, so callers never wait on SMTP.
+    """
     
     @staticmethod
     def send_email(
@@ -18,10 +23,11 @@ class EmailService:
         template_name,
         context,
         from_email=None,
-        reply_to=None
+        reply_to=None,
+        priority=OutboundEmail.PRIORITY_NORMAL
     ):
         """
-        Send HTML email using template
+        Queue HTML email using template
         
         Args:
             subject: Email subject
@@ -30,38 +36,25 @@ class EmailService:
             context: Template context dictionary
             from_email: Sender email (defaults to DEFAULT_FROM_EMAIL)
             reply_to: Reply-to email address
+            priority: OutboundEmail.PRIORITY_OTP for time-critical mail
         
         Returns:
-            bool: True if sent successfully, False otherwise
+            bool: True if queued successfully, False otherwise
         """
         try:
-            # Get from email from settings if not provided
-            if from_email is None:
-                from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'noreply@pola.co.tz')
-            
-            # Render HTML content
-            html_content = render_to_string(template_name, context)
-            
-            # Create email
-            email = EmailMultiAlternatives(
+            enqueue_template_email(
+                to_email=to_email,
                 subject=subject,
-                body='',  # Plain text will be set if needed
+                template_name=template_name,
+                context=context,
                 from_email=from_email,
-                to=[to_email],
-                reply_to=[reply_to] if reply_to else None
+                reply_to=reply_to,
+                priority=priority
             )
-            
-            # Attach HTML content
-            email.attach_alternative(html_content, 'text/html')
-            
-            # Send email
-            email.send()
-            
-            logger.info(f"✅ Email sent to {to_email}: {subject}")
             return True
             
         except Exception as e:
-            logger.error(f"❌ Failed to send email to {to_email}: {str(e)}")
+            logger.error(f"❌ Failed to queue email to {to_email}: {str(e)}")
             return False
     
     @staticmethod
@@ -75,7 +68,7 @@ class EmailService:
             expiry_minutes: OTP expiry time in minutes
         
         Returns:
-            bool: True if sent successfully
+            bool: True if queued successfully
         """
         context = {
             'otp_code': otp_code,
@@ -88,7 +81,8 @@ class EmailService:
             subject=f'Your Verification Code - {context["app_name"]}',
             to_email=to_email,
             template_name='emails/otp_verification.html',
-            context=context
+            context=context,
+            priority=OutboundEmail.PRIORITY_OTP
         )
     
     @staticmethod
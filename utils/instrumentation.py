@@ -0,0 +1,396 @@
+"""
+Request Instrumentation
+
+``InstrumentationMiddleware`` wraps every database connection with
+``execute_wrapper`` for the duration of a request and records how many SQL
+statements ran and how long they took:
+
+    - ``Server-Timing: db;dur=..;desc="N queries", app;dur=.., total;dur=..``
+      on every response (browser dev tools / the mobile HTTP inspector show it)
+    - statements repeated ``INSTRUMENTATION_N_PLUS_ONE_THRESHOLD`` times or more
+      with the same shape (literals and IN-lists stripped) are logged as a
+      suspected N+1
+    - requests slower than ``INSTRUMENTATION_SLOW_REQUEST_MS`` are logged with
+      their slowest statements
+
+Per-endpoint (URL name + method) latency and query-count histograms are kept
+in process and published to the default cache every
+``INSTRUMENTATION_FLUSH_SECONDS``. ``GET /api/v1/admin/metrics/`` merges the
+snapshots of every worker that shares that cache into one Prometheus text
+exposition (histograms plus estimated p50/p95/p99). The merge needs a shared
+cache (CACHE_URL): with a per-process cache each worker would only report its
+own requests and counters would jump between scrapes, so the endpoint answers
+503 instead.
+"""
+
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import AuthenticationFailed
+
+from utils.versioned_cache import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+QUANTILES = (0.5, 0.95, 0.99)
+
+MAX_RECORDED_QUERIES = 2000
+WORKER_ID = f'{socket.gethostname()}:{os.getpid()}'
+CACHE_PREFIX = 'instrumentation'
+REGISTRY_KEY = f'{CACHE_PREFIX}:workers'
+
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST_RE = re.compile(r'\bIN \((?:[^()]*?)\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def normalize_sql(sql):
+    """Statement shape: literals and IN-lists stripped, whitespace collapsed"""
+    sql = _LITERAL_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` callable collecting per-request SQL timings"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []  # (duration, sql), capped
+        self.shapes = {}   # normalized sql -> count
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            if len(self.queries) < MAX_RECORDED_QUERIES:
+                self.queries.append((elapsed, sql))
+                shape = normalize_sql(sql)
+                self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def duplicates(self, threshold):
+        """[(count, shape)] for statements repeated at least ``threshold`` times"""
+        repeated = [(count, shape) for shape, count in self.shapes.items() if count >= threshold]
+        return sorted(repeated, reverse=True)
+
+    def slowest(self, limit=5):
+        return sorted(self.queries, key=lambda query: query[0], reverse=True)[:limit]
+
+
+# ---------------------------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------------------------
+
+def _empty_stats():
+    return {
+        'count': 0,
+        'errors': 0,
+        'duration_sum': 0.0,
+        'db_sum': 0.0,
+        'queries_sum': 0,
+        'slow': 0,
+        'n_plus_one': 0,
+        'latency_buckets': [0] * (len(LATENCY_BUCKETS) + 1),
+        'query_buckets': [0] * (len(QUERY_BUCKETS) + 1),
+    }
+
+
+def _bucket_index(bounds, value):
+    for index, bound in enumerate(bounds):
+        if value <= bound:
+            return index
+    return len(bounds)
+
+
+class EndpointMetrics:
+    """Per-process histograms keyed by (endpoint, method)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._last_flush = 0.0
+
+    def record(self, endpoint, method, status_code, duration, recorder, slow, n_plus_one):
+        with self._lock:
+            stats = self._stats.setdefault(f'{method} {endpoint}', _empty_stats())
+            stats['count'] += 1
+            stats['errors'] += status_code >= 500
+            stats['duration_sum'] += duration
+            stats['db_sum'] += recorder.duration
+            stats['queries_sum'] += recorder.count
+            stats['slow'] += slow
+            stats['n_plus_one'] += n_plus_one
+            stats['latency_buckets'][_bucket_index(LATENCY_BUCKETS, duration)] += 1
+            stats['query_buckets'][_bucket_index(QUERY_BUCKETS, recorder.count)] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                key: {**stats, 'latency_buckets': list(stats['latency_buckets']),
+                      'query_buckets': list(stats['query_buckets'])}
+                for key, stats in self._stats.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._last_flush = 0.0
+
+    def maybe_flush(self):
+        """Publish this worker's snapshot to the shared cache (rate limited)"""
+        interval = _setting('INSTRUMENTATION_FLUSH_SECONDS', 10)
+        now = time.monotonic()
+        if now - self._last_flush < interval:
+            return
+        self._last_flush = now
+        self.flush(interval)
+
+    def flush(self, interval=10):
+        ttl = max(60, interval * 6)
+        try:
+            cache.set(f'{CACHE_PREFIX}:{WORKER_ID}', self.snapshot(), ttl)
+            workers = cache.get(REGISTRY_KEY) or {}
+            cutoff = time.time() - ttl
+            workers = {worker: seen for worker, seen in workers.items() if seen >= cutoff}
+            workers[WORKER_ID] = time.time()
+            cache.set(REGISTRY_KEY, workers, None)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not publish request metrics: {e}")
+
+
+metrics = EndpointMetrics()
+
+
+def _merge(into, stats):
+    for key in ('count', 'errors', 'duration_sum', 'db_sum', 'queries_sum', 'slow', 'n_plus_one'):
+        into[key] += stats[key]
+    for key in ('latency_buckets', 'query_buckets'):
+        into[key] = [a + b for a, b in zip(into[key], stats[key])]
+
+
+def collect_metrics():
+    """
+    Merge every live worker's published snapshot (and this worker's current one).
+    Only workers that share the default cache are visible.
+
+    Returns:
+        dict: {'METHOD endpoint': stats}
+    """
+    snapshots = {WORKER_ID: metrics.snapshot()}
+    for worker in (cache.get(REGISTRY_KEY) or {}):
+        if worker != WORKER_ID:
+            snapshot = cache.get(f'{CACHE_PREFIX}:{worker}')
+            if snapshot:
+                snapshots[worker] = snapshot
+
+    merged = {}
+    for snapshot in snapshots.values():
+        for key, stats in snapshot.items():
+            _merge(merged.setdefault(key, _empty_stats()), stats)
+    return merged
+
+
+def estimate_quantile(bounds, buckets, quantile):
+    """Linear interpolation inside the bucket holding ``quantile`` (like histogram_quantile)"""
+    total = sum(buckets)
+    if not total:
+        return 0.0
+    rank = quantile * total
+    cumulative, lower = 0, 0.0
+    for index, count in enumerate(buckets):
+        upper = bounds[index] if index < len(bounds) else bounds[-1]
+        if count and cumulative + count >= rank:
+            return lower + (upper - lower) * (rank - cumulative) / count
+        cumulative += count
+        lower = upper
+    return float(bounds[-1])
+
+
+# ---------------------------------------------------------------------------
+# Prometheus exposition
+# ---------------------------------------------------------------------------
+
+def _labels(**labels):
+    escaped = (
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in labels.items()
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _histogram(lines, name, bounds, buckets, total_sum, **labels):
+    cumulative = 0
+    for bound, count in zip(bounds, buckets):
+        cumulative += count
+        lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+    lines.append(f'{name}_bucket{_labels(**labels, le="+Inf")} {sum(buckets)}')
+    lines.append(f'{name}_sum{_labels(**labels)} {total_sum}')
+    lines.append(f'{name}_count{_labels(**labels)} {sum(buckets)}')
+
+
+def render_prometheus(merged):
+    """Prometheus text format (version 0.0.4) for the merged endpoint stats"""
+    families = {
+        'pola_http_requests_total': ('counter', 'Requests handled'),
+        'pola_http_request_errors_total': ('counter', 'Requests that returned a 5xx'),
+        'pola_http_slow_requests_total': ('counter', 'Requests over INSTRUMENTATION_SLOW_REQUEST_MS'),
+        'pola_http_n_plus_one_requests_total': ('counter', 'Requests with a repeated query shape (suspected N+1)'),
+        'pola_http_request_db_seconds_total': ('counter', 'Time spent in SQL'),
+        'pola_http_request_duration_seconds': ('histogram', 'Request latency'),
+        'pola_http_request_queries': ('histogram', 'SQL statements per request'),
+        'pola_http_request_duration_quantile_seconds': ('gauge', 'Estimated latency quantiles'),
+        'pola_http_request_queries_quantile': ('gauge', 'Estimated SQL statements per request quantiles'),
+    }
+    rows = sorted(merged.items())
+    lines = []
+    for family, (kind, help_text) in families.items():
+        lines.append(f'# HELP {family} {help_text}')
+        lines.append(f'# TYPE {family} {kind}')
+        for key, stats in rows:
+            method, endpoint = key.split(' ', 1)
+            labels = {'endpoint': endpoint, 'method': method}
+            if family == 'pola_http_requests_total':
+                lines.append(f'{family}{_labels(**labels)} {stats["count"]}')
+            elif family == 'pola_http_request_errors_total':
+                lines.append(f'{family}{_labels(**labels)} {stats["errors"]}')
+            elif family == 'pola_http_slow_requests_total':
+                lines.append(f'{family}{_labels(**labels)} {stats["slow"]}')
+            elif family == 'pola_http_n_plus_one_requests_total':
+                lines.append(f'{family}{_labels(**labels)} {stats["n_plus_one"]}')
+            elif family == 'pola_http_request_db_seconds_total':
+                lines.append(f'{family}{_labels(**labels)} {round(stats["db_sum"], 6)}')
+            elif family == 'pola_http_request_duration_seconds':
+                _histogram(lines, family, LATENCY_BUCKETS, stats['latency_buckets'],
+                           round(stats['duration_sum'], 6), **labels)
+            elif family == 'pola_http_request_queries':
+                _histogram(lines, family, QUERY_BUCKETS, stats['query_buckets'], stats['queries_sum'], **labels)
+            else:
+                latency = family == 'pola_http_request_duration_quantile_seconds'
+                bounds = LATENCY_BUCKETS if latency else QUERY_BUCKETS
+                buckets = stats['latency_buckets'] if latency else stats['query_buckets']
+                for quantile in QUANTILES:
+                    value = estimate_quantile(bounds, buckets, quantile)
+                    lines.append(f'{family}{_labels(**labels, quantile=quantile)} {round(value, 6)}')
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _endpoint(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unmatched'
+
+
+class InstrumentationMiddleware:
+    """
+    Time requests and their SQL. Place first in MIDDLEWARE so the total
+    covers every other middleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _setting('INSTRUMENTATION_ENABLED', True):
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration = time.perf_counter() - started
+
+        if _setting('INSTRUMENTATION_SERVER_TIMING', True):
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+                f'app;dur={(duration - recorder.duration) * 1000:.1f}, '
+                f'total;dur={duration * 1000:.1f}'
+            )
+
+        endpoint = _endpoint(request)
+        duplicates = recorder.duplicates(_setting('INSTRUMENTATION_N_PLUS_ONE_THRESHOLD', 10))
+        slow = duration * 1000 >= _setting('INSTRUMENTATION_SLOW_REQUEST_MS', 500)
+        if duplicates:
+            count, shape = duplicates[0]
+            logger.warning(
+                f"🔁 Suspected N+1 on {request.method} {request.path} ({endpoint}): "
+                f"{count}x {shape[:300]}"
+            )
+        if slow:
+            top = '\n'.join(
+                f'    {elapsed * 1000:8.1f} ms  {sql[:300]}' for elapsed, sql in recorder.slowest()
+            )
+            logger.warning(
+                f"🐢 Slow request {request.method} {request.path} ({endpoint}) -> {response.status_code}: "
+                f"{duration * 1000:.0f} ms total, {recorder.duration * 1000:.0f} ms in {recorder.count} queries\n{top}"
+            )
+
+        metrics.record(endpoint, request.method, response.status_code, duration, recorder, slow, bool(duplicates))
+        metrics.maybe_flush()
+        return response
+
+
+# ---------------------------------------------------------------------------
+# Metrics endpoint
+# ---------------------------------------------------------------------------
+
+def _is_authorized(request):
+    token = _setting('METRICS_TOKEN', '')
+    if token and request.META.get('HTTP_AUTHORIZATION') == f'Bearer {token}':
+        return True
+    from authentication.principal import PrincipalJWTAuthentication
+
+    try:
+        result = PrincipalJWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return False
+    principal = getattr(request, 'principal', None)
+    return bool(result and principal and principal.is_admin)
+
+
+@require_safe
+def metrics_view(request):
+    """
+    GET /api/v1/admin/metrics/
+
+    Staff JWT, or ``Authorization: Bearer <METRICS_TOKEN>`` for a Prometheus
+    scraper. 503 unless the default cache is shared between workers.
+    """
+    if not _is_authorized(request):
+        return HttpResponseForbidden('Admin access required')
+    if not cache_is_shared():
+        return HttpResponse(
+            'Metrics need a shared cache (CACHE_URL); each worker only sees its own requests',
+            status=503, content_type='text/plain; charset=utf-8',
+        )
+    return HttpResponse(
+        render_prometheus(collect_metrics()),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,49 @@
+"""
+Management command to verify database connectivity and connection reuse at start-up
+Usage: python manage.py probe_database [--retries 10] [--delay 2]
+
+Exits non-zero when the default database cannot be reached, fails its health
+check, or (with DB_CONN_MAX_AGE > 0) does not keep its connection across a
+request boundary. The production image runs it before starting gunicorn
+(Dockerfile CMD, events service in docker-compose.prod.yml):
+
+    python manage.py probe_database --retries 15 && exec gunicorn pola_settings.wsgi:application
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.db_connections import probe_databases
+
+
+class Command(BaseCommand):
+    help = 'Check each database alias: connect time, query, health check and persistent-connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retries', type=int, default=1, help='Attempts before giving up (database still starting)')
+        parser.add_argument('--delay', type=float, default=2.0, help='Seconds between attempts')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"🔄 Probing databases (pooler mode: {getattr(settings, 'DB_POOLER_MODE', 'none')})...")
+        for attempt in range(1, options['retries'] + 1):
+            healthy, results = probe_databases()
+            if healthy or attempt == options['retries']:
+                break
+            self.stdout.write(f"  attempt {attempt} failed: {results['default']['error']}; retrying in {options['delay']}s")
+            time.sleep(options['delay'])
+
+        for alias, result in results.items():
+            reuse = {True: 'reused', False: 'not reused', None: 'reuse not checked'}[result['reused']]
+            line = (
+                f"  {alias:<10} connect {result['connect_ms']} ms, query {result['query_ms']} ms, "
+                f"CONN_MAX_AGE={result['conn_max_age']}, health checks={result['health_checks']}, {reuse}"
+            )
+            if result['ok']:
+                self.stdout.write(self.style.SUCCESS(f"✅{line}"))
+            else:
+                self.stdout.write(self.style.ERROR(f"❌{line}: {result['error']}"))
+
+        if not healthy:
+            raise CommandError(f"Default database probe failed: {results['default']['error']}")
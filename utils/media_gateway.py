@@ -0,0 +1,295 @@
+"""
+Media Download Gateway
+
+Learning materials, generated documents and verification documents are not
+served from the public ``/media/`` location. Their storage URLs point at a
+short-lived signed link (``/api/v1/media/download/<token>/``) that is only
+handed out after the API has checked entitlement (subscription, purchase or
+ownership).
+
+Serving a signed link:
+    - Behind nginx (``MEDIA_ACCEL_REDIRECT_PREFIX`` set) Django returns an empty
+      response with ``X-Accel-Redirect`` and nginx streams the file from an
+      ``internal`` location, including Range/resume and ETag handling.
+    - Without nginx (local development) the file is streamed by Django with
+      single-range ``Range``/``If-Range`` and ``ETag``/``If-None-Match`` support.
+
+Download counters are bumped with ``F()`` updates on a background thread after
+the request's transaction commits (``record_download``).
+"""
+
+import logging
+import mimetypes
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core import signing
+from django.core.files.storage import FileSystemStorage
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden,
+    HttpResponseNotModified, StreamingHttpResponse,
+)
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import content_disposition_header, http_date, parse_etags, quote_etag
+from django.views.decorators.http import require_safe
+
+logger = logging.getLogger(__name__)
+
+SIGNING_SALT = 'pola.media-gateway'
+CHUNK_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+# ----------------------------------------------------------------------
+# Signed links
+# ----------------------------------------------------------------------
+
+def is_protected(name):
+    """True if the stored file lives under a protected media prefix"""
+    return any(name.startswith(prefix) for prefix in getattr(settings, 'PROTECTED_MEDIA_PREFIXES', []))
+
+
+def sign_media_name(name, ttl=None):
+    """
+    Sign a storage name. Expiry is rounded up to a ``ttl`` window so the same
+    file yields the same link for a while (keeps API responses cacheable);
+    a link stays valid for between ``ttl`` and ``2 * ttl`` seconds.
+    """
+    ttl = ttl or getattr(settings, 'MEDIA_SIGNED_URL_TTL', 3600)
+    expires = (int(time.time()) // ttl + 2) * ttl
+    return signing.dumps({'n': name, 'e': expires}, salt=SIGNING_SALT, compress=True)
+
+
+def unsign_media_name(token):
+    """
+    Returns:
+        tuple: (name or None, expired: bool)
+    """
+    try:
+        payload = signing.loads(token, salt=SIGNING_SALT)
+    except signing.BadSignature:
+        return None, False
+    return payload['n'], payload['e'] < time.time()
+
+
+def signed_media_url(name, ttl=None):
+    """Relative gateway URL for a protected storage name"""
+    return reverse('protected-media-download', args=[sign_media_name(name, ttl)])
+
+
+class ProtectedMediaStorage(FileSystemStorage):
+    """
+    FileSystemStorage whose ``url()`` returns signed gateway links for
+    protected prefixes, so every serializer/admin that calls ``.url`` hands
+    out expiring links instead of public paths.
+    """
+
+    def url(self, name):
+        if name and is_protected(name):
+            return signed_media_url(name)
+        return super().url(name)
+
+
+def download_link(request, file_field, filename=None):
+    """
+    Response payload for an authorized download request
+
+    Returns:
+        dict: download_url, filename, file_size, expires_in
+    """
+    return {
+        'download_url': request.build_absolute_uri(file_field.url),
+        'filename': filename or os.path.basename(file_field.name),
+        'file_size': file_field.size,
+        'expires_in': getattr(settings, 'MEDIA_SIGNED_URL_TTL', 3600),
+    }
+
+
+# ----------------------------------------------------------------------
+# Serving
+# ----------------------------------------------------------------------
+
+def _file_etag(stat):
+    """nginx-style ETag (mtime-size in hex) so both serving paths agree"""
+    return quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the file (416)"""
+
+
+def _parse_range(header, size):
+    """
+    Parse a single ``bytes=`` range.
+
+    Returns:
+        tuple: (start, end) inclusive, or None when the header should be
+               ignored and the full file sent (malformed, or several ranges,
+               which are not supported - RFC 9110 section 14.2)
+
+    Raises:
+        RangeNotSatisfiable: the range starts past the end of the file
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    end = min(int(last), size - 1) if last else size - 1
+    return start, end
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as handle:
+        handle.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = handle.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def serve_media_file(request, name, filename=None, as_attachment=True):
+    """Stream a stored file via nginx X-Accel-Redirect or directly from Django"""
+    filename = filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    disposition = content_disposition_header(as_attachment, filename)
+
+    accel_prefix = getattr(settings, 'MEDIA_ACCEL_REDIRECT_PREFIX', '')
+    if accel_prefix:
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{quote(name)}"
+        response['Content-Disposition'] = disposition
+        return response
+
+    path = os.path.join(settings.MEDIA_ROOT, name)
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise Http404('File not found')
+
+    etag = _file_etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+        'Cache-Control': 'private, max-age=0, must-revalidate',
+    }
+
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match and etag in parse_etags(if_none_match):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    range_header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = _parse_range(range_header, stat.st_size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    else:
+        byte_range = None
+
+    if byte_range is not None:
+        start, end = byte_range
+        length = end - start + 1
+        response = StreamingHttpResponse(_iter_range(path, start, length), status=206, content_type=content_type)
+        response['Content-Length'] = str(length)
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    else:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+
+    response['Content-Disposition'] = disposition
+    for header, value in headers.items():
+        response[header] = value
+    return response
+
+
+@require_safe
+def protected_media_download(request, token):
+    """
+    GET /api/v1/media/download/<token>/
+
+    The token is the authorization: it is only issued after an entitlement
+    check and expires after MEDIA_SIGNED_URL_TTL.
+    """
+    name, expired = unsign_media_name(token)
+    if name is None or not is_protected(name):
+        raise Http404('File not found')
+    if expired:
+        return HttpResponseForbidden('Download link expired')
+    return serve_media_file(request, name)
+
+
+# ----------------------------------------------------------------------
+# Download counters
+# ----------------------------------------------------------------------
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='download-counters')
+        return _executor
+
+
+def _increment(model, pk, count_field, timestamp_field):
+    updates = {count_field: F(count_field) + 1}
+    if timestamp_field:
+        updates[timestamp_field] = timezone.now()
+    model.objects.filter(pk=pk).update(**updates)
+
+
+def _increment_in_background(*args):
+    try:
+        _increment(*args)
+    except Exception as e:
+        logger.error(f"❌ Failed to record download: {e}")
+    finally:
+        close_old_connections()
+
+
+def record_download(instance, count_field='download_count', timestamp_field=None):
+    """
+    Bump a download counter with an ``F()`` update.
+
+    With DOWNLOAD_COUNTERS_ASYNC the update runs on a background thread once
+    the current transaction commits, so the download path never waits on a
+    row lock.
+    """
+    args = (type(instance), instance.pk, count_field, timestamp_field)
+    if not getattr(settings, 'DOWNLOAD_COUNTERS_ASYNC', True):
+        _increment(*args)
+        return
+    transaction.on_commit(lambda: _get_executor().submit(_increment_in_background, *args))
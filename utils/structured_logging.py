@@ -0,0 +1,211 @@
+"""
+Structured, Non-blocking Logging
+
+Building blocks wired up in ``settings.LOGGING``:
+
+    - ``QueueingHandler``: hands records to a ``QueueListener`` thread that owns
+      the real (console/file) handlers, so request threads never wait on I/O
+    - ``JSONFormatter``: one JSON object per line, including ``extra=`` fields
+    - ``RequestIdFilter`` / ``RequestIdMiddleware``: every record carries the
+      request id (``X-Request-ID`` from the proxy, or a generated one), which is
+      echoed back on the response
+    - ``SampledFilter``: caps DEBUG/INFO lines per message template per second
+      on chatty loggers (per-device / per-professional lines); warnings and
+      errors always pass
+
+Hot paths should log with %-style arguments (``logger.debug('x=%s', x)``) so
+records dropped by level or sampling are never formatted.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+request_id_var = contextvars.ContextVar('request_id', default='-')
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_REQUEST_ID_RE = re.compile(r'^[A-Za-z0-9._:-]{1,64}$')
+
+# Attributes every LogRecord has; anything else came from ``extra=``
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def get_request_id():
+    return request_id_var.get()
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp ``record.request_id`` (runs on the calling thread)"""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id'):
+            record.request_id = request_id_var.get()
+        return True
+
+
+class RequestIdMiddleware:
+    """
+    Bind a request id for the duration of the request. Place first in
+    MIDDLEWARE so every later log line carries it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        request_id = incoming if _REQUEST_ID_RE.match(incoming) else uuid.uuid4().hex
+        request.request_id = request_id
+        token = request_id_var.set(request_id)
+        try:
+            response = self.get_response(request)
+        finally:
+            request_id_var.reset(token)
+        response[REQUEST_ID_HEADER] = request_id
+        return response
+
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'request_id': getattr(record, 'request_id', '-'),
+            'module': record.module,
+            'line': record.lineno,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SampledFilter(logging.Filter):
+    """
+    Let through at most ``burst`` records per message template per
+    ``per_seconds`` window, then a ``rate`` fraction of the rest. Only
+    records below ``level`` are sampled.
+
+    The first record of a new window carries ``record.suppressed`` (how many
+    were dropped in the previous one).
+    """
+
+    def __init__(self, burst=20, per_seconds=1.0, rate=0.0, level='WARNING'):
+        super().__init__()
+        self.burst = int(burst)
+        self.per_seconds = float(per_seconds)
+        self.rate = float(rate)
+        self.level = logging._checkLevel(level)
+        self._lock = threading.Lock()
+        self._windows = {}  # (logger, template) -> [window_start, passed, suppressed]
+
+    def filter(self, record):
+        if record.levelno >= self.level:
+            return True
+
+        now = time.monotonic()
+        key = (record.name, record.msg if isinstance(record.msg, str) else type(record.msg))
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.per_seconds:
+                if window and window[2]:
+                    record.suppressed = window[2]
+                if len(self._windows) > 10000:
+                    self._windows.clear()
+                self._windows[key] = [now, 1, 0]
+                return True
+            if window[1] < self.burst or (self.rate and random.random() < self.rate):
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+def _handler_by_name(name):
+    lookup = getattr(logging, 'getHandlerByName', None)  # Python 3.12+
+    return lookup(name) if lookup else logging._handlers.get(name)
+
+
+class QueueingHandler(QueueHandler):
+    """
+    Enqueue records for the named ``handlers``, which a background
+    ``QueueListener`` writes out. The listener starts on first use (and again
+    in a forked worker) and is drained at exit.
+    """
+
+    def __init__(self, handlers=(), maxsize=10000):
+        super().__init__(queue.Queue(maxsize))
+        self.handler_names = list(handlers)
+        # Named handlers are only weakly referenced by logging; hold them here.
+        # dictConfig builds handlers in name order, so targets named before
+        # this one already exist; the rest are resolved on first emit.
+        self.targets = {name: _handler_by_name(name) for name in self.handler_names}
+        self.dropped = 0
+        self._listener = None
+        self._listener_pid = None
+        self._start_lock = threading.Lock()
+        atexit.register(self.stop)
+
+    def _ensure_listener(self):
+        if self._listener is not None and self._listener_pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._listener is not None and self._listener_pid == os.getpid():
+                return
+            for name, handler in self.targets.items():
+                self.targets[name] = handler or _handler_by_name(name)
+            targets = [handler for handler in self.targets.values() if handler]
+            self._listener = QueueListener(self.queue, *targets, respect_handler_level=True)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+
+    def stop(self):
+        """Flush queued records and stop the listener thread"""
+        if self._listener is not None and self._listener_pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+
+    def prepare(self, record):
+        # Merge args on this thread (they may be mutated later) but leave the
+        # formatting (JSON / verbose) to the listener's handlers.
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def emit(self, record):
+        self._ensure_listener()
+        super().emit(record)
+
+    def close(self):
+        self.stop()
+        super().close()
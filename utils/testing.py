@@ -0,0 +1,28 @@
+"""
+Shared test helpers
+
+    user = create_test_user('reader@test.com', 'Legal', 'Reader')
+    admin = create_test_admin('ops@test.com')
+
+Both create active accounts that agreed to the terms, with TEST_PASSWORD.
+"""
+
+from django.contrib.auth import get_user_model
+
+TEST_PASSWORD = 'pass123'
+
+
+def create_test_user(email, first_name='Test', last_name='User', **extra):
+    """Regular user"""
+    return get_user_model().objects.create_user(
+        email=email, password=TEST_PASSWORD, first_name=first_name, last_name=last_name,
+        agreed_to_Terms=True, **extra
+    )
+
+
+def create_test_admin(email, first_name='Admin', last_name='User', **extra):
+    """Superuser (staff)"""
+    return get_user_model().objects.create_superuser(
+        email=email, password=TEST_PASSWORD, first_name=first_name, last_name=last_name,
+        agreed_to_Terms=True, **extra
+    )
@@ -0,0 +1,210 @@
+import io
+import json
+import logging
+import shutil
+import tempfile
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.db import connections
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authentication.models import PolaUser
+from subscriptions.models import SubscriptionPlan
+from utils.db_connections import probe_databases
+from utils.db_routing import pin_user, read_only_replica
+from utils.instrumentation import metrics, normalize_sql
+from utils.structured_logging import JSONFormatter, QueueingHandler, RequestIdFilter, SampledFilter, request_id_var
+from utils.testing import create_test_admin, create_test_user
+
+
+class DatabaseConnectionTestCase(TestCase):
+    """Test suite for the database connection probe"""
+
+    def test_probe_and_health_endpoint(self):
+        healthy, results = probe_databases()
+        self.assertTrue(healthy)
+        self.assertEqual(results['default']['conn_max_age'], settings.DATABASES['default']['CONN_MAX_AGE'])
+        self.assertTrue(results['default']['health_checks'])
+        self.assertIsNotNone(results['default']['query_ms'])
+
+        response = self.client.get('/api/health/', {'db': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['databases'], {'default': 'ok'})
+
+    @override_settings(DB_POOLER_MODE='transaction')
+    def test_transaction_pooler_requires_client_side_cursors(self):
+        healthy, results = probe_databases()
+        self.assertFalse(healthy)
+        self.assertIn('DISABLE_SERVER_SIDE_CURSORS', results['default']['error'])
+
+        with self.assertLogs('pola_settings.urls', 'WARNING') as logs:
+            response = self.client.get('/api/health/', {'db': 1})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['databases'], {'default': 'fail'})
+        self.assertNotIn('CURSORS', response.content.decode())
+        self.assertIn('DISABLE_SERVER_SIDE_CURSORS', logs.output[0])
+
+
+class StructuredLoggingTestCase(TestCase):
+    """Test suite for request ids, sampling and queued JSON logging"""
+
+    def test_request_id_is_echoed_or_generated(self):
+        response = self.client.get('/api/health/', HTTP_X_REQUEST_ID='edge-42')
+        self.assertEqual(response['X-Request-ID'], 'edge-42')
+
+        response = self.client.get('/api/health/', HTTP_X_REQUEST_ID='bad id\n')
+        self.assertRegex(response['X-Request-ID'], r'^[0-9a-f]{32}$')
+
+    def test_sampling_and_queued_json_output(self):
+        stream = io.StringIO()
+        target = logging.StreamHandler(stream)
+        target.set_name('test_structured_target')
+        target.setFormatter(JSONFormatter())
+        handler = QueueingHandler(handlers=['test_structured_target'])
+        handler.addFilter(RequestIdFilter())
+
+        log = logging.getLogger('utils.tests.structured')
+        log.propagate = False
+        log.setLevel(logging.DEBUG)
+        log.addHandler(handler)
+        log.addFilter(SampledFilter(burst=3, per_seconds=60))
+        token = request_id_var.set('req-1')
+        try:
+            for device_id in range(10):
+                log.debug('sent to device %s', device_id)
+            log.warning('no devices for user %s', 7, extra={'user_id': 7})
+        finally:
+            request_id_var.reset(token)
+            handler.close()
+            log.removeHandler(handler)
+            log.filters.clear()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([r['message'] for r in records][:3], ['sent to device 0', 'sent to device 1', 'sent to device 2'])
+        self.assertEqual(len(records), 4)
+        self.assertEqual(records[-1]['level'], 'WARNING')
+        self.assertEqual(records[-1]['user_id'], 7)
+        self.assertTrue(all(r['request_id'] == 'req-1' for r in records))
+
+
+class RequestInstrumentationTestCase(TestCase):
+    """Test suite for the instrumentation middleware and metrics endpoint"""
+
+    def setUp(self):
+        metrics.reset()
+        self.admin = create_test_admin('ops@example.com', 'Ops', 'Admin')
+        self.user = create_test_user('member@example.com', 'Mem', 'Ber')
+
+    def test_server_timing_and_query_logging(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (1, 2, 3) AND name = 'x'"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ?',
+        )
+        with override_settings(INSTRUMENTATION_SLOW_REQUEST_MS=0, INSTRUMENTATION_N_PLUS_ONE_THRESHOLD=1):
+            with self.assertLogs('utils.instrumentation', 'WARNING') as logs:
+                response = self.client.get('/api/v1/lookups/regions/')
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+, total;dur=')
+        output = '\n'.join(logs.output)
+        self.assertIn('Suspected N+1 on GET /api/v1/lookups/regions/', output)
+        self.assertIn('Slow request GET /api/v1/lookups/regions/', output)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        self.client.get('/api/v1/lookups/regions/')
+        self.client.get('/api/v1/lookups/regions/')
+
+        self.assertEqual(self.client.get('/api/v1/admin/metrics/').status_code, 403)
+        member = f'Bearer {AccessToken.for_user(self.user)}'
+        self.assertEqual(self.client.get('/api/v1/admin/metrics/', HTTP_AUTHORIZATION=member).status_code, 403)
+
+        # A per-process cache cannot merge workers, so the endpoint refuses
+        admin = f'Bearer {AccessToken.for_user(self.admin)}'
+        self.assertEqual(self.client.get('/api/v1/admin/metrics/', HTTP_AUTHORIZATION=admin).status_code, 503)
+
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir, ignore_errors=True)
+        shared = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': cache_dir,
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+        response = self.client.get('/api/v1/admin/metrics/', HTTP_AUTHORIZATION=admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE pola_http_request_duration_seconds histogram', body)
+        self.assertIn('pola_http_requests_total{endpoint="lookups:regions",method="GET"} 2', body)
+        self.assertIn(
+            'pola_http_request_duration_quantile_seconds{endpoint="lookups:regions",method="GET",quantile="0.95"}',
+            body,
+        )
+
+        with override_settings(METRICS_TOKEN='scrape-secret'):
+            response = self.client.get('/api/v1/admin/metrics/', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+
+
+class ReplicaRoutingTestCase(TestCase):
+    """Test suite for read-replica routing of reporting reads"""
+
+    def setUp(self):
+        # Stand-in replica alias pointing at the test database; routing
+        # decisions are checked through QuerySet.db without querying it.
+        # override_settings(DATABASES=...) does not reach the connection
+        # handler, so its settings are patched (and restored) directly.
+        replica = mock.patch.dict(connections.settings, {'replica': dict(connections['default'].settings_dict)})
+        replica.start()
+        self.addCleanup(replica.stop)
+        self.addCleanup(self._drop_replica_connection)
+        lag = mock.patch('utils.db_routing.replica_lag', return_value=0.5)
+        self.replica_lag = lag.start()
+        self.addCleanup(lag.stop)
+        self.admin = create_test_admin('reports@example.com', 'Re', 'Ports')
+
+    def _drop_replica_connection(self):
+        if hasattr(connections._connections, 'replica'):
+            connections['replica'].close()
+            del connections['replica']
+
+    def test_reads_route_to_replica_only_when_fresh(self):
+        self.assertEqual(PolaUser.objects.all().db, 'default')
+        with read_only_replica():
+            self.assertEqual(PolaUser.objects.all().db, 'replica')
+
+        self.replica_lag.return_value = 120
+        with read_only_replica():
+            self.assertEqual(PolaUser.objects.all().db, 'default')
+        self.replica_lag.return_value = None
+        with read_only_replica():
+            self.assertEqual(PolaUser.objects.all().db, 'default')
+
+    def test_read_your_writes(self):
+        with read_only_replica(user=self.admin):
+            self.assertEqual(PolaUser.objects.all().db, 'replica')
+            SubscriptionPlan.objects.create(
+                plan_type='monthly', name='Monthly', name_sw='Mwezi', description='M', description_sw='M',
+                price=Decimal('1000'), duration_days=30,
+            )
+            self.assertEqual(PolaUser.objects.all().db, 'default')
+
+        pin_user(self.admin.pk)
+        with read_only_replica(user=self.admin):
+            self.assertEqual(PolaUser.objects.all().db, 'default')
+        with read_only_replica():
+            self.assertEqual(PolaUser.objects.all().db, 'replica')
+
+    def test_analytics_dashboard_falls_back_to_primary(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        self.replica_lag.return_value = None  # replica unreachable
+        response = client.get('/api/v1/admin/analytics/dashboard/')
+        self.assertEqual(response.status_code, 200)
+
+        # Healthy replica: the view's reads are sent there (the test runner blocks the alias)
+        self.replica_lag.return_value = 0.5
+        with self.assertRaisesMessage(AssertionError, "to 'replica' are not allowed"):
+            client.get('/api/v1/admin/analytics/dashboard/')
@@ -0,0 +1,93 @@
+"""
+Versioned cache for derived, read-mostly data (catalog trees, lookup bundles)
+
+A short version token lives in the shared cache. Writers call ``bump()`` (usually
+from a post_save signal) and every process rebuilds on its next read. The built
+blob is stored under ``<namespace>:data:<version>`` and memoised in-process so a
+hit costs a single cache GET for the version token.
+
+Bumps only reach other processes through a shared cache (CACHE_URL). With a
+per-process cache (LocMem) entries live at most LOCAL_CACHE_TIMEOUT seconds, so
+another worker's bump is picked up shortly instead of after ``timeout``.
+"""
+
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+PROCESS_LOCAL_BACKENDS = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+LOCAL_CACHE_TIMEOUT = 10
+
+
+def cache_is_shared():
+    """False when the default cache lives inside each process (LocMem, dummy)"""
+    return settings.CACHES.get('default', {}).get('BACKEND') not in PROCESS_LOCAL_BACKENDS
+
+
+class VersionedCache:
+    """
+    Usage:
+        catalog_cache = VersionedCache('legal_ed_catalog', timeout=300)
+        version, data = catalog_cache.get_or_build(build_catalog)
+        catalog_cache.bump()  # after any write that affects the data
+    """
+
+    def __init__(self, namespace, timeout=300):
+        self.namespace = namespace
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._local = (None, None)
+
+    @property
+    def timeout(self):
+        """Entry lifetime; short for per-process caches that never see other workers' bumps"""
+        if cache_is_shared():
+            return self._timeout
+        return min(self._timeout, LOCAL_CACHE_TIMEOUT)
+
+    @property
+    def version_key(self):
+        return f'{self.namespace}:version'
+
+    def data_key(self, version):
+        return f'{self.namespace}:data:{version}'
+
+    def version(self):
+        """Current version token (created on first use)"""
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex[:12], self.timeout)
+            version = cache.get(self.version_key)
+        return version
+
+    def bump(self):
+        """Invalidate after the current transaction commits"""
+        transaction.on_commit(self.bump_now)
+
+    def bump_now(self):
+        cache.set(self.version_key, uuid.uuid4().hex[:12], self.timeout)
+        self._local = (None, None)
+
+    def get_or_build(self, builder):
+        """
+        Returns:
+            tuple: (version, data)
+        """
+        version = self.version()
+        local_version, local_data = self._local
+        if local_version == version:
+            return version, local_data
+
+        with self._lock:
+            data = cache.get(self.data_key(version))
+            if data is None:
+                data = builder()
+                cache.set(self.data_key(version), data, self.timeout)
+            self._local = (version, data)
+        return version, data